@@ -3,7 +3,12 @@ from sqlalchemy.orm import Session
 
 from app.deps import get_current_user, get_db
 from app.models import User
-from app.schemas.gemini import AIAnalysisStatsResponse, ConnectionTestResponse
+from app.schemas.gemini import (
+    AIAnalysisCacheStatsResponse,
+    AIAnalysisStatsResponse,
+    ConnectionTestResponse,
+)
+from app.services.ai_analysis_cache_service import AIAnalysisCacheService
 from app.services.gemini_service import GeminiService
 from app.services.record_service import RecordService
 from app.services.user_config_service import UserConfigService
@@ -35,6 +40,26 @@ async def get_profile(
         )
 
 
+@router.get("/cache-stats", response_model=AIAnalysisCacheStatsResponse)
+async def get_cache_stats(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Get AI analysis cache statistics:
+    - Cached analyses count
+    - Cumulative cache hits and misses
+    - Hit rate
+    """
+    try:
+        return AIAnalysisCacheService(db).get_stats()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get cache stats: {str(e)}",
+        )
+
+
 @router.post("/test-connection", response_model=ConnectionTestResponse)
 async def test_connection(
     current_user: User = Depends(get_current_user),
@@ -2,12 +2,13 @@ import json
 import logging
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from app.deps import get_current_user, get_db, get_redis_client
 from app.schemas import LeetCodeConnectionTestOut
 from app.schemas.user import UserOut
-from app.services.leetcode_service import LeetCodeService
+from app.services.leetcode_async_graphql_service import AsyncLeetCodeGraphQLService
 from app.services.user_config_service import UserConfigService
 
 logger = logging.getLogger(__name__)
@@ -16,23 +17,27 @@ router = APIRouter(prefix="/api/leetcode", tags=["LeetCode"])
 
 
 @router.get("/test-connection", response_model=LeetCodeConnectionTestOut)
-def test_connection(
+async def test_connection(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
     """Test LeetCode connection with detailed diagnostics"""
+    # Database and Redis calls are blocking, run them off the event loop
     user_config_service = UserConfigService(db)
-    user_config = user_config_service.get(current_user.id)
+    user_config = await run_in_threadpool(user_config_service.get, current_user.id)
     leetcode_config = (
         user_config.leetcode_config
         if user_config and user_config.leetcode_config
         else None
     )
-    if not leetcode_config:
+    if not leetcode_config or not leetcode_config.session_cookie:
         raise HTTPException(status_code=400, detail="LeetCode not connected")
 
-    leetcode_service = LeetCodeService(leetcode_config)
-    if leetcode_service.test_connection():
+    async with AsyncLeetCodeGraphQLService(
+        str(leetcode_config.session_cookie)
+    ) as leetcode_service:
+        connected = await leetcode_service.test_connection()
+    if connected:
         return LeetCodeConnectionTestOut(
             status="success", message="LeetCode connected successfully"
         )
@@ -41,25 +46,27 @@ def test_connection(
 
 
 @router.get("/profile")
-def get_leetcode_profile(
+async def get_leetcode_profile(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
     redis_client=Depends(get_redis_client),
 ):
     """Get current user's LeetCode profile, with Redis cache (5min)"""
     cache_key = f"leetcode:profile:{current_user.id}"
-    cached = redis_client.get(cache_key)
+    cached = await run_in_threadpool(redis_client.get, cache_key)
     if cached:
         try:
             return json.loads(cached)
         except Exception as e:
             logger.warning(f"Failed to decode cached leetcode profile: {e}")
     user_config_service = UserConfigService(db)
-    config = user_config_service.get(current_user.id)
-    if not config:
+    config = await run_in_threadpool(user_config_service.get, current_user.id)
+    if not config or not config.leetcode_config:
         raise HTTPException(status_code=400, detail="LeetCode not connected")
-    leetcode_service = LeetCodeService(config.leetcode_config)
-    profile = leetcode_service.get_user_profile()
+    async with AsyncLeetCodeGraphQLService(
+        str(config.leetcode_config.session_cookie)
+    ) as leetcode_service:
+        profile = await leetcode_service.get_user_profile()
     if not profile:
         raise HTTPException(status_code=400, detail="Failed to fetch LeetCode profile")
     result = {
@@ -70,7 +77,7 @@ def get_leetcode_profile(
         "ranking": profile.get("ranking"),
     }
     try:
-        redis_client.setex(cache_key, 300, json.dumps(result))
+        await run_in_threadpool(redis_client.setex, cache_key, 300, json.dumps(result))
     except Exception as e:
         logger.warning(f"Failed to cache leetcode profile: {e}")
     return result
@@ -1,11 +1,27 @@
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app.deps import get_db
-from app.models import Record, SyncStatus, SyncTaskType
-from app.schemas import SyncTaskCreate, SyncTaskListOut, SyncTaskOut, SyncTaskStatsOut
+from app.models import SyncStatus, SyncTaskType
+from app.schemas import (
+    PipelineProgressOut,
+    SyncTaskCreate,
+    SyncTaskListOut,
+    SyncTaskOut,
+    SyncTaskStatsOut,
+)
+from app.services.review_service import ReviewService
+from app.services.sync_task_event_service import (
+    sync_task_event_stream,
+    task_event,
+    task_events_channel,
+    user_events_channel,
+)
+from app.services.sync_task_item_service import SyncTaskItemService
 from app.services.sync_task_service import SyncTaskService
 from app.tasks import TaskManager
 from app.utils.logger import get_logger
@@ -14,6 +30,25 @@ logger = get_logger(__name__)
 
 router = APIRouter(prefix="/api/sync_task", tags=["sync_task"])
 
+# Keep proxies such as nginx from buffering the event stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _task_out(
+    task, item_counts: Optional[dict] = None, include_record_ids: bool = True
+) -> SyncTaskOut:
+    """SyncTaskOut with per-item progress, optionally without the record id array."""
+    data = {
+        name: getattr(task, name)
+        for name in SyncTaskOut.model_fields
+        if name not in ("record_ids", "item_counts")
+    }
+    return SyncTaskOut(
+        **data,
+        record_ids=task.record_ids if include_record_ids else None,
+        item_counts=item_counts,
+    )
+
 
 @router.post("/", response_model=SyncTaskOut, status_code=status.HTTP_201_CREATED)
 async def create_sync_task(
@@ -35,6 +70,10 @@ async def create_sync_task(
             create_kwargs["total_records"] = task_data.total_records
         elif task_data.record_ids:
             create_kwargs["total_records"] = len(task_data.record_ids)
+        if task_data.full_analysis:
+            create_kwargs["full_analysis"] = True
+        if task_data.pipeline and task_data.type == "leetcode_batch_sync":
+            create_kwargs["pipeline"] = True
         sync_task = sync_task_service.create(**create_kwargs)
 
         task_manager = TaskManager()
@@ -68,8 +107,6 @@ async def list_sync_tasks(
     created_at_end: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    from datetime import datetime
-
     sync_task_service = SyncTaskService(db)
 
     # Parse date filters
@@ -97,34 +134,29 @@ async def list_sync_tasks(
     if id is not None:
         task = sync_task_service.get(id)
         if task and task.user_id == user_id:
-            return SyncTaskListOut(total=1, items=[SyncTaskOut.from_orm(task)])
+            item_counts = SyncTaskItemService(db).counts([task.id])
+            return SyncTaskListOut(
+                total=1,
+                items=[_task_out(task, item_counts.get(task.id), False)],
+            )
         else:
             return SyncTaskListOut(total=0, items=[])
 
-    # Get filtered tasks
-    tasks = sync_task_service.list(
+    filters = dict(
         user_id=user_id,
         type=type,
         status=status,
-        limit=limit,
-        offset=actual_offset,
         created_after=created_after,
         created_before=created_before,
     )
-
-    # Get total count without pagination (use a large limit)
-    total_tasks = sync_task_service.list(
-        user_id=user_id,
-        type=type,
-        status=status,
-        limit=10000,  # Large limit to get all tasks for count
-        offset=0,
-        created_after=created_after,
-        created_before=created_before,
+    tasks = sync_task_service.list(
+        limit=limit, offset=actual_offset, include_record_ids=False, **filters
     )
+    item_counts = SyncTaskItemService(db).counts([task.id for task in tasks])
 
     return SyncTaskListOut(
-        total=len(total_tasks), items=[SyncTaskOut.from_orm(task) for task in tasks]
+        total=sync_task_service.count(**filters),
+        items=[_task_out(task, item_counts.get(task.id), False) for task in tasks],
     )
 
 
@@ -138,8 +170,6 @@ async def get_sync_task_stats(
     db: Session = Depends(get_db),
 ):
     """Get sync task statistics with optional filters."""
-    from datetime import datetime
-
     sync_task_service = SyncTaskService(db)
 
     # Parse date filters
@@ -160,37 +190,37 @@ async def get_sync_task_stats(
         except ValueError:
             pass
 
-    # If filtering by specific ID, get only that task
+    # If filtering by specific ID, count only that task
     if id is not None:
-        task = sync_task_service.get(id)
-        if task and task.user_id == user_id:
-            tasks = [task]
-        else:
-            tasks = []
+        stats = sync_task_service.stats(user_id=user_id, task_id=id)
     else:
-        # Get all tasks matching filters (with large limit to get all)
-        tasks = sync_task_service.list(
+        stats = sync_task_service.stats(
             user_id=user_id,
             type=type,
-            limit=10000,  # Large limit to get all tasks for stats
-            offset=0,
             created_after=created_after,
             created_before=created_before,
         )
 
-    # Calculate statistics
-    stats = {
-        "total": len(tasks),
-        "pending": len([t for t in tasks if t.status == "pending"]),
-        "running": len([t for t in tasks if t.status == "running"]),
-        "completed": len([t for t in tasks if t.status == "completed"]),
-        "failed": len([t for t in tasks if t.status == "failed"]),
-        "paused": len([t for t in tasks if t.status == "paused"]),
-    }
-
     return SyncTaskStatsOut(**stats)
 
 
+@router.get("/events")
+async def stream_sync_task_events(
+    request: Request, user_id: int = 1, db: Session = Depends(get_db)
+):
+    """
+    Server-Sent Events with the progress of all of the user's sync tasks.
+
+    Starts with the tasks that are still active, then sends every update.
+    """
+    snapshot = [task_event(task) for task in SyncTaskService(db).active(user_id)]
+    return StreamingResponse(
+        sync_task_event_stream(request, [user_events_channel(user_id)], snapshot),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 @router.get("/{task_id}", response_model=SyncTaskOut)
 async def get_sync_task(task_id: int, user_id: int = 1, db: Session = Depends(get_db)):
     sync_task_service = SyncTaskService(db)
@@ -201,7 +231,52 @@ async def get_sync_task(task_id: int, user_id: int = 1, db: Session = Depends(ge
             status_code=status.HTTP_404_NOT_FOUND, detail="Sync task not found"
         )
 
-    return SyncTaskOut.from_orm(task)
+    return _task_out(task, SyncTaskItemService(db).counts([task.id]).get(task.id))
+
+
+@router.get("/{task_id}/pipeline", response_model=PipelineProgressOut)
+async def get_pipeline_progress(
+    task_id: int, user_id: int = 1, db: Session = Depends(get_db)
+):
+    """Per-stage progress of the tasks a pipelined batch sync has dispatched."""
+    sync_task_service = SyncTaskService(db)
+    task = sync_task_service.get(task_id)
+
+    if not task or task.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Sync task not found"
+        )
+
+    return PipelineProgressOut(
+        task_id=task.id,
+        status=task.status,
+        ingested_records=task.synced_records or 0,
+        stages=sync_task_service.pipeline_progress(task_id),
+    )
+
+
+@router.get("/{task_id}/events")
+async def stream_task_events(
+    task_id: int, request: Request, user_id: int = 1, db: Session = Depends(get_db)
+):
+    """Server-Sent Events with the progress of one task, until it completes or fails."""
+    task = SyncTaskService(db).get(task_id)
+
+    if not task or task.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Sync task not found"
+        )
+
+    return StreamingResponse(
+        sync_task_event_stream(
+            request,
+            [task_events_channel(task_id)],
+            [task_event(task)],
+            close_on_terminal=True,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -240,7 +315,15 @@ async def pause_sync_task(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Task cannot be paused"
         )
-    sync_task_service.update(task_id, status=SyncStatus.PAUSED.value)
+    # A running task checks the status between pages and stops at its
+    # checkpoint; its worker sets paused_at once it has stopped
+    sync_task_service.update(
+        task_id,
+        status=SyncStatus.PAUSED.value,
+        paused_at=(
+            None if task.status == SyncStatus.RUNNING.value else datetime.utcnow()
+        ),
+    )
     return SyncTaskOut.from_orm(sync_task_service.get(task_id))
 
 
@@ -258,7 +341,16 @@ async def resume_sync_task(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Task is not paused"
         )
-    sync_task_service.update(task_id, status=SyncStatus.PENDING.value)
+    # Two runs would advance the same checkpoint
+    if not sync_task_service.has_stopped(task):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task is still stopping, try again shortly",
+        )
+    # The checkpoint is kept so the task continues after the last committed page
+    sync_task_service.update(
+        task_id, status=SyncStatus.PENDING.value, resumed_at=datetime.utcnow()
+    )
     task_manager = TaskManager()
     task_manager.start_sync_task(sync_task_service.get(task_id))
     return SyncTaskOut.from_orm(sync_task_service.get(task_id))
@@ -278,9 +370,31 @@ async def retry_sync_task(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Task cannot be retried"
         )
+    if task.status == SyncStatus.PAUSED.value and not sync_task_service.has_stopped(
+        task
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Task is still stopping, try again shortly",
+        )
+    # Tasks tracking items only re-run their failed and unfinished items,
+    # after a backoff growing with the attempts already made
+    item_service = SyncTaskItemService(db)
+    countdown = None
+    if item_service.has_items(task_id):
+        if task.status == SyncStatus.FAILED.value:
+            item_service.release(task_id, "Interrupted")
+            db.commit()
+        counts = item_service.counts([task_id]).get(task_id, {})
+        countdown = item_service.retry_delay(task_id)
+        if countdown is None and not counts.get(SyncStatus.PENDING.value):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No failed items left to retry",
+            )
     sync_task_service.update(task_id, status=SyncStatus.PENDING.value)
     task_manager = TaskManager()
-    task_manager.start_sync_task(sync_task_service.get(task_id))
+    task_manager.start_sync_task(sync_task_service.get(task_id), countdown=countdown)
     return SyncTaskOut.from_orm(sync_task_service.get(task_id))
 
 
@@ -288,7 +402,10 @@ async def retry_sync_task(
 async def get_review_candidates(
     task_id: int, user_id: int = 1, db: Session = Depends(get_db)
 ):
-    """Get records that need review from a completed sync task and auto-generate reviews for failed submissions."""
+    """
+    Failed submissions of a completed sync task, with the review created for
+    each. The reviews are created by the post-sync review generation step.
+    """
     sync_task_service = SyncTaskService(db)
     task = sync_task_service.get(task_id)
 
@@ -306,21 +423,11 @@ async def get_review_candidates(
     if not task.record_ids:
         return {"task_id": task_id, "candidates": []}
 
-    candidates = []
-    for record_id in task.record_ids:
-        record = db.query(Record).filter(Record.id == record_id).first()
-        if record and record.execution_result != "Accepted":
-            candidates.append(
-                {
-                    "record_id": record.id,
-                    "problem_id": record.problem_id,
-                    "title": record.problem.title if record.problem else "Unknown",
-                    "execution_result": record.execution_result,
-                    "submitted_at": (
-                        record.submit_time.isoformat() if record.submit_time else None
-                    ),
-                    "language": record.language,
-                }
-            )
-
-    return {"task_id": task_id, "candidates": candidates}
+    candidates = ReviewService(db).review_candidates(task.user_id, task.record_ids)
+    return {
+        "task_id": task_id,
+        "candidates": [
+            {k: v for k, v in candidate.items() if k != "record"}
+            for candidate in candidates
+        ],
+    }
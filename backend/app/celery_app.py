@@ -23,4 +23,25 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+if settings.LEETCODE_INCREMENTAL_SYNC_ENABLED:
+    celery_app.conf.beat_schedule["leetcode-incremental-sync"] = {
+        "task": "app.tasks.leetcode_incremental_sync.schedule_leetcode_incremental_sync",
+        "schedule": timedelta(
+            minutes=settings.LEETCODE_INCREMENTAL_SYNC_INTERVAL_MINUTES
+        ),
+        "args": (),
+        "options": {"queue": "leetcode_sync_queue"},
+    }
+
+if settings.SYNC_SCHEDULER_ENABLED:
+    celery_app.conf.beat_schedule["dispatch-sync-queues"] = {
+        "task": "app.tasks.sync_scheduling.dispatch_sync_queues",
+        "schedule": timedelta(
+            seconds=settings.SYNC_SCHEDULER_RECONCILE_INTERVAL_SECONDS
+        ),
+        "args": (),
+        # Workers only consume the named queues, not the default one
+        "options": {"queue": "notification_queue"},
+    }
+
 celery_app.autodiscover_tasks(["app.tasks"])
@@ -67,6 +67,20 @@ class Settings(BaseSettings):
     GITHUB_CLIENT_ID: str = "your-github-client-id"
     GITHUB_CLIENT_SECRET: str = "your-github-client-secret"
     GITHUB_REDIRECT_URI: str = "http://localhost:8000/api/github/callback"
+    GITHUB_API_BASE_URL: str = "https://api.github.com"  # Override the GitHub endpoint
+    GITHUB_TREE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # Cached remote file SHAs
+    GITHUB_MAX_FILES_PER_COMMIT: int = 200  # Changed files per commit
+    GITHUB_MAX_BYTES_PER_COMMIT: int = 5 * 1024 * 1024  # Content bytes per commit
+    GITHUB_BLOB_CONCURRENCY: int = 4  # Parallel blob uploads per commit
+    GITHUB_SECONDS_BETWEEN_WRITES: float = 0.25  # PyGithub spacing of write calls
+    GITHUB_PUSH_LOCK_TIMEOUT_SECONDS: int = 600  # Per-user push lock across workers
+    GITHUB_PUSH_LOCK_RETRY_SECONDS: int = 60  # Requeue delay after a lock timeout
+    GITHUB_PUSH_LOCK_MAX_RETRIES: int = 5  # Lock timeouts before the task fails
+    GITHUB_GIT_BASE_URL: str = "https://github.com"  # Remote used by mirror mode
+    GIT_MIRROR_ROOT: str = "/app/data/git-mirrors"  # Bare mirrors, one per user/repo
+    GIT_COMMAND_TIMEOUT_SECONDS: int = 600
+    GIT_COMMITTER_NAME: str = "AlgoAssistant"
+    GIT_COMMITTER_EMAIL: str = "noreply@algoassistant.com"
 
     # Google OAuth
     GOOGLE_CLIENT_ID: str = "your-google-client-id"
@@ -76,15 +90,73 @@ class Settings(BaseSettings):
     # LeetCode Integration
     LEETCODE_SESSION_COOKIE: str = "your-leetcode-session-cookie"
     LEETCODE_CSRF_TOKEN: str = "your-leetcode-csrf-token"
+    LEETCODE_REQUEST_TIMEOUT: float = 30.0
+    LEETCODE_MAX_RETRIES: int = 3
+    LEETCODE_RETRY_BACKOFF: float = 1.0  # Base delay in seconds, doubled per retry
+    LEETCODE_MAX_CONNECTIONS: int = 10
+    LEETCODE_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    LEETCODE_DETAIL_BATCH_SIZE: int = 20  # Aliased submissionDetails per request
+    LEETCODE_DETAIL_SYNC_CHUNK_SIZE: int = 200  # Records loaded/updated per query
+    LEETCODE_CSRF_CACHE_TTL: int = 43200  # 12 hours
+    LEETCODE_SERVICE_POOL_SIZE: int = 32  # Initialised clients kept per worker
+    LEETCODE_INCREMENTAL_SYNC_ENABLED: bool = True
+    LEETCODE_INCREMENTAL_SYNC_INTERVAL_MINUTES: int = 60
+    SYNC_SHARD_SIZE: int = 250  # Gemini/Notion records per worker shard; 0 disables
+    SYNC_SHARD_COUNTER_TTL_SECONDS: int = 7 * 24 * 3600  # Redis shard progress
+    SYNC_ITEM_CLAIM_BATCH_SIZE: int = 500  # Items claimed per UPDATE
+    SYNC_ITEM_MAX_ATTEMPTS: int = 5  # Failed items are not retried beyond this
+    SYNC_ITEM_RETRY_BACKOFF_BASE: float = 30.0  # Seconds, doubled per attempt
+    SYNC_ITEM_RETRY_BACKOFF_MAX: float = 3600.0
+    SYNC_EVENTS_HEARTBEAT_SECONDS: float = 15.0  # SSE keep-alive comment interval
+    SYNC_EVENTS_RETRY_MILLISECONDS: int = 5000  # EventSource reconnect delay
+    SYNC_PAUSE_ACK_TIMEOUT_SECONDS: int = 600  # A paused run silent this long is dead
+    REVIEW_CANDIDATES_AFTER_SYNC: bool = True  # Create reviews once a sync completes
+    REVIEW_CANDIDATE_CHUNK_SIZE: int = 500  # Record ids per candidate query
+    SYNC_SCHEDULER_ENABLED: bool = True  # Per-user fair dispatch onto the queues
+    SYNC_SCHEDULER_QUEUE_SLOTS: int = 2  # In flight per queue: workers + reserved
+    SYNC_SCHEDULER_INTERACTIVE_RESERVED_SLOTS: int = 1  # Kept free of bulk tasks
+    SYNC_SCHEDULER_INTERACTIVE_MAX_RECORDS: int = 50  # Larger tasks are bulk
+    SYNC_SCHEDULER_USER_CONCURRENCY: int = 1  # Bulk tasks in flight per user/queue
+    SYNC_SCHEDULER_USER_INTERACTIVE_CONCURRENCY: int = 1
+    SYNC_SCHEDULER_LOCK_TIMEOUT_SECONDS: int = 10
+    SYNC_SCHEDULER_RECONCILE_INTERVAL_SECONDS: int = 60  # Frees slots of lost tasks
+    SYNC_SCHEDULER_SLOT_LEASE_SECONDS: int = 4 * 3600  # Slots are taken back after
 
     # Notion Integration
     NOTION_CLIENT_ID: str = "your-notion-client-id"
     NOTION_CLIENT_SECRET: str = "your-notion-client-secret"
     NOTION_REDIRECT_URI: str = "http://localhost:8000/api/notion/callback"
+    NOTION_API_BASE_URL: Optional[str] = None  # Override the Notion endpoint
+    NOTION_REQUESTS_PER_SECOND: int = 3  # Per integration token, per worker process
+    NOTION_MAX_RETRIES: int = 3  # Retries on rate limit (429) errors
+    NOTION_RATE_LIMIT_BACKOFF_BASE: float = 1.0  # Seconds, doubled per 429
+    NOTION_RATE_LIMIT_BACKOFF_MAX: float = 30.0
+    NOTION_SYNC_CONCURRENCY: int = 3  # Pages created concurrently per sync task
+    NOTION_COMMIT_BATCH_SIZE: int = 20  # Synced records per commit
 
     # Gemini AI Integration
     GEMINI_API_KEY: str = "your-gemini-api-key"
     GEMINI_MODEL: str = "gemini-pro"
+    GEMINI_API_BASE_URL: Optional[str] = None  # Override the Gemini endpoint
+    GEMINI_REQUESTS_PER_MINUTE: int = 15  # Per API key, per worker process
+    GEMINI_TOKENS_PER_MINUTE: int = 1000000  # Per API key, per worker process
+    GEMINI_OUTPUT_TOKEN_ESTIMATE: int = 1024  # Reserved per request before usage
+    GEMINI_MAX_RETRIES: int = 3  # Retries on quota (429) errors
+    GEMINI_QUOTA_BACKOFF_BASE: float = 2.0  # Seconds, doubled per quota error
+    GEMINI_QUOTA_BACKOFF_MAX: float = 60.0
+    GEMINI_SYNC_CONCURRENCY: int = 4  # Concurrent analyses per sync task
+    GEMINI_COMMIT_BATCH_SIZE: int = 20  # Analysed records per commit
+    GEMINI_BATCH_SIZE: int = 5  # Submissions packed into one request; 1 disables
+    GEMINI_MAX_CODE_CHARS: int = 12000  # Longer code is cut in the middle
+    GEMINI_MAX_DESCRIPTION_CHARS: int = 6000  # Markdown description cap
+    GEMINI_TASK_TOKEN_BUDGET: int = 0  # Estimated tokens per sync task; 0 = unlimited
+    LOCAL_ANALYSIS_ENABLED: bool = True  # Try the local static analyzer before Gemini
+    LOCAL_ANALYSIS_MIN_CONFIDENCE: float = 0.8  # Lower confidence escalates to Gemini
+    AI_ANALYSIS_CACHE_MAX_ENTRIES: int = 10000  # LRU-evicted beyond this
+    CODE_SIMILARITY_THRESHOLD: float = 0.95  # Reuse analyses above this similarity
+    CODE_MINHASH_NUM_PERM: int = 128
+    CODE_MINHASH_BANDS: int = 16  # LSH bands; num_perm must be divisible by it
+    CODE_MINHASH_SHINGLE_SIZE: int = 5  # Tokens per shingle
 
     # ================================
     # EMAIL CONFIGURATION
@@ -1,8 +1,14 @@
-from sqlalchemy import create_engine
+from typing import List
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from .config import settings
+from .utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 # Configure engine based on database type
 if settings.DATABASE_URL.startswith("sqlite"):
@@ -31,3 +37,43 @@ else:
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
+
+
+def upgrade_schema(bind: Engine = engine) -> List[str]:
+    """
+    Add the columns and indexes declared on the models that tables created
+    by an older version lack.
+
+    create_all only creates missing tables, so a column added to an existing
+    model would otherwise break every query on an upgraded database. New
+    columns are added as nullable, without their foreign key constraint.
+    Running it again is a no-op. Returns the statements run.
+    """
+    statements = []
+    with bind.begin() as connection:
+        inspector = inspect(connection)
+        existing_tables = set(inspector.get_table_names())
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            preparer = connection.dialect.identifier_preparer
+            for column in table.columns:
+                if column.name in columns:
+                    continue
+                column_type = column.type.compile(dialect=connection.dialect)
+                statement = (
+                    f"ALTER TABLE {preparer.format_table(table)} "
+                    f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                )
+                connection.execute(text(statement))
+                statements.append(statement)
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name in indexes:
+                    continue
+                index.create(bind=connection)
+                statements.append(f"CREATE INDEX {index.name}")
+    for statement in statements:
+        logger.info(f"Schema upgrade: {statement}")
+    return statements
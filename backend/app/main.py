@@ -18,7 +18,7 @@ from app.api import (
     sync_task,
     users,
 )
-from app.database import engine
+from app.database import engine, upgrade_schema
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -27,6 +27,7 @@ logger.info("Starting AlgoAssistant API with detailed logging enabled")
 # Create database tables only in production/development, not in testing
 if not os.getenv("TESTING"):
     models.Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
 
 app = FastAPI(title="AlgoAssistant API", version="1.0.0")
 
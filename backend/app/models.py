@@ -3,7 +3,16 @@ from enum import Enum
 
 from sqlalchemy import JSON, BigInteger, Boolean, Column, DateTime
 from sqlalchemy import Enum as SqlEnum
-from sqlalchemy import Float, ForeignKey, Integer, String, Table, Text, UniqueConstraint
+from sqlalchemy import (
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.schemas.notification import NotificationConfig
@@ -97,11 +106,17 @@ class Record(Base):
     # Additional information
     topic_tags = Column(JSON, nullable=True)  # Array of topic tags
     ai_analysis = Column(JSON, nullable=True)  # Store AI result as JSON
+    ai_input_tokens = Column(Integer, nullable=True)  # Prompt tokens of the analysis
+    ai_output_tokens = Column(Integer, nullable=True)  # Response tokens
+    ai_latency_ms = Column(Integer, nullable=True)  # LLM round trip of the analysis
     notion_url = Column(String(256), nullable=True)  # Notion page link after sync
     notion_sync_status = Column(
         String(32), default=SyncStatus.PENDING.value
     )  # Notion sync status
     notion_page_id = Column(String(100), nullable=True)  # Notion page ID for updates
+    notion_sync_state = Column(
+        JSON, nullable=True
+    )  # Title and per-section hashes/block counts of the synced Notion page
 
     # Timestamps
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -125,6 +140,16 @@ class SyncTask(Base):
     """Model for all synchronization tasks (Git, LeetCode, etc)."""
 
     __tablename__ = "sync_tasks"
+    __table_args__ = (
+        # Listing totals and stats: COUNT/GROUP BY within one user's tasks
+        Index(
+            "ix_sync_tasks_user_status_type_created",
+            "user_id",
+            "status",
+            "type",
+            "created_at",
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -139,6 +164,18 @@ class SyncTask(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     paused_at = Column(DateTime, nullable=True)  # When task was paused
     resumed_at = Column(DateTime, nullable=True)  # When task was resumed
+    checkpoint = Column(
+        JSON, nullable=True
+    )  # Progress of the last committed page: offset, last_submission_id, page
+    full_analysis = Column(
+        Boolean, default=False
+    )  # Gemini sync: skip the local static analysis tier
+    pipeline = Column(
+        Boolean, default=False
+    )  # LeetCode batch sync: hand each committed page to the downstream stages
+    parent_task_id = Column(
+        Integer, ForeignKey("sync_tasks.id"), nullable=True, index=True
+    )  # Pipeline stage tasks point at the batch sync that spawned them
     type = Column(String(32), nullable=False, default=SyncTaskType.GITHUB_SYNC.value)
 
     # Relationships
@@ -147,6 +184,99 @@ class SyncTask(Base):
     )
 
 
+class SyncTaskItem(Base):
+    """Sync state of one record within a sync task."""
+
+    __tablename__ = "sync_task_items"
+    __table_args__ = (
+        UniqueConstraint("task_id", "record_id", name="uq_sync_task_item"),
+        Index("ix_sync_task_items_task_status", "task_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    task_id = Column(
+        Integer, ForeignKey("sync_tasks.id", ondelete="CASCADE"), nullable=False
+    )
+    record_id = Column(Integer, nullable=False, index=True)
+    status = Column(String(20), nullable=False, default=SyncStatus.PENDING.value)
+    attempts = Column(Integer, nullable=False, default=0)  # Claims so far
+    last_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SyncWatermark(Base):
+    """Newest submission already synced per user and source, for incremental sync."""
+
+    __tablename__ = "sync_watermarks"
+    __table_args__ = (
+        UniqueConstraint("user_id", "source", name="uq_sync_watermark_user_source"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    source = Column(String(32), nullable=False, default=OJType.leetcode.value)
+    last_submission_id = Column(BigInteger, nullable=False)
+    last_submit_time = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AIAnalysisCache(Base):
+    """Content-addressed AI analysis results shared by identical submissions."""
+
+    __tablename__ = "ai_analysis_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(
+        String(64), unique=True, index=True, nullable=False
+    )  # sha256 of normalized code, problem, language, model and prompt version
+    model_name = Column(String(100), nullable=False)
+    analysis = Column(JSON, nullable=False)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(
+        DateTime, default=datetime.utcnow, index=True
+    )  # LRU eviction order
+
+
+class CodeSignature(Base):
+    """MinHash signature of a record's code for near-duplicate detection."""
+
+    __tablename__ = "code_signatures"
+
+    id = Column(Integer, primary_key=True, index=True)
+    record_id = Column(
+        Integer, ForeignKey("records.id", ondelete="CASCADE"), unique=True
+    )
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    problem_id = Column(Integer, ForeignKey("problems.id"), nullable=False)
+    signature = Column(JSON, nullable=False)  # List of MinHash values
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CodeLSHBand(Base):
+    """LSH bucket of a code signature, scoped per user and problem."""
+
+    __tablename__ = "code_lsh_bands"
+    __table_args__ = (
+        Index(
+            "ix_code_lsh_bands_lookup",
+            "user_id",
+            "problem_id",
+            "band_index",
+            "band_hash",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    record_id = Column(
+        Integer, ForeignKey("records.id", ondelete="CASCADE"), nullable=False
+    )
+    user_id = Column(Integer, nullable=False)
+    problem_id = Column(Integer, nullable=False)
+    band_index = Column(Integer, nullable=False)
+    band_hash = Column(String(16), nullable=False)
+
+
 record_tag = Table(
     "record_tag",
     Base.metadata,
@@ -215,6 +345,9 @@ class Problem(Base):
     difficulty = Column(String(16), nullable=True)
     tags = Column(JSON, nullable=True)  # e.g. ["array", "dp"]
     description = Column(Text, nullable=True)
+    # Rendered once from description; description_hash tells when it is stale
+    description_markdown = Column(Text, nullable=True)
+    description_hash = Column(String(64), nullable=True)
     url = Column(String(512), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
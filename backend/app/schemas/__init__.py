@@ -1,4 +1,9 @@
-from .gemini import AIAnalysisStatsResponse, ConnectionTestResponse, GeminiConfig
+from .gemini import (
+    AIAnalysisCacheStatsResponse,
+    AIAnalysisStatsResponse,
+    ConnectionTestResponse,
+    GeminiConfig,
+)
 from .github import GitHubConfig, GitHubConnectionTestOut
 from .google import (
     GoogleAuthResponse,
@@ -32,6 +37,8 @@ from .problem import (
     ProblemUpdate,
 )
 from .record import (
+    PipelineProgressOut,
+    PipelineStageOut,
     RecordCreate,
     RecordDeleteResponse,
     RecordDetailOut,
@@ -83,6 +90,7 @@ __all__ = [
     NotionConnectionTestOut,
     GeminiConfig,
     AIAnalysisStatsResponse,
+    AIAnalysisCacheStatsResponse,
     ConnectionTestResponse,
     GoogleConfig,
     GoogleLoginRequest,
@@ -111,6 +119,8 @@ __all__ = [
     GoogleCallbackResponse,
     SyncTaskCreate,
     SyncTaskOut,
+    PipelineProgressOut,
+    PipelineStageOut,
     ProblemCreate,
     ProblemUpdate,
     ProblemOut,
@@ -205,3 +205,18 @@ class GeminiAIAnalysisSchema(BaseModel):
         ..., description="Takeaways or lessons from this solution"
     )
     model_version: str = Field(..., description="Model version used for analysis")
+
+
+class AIAnalysisCacheStatsResponse(BaseModel):
+    """Response model for AI analysis cache statistics."""
+
+    entries: int = Field(..., description="Number of cached analyses.")
+    hits: int = Field(..., description="Analyses served from the cache.")
+    misses: int = Field(..., description="Analyses that required an LLM call.")
+    reused: int = Field(0, description="Records given a near-duplicate's analysis.")
+    deduplicated: int = Field(
+        0, description="Records sharing another record's LLM call in one task."
+    )
+    hit_rate: float = Field(
+        ..., ge=0, le=1, description="hits / (hits + misses), 0 when unused."
+    )
@@ -56,6 +56,15 @@ class GitHubConfig(BaseModel):
         max_length=1000,
         description="GitHub personal access token for authentication. Must have repo scope permissions. Encrypted in storage for security.",
     )
+    sync_mode: str = Field(
+        default="api",
+        pattern="^(api|mirror)$",
+        description="How code is pushed. 'api' commits through the GitHub REST API; 'mirror' commits to a local bare mirror and publishes with a single git push.",
+    )
+    commit_per_day: bool = Field(
+        default=False,
+        description="Mirror mode only: create one commit per submission day, each rendered from commit_message_template, instead of one commit per sync.",
+    )
 
 
 class GitHubSyncRequest(BaseModel):
@@ -193,6 +193,15 @@ class RecordDetailOut(BaseModel):
     ai_analysis: Optional[GeminiAIAnalysisSchema] = Field(
         None, description="The analysis of the solution"
     )
+    ai_input_tokens: Optional[int] = Field(
+        None, description="Prompt tokens spent on the AI analysis"
+    )
+    ai_output_tokens: Optional[int] = Field(
+        None, description="Response tokens spent on the AI analysis"
+    )
+    ai_latency_ms: Optional[int] = Field(
+        None, description="Latency of the AI analysis request in milliseconds"
+    )
     oj_sync_status: SyncStatus = Field(
         ..., description="The status of the OJ synchronization"
     )
@@ -328,6 +337,14 @@ class SyncTaskCreate(BaseModel):
         ge=0,
         description="Total number of records to sync for this task. Used for batch sync tasks.",
     )
+    full_analysis: bool = Field(
+        False,
+        description="For gemini_sync tasks, always run the full LLM analysis instead of accepting confident local static analysis results.",
+    )
+    pipeline: bool = Field(
+        False,
+        description="For leetcode_batch_sync tasks, start detail, Gemini, GitHub and Notion sync for each ingested page as soon as it is committed.",
+    )
 
 
 class SyncTaskQuery(BaseModel):
@@ -396,6 +413,26 @@ class SyncTaskOut(BaseModel):
         ge=0,
         description="Number of records that failed to synchronize. Updated during task execution.",
     )
+    checkpoint: Optional[Dict[str, Any]] = Field(
+        None,
+        description="Progress saved after each committed page (offset, last_submission_id, page). Resume and retry continue from here.",
+    )
+    full_analysis: Optional[bool] = Field(
+        None,
+        description="Whether a gemini_sync task skips the local static analysis tier.",
+    )
+    pipeline: Optional[bool] = Field(
+        None,
+        description="Whether a leetcode_batch_sync task streams each ingested page through the downstream stages.",
+    )
+    parent_task_id: Optional[int] = Field(
+        None,
+        description="For pipeline stage tasks, the leetcode_batch_sync task that spawned them.",
+    )
+    item_counts: Optional[Dict[str, int]] = Field(
+        None,
+        description="Number of records per item status (pending, running, completed, failed) for tasks tracking per-record state.",
+    )
     created_at: datetime = Field(
         ..., description="Task creation timestamp in ISO 8601 format (UTC timezone)."
     )
@@ -408,7 +445,11 @@ class SyncTaskOut(BaseModel):
 
 
 class SyncTaskListOut(BaseModel):
-    """Response schema for sync task list with pagination."""
+    """
+    Response schema for sync task list with pagination.
+
+    Items leave out record_ids; item_counts carries their progress.
+    """
 
     total: int
     items: List[SyncTaskOut]
@@ -423,6 +464,36 @@ class SyncTaskStatsOut(BaseModel):
     completed: int = Field(..., description="Number of completed tasks")
     failed: int = Field(..., description="Number of failed tasks")
     paused: int = Field(..., description="Number of paused tasks")
+    by_type: Dict[str, int] = Field(
+        default_factory=dict, description="Number of tasks per task type"
+    )
+
+
+class PipelineStageOut(BaseModel):
+    """Progress of one stage of a pipelined batch sync."""
+
+    type: str = Field(..., description="Stage task type, e.g. 'gemini_sync'.")
+    tasks: int = Field(..., ge=0, description="Number of stage tasks dispatched")
+    pending: int = Field(..., ge=0, description="Stage tasks not started yet")
+    running: int = Field(..., ge=0, description="Stage tasks currently running")
+    completed: int = Field(..., ge=0, description="Stage tasks completed")
+    failed: int = Field(..., ge=0, description="Stage tasks failed")
+    total_records: int = Field(..., ge=0, description="Records handed to the stage")
+    synced_records: int = Field(..., ge=0, description="Records the stage synced")
+    failed_records: int = Field(
+        ..., ge=0, description="Records the stage failed to sync"
+    )
+
+
+class PipelineProgressOut(BaseModel):
+    """Response schema for per-stage progress of a pipelined batch sync."""
+
+    task_id: int = Field(..., description="The leetcode_batch_sync task")
+    status: str = Field(..., description="Status of the ingestion itself")
+    ingested_records: int = Field(
+        ..., ge=0, description="Records ingested so far by the batch sync"
+    )
+    stages: List[PipelineStageOut]
 
 
 class RecordStatsOut(BaseModel):
@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.deps import get_redis_client
+from app.models import AIAnalysisCache
+from app.schemas.gemini import AIAnalysisCacheStatsResponse
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+METRICS_KEY = "ai_analysis_cache:metrics"
+
+
+class AIAnalysisCacheService:
+    """Service for the content-addressed AI analysis cache."""
+
+    def __init__(self, db: Session, redis_client=None):
+        self.db = db
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = next(get_redis_client())
+        return self._redis_client
+
+    def get_many(self, cache_keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up cached analyses and mark them as recently used.
+
+        Args:
+            cache_keys: Keys produced by GeminiService.analysis_cache_key
+
+        Returns:
+            Mapping of cache key to analysis for every hit
+        """
+        cache_keys = list(set(cache_keys))
+        if not cache_keys:
+            return {}
+        entries = (
+            self.db.query(AIAnalysisCache)
+            .filter(AIAnalysisCache.cache_key.in_(cache_keys))
+            .all()
+        )
+        now = datetime.utcnow()
+        for entry in entries:
+            entry.last_accessed_at = now
+            entry.hit_count = (entry.hit_count or 0) + 1
+        return {entry.cache_key: dict(entry.analysis) for entry in entries}
+
+    def put(self, cache_key: str, model_name: str, analysis: Dict[str, Any]) -> None:
+        """Store an analysis; a concurrent writer of the same key wins silently."""
+        try:
+            with self.db.begin_nested():
+                self.db.add(
+                    AIAnalysisCache(
+                        cache_key=cache_key, model_name=model_name, analysis=analysis
+                    )
+                )
+        except IntegrityError:
+            logger.debug(f"Analysis cache key {cache_key} already stored")
+
+    def evict(self, max_entries: int) -> int:
+        """Delete least recently used entries beyond max_entries."""
+        stale_ids = [
+            entry_id
+            for (entry_id,) in self.db.query(AIAnalysisCache.id)
+            .order_by(
+                AIAnalysisCache.last_accessed_at.desc(), AIAnalysisCache.id.desc()
+            )
+            .offset(max_entries)
+            .all()
+        ]
+        if not stale_ids:
+            return 0
+        self.db.query(AIAnalysisCache).filter(AIAnalysisCache.id.in_(stale_ids)).delete(
+            synchronize_session=False
+        )
+        self.db.commit()
+        logger.info(f"Evicted {len(stale_ids)} AI analysis cache entries")
+        return len(stale_ids)
+
+    def record_lookups(
+        self, hits: int, misses: int, reused: int = 0, deduplicated: int = 0
+    ) -> None:
+        """
+        Accumulate lookup counters; metrics never fail the caller.
+
+        Only cache hits and misses make the hit rate. Records served by a
+        near-duplicate's analysis or sharing another record's LLM call in
+        the same task are counted apart.
+        """
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.hincrby(METRICS_KEY, "hits", hits)
+            pipe.hincrby(METRICS_KEY, "misses", misses)
+            pipe.hincrby(METRICS_KEY, "reused", reused)
+            pipe.hincrby(METRICS_KEY, "deduplicated", deduplicated)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error recording AI analysis cache metrics: {e}")
+
+    def get_stats(self) -> AIAnalysisCacheStatsResponse:
+        """Get cache size and cumulative hit rate."""
+        entries = self.db.query(AIAnalysisCache).count()
+        counters = {"hits": 0, "misses": 0, "reused": 0, "deduplicated": 0}
+        try:
+            metrics: Optional[Dict] = self.redis_client.hgetall(METRICS_KEY)
+            for name in counters if metrics else []:
+                counters[name] = int(metrics.get(name.encode(), metrics.get(name, 0)))
+        except Exception as e:
+            logger.error(f"Error reading AI analysis cache metrics: {e}")
+        total = counters["hits"] + counters["misses"]
+        return AIAnalysisCacheStatsResponse(
+            entries=entries,
+            hit_rate=counters["hits"] / total if total else 0.0,
+            **counters,
+        )
@@ -41,6 +41,10 @@ class BaseRepoService(BaseService[ConfigType]):
         """List all repositories."""
         pass
 
+    def filter_unchanged(self, files: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Drop files whose content already matches the repository."""
+        return files
+
     def get_lastest_commit(self) -> Optional[str]:
         """Get the latest commit of the repository."""
         pass
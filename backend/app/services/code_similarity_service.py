@@ -0,0 +1,190 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import CodeLSHBand, CodeSignature, Record, SyncStatus
+from app.utils.logger import get_logger
+from app.utils.minhash import MinHasher
+
+logger = get_logger(__name__)
+
+_default_hasher: Optional[MinHasher] = None
+
+
+def get_minhasher() -> MinHasher:
+    """Get the process-wide MinHasher configured from settings"""
+    global _default_hasher
+    if _default_hasher is None:
+        _default_hasher = MinHasher(
+            num_perm=settings.CODE_MINHASH_NUM_PERM,
+            bands=settings.CODE_MINHASH_BANDS,
+            shingle_size=settings.CODE_MINHASH_SHINGLE_SIZE,
+        )
+    return _default_hasher
+
+
+class CodeSimilarityService:
+    """Service for the per-user, per-problem MinHash/LSH near-duplicate index."""
+
+    def __init__(self, db: Session, hasher: Optional[MinHasher] = None):
+        self.db = db
+        self.hasher = hasher or get_minhasher()
+
+    def index_code(
+        self, record_id: int, user_id: int, problem_id: int, code: str
+    ) -> List[int]:
+        """Add one record to the index without committing; returns its signature."""
+        signature = self.hasher.signature(code)
+        self.db.add(
+            CodeSignature(
+                record_id=record_id,
+                user_id=user_id,
+                problem_id=problem_id,
+                signature=signature,
+            )
+        )
+        self.db.add_all(
+            CodeLSHBand(
+                record_id=record_id,
+                user_id=user_id,
+                problem_id=problem_id,
+                band_index=band_index,
+                band_hash=band_hash,
+            )
+            for band_index, band_hash in enumerate(self.hasher.band_hashes(signature))
+        )
+        return signature
+
+    def index_records(self, records: Iterable[Record], commit: bool = True) -> int:
+        """Index records that have code and are not indexed yet."""
+        return self.index_codes(
+            (
+                (record.id, record.user_id, record.problem_id, record.code)
+                for record in records
+                if record.code and record.problem_id
+            ),
+            commit=commit,
+        )
+
+    def index_codes(
+        self, entries: Iterable[Tuple[int, int, int, str]], commit: bool = True
+    ) -> int:
+        """
+        Index (record_id, user_id, problem_id, code) entries not indexed yet.
+
+        Indexing is an optimisation: it runs in a savepoint and failures are
+        logged, so they never fail the ingestion that triggered them. With
+        commit=False the rows are only flushed, leaving the commit to the caller.
+        """
+        entries = list(entries)
+        if not entries:
+            return 0
+        try:
+            count = 0
+            with self.db.begin_nested():
+                indexed = {
+                    record_id
+                    for (record_id,) in self.db.query(CodeSignature.record_id).filter(
+                        CodeSignature.record_id.in_([entry[0] for entry in entries])
+                    )
+                }
+                for record_id, user_id, problem_id, code in entries:
+                    if record_id in indexed:
+                        continue
+                    self.index_code(record_id, user_id, problem_id, code)
+                    indexed.add(record_id)
+                    count += 1
+            if count and commit:
+                self.db.commit()
+            return count
+        except Exception as e:
+            logger.exception(f"Failed to index code signatures: {e}")
+            return 0
+
+    def find_similar(
+        self,
+        user_id: int,
+        problem_id: int,
+        signature: List[int],
+        threshold: float,
+        exclude_ids: Iterable[int] = (),
+    ) -> List[Tuple[int, float]]:
+        """
+        Find indexed records of the same user and problem above a similarity.
+
+        Args:
+            user_id: Owner of the submissions
+            problem_id: Problem the submissions solve
+            signature: MinHash signature to compare against
+            threshold: Minimum estimated Jaccard similarity
+            exclude_ids: Record ids to ignore, e.g. the query record itself
+
+        Returns:
+            (record_id, similarity) pairs, most similar first
+        """
+        bands = self.hasher.band_hashes(signature)
+        candidate_ids = {
+            record_id
+            for (record_id,) in self.db.query(CodeLSHBand.record_id)
+            .filter(
+                CodeLSHBand.user_id == user_id,
+                CodeLSHBand.problem_id == problem_id,
+                or_(
+                    *(
+                        and_(
+                            CodeLSHBand.band_index == band_index,
+                            CodeLSHBand.band_hash == band_hash,
+                        )
+                        for band_index, band_hash in enumerate(bands)
+                    )
+                ),
+            )
+            .distinct()
+        } - set(exclude_ids)
+        if not candidate_ids:
+            return []
+        matches = []
+        for record_id, candidate in self.db.query(
+            CodeSignature.record_id, CodeSignature.signature
+        ).filter(CodeSignature.record_id.in_(candidate_ids)):
+            similarity = self.hasher.similarity(signature, candidate)
+            if similarity >= threshold:
+                matches.append((record_id, similarity))
+        return sorted(matches, key=lambda match: match[1], reverse=True)
+
+    def find_reusable_analysis(
+        self, record: Record, threshold: Optional[float] = None
+    ) -> Optional[Tuple[int, float, Dict[str, Any]]]:
+        """
+        Find the analysis of a near-duplicate submission that can be reused.
+
+        Returns:
+            (record_id, similarity, analysis) of the best match, or None
+        """
+        if not record.code or not record.problem_id:
+            return None
+        threshold = (
+            threshold if threshold is not None else settings.CODE_SIMILARITY_THRESHOLD
+        )
+        signature = self.hasher.signature(record.code)
+        matches = self.find_similar(
+            record.user_id, record.problem_id, signature, threshold, [record.id]
+        )
+        if not matches:
+            return None
+        similarities = dict(matches)
+        analysed = (
+            self.db.query(Record.id, Record.ai_analysis)
+            .filter(
+                Record.id.in_(similarities),
+                Record.ai_sync_status == SyncStatus.COMPLETED.value,
+            )
+            .all()
+        )
+        analysed = [row for row in analysed if row.ai_analysis]
+        if not analysed:
+            return None
+        record_id, analysis = max(analysed, key=lambda row: similarities[row[0]])
+        return record_id, similarities[record_id], dict(analysis)
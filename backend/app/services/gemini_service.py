@@ -1,25 +1,86 @@
+import hashlib
 import json
-from typing import Any
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from google import genai
+from google.genai import errors, types
 
+from app.config import settings
 from app.schemas.gemini import GeminiAIAnalysisSchema, GeminiConfig
 from app.services.base_ai_service import BaseAIService
 from app.utils.logger import get_logger
+from app.utils.prompt_compaction import (
+    compact_code,
+    description_to_markdown,
+    estimate_tokens,
+    truncate_middle,
+)
+from app.utils.token_bucket import TokenBucketLimiter, get_token_bucket
 
 logger = get_logger(__name__)
 
+ANALYSIS_INSTRUCTIONS = """Provide a detailed analysis including:
+- summary: Brief overview of the solution's approach
+- solution_types: list of types of the solution, e.g., DFS, DP, Greedy, etc.
+- time_complexity: Time complexity in Big-O notation, e.g., O(n log n)
+- space_complexity: Space complexity in Big-O notation
+- algorithm_type: Main algorithm category, e.g., DFS, DP
+- topic_tags: List of relevant algorithmic topic tags for this problem (e.g., Array, String, Dynamic Programming, Tree, Graph, etc.)
+- code_quality_score: Overall code quality rating (1-10), 10 is the best
+- style_score: Code readability and formatting rating (1-10), 10 is the best
+- correctness_confidence: Estimated correctness confidence (0.0 - 1.0), 1.0 is the best
+- step_analysis: Step-by-step breakdown of the code logic, each step should be a string
+- improvement_suggestions: Suggestions for improvement or optimization
+- edge_cases_covered: Mentioned edge cases handled in the solution
+- related_problems: List of similar problems or variants, each problem should be a link to the problem, e.g. https://leetcode.com/problems/problem-name/
+- risk_areas: Parts of the code that may be error-prone or complex
+- learning_points: Takeaways or lessons from this solution
+
+Format the response as a structured JSON with these exact keys:
+- summary: string
+- solution_types: list[string]
+- time_complexity: string
+- space_complexity: string
+- algorithm_type: string
+- topic_tags: list[string]
+- code_quality_score: int
+- style_score: int
+- correctness_confidence: float
+- step_analysis: list[string]
+- improvement_suggestions: string
+- edge_cases_covered: list[string]
+- related_problems: list[string]
+- risk_areas: list[string]
+- learning_points: list[string]"""
+
 
 class GeminiService(BaseAIService[GeminiConfig]):
     """Service class for code analysis using Google's Gemini model via python-genai."""
 
-    def __init__(self, config: GeminiConfig):
+    def __init__(
+        self, config: GeminiConfig, limiter: Optional[TokenBucketLimiter] = None
+    ):
         """Initialize the Gemini service with configuration."""
         super().__init__(config)
         self.config = config
 
         # Initialize Gemini client
-        self.client = genai.Client(api_key=config.api_key)
+        http_options = (
+            types.HttpOptions(base_url=settings.GEMINI_API_BASE_URL)
+            if settings.GEMINI_API_BASE_URL
+            else None
+        )
+        self.client = genai.Client(api_key=config.api_key, http_options=http_options)
+        # RPM/TPM budget shared by every thread using the same API key
+        self.limiter = limiter or get_token_bucket(
+            config.api_key or "",
+            settings.GEMINI_REQUESTS_PER_MINUTE,
+            settings.GEMINI_TOKENS_PER_MINUTE,
+            backoff_base=settings.GEMINI_QUOTA_BACKOFF_BASE,
+            backoff_max=settings.GEMINI_QUOTA_BACKOFF_MAX,
+        )
 
     def test_connection(self) -> bool:
         """Test connection to Gemini API."""
@@ -56,42 +117,131 @@ Code:
 {code}
 ```
 
-Provide a detailed analysis including:
-- summary: Brief overview of the solution's approach
-- solution_types: list of types of the solution, e.g., DFS, DP, Greedy, etc.
-- time_complexity: Time complexity in Big-O notation, e.g., O(n log n)
-- space_complexity: Space complexity in Big-O notation
-- algorithm_type: Main algorithm category, e.g., DFS, DP
-- topic_tags: List of relevant algorithmic topic tags for this problem (e.g., Array, String, Dynamic Programming, Tree, Graph, etc.)
-- code_quality_score: Overall code quality rating (1-10), 10 is the best
-- style_score: Code readability and formatting rating (1-10), 10 is the best
-- correctness_confidence: Estimated correctness confidence (0.0 - 1.0), 1.0 is the best
-- step_analysis: Step-by-step breakdown of the code logic, each step should be a string
-- improvement_suggestions: Suggestions for improvement or optimization
-- edge_cases_covered: Mentioned edge cases handled in the solution
-- related_problems: List of similar problems or variants, each problem should be a link to the problem, e.g. https://leetcode.com/problems/problem-name/
-- risk_areas: Parts of the code that may be error-prone or complex
-- learning_points: Takeaways or lessons from this solution
-
-Format the response as a structured JSON with these exact keys:
-- summary: string
-- solution_types: list[string]
-- time_complexity: string
-- space_complexity: string
-- algorithm_type: string
-- topic_tags: list[string]
-- code_quality_score: int
-- style_score: int
-- correctness_confidence: float
-- step_analysis: list[string]
-- improvement_suggestions: string
-- edge_cases_covered: list[string]
-- related_problems: list[string]
-- risk_areas: list[string]
-- learning_points: list[string]
+{ANALYSIS_INSTRUCTIONS}
 
 Return only the JSON object, no additional text."""
 
+    def prompt_version(self) -> str:
+        """Fingerprint of the prompt template; changes whenever the prompt does."""
+        template = self._create_analysis_prompt("", "", "")
+        return hashlib.sha256(template.encode()).hexdigest()[:12]
+
+    @staticmethod
+    def _normalize_code(code: str) -> str:
+        """Ignore line endings, trailing whitespace and surrounding blank lines."""
+        lines = (code or "").replace("\r\n", "\n").split("\n")
+        return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+    def analysis_cache_key(
+        self, code: str, problem_id: Optional[int], language: str
+    ) -> str:
+        """Content address of an analysis for the analysis cache."""
+        parts = [
+            self._normalize_code(code),
+            str(problem_id),
+            (language or "").lower(),
+            self.config.model_name,
+            self.prompt_version(),
+        ]
+        return hashlib.sha256("\x00".join(parts).encode()).hexdigest()
+
+    def _create_batch_analysis_prompt(self, items: List[Tuple[str, str, str]]) -> str:
+        """Create one prompt analysing several submissions.
+
+        Args:
+            items: (code, problem_description, language) per submission
+
+        Returns:
+            A prompt asking for a JSON array with one analysis per submission
+        """
+        submissions = "\n\n".join(
+            f"""### Submission {index}
+
+Problem Description:
+{problem_description}
+
+Code:
+```{language}
+{code}
+```"""
+            for index, (code, problem_description, language) in enumerate(items)
+        )
+        return f"""Analyze each of the following {len(items)} code solutions independently.
+
+{submissions}
+
+For every submission, {ANALYSIS_INSTRUCTIONS[0].lower()}{ANALYSIS_INSTRUCTIONS[1:]}
+- id: int, the submission number
+
+Return only a JSON array with one object per submission, no additional text."""
+
+    @staticmethod
+    def _compact_inputs(code: str, problem_description: str) -> Tuple[str, str]:
+        """Markdown description and trimmed code, both capped in size."""
+        return (
+            truncate_middle(compact_code(code), settings.GEMINI_MAX_CODE_CHARS),
+            truncate_middle(
+                description_to_markdown(problem_description or ""),
+                settings.GEMINI_MAX_DESCRIPTION_CHARS,
+            ),
+        )
+
+    def _estimate_tokens(self, prompt: str, outputs: int = 1) -> int:
+        """Rough token estimate of the prompt plus expected output."""
+        return estimate_tokens(prompt) + settings.GEMINI_OUTPUT_TOKEN_ESTIMATE * outputs
+
+    def estimate_analysis_tokens(
+        self, code: str, problem_description: str = "", language: str = "python"
+    ) -> int:
+        """Tokens analyze_code is expected to spend, counted before sending."""
+        return self._estimate_tokens(
+            self._create_analysis_prompt(
+                *self._compact_inputs(code, problem_description), language
+            )
+        )
+
+    @staticmethod
+    def _usage(response, latency_ms: int, share: int = 1) -> Dict[str, int]:
+        """Token counts and latency of a response, split across `share` items."""
+        usage = getattr(response, "usage_metadata", None)
+        return {
+            "input_tokens": ((usage.prompt_token_count or 0) if usage else 0) // share,
+            "output_tokens": ((usage.candidates_token_count or 0) if usage else 0)
+            // share,
+            "latency_ms": latency_ms,
+        }
+
+    def _generate_content(self, prompt: str, outputs: int = 1):
+        """
+        Call Gemini within the RPM/TPM budget, backing off on quota errors.
+
+        Returns:
+            (response, latency_ms) where latency excludes rate-limit waits
+        """
+        estimated_tokens = self._estimate_tokens(prompt, outputs)
+        attempt = 0
+        while True:
+            self.limiter.acquire(estimated_tokens)
+            started = time.monotonic()
+            try:
+                response = self.client.models.generate_content(
+                    model=self.config.model_name, contents=prompt
+                )
+            except errors.APIError as e:
+                if e.code != 429 or attempt >= settings.GEMINI_MAX_RETRIES:
+                    raise
+                delay = self.limiter.on_quota_error()
+                logger.warning(
+                    f"Gemini quota exceeded, retry {attempt + 1}/{settings.GEMINI_MAX_RETRIES} in {delay:.1f}s"
+                )
+                attempt += 1
+                continue
+            self.limiter.on_success()
+            usage = getattr(response, "usage_metadata", None)
+            if usage and usage.total_token_count:
+                self.limiter.record_usage(estimated_tokens, usage.total_token_count)
+            return response, int((time.monotonic() - started) * 1000)
+
     def analyze_code(
         self, code: str, problem_description: str = "", language: str = "python"
     ) -> tuple[bool, dict[str, Any]]:
@@ -103,48 +253,118 @@ Return only the JSON object, no additional text."""
             language: Programming language of the code
 
         Returns:
-            Dictionary containing analysis results
+            (success, analysis); the analysis carries a "usage" entry with the
+            request's token counts and latency once Gemini has responded
 
         Raises:
             Exception: If analysis fails
         """
         try:
-            # Create analysis prompt
-            prompt = self._create_analysis_prompt(code, problem_description, language)
+            # Create analysis prompt from compacted inputs
+            prompt = self._create_analysis_prompt(
+                *self._compact_inputs(code, problem_description), language
+            )
 
             # Get response from Gemini
-            response = self.client.models.generate_content(
-                model=self.config.model_name, contents=prompt
-            )
+            response, latency_ms = self._generate_content(prompt)
+            usage = self._usage(response, latency_ms)
 
             if not response.text:
-                raise Exception("No response from Gemini model")
-
-            # Parse JSON response
-            try:
-                analysis_result = json.loads(response.text)
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract JSON from the response
-                import re
-
-                json_match = re.search(r"{.*\}", response.text, re.DOTALL)
-                if json_match:
-                    analysis_result = json.loads(json_match.group())
-                else:
-                    raise Exception("Failed to parse JSON response from Gemini")
-
-            # Add metadata
-            analysis_result["model_version"] = self.config.model_name
+                return False, {"error": "No response from Gemini model", "usage": usage}
 
             try:
-                validated_result = GeminiAIAnalysisSchema(**analysis_result)
+                parsed = self._parse_json_response(response.text, r"{.*\}")
             except Exception as e:
-                logger.error(
-                    f"GeminiAIAnalysisSchema validation failed: {e}, data: {analysis_result}"
-                )
-                return False, {"error": f"schema validation failed: {e}"}
-            return True, validated_result.model_dump()
+                return False, {"error": str(e), "usage": usage}
+            success, analysis_result = self._validate_analysis(parsed)
+            analysis_result["usage"] = usage
+            return success, analysis_result
 
         except Exception as e:
             logger.error(f"Gemini analysis failed: {e}")
             return False, {"error": str(e)}
+
+    def analyze_code_batch(
+        self, items: List[Tuple[str, str, str]]
+    ) -> List[Tuple[bool, Dict[str, Any]]]:
+        """Analyze several submissions with one Gemini request.
+
+        Every returned item is validated on its own; items that are missing
+        or fail validation, or all of them if the batch request fails, are
+        retried individually with analyze_code.
+
+        Args:
+            items: (code, problem_description, language) per submission
+
+        Returns:
+            (success, analysis) per item, in input order; the batch request's
+            token usage is split evenly across the items it answered
+        """
+        if len(items) <= 1:
+            return [self.analyze_code(*item) for item in items]
+        results: List[Optional[Tuple[bool, Dict[str, Any]]]] = [None] * len(items)
+        try:
+            response, latency_ms = self._generate_content(
+                self._create_batch_analysis_prompt(
+                    [
+                        (*self._compact_inputs(code, problem_description), language)
+                        for code, problem_description, language in items
+                    ]
+                ),
+                outputs=len(items),
+            )
+            if not response.text:
+                raise Exception("No response from Gemini model")
+            parsed = self._parse_json_response(response.text, r"\[.*\]")
+            if not isinstance(parsed, list):
+                raise Exception("Gemini batch response is not a JSON array")
+            for position, analysis_result in enumerate(parsed):
+                if not isinstance(analysis_result, dict):
+                    continue
+                index = analysis_result.pop("id", position)
+                if not isinstance(index, int) or not 0 <= index < len(items):
+                    continue
+                success, validated = self._validate_analysis(analysis_result)
+                if success and results[index] is None:
+                    results[index] = (success, validated)
+            answered = [result for result in results if result is not None]
+            if answered:
+                # Retried items record the usage of their own requests
+                usage = self._usage(response, latency_ms, share=len(answered))
+                for _, validated in answered:
+                    validated["usage"] = dict(usage)
+        except Exception as e:
+            logger.error(f"Gemini batch analysis of {len(items)} items failed: {e}")
+        retries = [index for index, result in enumerate(results) if result is None]
+        if retries:
+            logger.info(
+                f"Retrying {len(retries)}/{len(items)} batch items individually"
+            )
+        for index in retries:
+            results[index] = self.analyze_code(*items[index])
+        return results
+
+    @staticmethod
+    def _parse_json_response(text: str, fallback_pattern: str) -> Any:
+        """Parse a JSON response, extracting it from surrounding text if needed."""
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            json_match = re.search(fallback_pattern, text, re.DOTALL)
+            if json_match:
+                return json.loads(json_match.group())
+            raise Exception("Failed to parse JSON response from Gemini")
+
+    def _validate_analysis(
+        self, analysis_result: Dict[str, Any]
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Add metadata and validate one analysis against the schema."""
+        analysis_result["model_version"] = self.config.model_name
+        try:
+            validated_result = GeminiAIAnalysisSchema(**analysis_result)
+        except Exception as e:
+            logger.error(
+                f"GeminiAIAnalysisSchema validation failed: {e}, data: {analysis_result}"
+            )
+            return False, {"error": f"schema validation failed: {e}"}
+        return True, validated_result.model_dump()
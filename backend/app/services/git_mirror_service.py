@@ -0,0 +1,270 @@
+import base64
+import fcntl
+import hashlib
+import os
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from app.config import settings
+from app.schemas.github import GitHubConfig
+from app.services.base_repo_service import BaseRepoService
+from app.services.github_service import GitHubService, git_blob_sha, parse_repo_url
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@contextmanager
+def _mirror_lock(path: str) -> Iterator[None]:
+    """
+    Serialize access to one mirror across worker processes and threads.
+
+    Every task of a user/repo shares the mirror, and a fetch must not reset
+    the branch while another task is committing to it.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class GitMirrorService(BaseRepoService[GitHubConfig]):
+    """
+    Repository sync through a local bare mirror (using the git CLI).
+
+    Commits are written locally with git fast-import and published with one
+    git push, so a sync costs one fetch and one push however many files and
+    commits it contains. The token is passed as an HTTP header through the
+    environment and never written to the mirror's config.
+    """
+
+    def __init__(self, config: GitHubConfig):
+        super().__init__(config)
+        assert config.token is not None, "GitHub token is required"
+        self.repo_full_name = parse_repo_url(config.repo_url)
+        self.branch = config.branch or "main"
+        user_hash = hashlib.sha256(config.token.encode()).hexdigest()[:16]
+        self.mirror_path = os.path.join(
+            settings.GIT_MIRROR_ROOT,
+            user_hash,
+            f"{self.repo_full_name.replace('/', '__')}.git",
+        )
+        self.remote_url = (
+            f"{settings.GITHUB_GIT_BASE_URL.rstrip('/')}/{self.repo_full_name}.git"
+        )
+        self._fetched = False
+
+    def _env(self) -> Dict[str, str]:
+        credentials = base64.b64encode(
+            f"x-access-token:{self.config.token}".encode()
+        ).decode()
+        return {
+            **os.environ,
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.extraHeader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {credentials}",
+            "GIT_AUTHOR_NAME": settings.GIT_COMMITTER_NAME,
+            "GIT_AUTHOR_EMAIL": settings.GIT_COMMITTER_EMAIL,
+            "GIT_COMMITTER_NAME": settings.GIT_COMMITTER_NAME,
+            "GIT_COMMITTER_EMAIL": settings.GIT_COMMITTER_EMAIL,
+        }
+
+    def _git(self, *args: str, input: Optional[bytes] = None) -> str:
+        """Run a git command in the mirror and return its stdout."""
+        try:
+            result = subprocess.run(
+                ["git", "--git-dir", self.mirror_path, *args],
+                input=input,
+                capture_output=True,
+                env=self._env(),
+                timeout=settings.GIT_COMMAND_TIMEOUT_SECONDS,
+                check=True,
+            )
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode(errors="replace").strip()
+            raise Exception(f"git {args[0]} failed: {stderr}")
+        return result.stdout.decode(errors="replace")
+
+    def _head(self) -> Optional[str]:
+        """Local branch head, or None for a repository without commits."""
+        try:
+            return self._git(
+                "rev-parse", "--verify", "--quiet", f"refs/heads/{self.branch}"
+            ).strip()
+        except Exception:
+            return None
+
+    def _sync_mirror(self) -> None:
+        """Create the mirror if needed and fetch the branch, once per instance."""
+        if self._fetched:
+            return
+        if not os.path.isdir(self.mirror_path):
+            subprocess.run(
+                ["git", "init", "--quiet", "--bare", self.mirror_path],
+                check=True,
+                capture_output=True,
+            )
+        try:
+            self._git(
+                "fetch",
+                "--quiet",
+                "--force",
+                self.remote_url,
+                f"+refs/heads/{self.branch}:refs/heads/{self.branch}",
+            )
+        except Exception as e:
+            # An empty repository has no branch yet; the first push creates it
+            if "couldn't find remote ref" not in str(e):
+                raise
+        self._fetched = True
+
+    def _remote_blobs(self) -> Dict[str, str]:
+        head = self._head()
+        if not head:
+            return {}
+        blobs = {}
+        for line in self._git("ls-tree", "-r", "-z", head).split("\0"):
+            if not line:
+                continue
+            meta, path = line.split("\t", 1)
+            _, kind, sha = meta.split()
+            if kind == "blob":
+                blobs[path] = sha
+        return blobs
+
+    def test_connection(self) -> bool:
+        try:
+            subprocess.run(
+                ["git", "ls-remote", "--heads", self.remote_url],
+                capture_output=True,
+                env=self._env(),
+                timeout=settings.GIT_COMMAND_TIMEOUT_SECONDS,
+                check=True,
+            )
+            return True
+        except (subprocess.SubprocessError, OSError):
+            return False
+
+    def filter_unchanged(self, files: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Drop files whose content already matches the branch."""
+        with _mirror_lock(self.mirror_path):
+            self._sync_mirror()
+            blobs = self._remote_blobs()
+        return [
+            f for f in files if blobs.get(f["file_path"]) != git_blob_sha(f["code"])
+        ]
+
+    def commit_files(
+        self,
+        files: List[Dict[str, str]],
+        commit_message: str,
+        commit_time: Optional[datetime] = None,
+    ) -> Optional[str]:
+        """
+        Commit files to the local mirror without publishing them.
+
+        Args:
+            files: List of {'file_path': str, 'code': str}
+            commit_message: Commit message
+            commit_time: Author and committer date, defaults to now
+
+        Returns:
+            SHA of the new commit, or None when every file was already up to date
+        """
+        with _mirror_lock(self.mirror_path):
+            self._sync_mirror()
+            blobs = self._remote_blobs()
+            changed = [
+                f for f in files if blobs.get(f["file_path"]) != git_blob_sha(f["code"])
+            ]
+            if not changed:
+                return None
+            timestamp = int((commit_time or datetime.now()).timestamp())
+            message = commit_message.encode()
+            identity = (
+                f"{settings.GIT_COMMITTER_NAME} <{settings.GIT_COMMITTER_EMAIL}> "
+                f"{timestamp} +0000"
+            ).encode()
+            stream = [
+                f"commit refs/heads/{self.branch}\n".encode(),
+                b"author " + identity + b"\n",
+                b"committer " + identity + b"\n",
+                b"data %d\n" % len(message) + message + b"\n",
+            ]
+            head = self._head()
+            if head:
+                stream.append(f"from {head}\n".encode())
+            for f in changed:
+                content = f["code"].encode()
+                stream.append(f"M 100644 inline {f['file_path']}\n".encode())
+                stream.append(b"data %d\n" % len(content) + content + b"\n")
+            stream.append(b"\n")
+            self._git("fast-import", "--quiet", input=b"".join(stream))
+            commit_sha = self._head()
+        logger.info(
+            f"Committed {len(changed)} of {len(files)} files to mirror {self.repo_full_name}@{self.branch}"
+        )
+        return commit_sha
+
+    def publish(self) -> None:
+        """Push the local branch to the remote in a single network operation."""
+        with _mirror_lock(self.mirror_path):
+            start = time.monotonic()
+            self._git(
+                "push",
+                "--quiet",
+                self.remote_url,
+                f"refs/heads/{self.branch}:refs/heads/{self.branch}",
+            )
+        logger.info(
+            f"Published mirror {self.repo_full_name}@{self.branch} in {time.monotonic() - start:.1f}s"
+        )
+
+    def commit_url(self, commit_sha: str) -> str:
+        return f"{settings.GITHUB_GIT_BASE_URL.rstrip('/')}/{self.repo_full_name}/commit/{commit_sha}"
+
+    def push_code(
+        self,
+        file_path: str,
+        code: str,
+        commit_message: str,
+    ) -> str:
+        return self.push_files([{"file_path": file_path, "code": code}], commit_message)
+
+    def push_files(
+        self,
+        files: List[Dict[str, str]],
+        commit_message: str,
+    ) -> str:
+        """Commit and publish; returns "" when every file was already up to date."""
+        try:
+            commit_sha = self.commit_files(files, commit_message)
+            if not commit_sha:
+                return ""
+            self.publish()
+            return self.commit_url(commit_sha)
+        except Exception as e:
+            # The remote may have moved; fetch again before the next attempt
+            self._fetched = False
+            raise Exception(f"Failed to push files to GitHub: {str(e)}")
+
+    # Repository management has no git equivalent and goes through the REST API
+
+    def create_repository(self, repo_name: str, description: str = "") -> str:
+        return GitHubService(self.config).create_repository(repo_name, description)
+
+    def list_repos(self) -> List[str]:
+        return GitHubService(self.config).list_repos()
+
+    def get_lastest_commit(self) -> Optional[str]:
+        with _mirror_lock(self.mirror_path):
+            self._sync_mirror()
+            head = self._head()
+            return self._git("log", "-1", "--format=%B", head).strip() if head else None
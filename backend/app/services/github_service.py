@@ -1,43 +1,75 @@
 import hashlib
+import json
 import os
 import re
-from typing import Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
-from github import Github, GithubException, InputGitTreeElement
+from github import Github, GithubException
 
+from app.config import settings
+from app.deps import get_redis_client
 from app.schemas.github import GitHubConfig
 from app.services.base_repo_service import BaseRepoService
+from app.utils.logger import get_logger
 from app.utils.rate_limiter import RedisRateLimiter
 
+logger = get_logger(__name__)
+
+
+def git_blob_sha(content: str) -> str:
+    """SHA git assigns to a blob with this content, computed without the API."""
+    data = content.encode()
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def parse_repo_url(repo_url: str) -> str:
+    """Parse repository URL to extract owner/repo format."""
+    if not repo_url:
+        raise Exception("Repository URL is required")
+
+    # Handle different URL formats
+    patterns = [
+        r"https://github\.com/([^/]+/[^/]+?)(?:\.git)?/?$",  # https://github.com/owner/repo
+        r"git@github\.com:([^/]+/[^/]+?)(?:\.git)?/?$",  # git@github.com:owner/repo
+        r"^([^/]+/[^/]+)$",  # owner/repo
+    ]
+
+    for pattern in patterns:
+        match = re.match(pattern, repo_url)
+        if match:
+            return match.group(1)
+
+    raise Exception(f"Invalid repository URL format: {repo_url}")
+
 
 class GitHubService(BaseRepoService[GitHubConfig]):
     """GitHub integration service implementation (using PyGithub)."""
 
-    def __init__(self, config: GitHubConfig):
+    def __init__(self, config: GitHubConfig, redis_client=None):
         super().__init__(config)
         assert config.token is not None, "GitHub token is required"
-        self._client = Github(config.token)
-        user_hash = hashlib.sha256(config.token.encode()).hexdigest()
-        self.limiter = RedisRateLimiter(f"github_rate_limit:{user_hash}")
+        self._client = Github(
+            config.token,
+            base_url=settings.GITHUB_API_BASE_URL,
+            pool_size=settings.GITHUB_BLOB_CONCURRENCY,
+            seconds_between_writes=settings.GITHUB_SECONDS_BETWEEN_WRITES,
+        )
+        self._user_hash = hashlib.sha256(config.token.encode()).hexdigest()
+        self.limiter = RedisRateLimiter(f"github_rate_limit:{self._user_hash}")
+        self._redis_client = redis_client
+        # Branch head and file SHAs, fetched at most once per service instance
+        self._head: Optional[Dict[str, Any]] = None
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = next(get_redis_client())
+        return self._redis_client
 
     def _parse_repo_url(self, repo_url: str) -> str:
         """Parse repository URL to extract owner/repo format."""
-        if not repo_url:
-            raise Exception("Repository URL is required")
-
-        # Handle different URL formats
-        patterns = [
-            r"https://github\.com/([^/]+/[^/]+?)(?:\.git)?/?$",  # https://github.com/owner/repo
-            r"git@github\.com:([^/]+/[^/]+?)(?:\.git)?/?$",  # git@github.com:owner/repo
-            r"^([^/]+/[^/]+)$",  # owner/repo
-        ]
-
-        for pattern in patterns:
-            match = re.match(pattern, repo_url)
-            if match:
-                return match.group(1)
-
-        raise Exception(f"Invalid repository URL format: {repo_url}")
+        return parse_repo_url(repo_url)
 
     def _get_repo_full_name(self) -> str:
         """Get repository full name from config."""
@@ -94,28 +126,174 @@ class GitHubService(BaseRepoService[GitHubConfig]):
         except GithubException as e:
             raise Exception(f"Failed to push code to GitHub: {str(e)}")
 
+    def _tree_cache_key(self) -> str:
+        return f"github_tree:{self._user_hash}:{self._get_repo_full_name()}:{self._get_branch()}"
+
+    def _load_cached_tree(self) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.redis_client.get(self._tree_cache_key())
+            return json.loads(value) if value else None
+        except Exception as e:
+            logger.error(f"Error reading GitHub tree cache: {e}")
+            return None
+
+    def _store_cached_tree(self, head: Dict[str, Any]) -> None:
+        try:
+            self.redis_client.set(
+                self._tree_cache_key(),
+                json.dumps(head),
+                ex=settings.GITHUB_TREE_CACHE_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.error(f"Error writing GitHub tree cache: {e}")
+
+    def _remote_head(self) -> Dict[str, Any]:
+        """
+        Get the branch head commit and the blob SHA of every file in its tree.
+
+        The cached tree is revalidated with a conditional request, which GitHub
+        answers with 304 (not counted against the rate limit) while the branch
+        has not moved. The full tree is only fetched when its SHA changed.
+
+        Returns:
+            {"etag", "commit_sha", "tree_sha", "message", "blobs": {path: sha}}
+        """
+        if self._head is not None:
+            return self._head
+        self.limiter.wait_if_needed(0, 70, 60, "github")
+        requester = self._client.requester
+        repo_full_name = self._get_repo_full_name()
+        cached = self._load_cached_tree()
+        headers = {"If-None-Match": cached["etag"]} if cached and cached["etag"] else {}
+        response_headers, commit = requester.requestJsonAndCheck(
+            "GET",
+            f"/repos/{repo_full_name}/commits/{self._get_branch()}",
+            headers=headers,
+        )
+        if commit is None and cached:
+            self._head = cached
+            return self._head
+        tree_sha = commit["commit"]["tree"]["sha"]
+        if cached and cached["tree_sha"] == tree_sha:
+            blobs = cached["blobs"]
+        else:
+            self.limiter.wait_if_needed(0, 70, 60, "github")
+            _, tree = requester.requestJsonAndCheck(
+                "GET",
+                f"/repos/{repo_full_name}/git/trees/{tree_sha}",
+                parameters={"recursive": "1"},
+            )
+            # A truncated listing only makes unlisted files look changed
+            blobs = {
+                entry["path"]: entry["sha"]
+                for entry in tree["tree"]
+                if entry["type"] == "blob"
+            }
+        self._head = {
+            "etag": response_headers.get("etag"),
+            "commit_sha": commit["sha"],
+            "tree_sha": tree_sha,
+            "message": commit["commit"]["message"],
+            "blobs": blobs,
+        }
+        self._store_cached_tree(self._head)
+        return self._head
+
+    def filter_unchanged(self, files: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Drop files whose content already matches the remote branch."""
+        blobs = self._remote_head()["blobs"]
+        return [
+            f for f in files if blobs.get(f["file_path"]) != git_blob_sha(f["code"])
+        ]
+
     def push_files(
         self,
         files: List[Dict[str, str]],
         commit_message: str,
     ) -> str:
-        self.limiter.wait_if_needed(0, 70, 60, "github")
+        """
+        Commit the files that differ from the remote branch.
+
+        Returns:
+            URL of the new commit, or "" when every file was already up to date
+        """
         repo_full_name = self._get_repo_full_name()
         branch = self._get_branch()
         try:
-            repo = self._client.get_repo(repo_full_name)
-            base_tree = repo.get_git_tree(sha=repo.get_branch(branch).commit.sha)
-            elements = []
-            for f in files:
-                elements.append(
-                    InputGitTreeElement(f["file_path"], "100644", "blob", f["code"])
+            head = self._remote_head()
+            changed = self.filter_unchanged(files)
+            if not changed:
+                logger.info(f"All {len(files)} files already up to date on {branch}")
+                return ""
+            requester = self._client.requester
+            repo_url = f"/repos/{repo_full_name}"
+
+            def create_blob(content: str) -> str:
+                self.limiter.wait_if_needed(0, 70, 60, "github")
+                _, blob = requester.requestJsonAndCheck(
+                    "POST",
+                    f"{repo_url}/git/blobs",
+                    input={"content": content, "encoding": "utf-8"},
+                )
+                return blob["sha"]
+
+            # Blobs upload in parallel; the tree then only carries their SHAs
+            with ThreadPoolExecutor(
+                max_workers=settings.GITHUB_BLOB_CONCURRENCY
+            ) as executor:
+                blob_shas = list(
+                    executor.map(create_blob, [f["code"] for f in changed])
                 )
-            tree = repo.create_git_tree(elements, base_tree)
-            parent = repo.get_git_commit(repo.get_branch(branch).commit.sha)
-            commit = repo.create_git_commit(commit_message, tree, [parent])
-            repo.get_git_ref(f"heads/{branch}").edit(commit.sha)
-            return commit.html_url if hasattr(commit, "html_url") else ""
+            self.limiter.wait_if_needed(0, 70, 60, "github")
+            _, tree = requester.requestJsonAndCheck(
+                "POST",
+                f"{repo_url}/git/trees",
+                input={
+                    "base_tree": head["tree_sha"],
+                    "tree": [
+                        {
+                            "path": f["file_path"],
+                            "mode": "100644",
+                            "type": "blob",
+                            "sha": sha,
+                        }
+                        for f, sha in zip(changed, blob_shas)
+                    ],
+                },
+            )
+            _, commit = requester.requestJsonAndCheck(
+                "POST",
+                f"{repo_url}/git/commits",
+                input={
+                    "message": commit_message,
+                    "tree": tree["sha"],
+                    "parents": [head["commit_sha"]],
+                },
+            )
+            requester.requestJsonAndCheck(
+                "PATCH",
+                f"{repo_url}/git/refs/heads/{branch}",
+                input={"sha": commit["sha"]},
+            )
+            blobs = dict(head["blobs"])
+            blobs.update((f["file_path"], sha) for f, sha in zip(changed, blob_shas))
+            # Our own commit is the new head; the stale ETag just forces one
+            # cheap revalidation next time, the tree stays cached
+            self._head = {
+                "etag": None,
+                "commit_sha": commit["sha"],
+                "tree_sha": tree["sha"],
+                "message": commit_message,
+                "blobs": blobs,
+            }
+            self._store_cached_tree(self._head)
+            logger.info(
+                f"Pushed {len(changed)} of {len(files)} files to {repo_full_name}@{branch}"
+            )
+            return commit.get("html_url", "")
         except GithubException as e:
+            # The branch may have moved; look it up again before the next push
+            self._head = None
             raise Exception(f"Failed to push files to GitHub: {str(e)}")
 
     def create_repository(self, repo_name: str, description: str = "") -> str:
@@ -134,7 +312,4 @@ class GitHubService(BaseRepoService[GitHubConfig]):
         return [repo.full_name for repo in self._client.get_user().get_repos()]
 
     def get_lastest_commit(self) -> str:
-        self.limiter.wait_if_needed(0, 70, 60, "github")
-        repo_full_name = self._get_repo_full_name()
-        repo = self._client.get_repo(repo_full_name)
-        return repo.get_commits()[0].commit.message
+        return self._remote_head()["message"]
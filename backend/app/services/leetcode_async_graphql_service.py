@@ -0,0 +1,237 @@
+"""
+Async LeetCode GraphQL Service
+asyncio variant of LeetCodeGraphQLService built on a keep-alive httpx pool,
+so the API layer and Celery tasks can overlap LeetCode network waits
+"""
+
+import asyncio
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from app.config import settings
+from app.utils.logger import get_logger
+from app.utils.rate_limiter import RedisRateLimiter
+from app.utils.token_cache import RedisTokenCache
+
+from .leetcode_graphql_service import BaseLeetCodeGraphQLService
+
+logger = get_logger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class AsyncLeetCodeGraphQLService(BaseLeetCodeGraphQLService):
+    """LeetCode GraphQL client using asyncio and connection reuse"""
+
+    def __init__(
+        self,
+        session_cookie: str,
+        limiter: Optional[RedisRateLimiter] = None,
+        timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        retry_backoff: Optional[float] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        csrf_cache: Optional[RedisTokenCache] = None,
+    ):
+        super().__init__(session_cookie, csrf_cache)
+        self.limiter = limiter or RedisRateLimiter("leetcode_rate_limit")
+        self.timeout = (
+            timeout if timeout is not None else settings.LEETCODE_REQUEST_TIMEOUT
+        )
+        self.max_retries = (
+            max_retries if max_retries is not None else settings.LEETCODE_MAX_RETRIES
+        )
+        self.retry_backoff = (
+            retry_backoff
+            if retry_backoff is not None
+            else settings.LEETCODE_RETRY_BACKOFF
+        )
+        self.client = httpx.AsyncClient(
+            headers=self._default_headers(),
+            cookies={"LEETCODE_SESSION": session_cookie},
+            timeout=self.timeout,
+            limits=httpx.Limits(
+                max_connections=settings.LEETCODE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LEETCODE_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            follow_redirects=True,
+            transport=transport,
+        )
+        self._csrf_token: Optional[str] = None
+        self._session_lock = asyncio.Lock()
+
+    async def __aenter__(self) -> "AsyncLeetCodeGraphQLService":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    def _set_csrf_token(self, csrf_token: str) -> None:
+        self._csrf_token = csrf_token
+        self.client.cookies.set("csrftoken", csrf_token)
+        self.client.headers["x-csrftoken"] = csrf_token
+
+    async def _update_csrf_from_response(
+        self, response: httpx.Response
+    ) -> Optional[str]:
+        set_cookie = response.headers.get_list("set-cookie")
+        if not set_cookie:
+            return None
+        parsed_cookies = self._parse_cookie(set_cookie)
+        csrf_token = parsed_cookies.get("csrftoken")
+        if csrf_token:
+            self._set_csrf_token(csrf_token)
+            await asyncio.to_thread(
+                self.csrf_cache.set, self.session_cookie, csrf_token
+            )
+        return csrf_token
+
+    async def _initialize_session(self) -> bool:
+        """Resolve the CSRF token once, lazily, before the first GraphQL call"""
+        async with self._session_lock:
+            if self._csrf_token:
+                return True
+            cached_token = await asyncio.to_thread(
+                self.csrf_cache.get, self.session_cookie
+            )
+            if cached_token:
+                self._set_csrf_token(cached_token)
+                return True
+            response = await self._send_with_retry("GET", self.graphql_url)
+            if not await self._update_csrf_from_response(response):
+                logger.error("Failed to get CSRF token")
+                return False
+            return True
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return max(0.0, float(retry_after))
+                except ValueError:
+                    pass
+        return self.retry_backoff * (2**attempt)
+
+    async def _wait_for_rate_limit(self) -> None:
+        # The limiter talks to Redis synchronously, keep it off the event loop
+        if not self.limiter:
+            return
+        while not await asyncio.to_thread(self.limiter.is_allowed, 0, 1, 1, "leetcode"):
+            await asyncio.sleep(1)
+
+    async def _send_with_retry(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying with exponential backoff on 429/5xx and timeouts"""
+        attempt = 0
+        while True:
+            response: Optional[httpx.Response] = None
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if (
+                    response.status_code not in RETRYABLE_STATUS_CODES
+                    or attempt >= self.max_retries
+                ):
+                    return response
+                logger.warning(
+                    f"LeetCode responded {response.status_code} for {method} {url}, "
+                    f"retry {attempt + 1}/{self.max_retries}"
+                )
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(
+                    f"LeetCode request error for {method} {url}: {e}, "
+                    f"retry {attempt + 1}/{self.max_retries}"
+                )
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def _make_graphql_request(
+        self, query: str, variables: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        if not self._csrf_token:
+            await self._initialize_session()
+        await self._wait_for_rate_limit()
+        payload = {"query": query, "variables": variables or {}}
+        response = await self._send_with_retry("POST", self.graphql_url, json=payload)
+        if response.status_code == 403:
+            # A cached CSRF token may have been revoked; harvest a new one once
+            logger.warning("LeetCode rejected CSRF token, refreshing session")
+            await asyncio.to_thread(self.csrf_cache.delete, self.session_cookie)
+            self._csrf_token = None
+            if await self._initialize_session():
+                response = await self._send_with_retry(
+                    "POST", self.graphql_url, json=payload
+                )
+        await self._update_csrf_from_response(response)
+        try:
+            return response.json()
+        except ValueError:
+            logger.error(
+                f"Invalid GraphQL response from LeetCode: HTTP {response.status_code}"
+            )
+            return {}
+
+    async def get_user_submissions(
+        self, limit: int = 20, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        variables = {"offset": offset, "limit": limit, "slug": None}
+        result = await self._make_graphql_request(self.SUBMISSION_LIST_QUERY, variables)
+        return self._parse_submissions(result)
+
+    async def get_submission_details(self, submission_id: int) -> Dict[str, Any]:
+        variables = {"id": submission_id}
+        result = await self._make_graphql_request(
+            self.SUBMISSION_DETAILS_QUERY, variables
+        )
+        return self._parse_submission_details(result, submission_id)
+
+    async def get_submission_details_batch(
+        self, submission_ids: List[int], profile: str = "ingest"
+    ) -> Dict[int, Dict[str, Any]]:
+        """Fetch details for one page of submissions in a single aliased request"""
+        submission_ids = list(dict.fromkeys(submission_ids))
+        if not submission_ids:
+            return {}
+        query, variables = self._build_submission_details_batch_query(
+            submission_ids, profile
+        )
+        result = await self._make_graphql_request(query, variables)
+        return self._parse_submission_details_batch(result, submission_ids)
+
+    async def get_user_profile(self, username: Optional[str] = None) -> Dict[str, Any]:
+        if not username:
+            current_user_result = await self._make_graphql_request(
+                self.USER_STATUS_QUERY
+            )
+            username = self._parse_signed_in_username(current_user_result)
+            if not username:
+                return {}
+        variables = {"username": username}
+        result = await self._make_graphql_request(self.USER_PROFILE_QUERY, variables)
+        return self._parse_user_profile(result, username)
+
+    async def get_problem_detail(self, title_slug: str) -> Optional[Dict[str, Any]]:
+        try:
+            variables = {"titleSlug": title_slug}
+            result = await self._make_graphql_request(
+                self.PROBLEM_DETAIL_QUERY, variables
+            )
+            return self._parse_problem_detail(result, title_slug)
+        except Exception as e:
+            logger.error(f"Error fetching problem description for {title_slug}: {e}")
+            return None
+
+    async def test_connection(self) -> bool:
+        """Test LeetCode connection by fetching user profile"""
+        try:
+            profile = await self.get_user_profile()
+            return bool(profile and profile.get("username"))
+        except Exception as e:
+            logger.error(f"LeetCode async GraphQL test_connection failed: {e}")
+            return False
+
+    async def close(self) -> None:
+        """Close the underlying connection pool"""
+        await self.client.aclose()
@@ -5,44 +5,194 @@ Based on leetcode-query implementation
 """
 
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
+from app.config import settings
 from app.utils.logger import get_logger
 from app.utils.rate_limiter import RedisRateLimiter
+from app.utils.token_cache import RedisTokenCache
 
 logger = get_logger(__name__)
 
 
-class LeetCodeGraphQLService:
-    """LeetCode service using GraphQL API for data fetching"""
+class BaseLeetCodeGraphQLService:
+    """GraphQL queries and response parsing shared by sync and async clients"""
+
+    SUBMISSION_LIST_QUERY = """
+        query ($offset: Int!, $limit: Int!, $slug: String) {
+            submissionList(offset: $offset, limit: $limit, questionSlug: $slug) {
+                hasNext
+                submissions {
+                    id
+                    lang
+                    time
+                    timestamp
+                    statusDisplay
+                    runtime
+                    url
+                    isPending
+                    title
+                    memory
+                    titleSlug
+                }
+            }
+        }
+        """
+
+    SUBMISSION_DETAILS_QUERY = """
+        query submissionDetails($id: Int!) {
+            submissionDetails(submissionId: $id) {
+                id
+                runtimePercentile
+                memoryPercentile
+                code
+                question {
+                    questionId
+                    titleSlug
+                    hasFrontendPreview
+                }
+                notes
+                flagType
+                topicTags {
+                    tagId
+                    slug
+                    name
+                }
+                runtimeError
+                compileError
+                codeOutput
+                expectedOutput
+                totalCorrect
+                totalTestcases
+                fullCodeOutput
+                testDescriptions
+                testBodies
+                testInfo
+            }
+        }
+        """
+
+    # Field selections for aliased submissionDetails batches: "ingest" only asks
+    # for what we persist on Record, "debug" keeps the heavy test/output fields
+    SUBMISSION_DETAIL_FIELD_PROFILES = {
+        "ingest": """
+                id
+                runtimePercentile
+                memoryPercentile
+                code
+                topicTags {
+                    name
+                }
+                runtimeError
+                compileError
+                totalCorrect
+                totalTestcases
+        """,
+        "debug": """
+                id
+                runtimePercentile
+                memoryPercentile
+                code
+                question {
+                    questionId
+                    titleSlug
+                    hasFrontendPreview
+                }
+                notes
+                flagType
+                topicTags {
+                    tagId
+                    slug
+                    name
+                }
+                runtimeError
+                compileError
+                codeOutput
+                expectedOutput
+                totalCorrect
+                totalTestcases
+                fullCodeOutput
+                testDescriptions
+                testBodies
+                testInfo
+        """,
+    }
+
+    USER_STATUS_QUERY = """
+            query {
+                userStatus {
+                    isSignedIn
+                    username
+                }
+            }
+            """
+
+    USER_PROFILE_QUERY = """
+        query ($username: String!) {
+            matchedUser(username: $username) {
+                username
+                profile {
+                    realName
+                    websites
+                    countryName
+                    skillTags
+                    company
+                    school
+                    starRating
+                    aboutMe
+                    userAvatar
+                    reputation
+                    ranking
+                }
+                submitStats {
+                    acSubmissionNum {
+                        difficulty
+                        count
+                        submissions
+                    }
+                }
+            }
+        }
+        """
 
-    def __init__(self, session_cookie: str):
+    PROBLEM_DETAIL_QUERY = """
+            query questionData($titleSlug: String!) {
+                question(titleSlug: $titleSlug) {
+                    questionId
+                    title
+                    titleSlug
+                    content
+                    difficulty
+                    topicTags {
+                        name
+                        slug
+                    }
+                }
+            }
+            """
+
+    def __init__(
+        self, session_cookie: str, csrf_cache: Optional[RedisTokenCache] = None
+    ):
         assert session_cookie is not None, "Session cookie is required"
         self.session_cookie = session_cookie
-        self.session = requests.Session()
         self.base_url = "https://leetcode.com"
         self.graphql_url = f"{self.base_url}/graphql"
-        self.limiter = RedisRateLimiter("leetcode_rate_limit")
-
-        # Set up more realistic session headers
-        self.session.headers.update(
-            {
-                "content-type": "application/json",
-                "origin": self.base_url,
-                "referer": self.base_url,
-                "user-agent": "Mozilla/5.0 LeetCode API",
-            }
+        # CSRF tokens are shared across workers per session cookie hash
+        self.csrf_cache = csrf_cache or RedisTokenCache(
+            "leetcode_csrf", settings.LEETCODE_CSRF_CACHE_TTL
         )
 
-        # Set session cookie
-        self.session.cookies.set(
-            "LEETCODE_SESSION", session_cookie, domain=".leetcode.com"
-        )
-
-        # Initialize retry operation
-        self._initialize_session()
+    def _default_headers(self) -> Dict[str, str]:
+        """Headers sent with every request to look like a regular browser"""
+        return {
+            "content-type": "application/json",
+            "origin": self.base_url,
+            "referer": self.base_url,
+            "user-agent": "Mozilla/5.0 LeetCode API",
+        }
 
     def _parse_cookie(self, cookie_string: str) -> dict:
         if not cookie_string:
@@ -69,79 +219,7 @@ class LeetCodeGraphQLService:
 
         return result
 
-    def _get_csrf_token(self) -> Optional[str]:
-        response = self.session.get(self.graphql_url, timeout=30, allow_redirects=True)
-        set_cookie = response.headers.get("set-cookie")
-        if set_cookie:
-            parsed_cookies = self._parse_cookie(set_cookie)
-            if "csrftoken" in parsed_cookies:
-                csrf_token = parsed_cookies["csrftoken"]
-                return csrf_token
-        return None
-
-    def _initialize_session(self) -> bool:
-        # Get CSRF token with retry
-        csrf_token = self._get_csrf_token()
-        if not csrf_token:
-            logger.error("Failed to get CSRF token")
-            return False
-        self.session.cookies.set("csrftoken", csrf_token, domain=".leetcode.com")
-        self.session.headers.update(
-            {
-                "x-csrftoken": csrf_token,
-            }
-        )
-        return True
-
-    def _make_graphql_request(
-        self, query: str, variables: Optional[Dict[str, Any]] = None
-    ) -> Dict[str, Any]:
-        if self.limiter:
-            self.limiter.wait_if_needed(0, 1, 1, "leetcode")
-        # Add random delay to simulate human behavior
-        payload = {"query": query, "variables": variables or {}}
-        response = self.session.post(self.graphql_url, json=payload, timeout=30)
-        if response.headers.get("set-cookie"):
-            set_cookie_header = response.headers.get("set-cookie")
-            parsed_cookies = self._parse_cookie(set_cookie_header or "")
-            if "csrftoken" in parsed_cookies:
-                self.session.cookies.set(
-                    "csrftoken", parsed_cookies["csrftoken"], domain=".leetcode.com"
-                )
-                self.session.headers.update(
-                    {
-                        "x-csrftoken": parsed_cookies["csrftoken"],
-                    }
-                )
-        result = response.json()
-        return result
-
-    def get_user_submissions(
-        self, limit: int = 20, offset: int = 0
-    ) -> List[Dict[str, Any]]:
-        # GraphQL query for submissions
-        query = """
-        query ($offset: Int!, $limit: Int!, $slug: String) {
-            submissionList(offset: $offset, limit: $limit, questionSlug: $slug) {
-                hasNext
-                submissions {
-                    id
-                    lang
-                    time
-                    timestamp
-                    statusDisplay
-                    runtime
-                    url
-                    isPending
-                    title
-                    memory
-                    titleSlug
-                }
-            }
-        }
-        """
-        variables = {"offset": offset, "limit": limit, "slug": None}
-        result = self._make_graphql_request(query, variables)
+    def _parse_submissions(self, result: Dict[str, Any]) -> List[Dict[str, Any]]:
         if not result or "data" not in result:
             logger.error("Failed to fetch submissions")
             return []
@@ -186,70 +264,9 @@ class LeetCodeGraphQLService:
         logger.info(f"Fetched {len(transformed_submissions)} submissions")
         return transformed_submissions
 
-    def get_all_user_submissions(
-        self, max_submissions: Optional[int] = None, batch_size: int = 20
-    ):
-        offset = 0
-        total_yielded = 0
-        limit = batch_size  # LeetCode API limit per request
-        while True:
-            logger.info(f"Fetching submissions with offset {offset}, limit {limit}")
-            submissions = self.get_user_submissions(limit, offset)
-            if not submissions:
-                logger.info("No more submissions found")
-                break
-            if max_submissions is not None:
-                remain = max_submissions - total_yielded
-                if remain <= 0:
-                    break
-                if len(submissions) > remain:
-                    submissions = submissions[:remain]
-            yield submissions
-            total_yielded += len(submissions)
-            if max_submissions and total_yielded >= max_submissions:
-                logger.info(f"Reached max submissions limit: {max_submissions}")
-                break
-            if len(submissions) < limit:
-                logger.info("Reached end of submissions")
-                break
-            offset += limit
-
-    def get_submission_details(self, submission_id: int) -> Dict[str, Any]:
-        # GraphQL query for submission detail
-        query = """
-        query submissionDetails($id: Int!) {
-            submissionDetails(submissionId: $id) {
-                id
-                runtimePercentile
-                memoryPercentile
-                code
-                question {
-                    questionId
-                    titleSlug
-                    hasFrontendPreview
-                }
-                notes
-                flagType
-                topicTags {
-                    tagId
-                    slug
-                    name
-                }
-                runtimeError
-                compileError
-                codeOutput
-                expectedOutput
-                totalCorrect
-                totalTestcases
-                fullCodeOutput
-                testDescriptions
-                testBodies
-                testInfo
-            }
-        }
-        """
-        variables = {"id": submission_id}
-        result = self._make_graphql_request(query, variables)
+    def _parse_submission_details(
+        self, result: Dict[str, Any], submission_id: int
+    ) -> Dict[str, Any]:
         if not result or "data" not in result:
             logger.error(f"Failed to fetch submission details for ID {submission_id}")
             return {}
@@ -289,58 +306,55 @@ class LeetCodeGraphQLService:
         )
         return enhanced_details
 
-    def get_user_profile(self, username: Optional[str] = None) -> Dict[str, Any]:
-        # If no username provided, we need to get it from the session
-        if not username:
-            current_user_query = """
-            query {
-                userStatus {
-                    isSignedIn
-                    username
-                }
-            }
-            """
-            current_user_result = self._make_graphql_request(current_user_query)
-            if not current_user_result or "data" not in current_user_result:
-                logger.error("Failed to fetch current user status")
-                return {}
-            user_status = current_user_result["data"].get("userStatus", {})
-            if not user_status.get("isSignedIn"):
-                logger.warning("User is not signed in")
-                return {}
-            username = user_status.get("username")
-            if not username:
-                logger.error("No username found in user status")
-                return {}
-        query = """
-        query ($username: String!) {
-            matchedUser(username: $username) {
-                username
-                profile {
-                    realName
-                    websites
-                    countryName
-                    skillTags
-                    company
-                    school
-                    starRating
-                    aboutMe
-                    userAvatar
-                    reputation
-                    ranking
-                }
-                submitStats {
-                    acSubmissionNum {
-                        difficulty
-                        count
-                        submissions
-                    }
-                }
-            }
+    def _build_submission_details_batch_query(
+        self, submission_ids: List[int], profile: str = "ingest"
+    ) -> Tuple[str, Dict[str, Any]]:
+        """Build one GraphQL document with an aliased submissionDetails per id"""
+        fields = self.SUBMISSION_DETAIL_FIELD_PROFILES.get(profile)
+        if fields is None:
+            raise ValueError(f"Unknown submission detail profile: {profile}")
+        params = ", ".join(f"$id{i}: Int!" for i in range(len(submission_ids)))
+        selections = "\n".join(
+            f"s{i}: submissionDetails(submissionId: $id{i}) {{{fields}}}"
+            for i in range(len(submission_ids))
+        )
+        query = f"query submissionDetailsBatch({params}) {{\n{selections}\n}}"
+        variables = {f"id{i}": sid for i, sid in enumerate(submission_ids)}
+        return query, variables
+
+    def _parse_submission_details_batch(
+        self, result: Dict[str, Any], submission_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        data = (result or {}).get("data") or {}
+        if not data:
+            logger.error(
+                f"Failed to fetch batched submission details for IDs {submission_ids}"
+            )
+            return {submission_id: {} for submission_id in submission_ids}
+        return {
+            submission_id: self._parse_submission_details(
+                {"data": {"submissionDetails": data.get(f"s{i}")}}, submission_id
+            )
+            for i, submission_id in enumerate(submission_ids)
         }
-        """
-        variables = {"username": username}
-        result = self._make_graphql_request(query, variables)
+
+    def _parse_signed_in_username(self, result: Dict[str, Any]) -> Optional[str]:
+        if not result or "data" not in result:
+            logger.error("Failed to fetch current user status")
+            return None
+        user_status = result["data"].get("userStatus", {})
+        if not user_status.get("isSignedIn"):
+            logger.warning("User is not signed in")
+            return None
+        username = user_status.get("username")
+        if not username:
+            logger.error("No username found in user status")
+            return None
+        return username
+
+    def _parse_user_profile(
+        self, result: Dict[str, Any], username: str
+    ) -> Dict[str, Any]:
         if not result or "data" not in result:
             logger.error(f"Failed to fetch user profile for {username}")
             return {}
@@ -379,6 +393,198 @@ class LeetCodeGraphQLService:
         logger.info(f"Successfully fetched profile for user: {username}")
         return enhanced_profile
 
+    def _parse_problem_detail(
+        self, result: Dict[str, Any], title_slug: str
+    ) -> Optional[Dict[str, Any]]:
+        if not result or "data" not in result:
+            logger.error(f"Failed to fetch problem data for {title_slug}")
+            return None
+
+        question_data = result["data"].get("question")
+        if not question_data:
+            logger.warning(f"No question data found for {title_slug}")
+            return None
+
+        # Transform to our format
+        problem_info = {
+            "id": question_data.get("questionId"),
+            "title": question_data.get("title"),
+            "title_slug": question_data.get("titleSlug"),
+            "content": question_data.get("content"),
+            "difficulty": question_data.get("difficulty"),
+            "topic_tags": [
+                tag.get("name") for tag in question_data.get("topicTags", [])
+            ],
+        }
+
+        logger.info(f"Successfully fetched problem data for {title_slug}")
+        return problem_info
+
+
+class LeetCodeGraphQLService(BaseLeetCodeGraphQLService):
+    """LeetCode service using GraphQL API for data fetching"""
+
+    def __init__(
+        self, session_cookie: str, csrf_cache: Optional[RedisTokenCache] = None
+    ):
+        super().__init__(session_cookie, csrf_cache)
+        self.session = requests.Session()
+        self.limiter = RedisRateLimiter("leetcode_rate_limit")
+
+        # Set up more realistic session headers
+        self.session.headers.update(self._default_headers())
+
+        # Set session cookie
+        self.session.cookies.set(
+            "LEETCODE_SESSION", session_cookie, domain=".leetcode.com"
+        )
+
+        # Reuse a CSRF token harvested by any worker before fetching a new one
+        csrf_token = self.csrf_cache.get(session_cookie)
+        if csrf_token:
+            self._apply_csrf_token(csrf_token)
+        else:
+            self._initialize_session()
+
+    def _apply_csrf_token(self, csrf_token: str) -> None:
+        self.session.cookies.set("csrftoken", csrf_token, domain=".leetcode.com")
+        self.session.headers.update(
+            {
+                "x-csrftoken": csrf_token,
+            }
+        )
+
+    def _get_csrf_token(self) -> Optional[str]:
+        response = self.session.get(
+            self.graphql_url,
+            timeout=settings.LEETCODE_REQUEST_TIMEOUT,
+            allow_redirects=True,
+        )
+        set_cookie = response.headers.get("set-cookie")
+        if set_cookie:
+            parsed_cookies = self._parse_cookie(set_cookie)
+            if "csrftoken" in parsed_cookies:
+                csrf_token = parsed_cookies["csrftoken"]
+                return csrf_token
+        return None
+
+    def _initialize_session(self) -> bool:
+        # Get CSRF token with retry
+        csrf_token = self._get_csrf_token()
+        if not csrf_token:
+            logger.error("Failed to get CSRF token")
+            return False
+        self._apply_csrf_token(csrf_token)
+        self.csrf_cache.set(self.session_cookie, csrf_token)
+        return True
+
+    def _make_graphql_request(
+        self,
+        query: str,
+        variables: Optional[Dict[str, Any]] = None,
+        refresh_csrf: bool = True,
+    ) -> Dict[str, Any]:
+        if self.limiter:
+            self.limiter.wait_if_needed(0, 1, 1, "leetcode")
+        # Add random delay to simulate human behavior
+        payload = {"query": query, "variables": variables or {}}
+        response = self.session.post(
+            self.graphql_url, json=payload, timeout=settings.LEETCODE_REQUEST_TIMEOUT
+        )
+        if response.status_code == 403 and refresh_csrf:
+            # A cached CSRF token may have been revoked; harvest a new one once
+            logger.warning("LeetCode rejected CSRF token, refreshing session")
+            self.csrf_cache.delete(self.session_cookie)
+            if self._initialize_session():
+                return self._make_graphql_request(query, variables, refresh_csrf=False)
+        if response.headers.get("set-cookie"):
+            set_cookie_header = response.headers.get("set-cookie")
+            parsed_cookies = self._parse_cookie(set_cookie_header or "")
+            if "csrftoken" in parsed_cookies:
+                self._apply_csrf_token(parsed_cookies["csrftoken"])
+                self.csrf_cache.set(self.session_cookie, parsed_cookies["csrftoken"])
+        result = response.json()
+        return result
+
+    def get_user_submissions(
+        self, limit: int = 20, offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        variables = {"offset": offset, "limit": limit, "slug": None}
+        result = self._make_graphql_request(self.SUBMISSION_LIST_QUERY, variables)
+        return self._parse_submissions(result)
+
+    def get_all_user_submissions(
+        self,
+        max_submissions: Optional[int] = None,
+        batch_size: int = 20,
+        start_offset: int = 0,
+    ):
+        offset = start_offset
+        total_yielded = start_offset
+        limit = batch_size  # LeetCode API limit per request
+        while True:
+            logger.info(f"Fetching submissions with offset {offset}, limit {limit}")
+            submissions = self.get_user_submissions(limit, offset)
+            if not submissions:
+                logger.info("No more submissions found")
+                break
+            if max_submissions is not None:
+                remain = max_submissions - total_yielded
+                if remain <= 0:
+                    break
+                if len(submissions) > remain:
+                    submissions = submissions[:remain]
+            yield submissions
+            total_yielded += len(submissions)
+            if max_submissions and total_yielded >= max_submissions:
+                logger.info(f"Reached max submissions limit: {max_submissions}")
+                break
+            if len(submissions) < limit:
+                logger.info("Reached end of submissions")
+                break
+            offset += limit
+
+    def get_submission_details(self, submission_id: int) -> Dict[str, Any]:
+        variables = {"id": submission_id}
+        result = self._make_graphql_request(self.SUBMISSION_DETAILS_QUERY, variables)
+        return self._parse_submission_details(result, submission_id)
+
+    def get_submission_details_batch(
+        self, submission_ids: List[int], profile: str = "ingest"
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Fetch details for several submissions with aliased queries.
+
+        Args:
+            submission_ids: Submission ids, sent LEETCODE_DETAIL_BATCH_SIZE per request
+            profile: Field profile name from SUBMISSION_DETAIL_FIELD_PROFILES
+
+        Returns:
+            Dict mapping submission id to parsed details ({} when unavailable)
+        """
+        submission_ids = list(dict.fromkeys(submission_ids))
+        details: Dict[int, Dict[str, Any]] = {}
+        batch_size = settings.LEETCODE_DETAIL_BATCH_SIZE
+        for start in range(0, len(submission_ids), batch_size):
+            chunk = submission_ids[start : start + batch_size]
+            query, variables = self._build_submission_details_batch_query(
+                chunk, profile
+            )
+            result = self._make_graphql_request(query, variables)
+            details.update(self._parse_submission_details_batch(result, chunk))
+        return details
+
+    def get_user_profile(self, username: Optional[str] = None) -> Dict[str, Any]:
+        # If no username provided, we need to get it from the session
+        if not username:
+            current_user_result = self._make_graphql_request(self.USER_STATUS_QUERY)
+            username = self._parse_signed_in_username(current_user_result)
+            if not username:
+                return {}
+        variables = {"username": username}
+        result = self._make_graphql_request(self.USER_PROFILE_QUERY, variables)
+        return self._parse_user_profile(result, username)
+
     def get_problem_detail(self, title_slug: str) -> Optional[Dict[str, Any]]:
         """
         Get problem description using GraphQL API.
@@ -390,49 +596,9 @@ class LeetCodeGraphQLService:
             Dict with problem information or None if failed
         """
         try:
-            # GraphQL query for problem details
-            query = """
-            query questionData($titleSlug: String!) {
-                question(titleSlug: $titleSlug) {
-                    questionId
-                    title
-                    titleSlug
-                    content
-                    difficulty
-                    topicTags {
-                        name
-                        slug
-                    }
-                }
-            }
-            """
-
             variables = {"titleSlug": title_slug}
-            result = self._make_graphql_request(query, variables)
-
-            if not result or "data" not in result:
-                logger.error(f"Failed to fetch problem data for {title_slug}")
-                return None
-
-            question_data = result["data"].get("question")
-            if not question_data:
-                logger.warning(f"No question data found for {title_slug}")
-                return None
-
-            # Transform to our format
-            problem_info = {
-                "id": question_data.get("questionId"),
-                "title": question_data.get("title"),
-                "title_slug": question_data.get("titleSlug"),
-                "content": question_data.get("content"),
-                "difficulty": question_data.get("difficulty"),
-                "topic_tags": [
-                    tag.get("name") for tag in question_data.get("topicTags", [])
-                ],
-            }
-
-            logger.info(f"Successfully fetched problem data for {title_slug}")
-            return problem_info
+            result = self._make_graphql_request(self.PROBLEM_DETAIL_QUERY, variables)
+            return self._parse_problem_detail(result, title_slug)
 
         except Exception as e:
             logger.error(f"Error fetching problem description for {title_slug}: {e}")
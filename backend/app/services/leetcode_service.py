@@ -1,9 +1,15 @@
-from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
 
+from app.config import settings
 from app.schemas.leetcode import LeetCodeConfig
 from app.utils.logger import get_logger
 
 from .base_oj_service import BaseOJService
+from .leetcode_async_graphql_service import AsyncLeetCodeGraphQLService
 from .leetcode_graphql_service import LeetCodeGraphQLService
 
 logger = get_logger(__name__)
@@ -22,16 +28,125 @@ class LeetCodeService(BaseOJService[LeetCodeConfig]):
     def test_connection(self) -> bool:
         return self.service.test_connection()
 
-    def fetch_user_submissions(self, max_submissions: Optional[int] = None):
+    def fetch_user_submissions(
+        self, max_submissions: Optional[int] = None, start_offset: int = 0
+    ):
         yield from self.service.get_all_user_submissions(
-            max_submissions=max_submissions
+            max_submissions=max_submissions, start_offset=start_offset
         )
 
     def fetch_user_submissions_detail(self, submission_id: int):
         return self.service.get_submission_details(submission_id)
 
+    def fetch_user_submissions_detail_batch(
+        self, submission_ids: List[int], profile: str = "ingest"
+    ) -> Dict[int, Dict[str, Any]]:
+        """Fetch details for a page of submissions in one aliased GraphQL request."""
+        return self.service.get_submission_details_batch(submission_ids, profile)
+
+    def fetch_user_submissions_details(
+        self,
+        submission_ids: List[int],
+        concurrency: Optional[int] = None,
+        profile: str = "ingest",
+    ) -> Dict[int, Dict[str, Any]]:
+        """Fetch details for many submissions with overlapping network waits."""
+        return asyncio.run(
+            self._fetch_user_submissions_details(
+                submission_ids,
+                concurrency or settings.LEETCODE_MAX_CONNECTIONS,
+                profile,
+            )
+        )
+
+    async def _fetch_user_submissions_details(
+        self, submission_ids: List[int], concurrency: int, profile: str
+    ) -> Dict[int, Dict[str, Any]]:
+        semaphore = asyncio.Semaphore(concurrency)
+        batch_size = settings.LEETCODE_DETAIL_BATCH_SIZE
+        chunks = [
+            submission_ids[i : i + batch_size]
+            for i in range(0, len(submission_ids), batch_size)
+        ]
+        async with AsyncLeetCodeGraphQLService(
+            str(self.config.session_cookie)
+        ) as client:
+
+            async def fetch(chunk: List[int]) -> Dict[int, Dict[str, Any]]:
+                async with semaphore:
+                    try:
+                        return await client.get_submission_details_batch(chunk, profile)
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to fetch submission details for {chunk}: {e}"
+                        )
+                        return {submission_id: {} for submission_id in chunk}
+
+            results = await asyncio.gather(*(fetch(chunk) for chunk in chunks))
+        details: Dict[int, Dict[str, Any]] = {}
+        for result in results:
+            details.update(result)
+        return details
+
     def fetch_problem_detail(self, title_slug: str):
         return self.service.get_problem_detail(title_slug)
 
     def get_user_profile(self, username: Optional[str] = None) -> Dict[str, Any]:
         return self.service.get_user_profile(username)
+
+    def close(self):
+        self.service.close()
+
+
+class LeetCodeServicePool:
+    """
+    LRU pool of initialised LeetCodeService instances keyed by user.
+
+    A pooled service holds a requests.Session, which is not thread-safe, and
+    eviction closes it; a pool must therefore only be used by one thread
+    (see get_leetcode_service). A changed session cookie replaces the
+    user's service on the next get.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._services: "OrderedDict[int, Tuple[str, LeetCodeService]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int, config: LeetCodeConfig) -> LeetCodeService:
+        """Return the pooled service for a user, re-creating it if the cookie changed."""
+        assert config.session_cookie is not None, "Session cookie is required"
+        cookie_hash = hashlib.sha256(str(config.session_cookie).encode()).hexdigest()
+        with self._lock:
+            entry = self._services.get(user_id)
+            if entry and entry[0] == cookie_hash:
+                self._services.move_to_end(user_id)
+                return entry[1]
+        # Build outside the lock: initialisation may hit the network
+        service = LeetCodeService(config)
+        evicted: List[LeetCodeService] = []
+        with self._lock:
+            previous = self._services.pop(user_id, None)
+            if previous:
+                evicted.append(previous[1])
+            self._services[user_id] = (cookie_hash, service)
+            while len(self._services) > self.max_size:
+                _, (_, oldest) = self._services.popitem(last=False)
+                evicted.append(oldest)
+        for old_service in evicted:
+            old_service.close()
+        return service
+
+
+# One service pool per thread: Celery workers and API request threads each
+# reuse their own sessions and never close one in use elsewhere
+_thread_local = threading.local()
+
+
+def get_leetcode_service(user_id: int, config: LeetCodeConfig) -> LeetCodeService:
+    """Get a LeetCodeService for a user from the current thread's pool"""
+    pool: Optional[LeetCodeServicePool] = getattr(_thread_local, "pool", None)
+    if pool is None:
+        pool = LeetCodeServicePool(settings.LEETCODE_SERVICE_POOL_SIZE)
+        _thread_local.pool = pool
+    return pool.get(user_id, config)
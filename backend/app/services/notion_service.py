@@ -1,28 +1,52 @@
-import re
-from typing import Dict, List, Tuple
+import hashlib
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from bs4 import BeautifulSoup
-from markdownify import markdownify as md
 from notion_client import Client
-from notion_client.errors import APIResponseError
+from notion_client.errors import APIErrorCode, APIResponseError
 
+from app.config import settings
 from app.models import Record
 from app.schemas.notion import NotionConfig
 from app.services.base_note_service import BaseNoteService
+from app.utils.description import problem_markdown
 from app.utils.logger import get_logger
+from app.utils.token_bucket import TokenBucketLimiter, get_token_bucket
 
 logger = get_logger(__name__)
 
+NOTION_MAX_BLOCKS_PER_REQUEST = 100  # Notion rejects larger children arrays
+
+# (section name, blocks) in page order
+Sections = List[Tuple[str, List[Dict[str, Any]]]]
+
 
 class NotionService(BaseNoteService[NotionConfig]):
     """Notion integration service: only create page from record."""
 
-    def __init__(self, config: NotionConfig):
+    def __init__(
+        self, config: NotionConfig, limiter: Optional[TokenBucketLimiter] = None
+    ):
         super().__init__(config)
         assert config.token is not None, "Notion token is required"
         assert config.db_id is not None, "Notion database_id is required"
-        self.client = Client(auth=config.token)
+        client_options = (
+            {"base_url": settings.NOTION_API_BASE_URL}
+            if settings.NOTION_API_BASE_URL
+            else {}
+        )
+        self.client = Client(auth=config.token, **client_options)
         self.db_id = config.db_id
+        # Notion allows ~3 requests/s per integration, shared by all threads
+        self.limiter = limiter or get_token_bucket(
+            f"notion:{config.token}",
+            settings.NOTION_REQUESTS_PER_SECOND * 60,
+            0,
+            backoff_base=settings.NOTION_RATE_LIMIT_BACKOFF_BASE,
+            backoff_max=settings.NOTION_RATE_LIMIT_BACKOFF_MAX,
+            request_burst=settings.NOTION_REQUESTS_PER_SECOND,
+        )
 
     def _split_text(self, text: str, max_length: int = 2000) -> List[str]:
         """Split long text into chunks of max_length to avoid Notion API length limit errors."""
@@ -107,407 +131,445 @@ class NotionService(BaseNoteService[NotionConfig]):
             logger.error(f"Notion connection test failed: {e}")
             return False
 
-    def create_page_from_record(self, record: Record) -> Tuple[bool, Dict[str, str]]:
-        """Create a Notion page from a record, strictly following Notion API property/children format."""
-        try:
-            markdown_description = md(record.problem.description or "")
-            markdown_description = re.sub(
-                r"\n{3,}", "\n\n", markdown_description.strip()
-            )
-            problem_content_blocks = [
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [{"type": "text", "text": {"content": chunk}}]
-                    },
-                }
-                for i, chunk in enumerate(self._split_text(markdown_description, 2000))
-            ]
-
-            code_blocks = [
-                {
-                    "object": "block",
-                    "type": "code",
-                    "code": {
-                        "rich_text": [{"type": "text", "text": {"content": chunk}}],
-                        "language": self._map_language_to_notion(record.language),
-                    },
-                }
-                for i, chunk in enumerate(self._split_text(record.code, 2000))
-            ]
-
-            # AI Analysis blocks
-            ai_analysis_blocks = []
-            if record.ai_analysis:
-                ai_analysis = record.ai_analysis
-
-                # Summary
-                if ai_analysis.get("summary"):
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": "📊 AI Analysis Summary"
-                                            },
-                                        }
-                                    ]
-                                },
-                            },
-                            {
-                                "object": "block",
-                                "type": "paragraph",
-                                "paragraph": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": ai_analysis["summary"]},
-                                        }
-                                    ]
-                                },
-                            },
-                        ]
-                    )
+    def build_page_sections(self, record: Record) -> Tuple[str, Sections]:
+        """Build a record's page title and named block sections, strictly following Notion API property/children format.
 
-                # Complexity Analysis
-                if ai_analysis.get("time_complexity") or ai_analysis.get(
-                    "space_complexity"
-                ):
-                    complexity_text = f"Time Complexity: {ai_analysis.get('time_complexity', 'N/A')}\nSpace Complexity: {ai_analysis.get('space_complexity', 'N/A')}"
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": "⚡ Complexity Analysis"
-                                            },
-                                        }
-                                    ]
-                                },
+        This only reads the record, so callers can build pages on the thread
+        that owns the database session and send them from worker threads.
+        """
+        markdown_description = problem_markdown(record.problem)
+        problem_content_blocks = [
+            {
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {
+                    "rich_text": [{"type": "text", "text": {"content": chunk}}]
+                },
+            }
+            for i, chunk in enumerate(self._split_text(markdown_description, 2000))
+        ]
+
+        code_blocks = [
+            {
+                "object": "block",
+                "type": "code",
+                "code": {
+                    "rich_text": [{"type": "text", "text": {"content": chunk}}],
+                    "language": self._map_language_to_notion(record.language),
+                },
+            }
+            for i, chunk in enumerate(self._split_text(record.code, 2000))
+        ]
+
+        # AI Analysis blocks
+        ai_analysis_blocks = []
+        if record.ai_analysis:
+            ai_analysis = record.ai_analysis
+
+            # Summary
+            if ai_analysis.get("summary"):
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": "📊 AI Analysis Summary"
+                                        },
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "code",
-                                "code": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": complexity_text},
-                                        }
-                                    ],
-                                    "language": "plain text",
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "paragraph",
+                            "paragraph": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": ai_analysis["summary"]},
+                                    }
+                                ]
                             },
-                        ]
-                    )
-
-                # Algorithm Type
-                if ai_analysis.get("algorithm_type"):
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": "🎯 Algorithm Type"},
-                                        }
-                                    ]
-                                },
+                        },
+                    ]
+                )
+
+            # Complexity Analysis
+            if ai_analysis.get("time_complexity") or ai_analysis.get(
+                "space_complexity"
+            ):
+                complexity_text = f"Time Complexity: {ai_analysis.get('time_complexity', 'N/A')}\nSpace Complexity: {ai_analysis.get('space_complexity', 'N/A')}"
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": "⚡ Complexity Analysis"
+                                        },
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "paragraph",
-                                "paragraph": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": ai_analysis["algorithm_type"]
-                                            },
-                                        }
-                                    ]
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "code",
+                            "code": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": complexity_text},
+                                    }
+                                ],
+                                "language": "plain text",
                             },
-                        ]
-                    )
-
-                # Code Quality Score
-                if ai_analysis.get("code_quality_score"):
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": "⭐ Code Quality Score"
-                                            },
-                                        }
-                                    ]
-                                },
+                        },
+                    ]
+                )
+
+            # Algorithm Type
+            if ai_analysis.get("algorithm_type"):
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": "🎯 Algorithm Type"},
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "paragraph",
-                                "paragraph": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": f"{ai_analysis['code_quality_score']}/10"
-                                            },
-                                        }
-                                    ]
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "paragraph",
+                            "paragraph": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": ai_analysis["algorithm_type"]
+                                        },
+                                    }
+                                ]
                             },
-                        ]
-                    )
-
-                # Step Analysis
-                if ai_analysis.get("step_analysis"):
-                    step_analysis_text = "\n".join(
-                        [f"• {step}" for step in ai_analysis["step_analysis"]]
-                    )
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": "🔍 Step-by-Step Analysis"
-                                            },
-                                        }
-                                    ]
-                                },
+                        },
+                    ]
+                )
+
+            # Code Quality Score
+            if ai_analysis.get("code_quality_score"):
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": "⭐ Code Quality Score"
+                                        },
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "bulleted_list_item",
-                                "bulleted_list_item": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": step_analysis_text},
-                                        }
-                                    ]
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "paragraph",
+                            "paragraph": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": f"{ai_analysis['code_quality_score']}/10"
+                                        },
+                                    }
+                                ]
                             },
-                        ]
-                    )
-
-                # Improvement Suggestions
-                if ai_analysis.get("improvement_suggestions"):
-                    improvement_text = (
-                        ai_analysis["improvement_suggestions"]
-                        if isinstance(ai_analysis["improvement_suggestions"], str)
-                        else "\n".join(ai_analysis["improvement_suggestions"])
-                    )
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {
-                                                "content": "💡 Improvement Suggestions"
-                                            },
-                                        }
-                                    ]
-                                },
+                        },
+                    ]
+                )
+
+            # Step Analysis
+            if ai_analysis.get("step_analysis"):
+                step_analysis_text = "\n".join(
+                    [f"• {step}" for step in ai_analysis["step_analysis"]]
+                )
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": "🔍 Step-by-Step Analysis"
+                                        },
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "paragraph",
-                                "paragraph": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": improvement_text},
-                                        }
-                                    ]
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "bulleted_list_item",
+                            "bulleted_list_item": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": step_analysis_text},
+                                    }
+                                ]
                             },
-                        ]
-                    )
-
-                # Learning Points
-                if ai_analysis.get("learning_points"):
-                    learning_points_text = "\n".join(
-                        [f"• {point}" for point in ai_analysis["learning_points"]]
-                    )
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": "🎓 Learning Points"},
-                                        }
-                                    ]
-                                },
+                        },
+                    ]
+                )
+
+            # Improvement Suggestions
+            if ai_analysis.get("improvement_suggestions"):
+                improvement_text = (
+                    ai_analysis["improvement_suggestions"]
+                    if isinstance(ai_analysis["improvement_suggestions"], str)
+                    else "\n".join(ai_analysis["improvement_suggestions"])
+                )
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {
+                                            "content": "💡 Improvement Suggestions"
+                                        },
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "bulleted_list_item",
-                                "bulleted_list_item": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": learning_points_text},
-                                        }
-                                    ]
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "paragraph",
+                            "paragraph": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": improvement_text},
+                                    }
+                                ]
                             },
-                        ]
-                    )
-
-                # Related Problems
-                if ai_analysis.get("related_problems"):
-                    related_problems_text = ", ".join(ai_analysis["related_problems"])
-                    ai_analysis_blocks.extend(
-                        [
-                            {
-                                "object": "block",
-                                "type": "heading_3",
-                                "heading_3": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": "🔗 Related Problems"},
-                                        }
-                                    ]
-                                },
+                        },
+                    ]
+                )
+
+            # Learning Points
+            if ai_analysis.get("learning_points"):
+                learning_points_text = "\n".join(
+                    [f"• {point}" for point in ai_analysis["learning_points"]]
+                )
+                ai_analysis_blocks.extend(
+                    [
+                        {
+                            "object": "block",
+                            "type": "heading_3",
+                            "heading_3": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": "🎓 Learning Points"},
+                                    }
+                                ]
                             },
-                            {
-                                "object": "block",
-                                "type": "paragraph",
-                                "paragraph": {
-                                    "rich_text": [
-                                        {
-                                            "type": "text",
-                                            "text": {"content": related_problems_text},
-                                        }
-                                    ]
-                                },
+                        },
+                        {
+                            "object": "block",
+                            "type": "bulleted_list_item",
+                            "bulleted_list_item": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": learning_points_text},
+                                    }
+                                ]
                             },
-                        ]
-                    )
-
-            children = [
-                {
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {"content": "📝 Problem Description"},
-                            }
-                        ],
-                        "color": "default",
-                        "is_toggleable": False,
-                    },
-                },
-                *problem_content_blocks,
-                {
-                    "object": "block",
-                    "type": "heading_2",
-                    "heading_2": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {"content": "💻 Code Implementation"},
-                            }
-                        ],
-                        "color": "default",
-                        "is_toggleable": False,
-                    },
-                },
-                *code_blocks,
-            ]
+                        },
+                    ]
+                )
 
-            # Add AI Analysis section if available
-            if ai_analysis_blocks:
-                children.extend(
+            # Related Problems
+            if ai_analysis.get("related_problems"):
+                related_problems_text = ", ".join(ai_analysis["related_problems"])
+                ai_analysis_blocks.extend(
                     [
                         {
                             "object": "block",
-                            "type": "heading_2",
-                            "heading_2": {
+                            "type": "heading_3",
+                            "heading_3": {
                                 "rich_text": [
                                     {
                                         "type": "text",
-                                        "text": {"content": "🤖 AI Analysis"},
+                                        "text": {"content": "🔗 Related Problems"},
                                     }
-                                ],
-                                "color": "default",
-                                "is_toggleable": False,
+                                ]
+                            },
+                        },
+                        {
+                            "object": "block",
+                            "type": "paragraph",
+                            "paragraph": {
+                                "rich_text": [
+                                    {
+                                        "type": "text",
+                                        "text": {"content": related_problems_text},
+                                    }
+                                ]
                             },
                         },
-                        *ai_analysis_blocks,
                     ]
                 )
 
-            children.extend(
+        # Sections are hashed and replaced independently on re-sync. The
+        # description heading is its own section so every other section has
+        # a block to be inserted after.
+        sections = [
+            ("description_heading", [self._heading_2_block("📝 Problem Description")]),
+            ("description", problem_content_blocks),
+            (
+                "code",
+                [self._heading_2_block("💻 Code Implementation"), *code_blocks],
+            ),
+            (
+                "ai_analysis",
+                (
+                    [self._heading_2_block("🤖 AI Analysis"), *ai_analysis_blocks]
+                    if ai_analysis_blocks
+                    else []
+                ),
+            ),
+            (
+                "submission",
                 [
-                    {
-                        "object": "block",
-                        "type": "heading_2",
-                        "heading_2": {
-                            "rich_text": [
-                                {
-                                    "type": "text",
-                                    "text": {"content": "🔗 Submission Link"},
-                                }
-                            ],
-                            "color": "default",
-                            "is_toggleable": False,
-                        },
-                    },
+                    self._heading_2_block("🔗 Submission Link"),
                     {
                         "object": "block",
                         "type": "bookmark",
                         "bookmark": {"url": getattr(record, "submission_url", "")},
                     },
-                ]
-            )
+                ],
+            ),
+        ]
 
-            response = self.client.pages.create(
+        return record.problem.title, sections
+
+    def build_page(self, record: Record) -> Tuple[str, List[Dict[str, Any]]]:
+        """Build a record's page title and the flat list of its blocks."""
+        title, sections = self.build_page_sections(record)
+        return title, [block for _, blocks in sections for block in blocks]
+
+    @staticmethod
+    def _heading_2_block(content: str) -> Dict[str, Any]:
+        return {
+            "object": "block",
+            "type": "heading_2",
+            "heading_2": {
+                "rich_text": [{"type": "text", "text": {"content": content}}],
+                "color": "default",
+                "is_toggleable": False,
+            },
+        }
+
+    @staticmethod
+    def _content_hash(content: Any) -> str:
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True, ensure_ascii=False).encode()
+        ).hexdigest()[:16]
+
+    def changed_sections(
+        self, state: Optional[Dict[str, Any]], title: str, sections: Sections
+    ) -> Optional[List[str]]:
+        """Names of sections (and "title") that differ from the synced state.
+
+        Returns None when the state cannot be diffed, i.e. the page has never
+        been synced with section hashes.
+        """
+        if not state or "sections" not in state:
+            return None
+        changed = [
+            name
+            for name, blocks in sections
+            if state["sections"].get(name, {}).get("hash")
+            != self._content_hash(blocks)
+        ]
+        if state.get("title") != self._content_hash(title):
+            changed.insert(0, "title")
+        return changed
+
+    def _request(self, method: Callable[..., Any], **kwargs) -> Any:
+        """Call the Notion API within the integration's rate limit, retrying on 429."""
+        attempt = 0
+        while True:
+            self.limiter.acquire(0)
+            try:
+                response = method(**kwargs)
+            except APIResponseError as e:
+                if (
+                    e.code != APIErrorCode.RateLimited
+                    or attempt >= settings.NOTION_MAX_RETRIES
+                ):
+                    raise
+                retry_after = e.headers.get("retry-after")
+                delay = self.limiter.on_quota_error(
+                    float(retry_after) if retry_after else None
+                )
+                logger.warning(
+                    f"Notion rate limited, retry {attempt + 1}/{settings.NOTION_MAX_RETRIES} in {delay:.1f}s"
+                )
+                attempt += 1
+                continue
+            self.limiter.on_success()
+            return response
+
+    def create_page(
+        self, title: str, children: List[Dict[str, Any]]
+    ) -> Tuple[bool, Dict[str, str]]:
+        """Create a page, sending children in chunks within the per-request block limit.
+
+        Chunks of one page are appended in order; concurrency comes from
+        creating several pages at once.
+        """
+        try:
+            chunks = [
+                children[i : i + NOTION_MAX_BLOCKS_PER_REQUEST]
+                for i in range(0, len(children), NOTION_MAX_BLOCKS_PER_REQUEST)
+            ] or [[]]
+            response = self._request(
+                self.client.pages.create,
                 parent={"page_id": self.db_id},
-                properties={
-                    "title": [
-                        {"type": "text", "text": {"content": record.problem.title}}
-                    ]
-                },
-                children=children,
+                properties=self._title_properties(title),
+                children=chunks[0],
             )
+            for chunk in chunks[1:]:
+                self._request(
+                    self.client.blocks.children.append,
+                    block_id=response["id"],
+                    children=chunk,
+                )
             return True, {"page_id": response["id"], "page_url": response["url"]}
         except APIResponseError as e:
             logger.error(f"Notion API error: {e}", exc_info=True)
@@ -515,3 +577,147 @@ class NotionService(BaseNoteService[NotionConfig]):
         except Exception as e:
             logger.error(f"Failed to create Notion page: {e}", exc_info=True)
             return False, {"error": f"Create page failed: {e}"}
+
+    @staticmethod
+    def _title_properties(title: str) -> Dict[str, Any]:
+        return {"title": [{"type": "text", "text": {"content": title}}]}
+
+    def section_state(self, title: str, sections: Sections) -> Dict[str, Any]:
+        """Hashes and block counts of a page as synced, stored on the record."""
+        return {
+            "title": self._content_hash(title),
+            "sections": {
+                name: {"hash": self._content_hash(blocks), "count": len(blocks)}
+                for name, blocks in sections
+            },
+        }
+
+    def _append(
+        self,
+        block_id: str,
+        children: List[Dict[str, Any]],
+        after: Optional[str] = None,
+    ) -> List[str]:
+        """Append children in order, optionally after a block; returns their ids."""
+        block_ids: List[str] = []
+        for i in range(0, len(children), NOTION_MAX_BLOCKS_PER_REQUEST):
+            kwargs = {"after": after} if after else {}
+            response = self._request(
+                self.client.blocks.children.append,
+                block_id=block_id,
+                children=children[i : i + NOTION_MAX_BLOCKS_PER_REQUEST],
+                **kwargs,
+            )
+            new_ids = [block["id"] for block in response.get("results", [])]
+            block_ids.extend(new_ids)
+            if after and new_ids:
+                after = new_ids[-1]
+        return block_ids
+
+    def _list_child_ids(self, block_id: str) -> List[str]:
+        block_ids: List[str] = []
+        cursor = None
+        while True:
+            kwargs = {"start_cursor": cursor} if cursor else {}
+            response = self._request(
+                self.client.blocks.children.list,
+                block_id=block_id,
+                page_size=NOTION_MAX_BLOCKS_PER_REQUEST,
+                **kwargs,
+            )
+            block_ids.extend(block["id"] for block in response.get("results", []))
+            if not response.get("has_more"):
+                return block_ids
+            cursor = response.get("next_cursor")
+
+    def _replace_sections(
+        self,
+        page_id: str,
+        state: Dict[str, Any],
+        sections: Sections,
+        changed: List[str],
+    ) -> None:
+        """Delete and re-insert the blocks of changed sections only."""
+        block_ids = self._list_child_ids(page_id)
+        counts = [
+            state["sections"].get(name, {}).get("count", 0) for name, _ in sections
+        ]
+        if sum(counts) != len(block_ids) or changed[0] == sections[0][0]:
+            # Edited by hand, or nothing to anchor an insert to: rebuild the body
+            for block_id in block_ids:
+                self._request(self.client.blocks.delete, block_id=block_id)
+            self._append(page_id, [block for _, blocks in sections for block in blocks])
+            return
+        anchor = None
+        offset = 0
+        for (name, blocks), count in zip(sections, counts):
+            old_ids = block_ids[offset : offset + count]
+            offset += count
+            if name not in changed:
+                anchor = old_ids[-1] if old_ids else anchor
+                continue
+            for block_id in old_ids:
+                self._request(self.client.blocks.delete, block_id=block_id)
+            new_ids = self._append(page_id, blocks, after=anchor)
+            anchor = new_ids[-1] if new_ids else anchor
+
+    def sync_page(
+        self,
+        page_id: Optional[str],
+        state: Optional[Dict[str, Any]],
+        title: str,
+        sections: Sections,
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """Create a record's page or update only what changed since the last sync.
+
+        Args:
+            page_id: Existing page, if the record was synced before
+            state: Section state stored by the previous sync
+            title: Page title
+            sections: Named block sections from build_page_sections
+
+        Returns:
+            (success, result) where result carries page_id, page_url (for new
+            pages) and the new state to store, or an error
+        """
+        new_state = self.section_state(title, sections)
+        changed = self.changed_sections(state, title, sections) if page_id else None
+        if changed is None:
+            if page_id:
+                # Synced before section hashes existed: replace the page once
+                try:
+                    self._request(self.client.pages.update, page_id=page_id, archived=True)
+                except APIResponseError as e:
+                    logger.warning(f"Failed to archive Notion page {page_id}: {e}")
+            success, result = self.create_page(
+                title, [block for _, blocks in sections for block in blocks]
+            )
+            if success:
+                result["state"] = new_state
+            return success, result
+        try:
+            if "title" in changed:
+                self._request(
+                    self.client.pages.update,
+                    page_id=page_id,
+                    properties=self._title_properties(title),
+                )
+                changed.remove("title")
+            if changed:
+                self._replace_sections(page_id, state, sections, changed)
+            return True, {"page_id": page_id, "state": new_state}
+        except APIResponseError as e:
+            logger.error(f"Notion API error: {e}", exc_info=True)
+            return False, {"error": f"Notion API error: {e}"}
+        except Exception as e:
+            logger.error(f"Failed to update Notion page: {e}", exc_info=True)
+            return False, {"error": f"Update page failed: {e}"}
+
+    def create_page_from_record(self, record: Record) -> Tuple[bool, Dict[str, str]]:
+        """Create a Notion page from a record."""
+        try:
+            title, children = self.build_page(record)
+        except Exception as e:
+            logger.error(f"Failed to create Notion page: {e}", exc_info=True)
+            return False, {"error": f"Create page failed: {e}"}
+        return self.create_page(title, children)
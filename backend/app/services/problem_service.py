@@ -5,8 +5,16 @@ from sqlalchemy import and_, or_
 from sqlalchemy.orm import Session
 
 from app import models, schemas
-from app.services.leetcode_service import LeetCodeService
+from app.services.leetcode_service import get_leetcode_service
 from app.services.user_config_service import UserConfigService
+from app.utils.description import (
+    apply_description,
+    description_hash,
+    render_description_markdown,
+)
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 class ProblemService:
@@ -26,7 +34,9 @@ class ProblemService:
             title_slug = match.group(1)
             if not user.configs or not user.configs.leetcode_config:
                 raise ValueError("LeetCode not connected")
-            leetcode_service = LeetCodeService(user.configs.leetcode_config)
+            leetcode_service = get_leetcode_service(
+                user.id, user.configs.leetcode_config
+            )
             detail = leetcode_service.fetch_problem_detail(title_slug)
             if not detail:
                 raise ValueError("Problem not found on LeetCode")
@@ -42,6 +52,7 @@ class ProblemService:
                 url=problem_in.url,
             )
         problem = models.Problem(**problem_in.model_dump())
+        apply_description(problem)
         self.db.add(problem)
         self.db.commit()
         self.db.refresh(problem)
@@ -135,6 +146,7 @@ class ProblemService:
             return None
         for field, value in problem_in.dict(exclude_unset=True).items():
             setattr(problem, field, value)
+        apply_description(problem)
         self.db.commit()
         self.db.refresh(problem)
         return problem
@@ -199,6 +211,7 @@ class ProblemService:
         problems = []
         for p in problems_in:
             problem = models.Problem(**p.model_dump())
+            apply_description(problem)
             self.db.add(problem)
             problems.append(problem)
         self.db.commit()
@@ -206,6 +219,51 @@ class ProblemService:
             self.db.refresh(problem)
         return problems
 
+    def backfill_description_markdown(self, batch_size: int = 500) -> int:
+        """
+        Render description_markdown for problems stored before it existed.
+
+        Problems are read and written in batches of (id, description) mappings
+        without loading full ORM objects; each batch is committed on its own.
+
+        Returns:
+            Number of problems updated
+        """
+        updated = 0
+        last_id = 0
+        while True:
+            rows = (
+                self.db.query(models.Problem.id, models.Problem.description)
+                .filter(
+                    models.Problem.id > last_id,
+                    models.Problem.description_hash.is_(None),
+                )
+                .order_by(models.Problem.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+            self.db.bulk_update_mappings(
+                models.Problem,
+                [
+                    {
+                        "id": problem_id,
+                        "description_markdown": render_description_markdown(
+                            description
+                        ),
+                        "description_hash": description_hash(description),
+                    }
+                    for problem_id, description in rows
+                ],
+            )
+            self.db.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+        if updated:
+            logger.info(f"Backfilled markdown descriptions of {updated} problems")
+        return updated
+
     def get_problem_bank_stats(self, user: models.User) -> dict:
         """Get problem bank statistics for a specific user"""
         # Total problems count
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Optional
+from typing import Iterable, List, Optional, Set
 
 from sqlalchemy import func
 from sqlalchemy.orm import Session
@@ -114,6 +114,36 @@ class RecordService:
                 review_plan=None,
             )
 
+    def get_record_by_submission_id(
+        self, user_id: int, submission_id: int, oj_type: str = "leetcode"
+    ) -> Optional[models.Record]:
+        """Get a user's record by its online judge submission id."""
+        return (
+            self.db.query(models.Record)
+            .filter(
+                models.Record.user_id == user_id,
+                models.Record.oj_type == oj_type,
+                models.Record.submission_id == submission_id,
+            )
+            .first()
+        )
+
+    def existing_submission_ids(
+        self, user_id: int, submission_ids: Iterable[int], oj_type: str = "leetcode"
+    ) -> Set[int]:
+        """The submission ids among submission_ids the user already has records for."""
+        submission_ids = list(submission_ids)
+        if not submission_ids:
+            return set()
+        return {
+            submission_id
+            for (submission_id,) in self.db.query(models.Record.submission_id).filter(
+                models.Record.user_id == user_id,
+                models.Record.oj_type == oj_type,
+                models.Record.submission_id.in_(submission_ids),
+            )
+        }
+
     def get_record(self, id: int) -> Optional[models.Record]:
         """Get a single problem record by id for a user."""
         return (
@@ -185,6 +215,9 @@ class RecordService:
             total_testcases=record.total_testcases,
             topic_tags=record.topic_tags,
             ai_analysis=record.ai_analysis,
+            ai_input_tokens=record.ai_input_tokens,
+            ai_output_tokens=record.ai_output_tokens,
+            ai_latency_ms=record.ai_latency_ms,
             oj_sync_status=record.oj_sync_status,
             github_sync_status=record.github_sync_status,
             ai_sync_status=record.ai_sync_status,
@@ -1,11 +1,12 @@
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from sqlalchemy import tuple_
+from sqlalchemy import and_, tuple_
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app import models, schemas
+from app.config import settings
 from app.schemas.review import ReviewUpdate
 
 
@@ -275,7 +276,11 @@ class ReviewService:
             models.Review(
                 user_id=r.user_id,
                 problem_id=r.problem_id,
-                wrong_reason=getattr(r, "ai_analysis", "Auto generated by batch"),
+                wrong_reason=(
+                    str(r.ai_analysis)
+                    if getattr(r, "ai_analysis", None)
+                    else "Auto generated by batch"
+                ),
                 review_plan=None,
             )
             for r in unique_records
@@ -306,6 +311,70 @@ class ReviewService:
                 )
         return result
 
+    def review_candidates(self, user_id: int, record_ids: List[int]) -> List[dict]:
+        """
+        Non-accepted records among record_ids, with their existing review.
+
+        One query per chunk of REVIEW_CANDIDATE_CHUNK_SIZE ids, joining the
+        problem title and the user's review of the problem.
+        """
+        candidates = []
+        size = max(1, settings.REVIEW_CANDIDATE_CHUNK_SIZE)
+        for start in range(0, len(record_ids), size):
+            rows = (
+                self.db.query(models.Record, models.Problem.title, models.Review.id)
+                .outerjoin(
+                    models.Problem, models.Problem.id == models.Record.problem_id
+                )
+                .outerjoin(
+                    models.Review,
+                    and_(
+                        models.Review.user_id == models.Record.user_id,
+                        models.Review.problem_id == models.Record.problem_id,
+                    ),
+                )
+                .filter(
+                    models.Record.id.in_(record_ids[start : start + size]),
+                    models.Record.user_id == user_id,
+                    models.Record.execution_result != "Accepted",
+                )
+                .order_by(models.Record.id)
+                .all()
+            )
+            for record, title, review_id in rows:
+                candidates.append(
+                    {
+                        "record": record,
+                        "record_id": record.id,
+                        "problem_id": record.problem_id,
+                        "title": title or "Unknown",
+                        "execution_result": record.execution_result,
+                        "submitted_at": (
+                            record.submit_time.isoformat()
+                            if record.submit_time
+                            else None
+                        ),
+                        "language": record.language,
+                        "review_id": review_id,
+                    }
+                )
+        return candidates
+
+    def create_reviews_for_records(self, user_id: int, record_ids: List[int]) -> int:
+        """
+        Create reviews for the failed submissions among record_ids.
+
+        Candidates that already have a review are skipped; the rest go
+        through bulk_mark_as_wrong as one insert. Returns the number created.
+        """
+        records = [
+            candidate["record"]
+            for candidate in self.review_candidates(user_id, record_ids)
+            if candidate["review_id"] is None
+        ]
+        results = self.bulk_mark_as_wrong(records)
+        return len([r for r in results if r["status"] == "created"])
+
     def get_review_stats(self, user_id: int, days: int = 7) -> dict:
         from datetime import date
 
@@ -0,0 +1,227 @@
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.config import settings
+from app.deps import get_redis_client
+from app.models import SyncTask
+
+# Priority lanes, in dispatch order
+LANE_INTERACTIVE = "interactive"
+LANE_BULK = "bulk"
+LANES = [LANE_INTERACTIVE, LANE_BULK]
+
+# Celery message priority per lane; on the Redis broker 0 is the highest, so
+# small tasks overtake the shards of a backfill already in the queue
+LANE_PRIORITIES = {LANE_INTERACTIVE: 0, LANE_BULK: 9}
+
+
+def task_lane(task: SyncTask) -> str:
+    """
+    Small tasks, and batch syncs of unknown size (the watermark-bounded
+    incremental syncs), go to the interactive lane; backfills to the bulk one.
+    """
+    total = task.total_records or 0
+    return (
+        LANE_INTERACTIVE
+        if total <= settings.SYNC_SCHEDULER_INTERACTIVE_MAX_RECORDS
+        else LANE_BULK
+    )
+
+
+def lane_caps() -> Dict[str, int]:
+    """Tasks in flight per user and queue, per lane."""
+    return {
+        LANE_INTERACTIVE: settings.SYNC_SCHEDULER_USER_INTERACTIVE_CONCURRENCY,
+        LANE_BULK: settings.SYNC_SCHEDULER_USER_CONCURRENCY,
+    }
+
+
+def lane_slots(queue_slots: int) -> Dict[str, int]:
+    """
+    Tasks in flight per queue, per lane. Bulk tasks leave
+    SYNC_SCHEDULER_INTERACTIVE_RESERVED_SLOTS free for interactive ones, but
+    always get at least one slot.
+    """
+    return {
+        LANE_INTERACTIVE: queue_slots,
+        LANE_BULK: max(
+            1, queue_slots - settings.SYNC_SCHEDULER_INTERACTIVE_RESERVED_SLOTS
+        ),
+    }
+
+
+def plan_dispatch(
+    rings: Dict[str, List[int]],
+    pending: Dict[Tuple[str, int], int],
+    running: Dict[Tuple[str, int], int],
+    slots: int,
+    caps: Dict[str, int],
+    limits: Dict[str, int],
+) -> List[Tuple[str, int]]:
+    """
+    Choose which (lane, user) queues get the free slots.
+
+    Lanes are served in priority order, each up to its limit of tasks in
+    flight; within a lane users take turns in ring order, one task each,
+    skipping users at their concurrency cap. rings holds the users with
+    pending tasks per lane and is rotated in place, pending and running
+    are updated for the picks.
+    """
+    picks = []
+    for lane in LANES:
+        ring = rings.setdefault(lane, [])
+        lane_free = limits[lane] - sum(
+            count
+            for (running_lane, _), count in running.items()
+            if running_lane == lane
+        )
+        skipped = 0
+        while slots > 0 and lane_free > 0 and skipped < len(ring):
+            user_id = ring.pop(0)
+            key = (lane, user_id)
+            if running.get(key, 0) < caps[lane]:
+                picks.append(key)
+                pending[key] -= 1
+                running[key] = running.get(key, 0) + 1
+                slots -= 1
+                lane_free -= 1
+                skipped = 0
+            else:
+                skipped += 1
+            if pending.get(key, 0) > 0:
+                ring.append(user_id)
+    return picks
+
+
+class SyncSchedulerService:
+    """
+    Per-user fair dispatch of sync tasks onto the shared Celery queues.
+
+    Instead of going straight to the broker, where one user's backfill
+    would queue ahead of everyone else, tasks wait in Redis in a list per
+    queue, lane and user. At most SYNC_SCHEDULER_QUEUE_SLOTS tasks per queue
+    are in the broker or running at a time; free slots are handed out by
+    plan_dispatch. All changes happen under one lock per queue.
+    """
+
+    def __init__(self, redis_client=None):
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = next(get_redis_client())
+        return self._redis_client
+
+    @staticmethod
+    def _key(queue: str, *parts) -> str:
+        return ":".join(["sync_scheduler", queue, *map(str, parts)])
+
+    def _lock(self, queue: str):
+        return self.redis_client.lock(
+            self._key(queue, "lock"),
+            timeout=settings.SYNC_SCHEDULER_LOCK_TIMEOUT_SECONDS,
+            blocking_timeout=settings.SYNC_SCHEDULER_LOCK_TIMEOUT_SECONDS,
+        )
+
+    def submit(self, queue: str, task: SyncTask) -> None:
+        """Put a task at the end of its user's list in its lane."""
+        lane = task_lane(task)
+        with self._lock(queue):
+            if (
+                self.redis_client.rpush(
+                    self._key(queue, "pending", lane, task.user_id), task.id
+                )
+                == 1
+            ):
+                self.redis_client.rpush(self._key(queue, "ring", lane), task.user_id)
+
+    def dispatch(self, queue: str) -> List[int]:
+        """Take the tasks to start now off their lists and mark them running."""
+        with self._lock(queue):
+            running_key = self._key(queue, "running")
+            running: Dict[Tuple[str, int], int] = {}
+            entries = self.redis_client.hvals(running_key)
+            for entry in entries:
+                lane, user_id = _decode(entry).split(":")[:2]
+                key = (lane, int(user_id))
+                running[key] = running.get(key, 0) + 1
+            slots = settings.SYNC_SCHEDULER_QUEUE_SLOTS - len(entries)
+            if slots <= 0:
+                return []
+
+            rings: Dict[str, List[int]] = {}
+            pending: Dict[Tuple[str, int], int] = {}
+            for lane in LANES:
+                rings[lane] = [
+                    int(_decode(user_id))
+                    for user_id in self.redis_client.lrange(
+                        self._key(queue, "ring", lane), 0, -1
+                    )
+                ]
+                for user_id in rings[lane]:
+                    pending[(lane, user_id)] = self.redis_client.llen(
+                        self._key(queue, "pending", lane, user_id)
+                    )
+
+            picks = plan_dispatch(
+                rings,
+                pending,
+                running,
+                slots,
+                lane_caps(),
+                lane_slots(settings.SYNC_SCHEDULER_QUEUE_SLOTS),
+            )
+            task_ids = []
+            for lane, user_id in picks:
+                task_id = self.redis_client.lpop(
+                    self._key(queue, "pending", lane, user_id)
+                )
+                if task_id is None:
+                    continue
+                task_id = int(_decode(task_id))
+                self.redis_client.hset(
+                    running_key, task_id, f"{lane}:{user_id}:{int(time.time())}"
+                )
+                task_ids.append(task_id)
+
+            pipe = self.redis_client.pipeline()
+            for lane in LANES:
+                ring_key = self._key(queue, "ring", lane)
+                pipe.delete(ring_key)
+                if rings[lane]:
+                    pipe.rpush(ring_key, *rings[lane])
+            pipe.execute()
+            return task_ids
+
+    def release(self, queue: str, task_id: int) -> None:
+        """Free the slot of a task that finished."""
+        self.redis_client.hdel(self._key(queue, "running"), task_id)
+
+    def running(self, queue: str) -> Dict[int, float]:
+        """Tasks holding a slot, with the time they were dispatched."""
+        running = {}
+        for task_id, entry in self.redis_client.hgetall(
+            self._key(queue, "running")
+        ).items():
+            parts = _decode(entry).split(":")
+            running[int(_decode(task_id))] = float(parts[2]) if len(parts) > 2 else 0.0
+        return running
+
+    def expired(self, queue: str, now: Optional[float] = None) -> List[int]:
+        """
+        Tasks whose slot lease of SYNC_SCHEDULER_SLOT_LEASE_SECONDS ran out.
+
+        A task that died mid-run keeps its status, so its slot is taken back
+        after the lease whatever the database says.
+        """
+        now = time.time() if now is None else now
+        return [
+            task_id
+            for task_id, dispatched_at in self.running(queue).items()
+            if now - dispatched_at > settings.SYNC_SCHEDULER_SLOT_LEASE_SECONDS
+        ]
+
+
+def _decode(value: Optional[bytes]) -> str:
+    return value.decode() if isinstance(value, bytes) else str(value)
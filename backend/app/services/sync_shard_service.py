@@ -0,0 +1,211 @@
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.deps import get_redis_client
+from app.models import SyncStatus
+from app.services.sync_task_item_service import SyncTaskItemService
+from app.services.sync_task_service import SyncTaskService
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def shard_counter_key(task_id: int) -> str:
+    return f"sync_task_shards:{task_id}"
+
+
+class SyncShardService:
+    """
+    Progress of a sync task whose records are split across Celery workers.
+
+    Shards add their counts to a Redis hash with HINCRBY, which is atomic
+    across workers, and mirror the running totals onto the SyncTask. The
+    chord callback folds the final totals in and decides the status.
+    """
+
+    def __init__(self, db: Session, redis_client=None):
+        self.db = db
+        self.sync_task_service = SyncTaskService(db)
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = next(get_redis_client())
+        return self._redis_client
+
+    def begin(self, task_id: int) -> None:
+        """
+        Start the counters from the items earlier runs settled and mark the
+        task running, so a retry or resume keeps the totals of those runs.
+        """
+        synced, failed = SyncTaskItemService(self.db).settled(task_id)
+        key = shard_counter_key(task_id)
+        try:
+            self.redis_client.delete(key)
+            pipe = self.redis_client.pipeline()
+            pipe.hincrby(key, "synced", synced)
+            pipe.hincrby(key, "failed", failed)
+            pipe.expire(key, settings.SYNC_SHARD_COUNTER_TTL_SECONDS)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error resetting shard counters of task {task_id}: {e}")
+        self.sync_task_service.update(
+            task_id,
+            status=SyncStatus.RUNNING.value,
+            synced_records=synced,
+            failed_records=failed,
+        )
+
+    def totals(self, task_id: int) -> Dict[str, int]:
+        """Counts added by all shards so far: synced, failed and failed_shards."""
+        totals = {"synced": 0, "failed": 0, "failed_shards": 0}
+        try:
+            counters: Optional[Dict] = self.redis_client.hgetall(
+                shard_counter_key(task_id)
+            )
+        except Exception as e:
+            logger.error(f"Error reading shard counters of task {task_id}: {e}")
+            return totals
+        for name, value in (counters or {}).items():
+            name = name.decode() if isinstance(name, bytes) else name
+            totals[name] = int(value)
+        return totals
+
+    def add(
+        self, task_id: int, synced: int, failed: int, shard_failed: bool = False
+    ) -> None:
+        """
+        Add one shard's progress and commit it.
+
+        The session is committed even when Redis is down: sync tasks rely on
+        progress updates to flush their record changes.
+        """
+        key = shard_counter_key(task_id)
+        totals = None
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.hincrby(key, "synced", synced)
+            pipe.hincrby(key, "failed", failed)
+            if shard_failed:
+                pipe.hincrby(key, "failed_shards", 1)
+            pipe.expire(key, settings.SYNC_SHARD_COUNTER_TTL_SECONDS)
+            totals = pipe.execute()
+        except Exception as e:
+            logger.error(f"Error updating shard counters of task {task_id}: {e}")
+        if totals:
+            self.sync_task_service.update(
+                task_id, synced_records=totals[0], failed_records=totals[1]
+            )
+        else:
+            self.db.commit()
+
+    def finalize(self, task_id: int) -> None:
+        """Write the final totals and status once every shard has finished."""
+        totals = self.totals(task_id)
+        sync_task = self.sync_task_service.get(task_id)
+        if not sync_task:
+            return
+        if sync_task.status != SyncStatus.RUNNING.value:
+            # Paused meanwhile, or never begun: resuming runs it again
+            if sync_task.status == SyncStatus.PAUSED.value and not sync_task.paused_at:
+                # Every shard has finished, so the pause is acknowledged
+                self.sync_task_service.update(task_id, paused_at=datetime.utcnow())
+            return
+        item_service = SyncTaskItemService(self.db)
+        item_totals = item_service.totals(task_id)
+        if item_totals:
+            # Items hold the outcome of every run, not only this one
+            totals["synced"], totals["failed"] = item_totals
+        if totals["failed_shards"]:
+            status = SyncStatus.FAILED.value
+        elif (
+            item_service.counts([task_id])
+            .get(task_id, {})
+            .get(SyncStatus.PENDING.value)
+        ):
+            # Shards left items unattempted (e.g. over a token budget)
+            status = SyncStatus.PAUSED.value
+        else:
+            status = SyncStatus.COMPLETED.value
+        kwargs = (
+            {"paused_at": datetime.utcnow()}
+            if status == SyncStatus.PAUSED.value
+            else {}
+        )
+        self.sync_task_service.update(
+            task_id,
+            status=status,
+            synced_records=totals["synced"],
+            failed_records=totals["failed"],
+            **kwargs,
+        )
+        try:
+            self.redis_client.delete(shard_counter_key(task_id))
+        except Exception as e:
+            logger.error(f"Error deleting shard counters of task {task_id}: {e}")
+        logger.info(
+            f"Sharded sync task {task_id} finished with status {status}: {totals['synced']} synced, {totals['failed']} failed"
+        )
+
+
+class SyncProgress:
+    """
+    Progress reporting of one run of a sync task.
+
+    A whole task writes its counters and status to the SyncTask; a shard adds
+    what it did since its last report to the shard counters instead, and
+    leaves the status to SyncShardService.finalize.
+
+    The counts passed in cover this run only. A whole task adds them to what
+    earlier runs settled, taken by start() before claiming, and its final
+    report writes the item totals; shards start from SyncShardService.begin.
+    """
+
+    def __init__(
+        self,
+        sync_task_service: SyncTaskService,
+        task_id: int,
+        sharded: bool = False,
+        item_service: Optional[SyncTaskItemService] = None,
+    ):
+        self.task_id = task_id
+        self.sync_task_service = sync_task_service
+        self.shard_service = SyncShardService(sync_task_service.db) if sharded else None
+        self.item_service = item_service or SyncTaskItemService(sync_task_service.db)
+        self._base = (0, 0)
+        self._reported = (0, 0)
+
+    def start(self) -> None:
+        """Take the items earlier runs settled; call it before claiming."""
+        if self.shard_service is None:
+            self._base = self.item_service.settled(self.task_id)
+
+    def update(self, synced: int, failed: int, status: Optional[str] = None) -> None:
+        if self.shard_service is None:
+            kwargs = {"status": status} if status else {}
+            if status == SyncStatus.PAUSED.value:
+                # The run ends here, the task may be resumed
+                kwargs["paused_at"] = datetime.utcnow()
+            totals = self.item_service.totals(self.task_id) if status else None
+            if totals is None:
+                base_synced, base_failed = self._base
+                totals = (base_synced + synced, base_failed + failed)
+            self.sync_task_service.update(
+                self.task_id,
+                synced_records=totals[0],
+                failed_records=totals[1],
+                **kwargs,
+            )
+            return
+        reported_synced, reported_failed = self._reported
+        self.shard_service.add(
+            self.task_id,
+            synced - reported_synced,
+            failed - reported_failed,
+            shard_failed=status == SyncStatus.FAILED.value,
+        )
+        self._reported = (synced, failed)
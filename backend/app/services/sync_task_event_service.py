@@ -0,0 +1,131 @@
+import json
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import redis.asyncio as aioredis
+
+from app.config import settings
+from app.deps import get_redis_client
+from app.models import SyncStatus, SyncTask
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Statuses after which a task's event stream is closed
+TERMINAL_STATUSES = {SyncStatus.COMPLETED.value, SyncStatus.FAILED.value}
+
+
+def task_events_channel(task_id: int) -> str:
+    return f"sync_task_events:{task_id}"
+
+
+def user_events_channel(user_id: int) -> str:
+    return f"sync_task_events:user:{user_id}"
+
+
+def task_event(sync_task: SyncTask) -> Dict[str, Any]:
+    """Progress of a sync task as sent to event stream clients."""
+    return {
+        "id": sync_task.id,
+        "user_id": sync_task.user_id,
+        "type": sync_task.type,
+        "status": sync_task.status,
+        "total_records": sync_task.total_records,
+        "synced_records": sync_task.synced_records,
+        "failed_records": sync_task.failed_records,
+        "parent_task_id": sync_task.parent_task_id,
+        "updated_at": (
+            sync_task.updated_at.isoformat() if sync_task.updated_at else None
+        ),
+    }
+
+
+def format_sse(data: str, event: Optional[str] = None) -> str:
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+    return "\n".join(lines) + "\n\n"
+
+
+class SyncTaskEventService:
+    """
+    Publishes sync task progress over Redis pub/sub.
+
+    Every committed status or counter change is published on the task's
+    channel and its owner's channel; the API fans them out to browsers as
+    Server-Sent Events. Publishing is best effort and never fails a sync.
+    """
+
+    def __init__(self, redis_client=None):
+        self._redis_client = redis_client
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None:
+            self._redis_client = next(get_redis_client())
+        return self._redis_client
+
+    def publish(self, sync_task: SyncTask) -> None:
+        try:
+            payload = json.dumps(task_event(sync_task), default=str)
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.publish(task_events_channel(sync_task.id), payload)
+            pipe.publish(user_events_channel(sync_task.user_id), payload)
+            pipe.execute()
+        except Exception as e:
+            logger.error(f"Error publishing progress of sync task {sync_task.id}: {e}")
+
+
+async def sync_task_event_stream(
+    request,
+    channels: List[str],
+    snapshot: Iterable[Dict[str, Any]],
+    close_on_terminal: bool = False,
+    redis_client=None,
+) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for the given channels.
+
+    Subscribes first and then sends the snapshot, so no update published in
+    between is lost. A comment line is sent whenever nothing was published
+    for SYNC_EVENTS_HEARTBEAT_SECONDS to keep proxies from closing the
+    connection. With close_on_terminal the stream ends once the task
+    completes or fails.
+    """
+    redis_client = redis_client or aioredis.Redis.from_url(settings.REDIS_URL)
+    pubsub = redis_client.pubsub()
+    try:
+        yield f"retry: {settings.SYNC_EVENTS_RETRY_MILLISECONDS}\n\n"
+        try:
+            await pubsub.subscribe(*channels)
+        except Exception as e:
+            logger.error(f"Error subscribing to {channels}: {e}")
+            for event in snapshot:
+                yield format_sse(json.dumps(event, default=str), event="progress")
+            return
+
+        for event in snapshot:
+            yield format_sse(json.dumps(event, default=str), event="progress")
+            if close_on_terminal and event.get("status") in TERMINAL_STATUSES:
+                return
+
+        while not await request.is_disconnected():
+            message = await pubsub.get_message(
+                ignore_subscribe_messages=True,
+                timeout=settings.SYNC_EVENTS_HEARTBEAT_SECONDS,
+            )
+            if message is None:
+                yield ": heartbeat\n\n"
+                continue
+            data = message["data"]
+            data = data.decode() if isinstance(data, bytes) else data
+            yield format_sse(data, event="progress")
+            if (
+                close_on_terminal
+                and json.loads(data).get("status") in TERMINAL_STATUSES
+            ):
+                return
+    finally:
+        try:
+            await pubsub.aclose()
+            await redis_client.aclose()
+        except Exception as e:
+            logger.error(f"Error closing event subscription: {e}")
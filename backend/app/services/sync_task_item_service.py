@@ -0,0 +1,256 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import Record, SyncStatus, SyncTaskItem, SyncTaskType
+
+# Task types whose records are tracked as sync_task_items
+ITEM_TRACKED_TASK_TYPES = {
+    SyncTaskType.GITHUB_SYNC.value,
+    SyncTaskType.LEETCODE_DETAIL_SYNC.value,
+    SyncTaskType.GEMINI_SYNC.value,
+    SyncTaskType.NOTION_SYNC.value,
+}
+
+
+class SyncTaskItemService:
+    """Service for the per-record state of sync tasks."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _batches(self, record_ids: List[int]) -> Iterable[List[int]]:
+        size = max(1, settings.SYNC_ITEM_CLAIM_BATCH_SIZE)
+        for start in range(0, len(record_ids), size):
+            yield record_ids[start : start + size]
+
+    def add(self, task_id: int, record_ids: Iterable[int]) -> None:
+        """Create pending items for a new task; the caller commits."""
+        self.db.bulk_insert_mappings(
+            SyncTaskItem,
+            [
+                {
+                    "task_id": task_id,
+                    "record_id": record_id,
+                    "status": SyncStatus.PENDING.value,
+                    "attempts": 0,
+                }
+                for record_id in dict.fromkeys(record_ids)
+            ],
+        )
+
+    def has_items(self, task_id: int) -> bool:
+        return (
+            self.db.query(SyncTaskItem.id)
+            .filter(SyncTaskItem.task_id == task_id)
+            .first()
+            is not None
+        )
+
+    def claim(self, task_id: int, record_ids: List[int]) -> List[int]:
+        """
+        Mark the claimable items among record_ids running and return them.
+
+        Pending items and failed items under SYNC_ITEM_MAX_ATTEMPTS are taken
+        with one UPDATE ... RETURNING per batch, so concurrent workers never
+        claim the same item and completed items are not run again. Tasks
+        created before item tracking get record_ids back unchanged.
+        """
+        if not record_ids:
+            return []
+        if not self.has_items(task_id):
+            return list(record_ids)
+        claimed = set()
+        for batch in self._batches(record_ids):
+            result = self.db.execute(
+                update(SyncTaskItem)
+                .where(
+                    SyncTaskItem.task_id == task_id,
+                    SyncTaskItem.record_id.in_(batch),
+                    or_(
+                        SyncTaskItem.status == SyncStatus.PENDING.value,
+                        and_(
+                            SyncTaskItem.status == SyncStatus.FAILED.value,
+                            SyncTaskItem.attempts < settings.SYNC_ITEM_MAX_ATTEMPTS,
+                        ),
+                    ),
+                )
+                .values(
+                    status=SyncStatus.RUNNING.value,
+                    attempts=SyncTaskItem.attempts + 1,
+                    updated_at=datetime.utcnow(),
+                )
+                .returning(SyncTaskItem.record_id),
+                execution_options={"synchronize_session": False},
+            )
+            claimed.update(row[0] for row in result)
+        self.db.commit()
+        return [record_id for record_id in record_ids if record_id in claimed]
+
+    def finish(
+        self,
+        task_id: int,
+        record_ids: List[int],
+        status_column,
+        errors: Optional[Dict[int, str]] = None,
+    ) -> None:
+        """
+        Settle claimed items from their records' sync status; the caller commits.
+
+        Items whose record reached completed complete, the others fail with
+        the error reported for them.
+        """
+        errors = errors or {}
+        now = datetime.utcnow()
+        for batch in self._batches(record_ids):
+            running = update(SyncTaskItem).where(
+                SyncTaskItem.task_id == task_id,
+                SyncTaskItem.record_id.in_(batch),
+                SyncTaskItem.status == SyncStatus.RUNNING.value,
+            )
+            completed_ids = select(Record.id).where(
+                Record.id.in_(batch), status_column == SyncStatus.COMPLETED.value
+            )
+            self.db.execute(
+                running.where(SyncTaskItem.record_id.in_(completed_ids)).values(
+                    status=SyncStatus.COMPLETED.value, last_error=None, updated_at=now
+                ),
+                execution_options={"synchronize_session": False},
+            )
+            self.db.execute(
+                running.values(
+                    status=SyncStatus.FAILED.value,
+                    last_error="Sync did not complete",
+                    updated_at=now,
+                ),
+                execution_options={"synchronize_session": False},
+            )
+        failed_with_error = [
+            record_id for record_id in record_ids if record_id in errors
+        ]
+        for batch in self._batches(failed_with_error):
+            for item in (
+                self.db.query(SyncTaskItem)
+                .filter(
+                    SyncTaskItem.task_id == task_id,
+                    SyncTaskItem.record_id.in_(batch),
+                    SyncTaskItem.status == SyncStatus.FAILED.value,
+                )
+                .all()
+            ):
+                item.last_error = str(errors[item.record_id])[:2000]
+
+    def requeue(self, task_id: int, record_ids: List[int]) -> None:
+        """
+        Put claimed items that were not attempted back to pending, without
+        charging the attempt their claim counted; the caller commits.
+        """
+        for batch in self._batches(record_ids):
+            self.db.execute(
+                update(SyncTaskItem)
+                .where(
+                    SyncTaskItem.task_id == task_id,
+                    SyncTaskItem.record_id.in_(batch),
+                    SyncTaskItem.status == SyncStatus.RUNNING.value,
+                )
+                .values(
+                    status=SyncStatus.PENDING.value,
+                    attempts=SyncTaskItem.attempts - 1,
+                    updated_at=datetime.utcnow(),
+                ),
+                execution_options={"synchronize_session": False},
+            )
+
+    def release(
+        self, task_id: int, error: str, record_ids: Optional[List[int]] = None
+    ) -> None:
+        """Fail items left running by an interrupted run; the caller commits."""
+        query = self.db.query(SyncTaskItem).filter(
+            SyncTaskItem.task_id == task_id,
+            SyncTaskItem.status == SyncStatus.RUNNING.value,
+        )
+        if record_ids is not None:
+            query = query.filter(SyncTaskItem.record_id.in_(record_ids))
+        query.update(
+            {
+                SyncTaskItem.status: SyncStatus.FAILED.value,
+                SyncTaskItem.last_error: error[:2000],
+                SyncTaskItem.updated_at: datetime.utcnow(),
+            },
+            synchronize_session=False,
+        )
+
+    def retry_delay(self, task_id: int) -> Optional[float]:
+        """
+        Exponential backoff before re-running failed items, from the fewest
+        attempts among them. None when no failed item can be retried.
+        """
+        attempts = (
+            self.db.query(func.min(SyncTaskItem.attempts))
+            .filter(
+                SyncTaskItem.task_id == task_id,
+                SyncTaskItem.status == SyncStatus.FAILED.value,
+                SyncTaskItem.attempts < settings.SYNC_ITEM_MAX_ATTEMPTS,
+            )
+            .scalar()
+        )
+        if attempts is None:
+            return None
+        return min(
+            settings.SYNC_ITEM_RETRY_BACKOFF_BASE * 2 ** max(attempts - 1, 0),
+            settings.SYNC_ITEM_RETRY_BACKOFF_MAX,
+        )
+
+    def counts(self, task_ids: List[int]) -> Dict[int, Dict[str, int]]:
+        """Item counts per status for each task, in one GROUP BY."""
+        if not task_ids:
+            return {}
+        counts: Dict[int, Dict[str, int]] = {}
+        for task_id, status, count in (
+            self.db.query(
+                SyncTaskItem.task_id, SyncTaskItem.status, func.count(SyncTaskItem.id)
+            )
+            .filter(SyncTaskItem.task_id.in_(task_ids))
+            .group_by(SyncTaskItem.task_id, SyncTaskItem.status)
+            .all()
+        ):
+            counts.setdefault(task_id, {})[status] = count
+        return counts
+
+    def settled(self, task_id: int) -> Tuple[int, int]:
+        """
+        Completed items and failed items out of attempts: what earlier runs
+        settled for good, as a new run will not claim them again.
+        """
+        counts = dict(
+            self.db.query(SyncTaskItem.status, func.count(SyncTaskItem.id))
+            .filter(
+                SyncTaskItem.task_id == task_id,
+                or_(
+                    SyncTaskItem.status == SyncStatus.COMPLETED.value,
+                    and_(
+                        SyncTaskItem.status == SyncStatus.FAILED.value,
+                        SyncTaskItem.attempts >= settings.SYNC_ITEM_MAX_ATTEMPTS,
+                    ),
+                ),
+            )
+            .group_by(SyncTaskItem.status)
+            .all()
+        )
+        return (
+            counts.get(SyncStatus.COMPLETED.value, 0),
+            counts.get(SyncStatus.FAILED.value, 0),
+        )
+
+    def totals(self, task_id: int) -> Optional[Tuple[int, int]]:
+        """Completed and failed items of the task; None for tasks without items."""
+        counts = self.counts([task_id]).get(task_id)
+        if not counts:
+            return None
+        return (
+            counts.get(SyncStatus.COMPLETED.value, 0),
+            counts.get(SyncStatus.FAILED.value, 0),
+        )
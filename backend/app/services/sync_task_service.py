@@ -1,24 +1,44 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer
 
-from app.models import SyncStatus, SyncTask
+from app.config import settings
+from app.models import SyncStatus, SyncTask, SyncTaskItem, SyncTaskType
+from app.services.sync_task_event_service import SyncTaskEventService
+from app.services.sync_task_item_service import (
+    ITEM_TRACKED_TASK_TYPES,
+    SyncTaskItemService,
+)
+
+# Downstream stages of a pipelined batch sync, in pipeline order
+PIPELINE_STAGES = [
+    SyncTaskType.LEETCODE_DETAIL_SYNC.value,
+    SyncTaskType.GEMINI_SYNC.value,
+    SyncTaskType.GITHUB_SYNC.value,
+    SyncTaskType.NOTION_SYNC.value,
+]
 
 
 class SyncTaskService:
     """Service for SyncTask CURD operations."""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, event_service: SyncTaskEventService = None):
         self.db = db
+        self.event_service = event_service or SyncTaskEventService()
 
     def create(self, user_id: int, type: str, total_records: int, **kwargs) -> SyncTask:
         sync_task = SyncTask(
             user_id=user_id, type=type, total_records=total_records, **kwargs
         )
         self.db.add(sync_task)
+        if type in ITEM_TRACKED_TASK_TYPES and kwargs.get("record_ids"):
+            self.db.flush()
+            SyncTaskItemService(self.db).add(sync_task.id, kwargs["record_ids"])
         self.db.commit()
         self.db.refresh(sync_task)
+        self.event_service.publish(sync_task)
         return sync_task
 
     def can_start(self, task_id: int) -> bool:
@@ -33,6 +53,32 @@ class SyncTaskService:
             return False
         return True
 
+    def is_paused(self, task_id: int) -> bool:
+        """Read the current status from the database, bypassing the session cache."""
+        status = self.db.query(SyncTask.status).filter(SyncTask.id == task_id).scalar()
+        return status == SyncStatus.PAUSED.value
+
+    def has_stopped(self, sync_task: SyncTask) -> bool:
+        """
+        Whether the run of a paused task has stopped, so it may be started again.
+
+        A task paused while running keeps going until its worker reaches a
+        page boundary and stamps paused_at. A worker that died before that
+        stops updating the task; after SYNC_PAUSE_ACK_TIMEOUT_SECONDS its run
+        is taken as stopped.
+        """
+        if sync_task.paused_at is not None:
+            return True
+        if sync_task.updated_at is None:
+            return True
+        silent = (datetime.utcnow() - sync_task.updated_at).total_seconds()
+        return silent > settings.SYNC_PAUSE_ACK_TIMEOUT_SECONDS
+
+    def is_running(self, task_id: int) -> bool:
+        """Read the current status from the database, bypassing the session cache."""
+        status = self.db.query(SyncTask.status).filter(SyncTask.id == task_id).scalar()
+        return status == SyncStatus.RUNNING.value
+
     def get(self, task_id: int) -> Optional[SyncTask]:
         return self.db.query(SyncTask).filter(SyncTask.id == task_id).first()
 
@@ -46,25 +92,42 @@ class SyncTaskService:
                 setattr(sync_task, k, v)
         self.db.commit()
         self.db.refresh(sync_task)
+        self.event_service.publish(sync_task)
         return sync_task
 
+    def active(self, user_id: int) -> List[SyncTask]:
+        """Tasks of the user that have not completed or failed yet."""
+        return (
+            self.db.query(SyncTask)
+            .options(defer(SyncTask.record_ids, raiseload=True))
+            .filter(
+                SyncTask.user_id == user_id,
+                SyncTask.status.notin_(
+                    [SyncStatus.COMPLETED.value, SyncStatus.FAILED.value]
+                ),
+            )
+            .order_by(SyncTask.id)
+            .all()
+        )
+
     def delete(self, task_id: int) -> bool:
         sync_task = self.get(task_id)
         if not sync_task:
             return False
+        self.db.query(SyncTaskItem).filter(SyncTaskItem.task_id == task_id).delete(
+            synchronize_session=False
+        )
         self.db.delete(sync_task)
         self.db.commit()
         return True
 
-    def list(
+    def _filter(
         self,
+        query,
+        task_id: Optional[int] = None,
         user_id: int = None,
         type: str = None,
         status: str = None,
-        limit: int = 100,
-        offset: int = 0,
-        sort_by: str = "created_at",
-        sort_order: str = "desc",
         created_after: Optional[datetime] = None,
         created_before: Optional[datetime] = None,
         updated_after: Optional[datetime] = None,
@@ -72,10 +135,10 @@ class SyncTaskService:
         has_failed_records: Optional[bool] = None,
         min_total_records: Optional[int] = None,
         max_total_records: Optional[int] = None,
-    ) -> List[SyncTask]:
-        query = self.db.query(SyncTask)
-
+    ):
         # Basic filters
+        if task_id is not None:
+            query = query.filter(SyncTask.id == task_id)
         if user_id is not None:
             query = query.filter(SyncTask.user_id == user_id)
         if type is not None:
@@ -104,6 +167,23 @@ class SyncTaskService:
         if max_total_records is not None:
             query = query.filter(SyncTask.total_records <= max_total_records)
 
+        return query
+
+    def list(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        include_record_ids: bool = True,
+        **filters,
+    ) -> List[SyncTask]:
+        query = self.db.query(SyncTask)
+        if not include_record_ids:
+            # The JSON array can hold thousands of ids; listings use item counts
+            query = query.options(defer(SyncTask.record_ids, raiseload=True))
+        query = self._filter(query, **filters)
+
         # Sorting
         sort_column = getattr(SyncTask, sort_by, SyncTask.created_at)
         if sort_order.lower() == "asc":
@@ -115,3 +195,85 @@ class SyncTaskService:
         query = query.offset(offset).limit(limit)
 
         return query.all()
+
+    def count(self, **filters) -> int:
+        """Number of tasks matching the list() filters, as one COUNT(*)."""
+        return self._filter(self.db.query(func.count(SyncTask.id)), **filters).scalar()
+
+    def stats(self, **filters) -> Dict[str, Any]:
+        """
+        Task counts per status and per type for the list() filters.
+
+        One GROUP BY status, type, served by the (user_id, status, type,
+        created_at) index, instead of loading the tasks to count them.
+        """
+        stats: Dict[str, Any] = {
+            "total": 0,
+            **{task_status.value: 0 for task_status in SyncStatus},
+            "by_type": {},
+        }
+        rows = (
+            self._filter(
+                self.db.query(SyncTask.status, SyncTask.type, func.count(SyncTask.id)),
+                **filters,
+            )
+            .group_by(SyncTask.status, SyncTask.type)
+            .all()
+        )
+        for task_status, task_type, count in rows:
+            stats["total"] += count
+            if task_status in stats:
+                stats[task_status] += count
+            stats["by_type"][task_type] = stats["by_type"].get(task_type, 0) + count
+        return stats
+
+    def pipeline_progress(self, parent_task_id: int) -> List[Dict[str, Any]]:
+        """
+        Aggregate the stage tasks of a pipelined batch sync per stage.
+
+        One GROUP BY over the children instead of loading them: a long walk
+        dispatches several stage tasks per page.
+        """
+        rows = (
+            self.db.query(
+                SyncTask.type,
+                SyncTask.status,
+                func.count(SyncTask.id),
+                func.coalesce(func.sum(SyncTask.total_records), 0),
+                func.coalesce(func.sum(SyncTask.synced_records), 0),
+                func.coalesce(func.sum(SyncTask.failed_records), 0),
+            )
+            .filter(SyncTask.parent_task_id == parent_task_id)
+            .group_by(SyncTask.type, SyncTask.status)
+            .all()
+        )
+        stages: Dict[str, Dict[str, Any]] = {}
+        for task_type, task_status, count, total, synced, failed in rows:
+            stage = stages.setdefault(
+                task_type,
+                {
+                    "type": task_type,
+                    "tasks": 0,
+                    "pending": 0,
+                    "running": 0,
+                    "completed": 0,
+                    "failed": 0,
+                    "total_records": 0,
+                    "synced_records": 0,
+                    "failed_records": 0,
+                },
+            )
+            stage["tasks"] += count
+            if task_status in (SyncStatus.PENDING.value, SyncStatus.RETRY.value):
+                stage["pending"] += count
+            elif task_status in (
+                SyncStatus.RUNNING.value,
+                SyncStatus.COMPLETED.value,
+                SyncStatus.FAILED.value,
+            ):
+                stage[task_status] += count
+            stage["total_records"] += total
+            stage["synced_records"] += synced
+            stage["failed_records"] += failed
+        order = {task_type: i for i, task_type in enumerate(PIPELINE_STAGES)}
+        return sorted(stages.values(), key=lambda s: order.get(s["type"], len(order)))
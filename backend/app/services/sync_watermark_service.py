@@ -0,0 +1,46 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import OJType, SyncWatermark
+
+
+class SyncWatermarkService:
+    """Service for per-user incremental sync high-water marks."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def get(
+        self, user_id: int, source: str = OJType.leetcode.value
+    ) -> Optional[SyncWatermark]:
+        return (
+            self.db.query(SyncWatermark)
+            .filter(SyncWatermark.user_id == user_id, SyncWatermark.source == source)
+            .first()
+        )
+
+    def advance(
+        self,
+        user_id: int,
+        submission_id: int,
+        submit_time: Optional[datetime] = None,
+        source: str = OJType.leetcode.value,
+    ) -> SyncWatermark:
+        """Move the watermark forward; older submissions never move it back."""
+        watermark = self.get(user_id, source)
+        if watermark is None:
+            watermark = SyncWatermark(
+                user_id=user_id,
+                source=source,
+                last_submission_id=submission_id,
+                last_submit_time=submit_time,
+            )
+            self.db.add(watermark)
+        elif submission_id > watermark.last_submission_id:
+            watermark.last_submission_id = submission_id
+            watermark.last_submit_time = submit_time
+        self.db.commit()
+        self.db.refresh(watermark)
+        return watermark
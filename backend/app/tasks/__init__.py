@@ -1,7 +1,11 @@
+from .leetcode_incremental_sync import schedule_leetcode_incremental_sync
 from .review_notification import check_due_reviews
+from .sync_scheduling import dispatch_sync_queues
 from .task_manager import TaskManager
 
 __all__ = [
     "TaskManager",
     "check_due_reviews",
+    "dispatch_sync_queues",
+    "schedule_leetcode_incremental_sync",
 ]
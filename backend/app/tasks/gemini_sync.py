@@ -1,31 +1,91 @@
-from typing import Optional
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import joinedload
 
 from app.celery_app import celery_app
+from app.config import settings
 from app.deps import get_db
 from app.models import Record, SyncStatus, SyncTask
 from app.schemas.gemini import AIAnalysisStatus
+from app.services.ai_analysis_cache_service import AIAnalysisCacheService
+from app.services.code_similarity_service import CodeSimilarityService
 from app.services.gemini_service import GeminiService
+from app.services.sync_shard_service import SyncProgress
+from app.services.sync_task_item_service import SyncTaskItemService
 from app.services.sync_task_service import SyncTaskService
 from app.services.user_config_service import UserConfigService
 from app.utils.logger import get_logger
+from app.utils.static_analyzer import LOCAL_ANALYZER_VERSION, StaticAnalyzer
 
 logger = get_logger("gemini_sync")
 
 
+def _apply_analysis(
+    record: Record,
+    record_id: int,
+    success: bool,
+    analysis_result: Dict[str, Any],
+    usage: Optional[Dict[str, int]] = None,
+) -> bool:
+    """
+    Copy one analysis result onto its record; the caller commits in batches.
+
+    record_id is passed separately so logging does not reload records that a
+    previous batch commit expired. usage is the LLM cost attributed to this
+    record; records served without a call are recorded as free.
+    """
+    usage = usage or {}
+    record.ai_input_tokens = usage.get("input_tokens", 0)
+    record.ai_output_tokens = usage.get("output_tokens", 0)
+    record.ai_latency_ms = usage.get("latency_ms", 0)
+    if not success:
+        logger.error(
+            f"Gemini analysis failed for record {record_id}: {analysis_result['error']}"
+        )
+        record.ai_sync_status = SyncStatus.FAILED.value
+        return False
+    record.ai_sync_status = SyncStatus.COMPLETED.value
+    record.ai_analysis = analysis_result
+
+    # Extract and backfill topic_tags from AI analysis
+    if "topic_tags" in analysis_result and analysis_result["topic_tags"]:
+        record.topic_tags = analysis_result["topic_tags"]
+        logger.info(
+            f"Backfilled {len(analysis_result['topic_tags'])} topic tags for record {record_id}: {analysis_result['topic_tags']}"
+        )
+    logger.info(f"Successfully analyzed record {record_id}")
+    return True
+
+
 @celery_app.task
-def gemini_sync_task(task_id: int):
+def gemini_sync_task(task_id: int, shard_record_ids: Optional[List[int]] = None):
     """Celery task for Gemini AI analysis synchronization."""
     db = next(get_db())
     sync_task_service = SyncTaskService(db)
     user_config_service = UserConfigService(db)
+    item_service = SyncTaskItemService(db)
+    progress = SyncProgress(
+        sync_task_service,
+        task_id,
+        sharded=shard_record_ids is not None,
+        item_service=item_service,
+    )
     sync_count = 0
     failed_count = 0
+    claimed: List[int] = []
     try:
         sync_task: Optional[SyncTask] = sync_task_service.get(task_id)
         if not sync_task:
             logger.error(f"Sync task {task_id} not found")
             return
-        if not sync_task_service.can_start(task_id):
+        if shard_record_ids is not None:
+            # Shards of a fanned-out task run while its status is running
+            if not sync_task_service.is_running(task_id):
+                logger.info(f"Sync task {task_id} is not running, skipping shard")
+                return
+        elif not sync_task_service.can_start(task_id):
             logger.info(
                 f"Sync task {task_id} is not in pending or retry status, skipping processing"
             )
@@ -36,88 +96,193 @@ def gemini_sync_task(task_id: int):
         )
         if not gemini_config:
             logger.error(f"Gemini config not found for user {sync_task.user_id}")
-            sync_task_service.update(
-                task_id,
-                status=SyncStatus.FAILED.value,
-                synced_records=0,
-                failed_records=0,
-            )
+            progress.update(0, 0, status=SyncStatus.FAILED.value)
             return
         gemini_service = GeminiService(gemini_config)
-        record_ids = sync_task.record_ids or []
+        record_ids = (
+            shard_record_ids
+            if shard_record_ids is not None
+            else sync_task.record_ids or []
+        )
         if not record_ids:
             logger.info(f"Sync task {task_id} has no record ids, skipping processing")
             return
+        # Completed items are not run again; retries only take failed ones
+        progress.start()
+        claimed = item_service.claim(task_id, record_ids)
         records = (
             db.query(Record)
+            .options(joinedload(Record.problem))
             .filter(
-                Record.id.in_(record_ids),
+                Record.id.in_(claimed),
                 Record.user_id == sync_task.user_id,
             )
             .all()
         )
         if not records:
             logger.info(f"No records to process for task {task_id}")
-            sync_task_service.update(
-                task_id,
-                status=SyncStatus.COMPLETED.value,
-                synced_records=0,
-                failed_records=0,
-            )
+            item_service.finish(task_id, claimed, Record.ai_sync_status)
+            progress.update(0, 0, status=SyncStatus.COMPLETED.value)
             return
+        cache_service = AIAnalysisCacheService(db)
+        similarity_service = CodeSimilarityService(db)
+        similarity_service.index_records(records, commit=False)
+        cache_keys = {
+            record.id: gemini_service.analysis_cache_key(
+                record.code, record.problem_id, record.language
+            )
+            for record in records
+        }
+        cached = cache_service.get_many(cache_keys.values())
+        # Snapshot inputs before committing: worker threads only talk to Gemini,
+        # the session stays on this thread. Identical submissions share one call.
+        jobs: Dict[str, Tuple[str, str, str]] = {}
+        reused: Dict[str, Dict[str, Any]] = {}
+        record_ids_by_key: Dict[str, List[int]] = defaultdict(list)
+        records_by_id = {record.id: record for record in records}
+        errors: Dict[int, str] = {}
+        budgeted_tokens = 0
+        over_budget_ids: List[int] = []
+        cache_hits = 0
+        reused_count = 0
+        local_count = 0
+        # Confident local estimates spare the LLM unless a full analysis is asked for
+        analyzer = (
+            StaticAnalyzer()
+            if settings.LOCAL_ANALYSIS_ENABLED and not sync_task.full_analysis
+            else None
+        )
         for record in records:
-            try:
-                record.ai_sync_status = SyncStatus.RUNNING.value
-                db.commit()
-                success, analysis_result = gemini_service.analyze_code(
-                    code=record.code,
-                    problem_description=record.problem.description,
-                    language=record.language,
-                )
-                if not success:
-                    logger.error(
-                        f"Gemini analysis failed for record {record.id}: {analysis_result['error']}"
+            cache_key = cache_keys[record.id]
+            if cache_key in cached:
+                _apply_analysis(record, record.id, True, dict(cached[cache_key]))
+                sync_count += 1
+                cache_hits += 1
+                continue
+            if cache_key not in jobs and cache_key not in reused:
+                # A >threshold-similar submission's analysis stands in for a new call
+                match = similarity_service.find_reusable_analysis(record)
+                if match and match[2].get("model_version") != LOCAL_ANALYZER_VERSION:
+                    source_id, similarity, analysis = match
+                    logger.info(
+                        f"Record {record.id} reuses analysis of record {source_id} ({similarity:.2f} similar)"
                     )
-                    record.ai_sync_status = SyncStatus.FAILED.value
-                    failed_count += 1
-                else:
-                    record.ai_sync_status = SyncStatus.COMPLETED.value
-                    record.ai_analysis = analysis_result
-
-                    # Extract and backfill topic_tags from AI analysis
-                    if (
-                        "topic_tags" in analysis_result
-                        and analysis_result["topic_tags"]
-                    ):
-                        record.topic_tags = analysis_result["topic_tags"]
-                        logger.info(
-                            f"Backfilled {len(analysis_result['topic_tags'])} topic tags for record {record.id}: {analysis_result['topic_tags']}"
-                        )
-
+                    # Kept on the record only: the exact-key cache holds
+                    # analyses of this very code, not borrowed ones
+                    reused[cache_key] = analysis
+            if cache_key in reused:
+                _apply_analysis(record, record.id, True, dict(reused[cache_key]))
+                sync_count += 1
+                reused_count += 1
+                continue
+            if analyzer and cache_key not in jobs:
+                confidence, analysis = analyzer.analyze(record.code, record.language)
+                if confidence >= settings.LOCAL_ANALYSIS_MIN_CONFIDENCE:
+                    _apply_analysis(record, record.id, True, analysis)
                     sync_count += 1
-                    logger.info(f"Successfully analyzed record {record.id}")
-                db.commit()
-            except Exception as e:
-                logger.exception(f"Failed to process record {record.id}: {e}")
-                record.ai_sync_status = SyncStatus.FAILED.value
-                db.commit()
-                failed_count += 1
-        sync_task_service.update(
-            task_id,
-            status=SyncStatus.COMPLETED.value,
-            synced_records=sync_count,
-            failed_records=failed_count,
+                    local_count += 1
+                    continue
+            if cache_key not in jobs:
+                inputs = (
+                    record.code,
+                    record.problem.description if record.problem else "",
+                    record.language,
+                )
+                # Count tokens before sending; what does not fit waits for a resume
+                estimated_tokens = gemini_service.estimate_analysis_tokens(*inputs)
+                if (
+                    settings.GEMINI_TASK_TOKEN_BUDGET
+                    and budgeted_tokens + estimated_tokens
+                    > settings.GEMINI_TASK_TOKEN_BUDGET
+                ):
+                    over_budget_ids.append(record.id)
+                    continue
+                budgeted_tokens += estimated_tokens
+                jobs[cache_key] = inputs
+            record.ai_sync_status = SyncStatus.RUNNING.value
+            record_ids_by_key[cache_key].append(record.id)
+        if over_budget_ids:
+            logger.warning(
+                f"Gemini sync task {task_id} token budget {settings.GEMINI_TASK_TOKEN_BUDGET} reached, {len(over_budget_ids)} records left pending, pausing"
+            )
+        db.commit()
+        uncommitted = 0
+        # Several submissions share one request; failed items retry individually
+        job_items = list(jobs.items())
+        batch_size = max(1, settings.GEMINI_BATCH_SIZE)
+        batches = [
+            job_items[start : start + batch_size]
+            for start in range(0, len(job_items), batch_size)
+        ]
+        with ThreadPoolExecutor(
+            max_workers=settings.GEMINI_SYNC_CONCURRENCY
+        ) as executor:
+            futures = {
+                executor.submit(
+                    gemini_service.analyze_code_batch,
+                    [inputs for _, inputs in batch],
+                ): [cache_key for cache_key, _ in batch]
+                for batch in batches
+            }
+            for future in as_completed(futures):
+                batch_keys = futures[future]
+                try:
+                    results = future.result()
+                except Exception as e:
+                    logger.exception(f"Failed to analyze batch {batch_keys}: {e}")
+                    results = [(False, {"error": str(e)})] * len(batch_keys)
+                for cache_key, (success, analysis_result) in zip(batch_keys, results):
+                    usage = analysis_result.pop("usage", None)
+                    if success:
+                        cache_service.put(
+                            cache_key, gemini_config.model_name, analysis_result
+                        )
+                    for position, record_id in enumerate(record_ids_by_key[cache_key]):
+                        # Identical submissions share the call; bill it once
+                        if _apply_analysis(
+                            records_by_id[record_id],
+                            record_id,
+                            success,
+                            dict(analysis_result),
+                            usage if position == 0 else None,
+                        ):
+                            sync_count += 1
+                        else:
+                            errors[record_id] = analysis_result.get("error")
+                            failed_count += 1
+                        uncommitted += 1
+                if uncommitted >= settings.GEMINI_COMMIT_BATCH_SIZE:
+                    progress.update(sync_count, failed_count)
+                    uncommitted = 0
+        db.commit()
+        # Records beyond the first of a job share its LLM call
+        deduplicated = sum(len(ids) - 1 for ids in record_ids_by_key.values())
+        cache_service.record_lookups(
+            cache_hits, len(jobs), reused=reused_count, deduplicated=deduplicated
+        )
+        cache_service.evict(settings.AI_ANALYSIS_CACHE_MAX_ENTRIES)
+        logger.info(
+            f"Gemini sync task {task_id} analysis cache: {cache_hits}/{len(records)} hits, {reused_count} near-duplicates, {deduplicated} duplicates in task, {local_count} local analyses, {len(jobs)} LLM calls"
+        )
+        # Records over the budget were not attempted: they stay pending and the
+        # task pauses, so resuming or retrying it analyzes them
+        item_service.requeue(task_id, over_budget_ids)
+        item_service.finish(task_id, claimed, Record.ai_sync_status, errors)
+        progress.update(
+            sync_count,
+            failed_count,
+            status=(
+                SyncStatus.PAUSED.value
+                if over_budget_ids
+                else SyncStatus.COMPLETED.value
+            ),
         )
         logger.info(
             f"Gemini sync task {task_id} completed: {sync_count} successful, {failed_count} failed"
         )
     except Exception as e:
         logger.exception(f"Gemini sync task {task_id} error: {e}")
-        sync_task_service.update(
-            task_id,
-            status=SyncStatus.FAILED.value,
-            synced_records=sync_count,
-            failed_records=failed_count,
-        )
+        item_service.release(task_id, str(e), claimed)
+        progress.update(sync_count, failed_count, status=SyncStatus.FAILED.value)
     finally:
         db.close()
@@ -1,26 +1,78 @@
 import re
+from collections import defaultdict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-
-from markdownify import markdownify as md
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from app.celery_app import celery_app
-from app.deps import get_db
+from app.config import settings
+from app.deps import get_db, get_redis_client
 from app.models import Record, SyncStatus, SyncTask
 from app.schemas.github import GitHubConfig, GitHubSyncStatus
+from app.services.base_repo_service import BaseRepoService
+from app.services.git_mirror_service import GitMirrorService
 from app.services.github_service import GitHubService
+from app.services.sync_shard_service import SyncProgress
+from app.services.sync_task_item_service import SyncTaskItemService
 from app.services.sync_task_service import SyncTaskService
 from app.services.user_config_service import UserConfigService
+from app.utils.description import problem_markdown
 from app.utils.logger import get_logger
 
 logger = get_logger("github_sync")
 
 
+class PushLockTimeout(Exception):
+    """Another worker held the push lock of the user for the whole wait."""
+
+
+@contextmanager
+def _push_lock(user_id: int) -> Iterator[None]:
+    """
+    Serialize GitHub pushes of one user across workers.
+
+    A pipelined batch sync starts a GitHub stage per page, and concurrent
+    updates of one branch would be rejected as non-fast-forward. Waiting
+    longer than GITHUB_PUSH_LOCK_TIMEOUT_SECONDS raises PushLockTimeout, so
+    the caller can requeue the run. Only when Redis itself is unreachable
+    does the push run unlocked.
+    """
+    lock = None
+    acquired = False
+    try:
+        lock = next(get_redis_client()).lock(
+            f"github_push_lock:{user_id}",
+            timeout=settings.GITHUB_PUSH_LOCK_TIMEOUT_SECONDS,
+        )
+        acquired = lock.acquire(
+            blocking_timeout=settings.GITHUB_PUSH_LOCK_TIMEOUT_SECONDS
+        )
+    except Exception as e:
+        logger.warning(
+            f"Push lock of user {user_id} unavailable, pushing unlocked: {e}"
+        )
+        lock = None
+    if lock is not None and not acquired:
+        raise PushLockTimeout(f"Push lock of user {user_id} timed out")
+    try:
+        yield
+    finally:
+        if lock is not None:
+            try:
+                lock.release()
+            except Exception as e:
+                logger.warning(f"Failed to release push lock of user {user_id}: {e}")
+
+
 class GitHubSyncTask:
     def __init__(self, db, config: GitHubConfig):
         self.db = db
         self.config = config
-        self.service = GitHubService(config)
+        self.service: BaseRepoService = (
+            GitMirrorService(config)
+            if config.sync_mode == "mirror"
+            else GitHubService(config)
+        )
 
     def _get_file_extension(self, language: str) -> str:
         """Get file extension based on programming language."""
@@ -103,17 +155,14 @@ class GitHubSyncTask:
             )
             code = record.code
             content = self._format_code_content(
-                record.language, problem_title, record.problem.description, code
+                record.language, problem_title, problem_markdown(record.problem), code
             )
             files_data.append({"file_path": file_path, "code": content})
         return files_data
 
     def _format_code_content(
-        self, language: str, problem_title: str, problem_description: str, code: str
+        self, language: str, problem_title: str, markdown_desc: str, code: str
     ) -> str:
-        markdown_desc = md(problem_description or "")
-        markdown_desc = re.sub(r"\n{3,}", "\n\n", markdown_desc.strip())
-
         language = language.lower()
         if language in ["python", "python3"]:
             return f'"""\n{problem_title}\n\n{markdown_desc}\n\nLeetCode Problem\n"""\n\n{code}\n\n# Test cases\nif __name__ == "__main__":\n    # Add your test cases here\n    pass\n'
@@ -183,34 +232,153 @@ class GitHubSyncTask:
 
         return next_date.strftime(template)
 
-    def run(self, sync_task: SyncTask, records: List[Record]):
+    def _split_into_chunks(
+        self, items: List[Tuple[Record, Dict[str, str]]]
+    ) -> List[List[Tuple[Record, Dict[str, str]]]]:
+        """Group (record, file) pairs into commits within the file and byte limits."""
+        chunks: List[List[Tuple[Record, Dict[str, str]]]] = []
+        current: List[Tuple[Record, Dict[str, str]]] = []
+        current_bytes = 0
+        for item in items:
+            file_bytes = len(item[1]["code"].encode())
+            if current and (
+                len(current) >= settings.GITHUB_MAX_FILES_PER_COMMIT
+                or current_bytes + file_bytes > settings.GITHUB_MAX_BYTES_PER_COMMIT
+            ):
+                chunks.append(current)
+                current, current_bytes = [], 0
+            current.append(item)
+            current_bytes += file_bytes
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def _commit_to_mirror(self, items: List[Tuple[Record, Dict[str, str]]]) -> bool:
+        """
+        Commit to the local mirror, one commit per submission day if configured,
+        then publish them all with a single push.
+        """
+        if self.config.commit_per_day:
+            by_day = defaultdict(list)
+            for item in sorted(items, key=lambda item: item[0].submit_time):
+                by_day[item[0].submit_time.date()].append(item)
+            groups = list(by_day.values())
+        else:
+            groups = [items]
+        commits = []
+        try:
+            for group in groups:
+                first_record = group[0][0]
+                commit_message = self._generate_commit_message(
+                    first_record.problem.title, first_record.submit_time
+                )
+                commit_sha = self.service.commit_files(
+                    [file_data for _, file_data in group],
+                    commit_message,
+                    group[-1][0].submit_time if self.config.commit_per_day else None,
+                )
+                commits.append((group, commit_sha))
+            self.service.publish()
+        except Exception as e:
+            logger.exception(f"[GitHubSyncTask] Mirror push failed: {e}")
+            for record, _ in items:
+                record.github_sync_status = SyncStatus.FAILED.value
+            return False
+        for group, commit_sha in commits:
+            for record, _ in group:
+                record.github_sync_status = SyncStatus.COMPLETED.value
+                if commit_sha:
+                    record.git_file_path = self.service.commit_url(commit_sha)
+        logger.info(f"[GitHubSyncTask] Published {len(commits)} mirror commits")
+        return True
+
+    def run(
+        self,
+        sync_task: SyncTask,
+        records: List[Record],
+        progress: Optional[SyncProgress] = None,
+    ) -> Tuple[int, int]:
+        """
+        Push records to GitHub in commits of bounded size.
+
+        Record statuses and task progress are committed after every chunk, so a
+        failed commit leaves only its own records FAILED for the next retry.
+        Mirror mode commits locally and publishes everything in one push.
+
+        Returns:
+            (synced_records, failed_records)
+        """
+        task_id = sync_task.id
         files_data = self.prepare_files_data(records)
         if not files_data:
-            logger.info(f"No files to push for task {sync_task.id}")
-            return False
-        commit_message = self._generate_commit_message(
-            records[0].problem.title, records[0].submit_time
-        )
+            logger.info(f"No files to push for task {task_id}")
+            return 0, 0
         try:
-            url = self.service.push_files(files_data, commit_message)
-            for record in records:
-                record.github_sync_status = SyncStatus.COMPLETED.value
-                record.git_file_path = url
-            self.db.commit()
-            logger.info(
-                f"[GitHubSyncTask] Task {sync_task.id} completed. Commit: {url}"
-            )
-            return True
+            # Files whose blob SHA matches the remote tree need no commit at all
+            changed_paths = {
+                f["file_path"] for f in self.service.filter_unchanged(files_data)
+            }
         except Exception as e:
-            logger.exception(f"[GitHubSyncTask] Task {sync_task.id} failed: {e}")
-            return False
+            logger.exception(f"[GitHubSyncTask] Task {task_id} failed: {e}")
+            return 0, len(records)
+        progress = progress or SyncProgress(SyncTaskService(self.db), task_id)
+        synced_count = failed_count = 0
+        changed = []
+        for record, file_data in zip(records, files_data):
+            if file_data["file_path"] in changed_paths:
+                changed.append((record, file_data))
+            else:
+                record.github_sync_status = SyncStatus.COMPLETED.value
+                synced_count += 1
+        progress.update(synced_count, failed_count)
+
+        if isinstance(self.service, GitMirrorService):
+            if changed and self._commit_to_mirror(changed):
+                synced_count += len(changed)
+            else:
+                failed_count += len(changed)
+            progress.update(synced_count, failed_count)
+            return synced_count, failed_count
+
+        chunks = self._split_into_chunks(changed)
+        for index, chunk in enumerate(chunks, 1):
+            first_record = chunk[0][0]
+            try:
+                commit_message = self._generate_commit_message(
+                    first_record.problem.title, first_record.submit_time
+                )
+                url = self.service.push_files(
+                    [file_data for _, file_data in chunk], commit_message
+                )
+                status = SyncStatus.COMPLETED.value
+                synced_count += len(chunk)
+                logger.info(
+                    f"[GitHubSyncTask] Task {task_id} chunk {index}/{len(chunks)} committed: {url}"
+                )
+            except Exception as e:
+                logger.exception(
+                    f"[GitHubSyncTask] Task {task_id} chunk {index}/{len(chunks)} failed: {e}"
+                )
+                url, status = None, SyncStatus.FAILED.value
+                failed_count += len(chunk)
+            for record, _ in chunk:
+                record.github_sync_status = status
+                if url:
+                    record.git_file_path = url
+            progress.update(synced_count, failed_count)
+        logger.info(
+            f"[GitHubSyncTask] Task {task_id} finished: {len(records) - len(changed)} unchanged, {len(chunks)} commits, {failed_count} failed"
+        )
+        return synced_count, failed_count
 
 
-@celery_app.task
-def github_sync_task(task_id: int):
+@celery_app.task(bind=True, max_retries=settings.GITHUB_PUSH_LOCK_MAX_RETRIES)
+def github_sync_task(self, task_id: int):
     db = next(get_db())
     sync_task_service = SyncTaskService(db)
     user_config_service = UserConfigService(db)
+    item_service = SyncTaskItemService(db)
+    claimed: List[int] = []
     try:
         sync_task: Optional[SyncTask] = sync_task_service.get(task_id)
         if not sync_task:
@@ -233,10 +401,14 @@ def github_sync_task(task_id: int):
         if not github_config:
             logger.error(f"GitHub config not found for user {user_id}")
             return
+        progress = SyncProgress(sync_task_service, task_id, item_service=item_service)
+        # Completed items are not run again; retries only take failed ones
+        progress.start()
+        claimed = item_service.claim(task_id, record_ids)
         records = (
             db.query(Record)
             .filter(
-                Record.id.in_(record_ids),
+                Record.id.in_(claimed),
                 Record.user_id == user_id,
                 Record.github_sync_status.in_(
                     [SyncStatus.PENDING.value, SyncStatus.FAILED.value]
@@ -248,22 +420,30 @@ def github_sync_task(task_id: int):
             f"[GitHubSyncTask] Running task {sync_task.id} with {len(records)} records"
         )
         sync = GitHubSyncTask(db, github_config)
-        success = sync.run(sync_task, records)
-        if success:
-            sync_task_service.update(
-                task_id,
-                status=SyncStatus.COMPLETED.value,
-                synced_records=len(records),
-                failed_records=0,
-            )
-        else:
-            sync_task_service.update(
-                task_id,
-                status=SyncStatus.FAILED.value,
-                synced_records=0,
-                failed_records=len(records),
-            )
+        with _push_lock(user_id):
+            synced_count, failed_count = sync.run(sync_task, records, progress)
+        db.commit()
+        item_service.finish(task_id, claimed, Record.github_sync_status)
+        progress.update(
+            synced_count,
+            failed_count,
+            status=(
+                SyncStatus.FAILED.value if failed_count else SyncStatus.COMPLETED.value
+            ),
+        )
+    except PushLockTimeout as e:
+        # Nothing was pushed: the items wait for the next attempt uncharged
+        item_service.requeue(task_id, claimed)
+        if self.request.retries >= self.max_retries:
+            logger.error(f"[GitHubSyncTask] Task {task_id} gave up: {e}")
+            sync_task_service.update(task_id, status=SyncStatus.FAILED.value)
+            return
+        logger.warning(f"[GitHubSyncTask] Task {task_id} requeued: {e}")
+        sync_task_service.update(task_id, status=SyncStatus.RETRY.value)
+        raise self.retry(countdown=settings.GITHUB_PUSH_LOCK_RETRY_SECONDS)
     except Exception as e:
         logger.exception(f"[GitHubSyncTask] Task {task_id} error: {e}")
+        item_service.release(task_id, str(e), claimed)
+        db.commit()
     finally:
         db.close()
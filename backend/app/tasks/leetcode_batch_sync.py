@@ -1,13 +1,16 @@
+from datetime import datetime
 from typing import Optional
 
 from app import schemas
 from app.celery_app import celery_app
 from app.deps import get_db, get_redis_client
 from app.models import OJType, SyncStatus, SyncTask
-from app.services.leetcode_service import LeetCodeService
+from app.services.code_similarity_service import CodeSimilarityService
+from app.services.leetcode_service import get_leetcode_service
 from app.services.problem_service import ProblemService
 from app.services.record_service import RecordService
 from app.services.sync_task_service import SyncTaskService
+from app.services.sync_watermark_service import SyncWatermarkService
 from app.services.user_config_service import UserConfigService
 from app.utils.logger import get_logger
 from app.utils.rate_limiter import get_global_rate_limiter
@@ -23,8 +26,11 @@ def leetcode_batch_sync_task(task_id: int):
     sync_task_service = SyncTaskService(db)
     user_config_service = UserConfigService(db)
     record_service = RecordService(db)
+    watermark_service = SyncWatermarkService(db)
+    similarity_service = CodeSimilarityService(db)
     sync_count = 0
     failed_count = 0
+    paused = False
     problem_service = ProblemService(db)
     try:
         sync_task: Optional[SyncTask] = sync_task_service.get(task_id)
@@ -36,6 +42,9 @@ def leetcode_batch_sync_task(task_id: int):
                 f"Sync task {task_id} is not in pending or retry status, skipping processing"
             )
             return
+        if sync_task_service.is_paused(task_id):
+            logger.info(f"Sync task {task_id} is paused, skipping processing")
+            return
         limiter.wait_if_needed(0, 1, 1, "leetcode")
         config = user_config_service.get(sync_task.user_id)
         leetcode_config = (
@@ -44,26 +53,83 @@ def leetcode_batch_sync_task(task_id: int):
         if not leetcode_config:
             logger.error(f"LeetCode config not found for user {sync_task.user_id}")
             return
-        service = LeetCodeService(leetcode_config)
-        if sync_task.total_records:
-            submissions = service.fetch_user_submissions(
-                max_submissions=sync_task.total_records
+        service = get_leetcode_service(sync_task.user_id, leetcode_config)
+        # Resume and retry continue after the last committed page
+        checkpoint = sync_task.checkpoint or {}
+        offset = checkpoint.get("offset", 0)
+        page = checkpoint.get("page", 0)
+        last_submission_id = checkpoint.get("last_submission_id")
+        # Newest submission seen by this walk, promoted to the watermark on completion
+        newest_submission_id = checkpoint.get("newest_submission_id")
+        newest_submit_time = checkpoint.get("newest_submit_time")
+        watermark = watermark_service.get(sync_task.user_id)
+        watermark_id = watermark.last_submission_id if watermark else None
+        if checkpoint:
+            sync_count = sync_task.synced_records or 0
+            failed_count = sync_task.failed_records or 0
+            logger.info(
+                f"[LeetCodeBatchSyncTask] Task {task_id} resuming at offset {offset}, page {page}"
             )
-        else:
-            submissions = service.fetch_user_submissions()
+        submissions = service.fetch_user_submissions(
+            max_submissions=sync_task.total_records or None, start_offset=offset
+        )
         sync_task.status = SyncStatus.RUNNING.value
         sync_task_service.update(task_id, status=SyncStatus.RUNNING.value)
         early_stop = False
         for batch in submissions:
+            new_submissions = []
             for submission in batch:
                 record_id = submission["submission_id"]
-                record = record_service.get_record(int(record_id))
-                if record:
+                if last_submission_id and int(record_id) >= int(last_submission_id):
+                    # Offsets shift when new submissions arrive while paused;
+                    # anything at or above the checkpoint was already handled
+                    continue
+                if newest_submission_id is None:
+                    newest_submission_id = int(record_id)
+                    if submission.get("submit_time"):
+                        newest_submit_time = submission["submit_time"].isoformat()
+                if watermark_id is not None:
+                    if int(record_id) <= watermark_id:
+                        logger.info(
+                            f"Record {record_id} is at or below the watermark {watermark_id}, stopping sync"
+                        )
+                        early_stop = True
+                        break
+                elif record_service.get_record_by_submission_id(
+                    sync_task.user_id, int(record_id)
+                ):
                     logger.info(
                         f"Record {record_id} already exists, stopping sync as subsequent records are likely synced"
                     )
                     early_stop = True
                     break
+                new_submissions.append(submission)
+            if watermark_id is not None and new_submissions:
+                # Pages committed by an earlier run that failed before moving
+                # the watermark are above it; skip what already exists
+                existing = record_service.existing_submission_ids(
+                    sync_task.user_id,
+                    [int(s["submission_id"]) for s in new_submissions],
+                )
+                if existing:
+                    logger.info(
+                        f"[LeetCodeBatchSyncTask] Task {task_id} skipping {len(existing)} submissions already synced"
+                    )
+                    new_submissions = [
+                        s
+                        for s in new_submissions
+                        if int(s["submission_id"]) not in existing
+                    ]
+            details = (
+                service.fetch_user_submissions_detail_batch(
+                    [int(s["submission_id"]) for s in new_submissions]
+                )
+                if new_submissions
+                else {}
+            )
+            created_records = []
+            for submission in new_submissions:
+                record_id = submission["submission_id"]
                 try:
                     problem = problem_service.get_problem_by_title_slug(
                         submission["problem_title_slug"]
@@ -76,7 +142,7 @@ def leetcode_batch_sync_task(task_id: int):
                             ),
                             user=sync_task.user,
                         )
-                    detail = service.fetch_user_submissions_detail(int(record_id))
+                    detail = details.get(int(record_id)) or {}
                     new_record = record_service.create_record(
                         sync_task.user_id,
                         schemas.RecordCreate(
@@ -101,6 +167,7 @@ def leetcode_batch_sync_task(task_id: int):
                     if not detail:
                         new_record.oj_sync_status = SyncStatus.FAILED.value
                         db.commit()
+                    created_records.append(new_record)
                     sync_count += 1
                 except Exception as e:
                     logger.exception(
@@ -108,13 +175,70 @@ def leetcode_batch_sync_task(task_id: int):
                     )
                     failed_count += 1
                 logger.info(f"[LeetCodeBatchSyncTask] Record {record_id} synced.")
+            # Keep the near-duplicate index current as records arrive
+            similarity_service.index_records(created_records)
+            if sync_task.pipeline and created_records:
+                # Imported here: the pipeline starts tasks through task_manager,
+                # which imports this module
+                from app.tasks.pipeline import start_pipeline_batch
+
+                try:
+                    start_pipeline_batch(
+                        db,
+                        sync_task,
+                        config,
+                        [r.id for r in created_records],
+                        [
+                            r.id
+                            for r in created_records
+                            if r.oj_sync_status == SyncStatus.FAILED.value
+                        ],
+                    )
+                except Exception as e:
+                    # The records stay pending for a manually started sync
+                    logger.exception(
+                        f"[LeetCodeBatchSyncTask] Task {task_id} failed to dispatch page {page} downstream: {e}"
+                    )
             if early_stop:
                 logger.info(
                     "[LeetCodeBatchSyncTask] Early stop triggered, ending sync process"
                 )
                 break
+            offset += len(batch)
+            page += 1
+            if batch:
+                last_submission_id = int(batch[-1]["submission_id"])
             sync_task_service.update(
-                task_id, synced_records=sync_count, failed_records=failed_count
+                task_id,
+                synced_records=sync_count,
+                failed_records=failed_count,
+                checkpoint={
+                    "offset": offset,
+                    "last_submission_id": last_submission_id,
+                    "page": page,
+                    "newest_submission_id": newest_submission_id,
+                    "newest_submit_time": newest_submit_time,
+                },
+            )
+            if sync_task_service.is_paused(task_id):
+                paused = True
+                # Acknowledge the pause: the task may be resumed from here on
+                sync_task_service.update(task_id, paused_at=datetime.utcnow())
+                logger.info(
+                    f"[LeetCodeBatchSyncTask] Task {task_id} paused at offset {offset}"
+                )
+                break
+        if paused:
+            return
+        if newest_submission_id is not None:
+            watermark_service.advance(
+                sync_task.user_id,
+                newest_submission_id,
+                (
+                    datetime.fromisoformat(newest_submit_time)
+                    if newest_submit_time
+                    else None
+                ),
             )
         final_status = "COMPLETED_EARLY_STOP" if early_stop else "COMPLETED"
         sync_task_service.update(
@@ -1,9 +1,13 @@
-from typing import Optional
+from typing import List, Optional
 
 from app.celery_app import celery_app
+from app.config import settings
 from app.deps import get_db
 from app.models import Record, SyncStatus, SyncTask
-from app.services.leetcode_service import LeetCodeService
+from app.services.code_similarity_service import CodeSimilarityService
+from app.services.leetcode_service import get_leetcode_service
+from app.services.sync_shard_service import SyncProgress
+from app.services.sync_task_item_service import SyncTaskItemService
 from app.services.sync_task_service import SyncTaskService
 from app.services.user_config_service import UserConfigService
 from app.utils.logger import get_logger
@@ -18,6 +22,9 @@ def leetcode_detail_sync_task(task_id: int):
     user_config_service = UserConfigService(db)
     sync_count = 0
     failed_count = 0
+    item_service = SyncTaskItemService(db)
+    progress = SyncProgress(sync_task_service, task_id, item_service=item_service)
+    chunk: List[int] = []
     try:
         sync_task: Optional[SyncTask] = sync_task_service.get(task_id)
         if not sync_task:
@@ -39,60 +46,88 @@ def leetcode_detail_sync_task(task_id: int):
         if not leetcode_config:
             logger.error(f"LeetCode config not found for user {sync_task.user_id}")
             return
-        service = LeetCodeService(leetcode_config)
-        for record_id in record_ids:
-            record = (
-                db.query(Record)
+        service = get_leetcode_service(sync_task.user_id, leetcode_config)
+        similarity_service = CodeSimilarityService(db)
+        chunk_size = settings.LEETCODE_DETAIL_SYNC_CHUNK_SIZE
+        progress.start()
+        for i in range(0, len(record_ids), chunk_size):
+            # Claimed per chunk; retries only take the failed items
+            chunk = item_service.claim(task_id, record_ids[i : i + chunk_size])
+            if not chunk:
+                continue
+            records = (
+                db.query(Record.id, Record.submission_id, Record.problem_id)
                 .filter(
-                    Record.id == record_id,
+                    Record.id.in_(chunk),
                     Record.oj_sync_status.in_(
                         [SyncStatus.PENDING.value, SyncStatus.FAILED.value]
                     ),
                 )
-                .first()
+                .all()
             )
-            if not record:
-                logger.warning(f"Record {record_id} not found")
+            missing = set(chunk) - {record.id for record in records}
+            if missing:
+                logger.warning(f"Records {sorted(missing)} not found")
+            if not records:
+                item_service.finish(task_id, chunk, Record.oj_sync_status)
+                db.commit()
                 continue
             try:
-                detail = service.fetch_user_submissions_detail(record.submission_id)
+                details = service.fetch_user_submissions_details(
+                    [record.submission_id for record in records]
+                )
+            except Exception as e:
+                logger.exception(
+                    f"[LeetCodeDetailSyncTask] Detail fetch failed for records {chunk}: {e}"
+                )
+                details = {}
+            mappings = []
+            indexed_codes = []
+            for record in records:
+                detail = details.get(record.submission_id)
                 if detail:
-                    record.code = detail["code"]
-                    record.runtime_percentile = detail["runtime_percentile"]
-                    record.memory_percentile = detail["memory_percentile"]
-                    record.total_correct = detail["total_correct"]
-                    record.total_testcases = detail["total_testcases"]
-                    record.topic_tags = detail["topic_tags"]
-                    record.oj_sync_status = SyncStatus.COMPLETED.value
-                    db.commit()
-                    logger.info(f"[LeetCodeDetailSyncTask] Record {record_id} synced.")
+                    mappings.append(
+                        {
+                            "id": record.id,
+                            "code": detail["code"],
+                            "runtime_percentile": detail["runtime_percentile"],
+                            "memory_percentile": detail["memory_percentile"],
+                            "total_correct": detail["total_correct"],
+                            "total_testcases": detail["total_testcases"],
+                            "topic_tags": detail["topic_tags"],
+                            "oj_sync_status": SyncStatus.COMPLETED.value,
+                        }
+                    )
+                    if detail["code"] and record.problem_id:
+                        indexed_codes.append(
+                            (
+                                record.id,
+                                sync_task.user_id,
+                                record.problem_id,
+                                detail["code"],
+                            )
+                        )
                     sync_count += 1
                 else:
-                    record.oj_sync_status = SyncStatus.FAILED.value
-                    db.commit()
+                    mappings.append(
+                        {"id": record.id, "oj_sync_status": SyncStatus.FAILED.value}
+                    )
                     logger.warning(
-                        f"[LeetCodeDetailSyncTask] No detail for record {record_id}"
+                        f"[LeetCodeDetailSyncTask] No detail for record {record.id}"
                     )
-            except Exception as e:
-                record.oj_sync_status = SyncStatus.FAILED.value
-                db.commit()
-                logger.exception(
-                    f"[LeetCodeDetailSyncTask] Record {record_id} failed: {e}"
-                )
-                failed_count += 1
-        sync_task_service.update(
-            task_id,
-            status=SyncStatus.COMPLETED.value,
-            synced_records=sync_count,
-            failed_records=failed_count,
-        )
+                    failed_count += 1
+            db.bulk_update_mappings(Record, mappings)
+            db.commit()
+            item_service.finish(task_id, chunk, Record.oj_sync_status)
+            similarity_service.index_codes(indexed_codes)
+            progress.update(sync_count, failed_count)
+            logger.info(
+                f"[LeetCodeDetailSyncTask] Synced chunk of {len(records)} records, total synced: {sync_count}"
+            )
+        progress.update(sync_count, failed_count, status=SyncStatus.COMPLETED.value)
     except Exception as e:
         logger.exception(f"[LeetCodeDetailSyncTask] Task {task_id} error: {e}")
-        sync_task_service.update(
-            task_id,
-            status=SyncStatus.FAILED.value,
-            synced_records=sync_count,
-            failed_records=failed_count,
-        )
+        item_service.release(task_id, str(e), chunk)
+        progress.update(sync_count, failed_count, status=SyncStatus.FAILED.value)
     finally:
         db.close()
@@ -0,0 +1,65 @@
+from celery import shared_task
+
+from app.deps import get_db
+from app.models import SyncStatus, SyncTask, SyncTaskType, UserConfig
+from app.services.sync_task_service import SyncTaskService
+from app.tasks.task_manager import TaskManager
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+ACTIVE_STATUSES = [
+    SyncStatus.PENDING.value,
+    SyncStatus.RUNNING.value,
+    SyncStatus.PAUSED.value,
+    SyncStatus.RETRY.value,
+]
+
+
+@shared_task
+def schedule_leetcode_incremental_sync():
+    """Queue a watermark-bounded LeetCode sync for every connected user."""
+    logger.info("Starting LeetCode incremental sync scheduling")
+    db = next(get_db())
+    try:
+        sync_task_service = SyncTaskService(db)
+        task_manager = TaskManager()
+        configs = (
+            db.query(UserConfig).filter(UserConfig.leetcode_config.isnot(None)).all()
+        )
+        # Users with an unfinished batch sync keep it; it resumes from its checkpoint
+        busy_user_ids = {
+            user_id
+            for (user_id,) in db.query(SyncTask.user_id)
+            .filter(
+                SyncTask.type == SyncTaskType.LEETCODE_BATCH_SYNC.value,
+                SyncTask.status.in_(ACTIVE_STATUSES),
+            )
+            .distinct()
+        }
+        scheduled = 0
+        for config in configs:
+            if not config.leetcode_config.session_cookie:
+                continue
+            if config.user_id in busy_user_ids:
+                logger.info(
+                    f"User {config.user_id} already has an active LeetCode sync, skipping"
+                )
+                continue
+            try:
+                sync_task = sync_task_service.create(
+                    user_id=config.user_id,
+                    type=SyncTaskType.LEETCODE_BATCH_SYNC.value,
+                    total_records=0,
+                )
+                task_manager.start_sync_task(sync_task)
+                scheduled += 1
+            except Exception as e:
+                logger.exception(
+                    f"Failed to schedule LeetCode sync for user {config.user_id}: {e}"
+                )
+        logger.info(f"Scheduled {scheduled} LeetCode incremental syncs")
+    except Exception as e:
+        logger.exception(f"Failed to schedule LeetCode incremental syncs: {e}")
+    finally:
+        db.close()
@@ -1,10 +1,16 @@
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import joinedload
 
 from app.celery_app import celery_app
+from app.config import settings
 from app.deps import get_db
 from app.models import Record, SyncTask
 from app.schemas.record import SyncStatus
-from app.services.notion_service import NotionService
+from app.services.notion_service import NotionService, Sections
+from app.services.sync_shard_service import SyncProgress
+from app.services.sync_task_item_service import SyncTaskItemService
 from app.services.sync_task_service import SyncTaskService
 from app.services.user_config_service import UserConfigService
 from app.utils.logger import get_logger
@@ -13,13 +19,21 @@ logger = get_logger("notion_sync")
 
 
 @celery_app.task
-def notion_sync_task(task_id: int):
+def notion_sync_task(task_id: int, shard_record_ids: Optional[List[int]] = None):
     """Celery task for syncing records to Notion."""
     db = next(get_db())
     sync_task_service = SyncTaskService(db)
     user_config_service = UserConfigService(db)
+    item_service = SyncTaskItemService(db)
+    progress = SyncProgress(
+        sync_task_service,
+        task_id,
+        sharded=shard_record_ids is not None,
+        item_service=item_service,
+    )
     sync_count = 0
     failed_count = 0
+    claimed: List[int] = []
 
     try:
         sync_task: Optional[SyncTask] = sync_task_service.get(task_id)
@@ -27,7 +41,12 @@ def notion_sync_task(task_id: int):
             logger.error(f"Sync task {task_id} not found")
             return
 
-        if not sync_task_service.can_start(task_id):
+        if shard_record_ids is not None:
+            # Shards of a fanned-out task run while its status is running
+            if not sync_task_service.is_running(task_id):
+                logger.info(f"Sync task {task_id} is not running, skipping shard")
+                return
+        elif not sync_task_service.can_start(task_id):
             logger.info(
                 f"Sync task {task_id} is not in pending or retry status, skipping processing"
             )
@@ -40,24 +59,27 @@ def notion_sync_task(task_id: int):
 
         if not notion_config:
             logger.error(f"Notion config not found for user {sync_task.user_id}")
-            sync_task_service.update(
-                task_id,
-                status=SyncStatus.FAILED.value,
-                synced_records=0,
-                failed_records=0,
-            )
+            progress.update(0, 0, status=SyncStatus.FAILED.value)
             return
 
         notion_service = NotionService(notion_config)
-        record_ids = sync_task.record_ids or []
+        record_ids = (
+            shard_record_ids
+            if shard_record_ids is not None
+            else sync_task.record_ids or []
+        )
         if not record_ids:
             logger.info(f"Sync task {task_id} has no record ids, skipping processing")
             return
 
+        # Completed items are not run again; retries only take failed ones
+        progress.start()
+        claimed = item_service.claim(task_id, record_ids)
         records = (
             db.query(Record)
+            .options(joinedload(Record.problem))
             .filter(
-                Record.id.in_(record_ids),
+                Record.id.in_(claimed),
                 Record.user_id == sync_task.user_id,
             )
             .all()
@@ -65,60 +87,91 @@ def notion_sync_task(task_id: int):
 
         if not records:
             logger.info(f"No records to process for task {task_id}")
-            sync_task_service.update(
-                task_id,
-                status=SyncStatus.COMPLETED.value,
-                synced_records=0,
-                failed_records=0,
-            )
+            item_service.finish(task_id, claimed, Record.notion_sync_status)
+            progress.update(0, 0, status=SyncStatus.COMPLETED.value)
             return
 
+        # Build pages here, where the session lives; workers only talk to Notion
+        pages: Dict[int, Tuple[Optional[str], Optional[Dict], str, Sections]] = {}
+        records_by_id = {record.id: record for record in records}
+        skipped = 0
+        errors: Dict[int, str] = {}
         for record in records:
             try:
+                title, sections = notion_service.build_page_sections(record)
+                if record.notion_page_id and (
+                    notion_service.changed_sections(
+                        record.notion_sync_state, title, sections
+                    )
+                    == []
+                ):
+                    record.notion_sync_status = SyncStatus.COMPLETED.value
+                    sync_count += 1
+                    skipped += 1
+                    continue
+                pages[record.id] = (
+                    record.notion_page_id,
+                    record.notion_sync_state,
+                    title,
+                    sections,
+                )
                 record.notion_sync_status = SyncStatus.RUNNING.value
-                db.commit()
-
-                # Create new page directly from record
-                success, result = notion_service.create_page_from_record(record)
+            except Exception as e:
+                logger.exception(
+                    f"Failed to build Notion page for record {record.id}: {e}"
+                )
+                record.notion_sync_status = SyncStatus.FAILED.value
+                errors[record.id] = str(e)
+                failed_count += 1
+        db.commit()
+
+        uncommitted = 0
+        with ThreadPoolExecutor(
+            max_workers=settings.NOTION_SYNC_CONCURRENCY
+        ) as executor:
+            futures = {
+                executor.submit(notion_service.sync_page, *page): record_id
+                for record_id, page in pages.items()
+            }
+            for future in as_completed(futures):
+                record_id = futures[future]
+                record = records_by_id[record_id]
+                try:
+                    success, result = future.result()
+                except Exception as e:
+                    logger.exception(f"Failed to process record {record_id}: {e}")
+                    success, result = False, {"error": str(e)}
 
                 if not success:
-                    logger.error(f"Notion sync failed for record {record.id}: {result}")
+                    logger.error(f"Notion sync failed for record {record_id}: {result}")
                     record.notion_sync_status = SyncStatus.FAILED.value
+                    errors[record_id] = str(result)
                     failed_count += 1
                 else:
                     record.notion_sync_status = SyncStatus.COMPLETED.value
-                    if isinstance(result, dict):
-                        record.notion_page_id = result.get("page_id")
-                        record.notion_url = result.get("page_url")
+                    record.notion_page_id = result["page_id"]
+                    record.notion_sync_state = result["state"]
+                    if result.get("page_url"):
+                        record.notion_url = result["page_url"]
                     sync_count += 1
-                    logger.info(f"Successfully synced record {record.id}")
+                    logger.info(f"Successfully synced record {record_id}")
 
-                db.commit()
-
-            except Exception as e:
-                logger.exception(f"Failed to process record {record.id}: {e}")
-                record.notion_sync_status = SyncStatus.FAILED.value
-                db.commit()
-                failed_count += 1
+                uncommitted += 1
+                if uncommitted >= settings.NOTION_COMMIT_BATCH_SIZE:
+                    progress.update(sync_count, failed_count)
+                    uncommitted = 0
+        db.commit()
 
-        sync_task_service.update(
-            task_id,
-            status=SyncStatus.COMPLETED.value,
-            synced_records=sync_count,
-            failed_records=failed_count,
-        )
+        item_service.finish(task_id, claimed, Record.notion_sync_status, errors)
+        progress.update(sync_count, failed_count, status=SyncStatus.COMPLETED.value)
 
         logger.info(
-            f"Notion sync task {task_id} completed: {sync_count} successful, {failed_count} failed"
+            f"Notion sync task {task_id} completed: {sync_count} successful ({skipped} unchanged), {failed_count} failed"
         )
 
     except Exception as e:
         logger.exception(f"Notion sync task {task_id} error: {e}")
-        sync_task_service.update(
-            task_id,
-            status=SyncStatus.FAILED.value,
-            synced_records=sync_count,
-            failed_records=failed_count,
-        )
+        item_service.release(task_id, str(e), claimed)
+        progress.update(sync_count, failed_count, status=SyncStatus.FAILED.value)
     finally:
         db.close()
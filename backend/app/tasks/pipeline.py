@@ -0,0 +1,104 @@
+"""
+Streaming sync pipeline.
+
+A leetcode_batch_sync task created with pipeline=True hands every committed
+page to the downstream stages instead of leaving them for separate manual
+tasks after the whole walk. Each page gets its own stage tasks, children of
+the batch task, started as one Celery canvas:
+
+    leetcode_detail_sync -> group(github_sync, gemini_sync -> notion_sync)
+        -> review generation for the page
+
+Notion waits for Gemini because its pages include the AI analysis; GitHub
+only needs the code. Stages whose integration is not configured are left out.
+"""
+
+from typing import List, Optional
+
+from celery import chain, group
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models import SyncTask, SyncTaskType
+from app.services.sync_task_service import SyncTaskService
+from app.tasks.review_candidates import generate_review_candidates_task
+from app.tasks.task_manager import TaskManager
+from app.utils.logger import get_logger
+
+logger = get_logger("pipeline")
+
+
+def start_pipeline_batch(
+    db: Session,
+    parent: SyncTask,
+    config,
+    record_ids: List[int],
+    detail_record_ids: Optional[List[int]] = None,
+) -> List[SyncTask]:
+    """
+    Create the stage tasks for one ingested page and start them.
+
+    Args:
+        db: Database session
+        parent: The pipelined leetcode_batch_sync task
+        config: The user's UserConfig, deciding which export stages run
+        record_ids: Records created from the page
+        detail_record_ids: Records whose submission detail is still missing
+
+    Returns:
+        The created stage tasks
+    """
+    if not record_ids:
+        return []
+    sync_task_service = SyncTaskService(db)
+    task_manager = TaskManager()
+    stages: List[SyncTask] = []
+
+    def stage(task_type: SyncTaskType, ids: List[int], **kwargs):
+        task = sync_task_service.create(
+            parent.user_id,
+            task_type.value,
+            len(ids),
+            record_ids=list(ids),
+            parent_task_id=parent.id,
+            **kwargs,
+        )
+        stages.append(task)
+        return task_manager.signature(task)
+
+    downstream = []
+    if config and config.github_config:
+        downstream.append(stage(SyncTaskType.GITHUB_SYNC, record_ids))
+    analysis = []
+    if config and config.gemini_config:
+        analysis.append(
+            stage(
+                SyncTaskType.GEMINI_SYNC,
+                record_ids,
+                full_analysis=bool(parent.full_analysis),
+            )
+        )
+    if config and config.notion_config:
+        analysis.append(stage(SyncTaskType.NOTION_SYNC, record_ids))
+    if analysis:
+        downstream.append(chain(*analysis) if len(analysis) > 1 else analysis[0])
+
+    steps = []
+    if detail_record_ids:
+        steps.append(stage(SyncTaskType.LEETCODE_DETAIL_SYNC, detail_record_ids))
+    if downstream:
+        steps.append(group(downstream) if len(downstream) > 1 else downstream[0])
+    if settings.REVIEW_CANDIDATES_AFTER_SYNC:
+        steps.append(
+            generate_review_candidates_task.si(parent.id, list(record_ids)).set(
+                queue="leetcode_sync_queue"
+            )
+        )
+    if not steps:
+        return []
+    canvas = chain(*steps) if len(steps) > 1 else steps[0]
+    canvas.apply_async()
+    logger.info(
+        f"[Pipeline] Task {parent.id} dispatched {len(record_ids)} records to {[t.type for t in stages]}"
+    )
+    return stages
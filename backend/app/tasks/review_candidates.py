@@ -0,0 +1,53 @@
+"""
+Post-sync review generation.
+
+Once a sync task with record ids completes, its failed submissions become
+reviews. TaskManager chains this step after such tasks; pipelined batch
+syncs run it once per ingested page instead of after every stage.
+"""
+
+from typing import List, Optional
+
+from app.celery_app import celery_app
+from app.deps import get_db
+from app.models import SyncStatus
+from app.services.review_service import ReviewService
+from app.services.sync_task_service import SyncTaskService
+from app.utils.logger import get_logger
+
+logger = get_logger("review_candidates")
+
+
+@celery_app.task
+def generate_review_candidates_task(
+    task_id: int, record_ids: Optional[List[int]] = None
+):
+    """
+    Create reviews for the failed submissions of a sync task.
+
+    Without record_ids the task's own records are used, and only when it
+    completed. With record_ids (a pipeline page) they are used as given.
+    """
+    db = next(get_db())
+    try:
+        sync_task = SyncTaskService(db).get(task_id)
+        if not sync_task:
+            return 0
+        if record_ids is None:
+            if sync_task.status != SyncStatus.COMPLETED.value:
+                logger.info(
+                    f"Sync task {task_id} did not complete, skipping review generation"
+                )
+                return 0
+            record_ids = sync_task.record_ids or []
+        created = ReviewService(db).create_reviews_for_records(
+            sync_task.user_id, record_ids
+        )
+        logger.info(f"Sync task {task_id}: created {created} reviews")
+        return created
+    except Exception as e:
+        logger.exception(f"Review generation for sync task {task_id} failed: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
@@ -0,0 +1,78 @@
+"""
+Fan-out of large Gemini and Notion sync tasks across workers.
+
+A task with more than SYNC_SHARD_SIZE records runs as
+
+    begin -> chord(group(one shard per chunk of record_ids), finish)
+
+Shards are the regular sync task called with a slice of the record ids;
+they add their counts to Redis counters (SyncShardService) and the chord
+callback writes the final totals and status.
+"""
+
+from typing import Optional
+
+from celery import chain, chord
+from celery.canvas import Signature
+
+from app.celery_app import celery_app
+from app.config import settings
+from app.deps import get_db
+from app.models import SyncTask, SyncTaskType
+from app.services.sync_shard_service import SyncShardService
+from app.services.sync_task_service import SyncTaskService
+from app.utils.logger import get_logger
+
+logger = get_logger("sharding")
+
+SHARDED_TASK_TYPES = {SyncTaskType.GEMINI_SYNC.value, SyncTaskType.NOTION_SYNC.value}
+
+
+@celery_app.task
+def begin_sharded_sync_task(task_id: int):
+    """Reset the shard counters and mark the task running for its shards."""
+    db = next(get_db())
+    try:
+        if not SyncTaskService(db).can_start(task_id):
+            logger.info(
+                f"Sync task {task_id} is not in pending or retry status, its shards will skip"
+            )
+            return
+        SyncShardService(db).begin(task_id)
+    finally:
+        db.close()
+
+
+@celery_app.task
+def finish_sharded_sync_task(task_id: int):
+    """Chord callback: fold the shard counters into the task."""
+    db = next(get_db())
+    try:
+        SyncShardService(db).finalize(task_id)
+    finally:
+        db.close()
+
+
+def shard_signature(
+    task: SyncTask, celery_task, queue: str, priority: Optional[int] = None
+) -> Optional[Signature]:
+    """
+    Canvas running a large task as parallel shards on its queue, or None
+    when the task is not sharded. priority is the shards' message priority.
+    """
+    record_ids = task.record_ids or []
+    size = settings.SYNC_SHARD_SIZE
+    if task.type not in SHARDED_TASK_TYPES or not size or len(record_ids) <= size:
+        return None
+    options = {"queue": queue}
+    if priority is not None:
+        options["priority"] = priority
+    shards = [
+        celery_task.si(task.id, record_ids[start : start + size]).set(**options)
+        for start in range(0, len(record_ids), size)
+    ]
+    logger.info(f"Sync task {task.id} split into {len(shards)} shards")
+    return chain(
+        begin_sharded_sync_task.si(task.id).set(queue=queue),
+        chord(shards, finish_sharded_sync_task.si(task.id).set(queue=queue)),
+    )
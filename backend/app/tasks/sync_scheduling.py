@@ -0,0 +1,76 @@
+"""
+Celery side of the per-user fair scheduler (SyncSchedulerService).
+
+A task started through the scheduler is followed by release_sync_slot_task,
+which frees its slot and starts the next waiting tasks of the queue.
+dispatch_sync_queues runs periodically to free the slots of tasks that
+ended without reaching their release step, or whose lease ran out because
+they died mid-run, and to start what is waiting.
+"""
+
+from app.celery_app import celery_app
+from app.deps import get_db
+from app.models import SyncStatus, SyncTask
+from app.services.sync_scheduler_service import SyncSchedulerService
+from app.utils.logger import get_logger
+
+logger = get_logger("sync_scheduling")
+
+# A task holding a slot in one of these statuses is no longer in flight
+RELEASED_STATUSES = {
+    SyncStatus.COMPLETED.value,
+    SyncStatus.FAILED.value,
+    SyncStatus.PAUSED.value,
+}
+
+
+@celery_app.task
+def release_sync_slot_task(task_id: int, queue: str):
+    """Free the slot of a finished task and start the next waiting ones."""
+    from app.tasks.task_manager import TaskManager
+
+    db = next(get_db())
+    try:
+        SyncSchedulerService().release(queue, task_id)
+        return TaskManager().dispatch(queue, db)
+    except Exception as e:
+        logger.exception(f"Failed to release the slot of sync task {task_id}: {e}")
+        return 0
+    finally:
+        db.close()
+
+
+@celery_app.task
+def dispatch_sync_queues():
+    """Free the slots of tasks no longer in flight and fill every queue."""
+    from app.tasks.task_manager import TaskManager, scheduled_queues
+
+    db = next(get_db())
+    try:
+        scheduler = SyncSchedulerService()
+        task_manager = TaskManager()
+        started = 0
+        for queue in scheduled_queues():
+            task_ids = list(scheduler.running(queue))
+            in_flight = {
+                task_id
+                for task_id, status in db.query(SyncTask.id, SyncTask.status).filter(
+                    SyncTask.id.in_(task_ids)
+                )
+                if status not in RELEASED_STATUSES
+            }
+            for task_id in set(task_ids) - in_flight:
+                logger.info(f"Releasing the slot of sync task {task_id} on {queue}")
+                scheduler.release(queue, task_id)
+            for task_id in set(scheduler.expired(queue)) & in_flight:
+                logger.warning(
+                    f"Slot lease of sync task {task_id} on {queue} expired, releasing it"
+                )
+                scheduler.release(queue, task_id)
+            started += task_manager.dispatch(queue, db)
+        return started
+    except Exception as e:
+        logger.exception(f"Failed to dispatch sync queues: {e}")
+        return 0
+    finally:
+        db.close()
@@ -3,35 +3,139 @@ Task manager for starting Celery tasks based on sync task type.
 Uses object-oriented design and reuses existing service components.
 """
 
+from typing import List, Optional
+
+from celery import chain
+from celery.canvas import Signature
+from sqlalchemy.orm import Session, object_session
+
+from app.config import settings
+from app.deps import get_db
 from app.models import SyncTask, SyncTaskType
+from app.services.sync_scheduler_service import (
+    LANE_PRIORITIES,
+    SyncSchedulerService,
+    task_lane,
+)
+from app.services.sync_task_service import SyncTaskService
 from app.tasks.gemini_sync import gemini_sync_task
 from app.tasks.github_sync import github_sync_task
 from app.tasks.leetcode_batch_sync import leetcode_batch_sync_task
 from app.tasks.leetcode_detail_sync import leetcode_detail_sync_task
 from app.tasks.notion_sync import notion_sync_task
+from app.tasks.review_candidates import generate_review_candidates_task
+from app.tasks.sharding import shard_signature
+from app.tasks.sync_scheduling import release_sync_slot_task
 from app.utils.logger import get_logger
 
 logger = get_logger("task_manager")
 
+# Celery task and queue per sync task type
+TASK_ROUTES = {
+    SyncTaskType.GITHUB_SYNC.value: (github_sync_task, "git_sync_queue"),
+    SyncTaskType.LEETCODE_BATCH_SYNC.value: (
+        leetcode_batch_sync_task,
+        "leetcode_sync_queue",
+    ),
+    SyncTaskType.LEETCODE_DETAIL_SYNC.value: (
+        leetcode_detail_sync_task,
+        "leetcode_sync_queue",
+    ),
+    SyncTaskType.GEMINI_SYNC.value: (gemini_sync_task, "gemini_sync_queue"),
+    SyncTaskType.NOTION_SYNC.value: (notion_sync_task, "notion_sync_queue"),
+}
+
+
+def scheduled_queues() -> List[str]:
+    return sorted({queue for _, queue in TASK_ROUTES.values()})
+
 
 class TaskManager:
-    def start_sync_task(self, task: SyncTask) -> bool:
-        if task.type == SyncTaskType.GITHUB_SYNC.value:
-            return github_sync_task.apply_async(args=[task.id], queue="git_sync_queue")
-        elif task.type == SyncTaskType.LEETCODE_BATCH_SYNC.value:
-            return leetcode_batch_sync_task.apply_async(
-                args=[task.id], queue="leetcode_sync_queue"
+    def signature(self, task: SyncTask, scheduled: bool = False) -> Optional[Signature]:
+        """
+        Immutable Celery signature running a sync task on its queue, for use
+        on its own or inside a chain/group. Large Gemini and Notion tasks fan
+        out into shards. Tasks started by the fair scheduler carry their
+        lane's message priority and then free their slot. Tasks with record
+        ids are followed by review generation, except pipeline stages: the
+        pipeline runs it per page. None for unknown task types.
+        """
+        route = TASK_ROUTES.get(task.type)
+        if not route:
+            return None
+        celery_task, queue = route
+        priority = LANE_PRIORITIES[task_lane(task)] if scheduled else None
+        signature = shard_signature(task, celery_task, queue, priority=priority)
+        if signature is None:
+            signature = celery_task.si(task.id).set(queue=queue)
+            if priority is not None:
+                signature.set(priority=priority)
+        if scheduled:
+            signature = chain(
+                signature, release_sync_slot_task.si(task.id, queue).set(queue=queue)
             )
-        elif task.type == SyncTaskType.LEETCODE_DETAIL_SYNC.value:
-            return leetcode_detail_sync_task.apply_async(
-                args=[task.id], queue="leetcode_sync_queue"
+        if (
+            settings.REVIEW_CANDIDATES_AFTER_SYNC
+            and task.record_ids
+            and task.parent_task_id is None
+        ):
+            signature = chain(
+                signature, generate_review_candidates_task.si(task.id).set(queue=queue)
             )
-        elif task.type == SyncTaskType.GEMINI_SYNC.value:
-            return gemini_sync_task.apply_async(
-                args=[task.id], queue="gemini_sync_queue"
-            )
-        elif task.type == SyncTaskType.NOTION_SYNC.value:
-            return notion_sync_task.apply_async(
-                args=[task.id], queue="notion_sync_queue"
-            )
-        return False
+        return signature
+
+    def start_sync_task(
+        self, task: SyncTask, countdown: Optional[float] = None
+    ) -> bool:
+        """
+        Start a sync task. With SYNC_SCHEDULER_ENABLED top-level tasks wait
+        for their turn in the fair scheduler instead of going to the broker
+        directly; delayed retries and pipeline stages bypass it, as does
+        everything while Redis is unavailable.
+        """
+        route = TASK_ROUTES.get(task.type)
+        if not route:
+            return False
+        queue = route[1]
+        if (
+            settings.SYNC_SCHEDULER_ENABLED
+            and countdown is None
+            and task.parent_task_id is None
+        ):
+            try:
+                SyncSchedulerService().submit(queue, task)
+            except Exception as e:
+                logger.error(f"Failed to schedule sync task {task.id}: {e}")
+            else:
+                try:
+                    self.dispatch(queue, object_session(task))
+                except Exception as e:
+                    # Started by the next release or periodic dispatch
+                    logger.error(f"Failed to dispatch {queue}: {e}")
+                return True
+        signature = self.signature(task)
+        return signature.apply_async(countdown=countdown)
+
+    def dispatch(self, queue: str, db: Optional[Session] = None) -> int:
+        """Start the tasks the fair scheduler lets run now on a queue."""
+        own_session = db is None
+        if own_session:
+            db = next(get_db())
+        try:
+            scheduler = SyncSchedulerService()
+            sync_task_service = SyncTaskService(db)
+            started = 0
+            for task_id in scheduler.dispatch(queue):
+                task = sync_task_service.get(task_id)
+                signature = self.signature(task, scheduled=True) if task else None
+                if signature is None:
+                    scheduler.release(queue, task_id)
+                    continue
+                signature.apply_async()
+                started += 1
+            if started:
+                logger.info(f"Dispatched {started} sync tasks on {queue}")
+            return started
+        finally:
+            if own_session:
+                db.close()
@@ -0,0 +1,49 @@
+"""
+Markdown rendering of problem descriptions shared by the sync renderers
+"""
+
+import hashlib
+import re
+from typing import Optional
+
+from markdownify import markdownify as md
+
+
+def description_hash(description: Optional[str]) -> str:
+    """Content hash of an HTML description; None and "" hash the same"""
+    return hashlib.sha256((description or "").encode()).hexdigest()
+
+
+def render_description_markdown(description: Optional[str]) -> str:
+    """Convert an HTML description to the markdown embedded in files and pages"""
+    markdown = md(description or "")
+    return re.sub(r"\n{3,}", "\n\n", markdown.strip())
+
+
+def apply_description(problem) -> bool:
+    """
+    Refresh a problem's description_markdown if its description changed
+
+    Returns:
+        True if the markdown was (re)computed, False if it was up to date
+    """
+    content_hash = description_hash(problem.description)
+    if (
+        problem.description_hash == content_hash
+        and problem.description_markdown is not None
+    ):
+        return False
+    problem.description_markdown = render_description_markdown(problem.description)
+    problem.description_hash = content_hash
+    return True
+
+
+def problem_markdown(problem) -> str:
+    """
+    Markdown description of a problem, rendered only when missing or stale
+
+    A refreshed value is set on the problem so the caller's next commit
+    stores it for every later sync.
+    """
+    apply_description(problem)
+    return problem.description_markdown
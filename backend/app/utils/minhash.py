@@ -0,0 +1,150 @@
+"""
+MinHash signatures and LSH banding for near-duplicate source code detection
+"""
+
+import hashlib
+import keyword
+import random
+import re
+from typing import Iterable, List, Set
+
+# Mersenne prime used for the universal hash family h(x) = (a * x + b) mod p
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>\#[^\n]*|//[^\n]*|/\*.*?\*/)
+    |(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+    |(?P<number>\d+(?:\.\d+)?)
+    |(?P<name>[A-Za-z_]\w*)
+    |(?P<op>\S)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+# Keywords shared by the languages LeetCode accepts; other identifiers are renamed
+_KEYWORDS = set(keyword.kwlist) | {
+    "auto",
+    "bool",
+    "boolean",
+    "break",
+    "case",
+    "char",
+    "class",
+    "const",
+    "continue",
+    "default",
+    "do",
+    "double",
+    "else",
+    "false",
+    "float",
+    "for",
+    "func",
+    "function",
+    "if",
+    "int",
+    "let",
+    "long",
+    "new",
+    "null",
+    "nullptr",
+    "private",
+    "public",
+    "return",
+    "static",
+    "string",
+    "struct",
+    "switch",
+    "this",
+    "true",
+    "var",
+    "vector",
+    "void",
+    "while",
+}
+
+
+def tokenize_code(code: str) -> List[str]:
+    """
+    Tokenize source code so renames and formatting do not change the result
+
+    Comments are dropped, identifiers other than keywords collapse to "ID",
+    literals to "NUM"/"STR"; operators and keywords are kept verbatim.
+    """
+    tokens: List[str] = []
+    for match in _TOKEN_RE.finditer(code or ""):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        if kind == "string":
+            tokens.append("STR")
+        elif kind == "number":
+            tokens.append("NUM")
+        elif kind == "name":
+            value = match.group()
+            tokens.append(value if value in _KEYWORDS else "ID")
+        else:
+            tokens.append(match.group())
+    return tokens
+
+
+def shingles(tokens: List[str], size: int) -> Set[int]:
+    """Hash every run of `size` consecutive tokens to a 32-bit integer"""
+    if len(tokens) < size:
+        size = max(1, len(tokens))
+    result = set()
+    for i in range(max(1, len(tokens) - size + 1)):
+        shingle = " ".join(tokens[i : i + size])
+        digest = hashlib.blake2b(shingle.encode(), digest_size=4).digest()
+        result.add(int.from_bytes(digest, "big"))
+    return result
+
+
+class MinHasher:
+    """Compute MinHash signatures and LSH band keys with fixed permutations"""
+
+    def __init__(
+        self, num_perm: int = 128, bands: int = 16, shingle_size: int = 5, seed: int = 1
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, code: str) -> List[int]:
+        """MinHash signature of the code's token shingles"""
+        values = shingles(tokenize_code(code), self.shingle_size)
+        if not values:
+            return [_MAX_HASH] * self.num_perm
+        return [
+            min(((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH for value in values)
+            for a, b in self._perms
+        ]
+
+    def band_hashes(self, signature: List[int]) -> List[str]:
+        """One bucket key per band; similar signatures share at least one"""
+        result = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            digest = hashlib.blake2b(
+                ",".join(map(str, rows)).encode(), digest_size=8
+            ).hexdigest()
+            result.append(digest)
+        return result
+
+    @staticmethod
+    def similarity(first: Iterable[int], second: Iterable[int]) -> float:
+        """Estimated Jaccard similarity of two signatures"""
+        first, second = list(first), list(second)
+        if not first or len(first) != len(second):
+            return 0.0
+        return sum(a == b for a, b in zip(first, second)) / len(first)
@@ -0,0 +1,49 @@
+"""
+Compact problem descriptions and code before they are embedded in LLM prompts
+"""
+
+import re
+from functools import lru_cache
+
+from markdownify import markdownify as md
+
+TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+_SUPERSCRIPT_RE = re.compile(r"<sup>(.*?)</sup>", re.IGNORECASE | re.DOTALL)
+
+
+@lru_cache(maxsize=2048)
+def description_to_markdown(description: str) -> str:
+    """
+    Convert an HTML problem description to compact markdown
+
+    Images are dropped (the model cannot see them), superscripts keep their
+    meaning (10<sup>4</sup> -> 10^4) and whitespace runs collapse. Results are
+    cached per process since the same problems are analysed over and over.
+    """
+    html = _SUPERSCRIPT_RE.sub(r"^\1", description or "")
+    markdown = md(html, strip=["img"]).replace("\xa0", " ")
+    markdown = re.sub(r"[ \t]+\n", "\n", markdown)
+    markdown = re.sub(r"\n{3,}", "\n\n", markdown)
+    return markdown.strip()
+
+
+def compact_code(code: str) -> str:
+    """Drop trailing whitespace and runs of blank lines"""
+    lines = (code or "").replace("\r\n", "\n").split("\n")
+    compacted = "\n".join(line.rstrip() for line in lines)
+    return re.sub(r"\n{3,}", "\n\n", compacted).strip("\n")
+
+
+def truncate_middle(text: str, max_chars: int) -> str:
+    """Cap text at max_chars, keeping its head and tail; 0 disables the cap"""
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    keep = max(0, max_chars - len(TRUNCATION_MARKER))
+    head = keep * 2 // 3
+    return text[:head] + TRUNCATION_MARKER + text[len(text) - (keep - head) :]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) without a round trip"""
+    return (len(text) + 3) // 4
@@ -0,0 +1,386 @@
+"""
+Local static analysis estimating GeminiAIAnalysisSchema fields without an LLM
+
+Python code is analysed with the ast module; other languages fall back to a
+brace-aware tokenizer and always report a lower confidence.
+"""
+
+import ast
+import re
+from typing import Any, Dict, List, Set, Tuple
+
+LOCAL_ANALYZER_VERSION = "local-static-v1"
+
+PYTHON_LANGUAGES = {"python", "python3"}
+
+_HASH_NAMES = {"dict", "set", "Counter", "defaultdict", "OrderedDict", "frozenset"}
+_MEMO_DECORATORS = {"lru_cache", "cache"}
+
+# Primary algorithm, most specific first
+_ALGORITHM_ORDER = [
+    "Dynamic Programming",
+    "Binary Search",
+    "Breadth-First Search",
+    "Depth-First Search",
+    "Heap (Priority Queue)",
+    "Sorting",
+    "Stack",
+    "Hash Table",
+]
+
+
+def _name_of(node: ast.AST) -> str:
+    """Name of a called function or decorator: foo, obj.foo and foo(...) all give foo"""
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return ""
+
+
+def _is_constant_iterable(node: ast.AST) -> bool:
+    """Loops over literals or range(<constant>) do not grow with the input"""
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set, ast.Constant)):
+        return True
+    if isinstance(node, ast.Call) and _name_of(node) == "range":
+        return all(isinstance(arg, ast.Constant) for arg in node.args)
+    return False
+
+
+def _is_bounded_range(node: ast.AST) -> bool:
+    """
+    range() capped with min() or ending a constant past a name, as in
+    range(i + 1, min(i + 3, n)); such inner loops may not grow with the input
+    """
+    if not (isinstance(node, ast.Call) and _name_of(node) == "range"):
+        return False
+    for arg in node.args:
+        if isinstance(arg, ast.Call) and _name_of(arg) == "min":
+            return True
+    stop = node.args[1] if len(node.args) > 1 else None
+    return (
+        isinstance(stop, ast.BinOp)
+        and isinstance(stop.op, ast.Add)
+        and isinstance(stop.left, ast.Name)
+        and isinstance(stop.right, ast.Constant)
+    )
+
+
+def _halves(node: ast.AST) -> bool:
+    """Whether a loop body halves a search range (// 2 or >> 1)"""
+    for child in ast.walk(node):
+        if isinstance(child, ast.BinOp) and isinstance(child.right, ast.Constant):
+            if isinstance(child.op, ast.FloorDiv) and child.right.value == 2:
+                return True
+            if isinstance(child.op, ast.RShift) and child.right.value == 1:
+                return True
+    return False
+
+
+class _PythonFacts(ast.NodeVisitor):
+    """Collect loop nesting, recursion and data structure usage"""
+
+    def __init__(self):
+        self.max_depth = 0
+        self.depth = 0
+        self.log_loops = 0
+        self.unclassified_while = 0
+        # Inner loops whose total cost the nesting depth may overstate
+        self.uncertain_loops = 0
+        self.features: Set[str] = set()
+        self.recursive = False
+        self.memoized = False
+        self.allocates = False
+        self.early_returns = 0
+        self.sort_in_loop = False
+        self.log_op_in_loop = False
+        self._functions: List[str] = []
+
+    def _loop(self, node: ast.AST, counts: bool) -> None:
+        if counts:
+            self.depth += 1
+            self.max_depth = max(self.max_depth, self.depth)
+        self.generic_visit(node)
+        if counts:
+            self.depth -= 1
+
+    def visit_For(self, node: ast.For) -> None:
+        if self.depth > 0 and _is_bounded_range(node.iter):
+            self.uncertain_loops += 1
+        self._loop(node, not _is_constant_iterable(node.iter))
+
+    def visit_While(self, node: ast.While) -> None:
+        if _halves(node):
+            self.log_loops += 1
+            self.features.add("Binary Search")
+            self.generic_visit(node)
+            return
+        if isinstance(node.test, ast.Name) and node.test.id in {"queue", "q", "dq"}:
+            self.features.add("Breadth-First Search")
+        elif not isinstance(node.test, ast.Compare):
+            self.unclassified_while += 1
+        if self.depth > 0:
+            # Two pointers and sliding windows advance a shared index, so the
+            # inner while is often amortized O(1)
+            self.uncertain_loops += 1
+        self._loop(node, True)
+
+    def _comprehension(self, node: ast.AST) -> None:
+        self.allocates = True
+        counted = [
+            generator
+            for generator in node.generators
+            if not _is_constant_iterable(generator.iter)
+        ]
+        self.depth += len(counted)
+        self.max_depth = max(self.max_depth, self.depth)
+        self.generic_visit(node)
+        self.depth -= len(counted)
+
+    visit_ListComp = _comprehension
+    visit_SetComp = _comprehension
+    visit_DictComp = _comprehension
+    visit_GeneratorExp = _comprehension
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> None:
+        if any(_name_of(d) in _MEMO_DECORATORS for d in node.decorator_list):
+            self.memoized = True
+        self._functions.append(node.name)
+        self.generic_visit(node)
+        self._functions.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Call(self, node: ast.Call) -> None:
+        name = _name_of(node)
+        if self._functions and name == self._functions[-1]:
+            self.recursive = True
+        if name in _HASH_NAMES:
+            self.features.add("Hash Table")
+            self.allocates = True
+        elif name in {"sorted", "sort"}:
+            self.features.add("Sorting")
+            self.sort_in_loop |= self.depth > 0
+        elif name in {"heappush", "heappop", "heapify", "heappushpop", "nlargest"}:
+            self.features.add("Heap (Priority Queue)")
+            self.log_op_in_loop |= self.depth > 0
+        elif name in {"bisect", "bisect_left", "bisect_right", "insort"}:
+            self.features.add("Binary Search")
+            self.log_op_in_loop |= self.depth > 0
+        elif name == "deque":
+            self.features.add("Breadth-First Search")
+            self.allocates = True
+        elif name == "pop" and not node.args and self.depth > 0:
+            self.features.add("Stack")
+        self.generic_visit(node)
+
+    def visit_Dict(self, node: ast.Dict) -> None:
+        self.features.add("Hash Table")
+        self.allocates = True
+        self.generic_visit(node)
+
+    def visit_Set(self, node: ast.Set) -> None:
+        self.features.add("Hash Table")
+        self.generic_visit(node)
+
+    def visit_BinOp(self, node: ast.BinOp) -> None:
+        # [0] * (n + 1) style tables
+        if isinstance(node.op, ast.Mult) and isinstance(node.left, ast.List):
+            self.allocates = True
+            self.features.add("Dynamic Programming")
+        self.generic_visit(node)
+
+    def visit_If(self, node: ast.If) -> None:
+        if (
+            isinstance(node.test, ast.UnaryOp)
+            and isinstance(node.test.op, ast.Not)
+            and node.body
+            and isinstance(node.body[0], ast.Return)
+        ):
+            self.early_returns += 1
+        self.generic_visit(node)
+
+
+def _complexity(loop_depth: int, log_factor: bool) -> str:
+    if loop_depth == 0:
+        return "O(log n)" if log_factor else "O(1)"
+    base = "n" if loop_depth == 1 else f"n^{loop_depth}"
+    return f"O({base} log n)" if log_factor else f"O({base})"
+
+
+def _scores(code: str) -> Tuple[int, int]:
+    """(code_quality_score, style_score) from simple formatting signals"""
+    lines = code.splitlines()
+    style = 10
+    if any(len(line) > 100 for line in lines):
+        style -= 2
+    if any("\t" in line for line in lines) and any(
+        line.startswith("    ") for line in lines
+    ):
+        style -= 2
+    if len(re.findall(r"\b[a-z]\b\s*=", code)) > 6:
+        style -= 1
+    if (
+        not any(line.strip().startswith(("#", "//")) for line in lines)
+        and len(lines) > 30
+    ):
+        style -= 1
+    return max(1, min(10, style - 1)), max(1, style)
+
+
+class StaticAnalyzer:
+    """Estimate analysis fields locally and report how much to trust them"""
+
+    def analyze(self, code: str, language: str) -> Tuple[float, Dict[str, Any]]:
+        """
+        Analyze code without calling an LLM.
+
+        Args:
+            code: Source code
+            language: Record language, e.g. python3, java, cpp
+
+        Returns:
+            (confidence, analysis) where confidence is in [0, 1] and analysis
+            matches GeminiAIAnalysisSchema
+        """
+        code = code or ""
+        if not code.strip():
+            return 0.0, {}
+        if (language or "").lower() in PYTHON_LANGUAGES:
+            try:
+                tree = ast.parse(code)
+            except (SyntaxError, ValueError):
+                return 0.0, {}
+            return self._analyze_python(code, tree)
+        return self._analyze_tokens(code)
+
+    def _analyze_python(self, code: str, tree: ast.AST) -> Tuple[float, Dict[str, Any]]:
+        facts = _PythonFacts()
+        facts.visit(tree)
+        features = set(facts.features)
+        risks = []
+        # Only flat, plainly bounded code clears LOCAL_ANALYSIS_MIN_CONFIDENCE
+        confidence = 0.85
+        if facts.recursive:
+            if facts.memoized:
+                features.add("Dynamic Programming")
+                confidence -= 0.3
+            else:
+                features.add("Depth-First Search")
+                risks.append("Recursion depth may exceed the interpreter limit")
+                confidence -= 0.4
+        confidence -= 0.1 * facts.unclassified_while
+        confidence -= 0.3 * facts.uncertain_loops
+        if facts.max_depth >= 2:
+            confidence -= 0.1
+        if facts.max_depth >= 3:
+            risks.append("Deeply nested loops")
+            confidence -= 0.1
+        if len(code.splitlines()) > 80:
+            confidence -= 0.2
+
+        depth = facts.max_depth
+        log_factor = bool(facts.log_loops)
+        if facts.sort_in_loop:
+            # Repeated sorting cost depends on the sizes sorted; let the LLM judge
+            confidence -= 0.2
+        if facts.sort_in_loop or facts.log_op_in_loop:
+            log_factor = True
+        elif "Sorting" in features and depth <= 1:
+            depth, log_factor = max(depth, 1), True
+        time_complexity = _complexity(depth, log_factor)
+        space_complexity = (
+            "O(n)"
+            if facts.allocates or (facts.recursive and not facts.memoized)
+            else "O(1)"
+        )
+        edge_cases = ["Empty input"] if facts.early_returns else []
+        return max(0.0, confidence), self._build(
+            code,
+            features,
+            facts.max_depth,
+            time_complexity,
+            space_complexity,
+            risks,
+            edge_cases,
+        )
+
+    def _analyze_tokens(self, code: str) -> Tuple[float, Dict[str, Any]]:
+        """Brace-aware loop nesting for C-like languages"""
+        stripped = re.sub(
+            r"//[^\n]*|/\*.*?\*/|\"(?:\\.|[^\"\\])*\"", "", code, flags=re.DOTALL
+        )
+        depth = max_depth = 0
+        blocks: List[bool] = []
+        pending_loop = False
+        for token in re.findall(r"\b(?:for|while)\b|[{}]", stripped):
+            if token in ("for", "while"):
+                pending_loop = True
+            elif token == "{":
+                blocks.append(pending_loop)
+                if pending_loop:
+                    depth += 1
+                    max_depth = max(max_depth, depth)
+                pending_loop = False
+            elif blocks and blocks.pop():
+                depth -= 1
+        features = set()
+        if re.search(
+            r"HashMap|HashSet|unordered_(?:map|set)|\bmap\[|new Map|new Set|\bMap<|\bSet<",
+            stripped,
+        ):
+            features.add("Hash Table")
+        if re.search(r"PriorityQueue|priority_queue|heap\.", stripped):
+            features.add("Heap (Priority Queue)")
+        if re.search(r"\bsort\b|\.sort\(|Arrays\.sort|sort\.", stripped):
+            features.add("Sorting")
+        log_factor = "Sorting" in features or "Heap (Priority Queue)" in features
+        # Without a parser recursion and loop bounds are guesses
+        confidence = 0.6 if max_depth <= 2 else 0.4
+        return confidence, self._build(
+            code,
+            features,
+            max_depth,
+            _complexity(max(max_depth, 1 if "Sorting" in features else 0), log_factor),
+            "O(n)" if features else "O(1)",
+            [],
+            [],
+        )
+
+    @staticmethod
+    def _build(
+        code: str,
+        features: Set[str],
+        loop_depth: int,
+        time_complexity: str,
+        space_complexity: str,
+        risks: List[str],
+        edge_cases: List[str],
+    ) -> Dict[str, Any]:
+        solution_types = [name for name in _ALGORITHM_ORDER if name in features]
+        algorithm_type = solution_types[0] if solution_types else "Iteration"
+        code_quality_score, style_score = _scores(code)
+        return {
+            "summary": (
+                f"Local estimate: {algorithm_type.lower()} with loop nesting depth "
+                f"{loop_depth}, {time_complexity} time and {space_complexity} space."
+            ),
+            "solution_types": solution_types or ["Iteration"],
+            "time_complexity": time_complexity,
+            "space_complexity": space_complexity,
+            "algorithm_type": algorithm_type,
+            # Left empty so guesses never overwrite the problem's real tags
+            "topic_tags": [],
+            "code_quality_score": code_quality_score,
+            "style_score": style_score,
+            "correctness_confidence": 0.5,
+            "step_analysis": [],
+            "improvement_suggestions": "",
+            "edge_cases_covered": edge_cases,
+            "related_problems": [],
+            "risk_areas": risks,
+            "learning_points": [],
+            "model_version": LOCAL_ANALYZER_VERSION,
+        }
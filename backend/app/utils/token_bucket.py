@@ -0,0 +1,157 @@
+"""
+Token-bucket limiter enforcing requests-per-minute and tokens-per-minute budgets
+"""
+
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucketLimiter:
+    """Thread-safe dual token bucket (RPM and TPM) with adaptive quota backoff"""
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        request_burst: Optional[int] = None,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        # Requests that may go out back to back; defaults to a full minute's budget
+        self.request_burst = request_burst or requests_per_minute
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._request_tokens = float(self.request_burst)
+        self._llm_tokens = float(tokens_per_minute)
+        self._updated_at = clock()
+        self._blocked_until = 0.0
+        self._consecutive_quota_errors = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._updated_at)
+        self._updated_at = now
+        self._request_tokens = min(
+            float(self.request_burst),
+            self._request_tokens + elapsed * self.requests_per_minute / 60.0,
+        )
+        self._llm_tokens = min(
+            float(self.tokens_per_minute),
+            self._llm_tokens + elapsed * self.tokens_per_minute / 60.0,
+        )
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until one request and `tokens` LLM tokens are both available"""
+        wait = max(0.0, self._blocked_until - now)
+        if self._request_tokens < 1:
+            wait = max(
+                wait, (1 - self._request_tokens) * 60.0 / self.requests_per_minute
+            )
+        if self._llm_tokens < tokens:
+            wait = max(
+                wait, (tokens - self._llm_tokens) * 60.0 / self.tokens_per_minute
+            )
+        return wait
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until a request costing `tokens` fits both budgets, then consume it
+
+        Args:
+            tokens: Estimated tokens (prompt + expected output) for the request
+
+        Returns:
+            Total seconds waited
+        """
+        # A single request larger than the whole minute budget still has to run
+        tokens = max(0, min(tokens, self.tokens_per_minute))
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = self._wait_time(tokens, now)
+                if wait <= 0:
+                    self._request_tokens -= 1
+                    self._llm_tokens -= tokens
+                    return waited
+            logger.debug(f"Token bucket exhausted, waiting {wait:.2f}s")
+            self._sleep(wait)
+            waited += wait
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Settle the difference between the estimate and the reported usage"""
+        with self._lock:
+            self._llm_tokens -= actual_tokens - estimated_tokens
+
+    def on_quota_error(self, retry_after: Optional[float] = None) -> float:
+        """
+        Back off after a quota error, doubling the delay on consecutive errors
+
+        Args:
+            retry_after: Delay suggested by the server, if any
+
+        Returns:
+            Seconds all callers sharing this bucket are blocked for
+        """
+        with self._lock:
+            self._consecutive_quota_errors += 1
+            delay = min(
+                self.backoff_max,
+                self.backoff_base * (2 ** (self._consecutive_quota_errors - 1)),
+            )
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            self._blocked_until = max(self._blocked_until, self._clock() + delay)
+            # The server disagrees with our budget; stop spending what we think is left
+            self._request_tokens = min(self._request_tokens, 0.0)
+            logger.warning(
+                f"Quota error #{self._consecutive_quota_errors}, backing off {delay:.1f}s"
+            )
+            return delay
+
+    def on_success(self) -> None:
+        """Reset the adaptive backoff after a successful request"""
+        with self._lock:
+            self._consecutive_quota_errors = 0
+
+
+# Buckets shared by all threads in this worker process, one per API key
+_global_buckets: Dict[str, TokenBucketLimiter] = {}
+_global_buckets_lock = threading.Lock()
+
+
+def get_token_bucket(
+    api_key: str,
+    requests_per_minute: int,
+    tokens_per_minute: int,
+    backoff_base: float = 1.0,
+    backoff_max: float = 60.0,
+    request_burst: Optional[int] = None,
+) -> TokenBucketLimiter:
+    """Get the process-wide token bucket for an API key"""
+    key = hashlib.sha256(api_key.encode()).hexdigest()
+    with _global_buckets_lock:
+        bucket = _global_buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucketLimiter(
+                requests_per_minute,
+                tokens_per_minute,
+                backoff_base=backoff_base,
+                backoff_max=backoff_max,
+                request_burst=request_burst,
+            )
+            _global_buckets[key] = bucket
+        return bucket
@@ -0,0 +1,84 @@
+"""
+Redis-based token cache shared across API and worker processes
+"""
+
+import hashlib
+from typing import Optional
+
+from app.deps import get_redis_client
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_global_redis_client = None
+
+
+class RedisTokenCache:
+    """Cache short-lived tokens in Redis, keyed by a hash of the owning secret"""
+
+    def __init__(self, prefix: str, ttl_seconds: int):
+        global _global_redis_client
+        if _global_redis_client is None:
+            _global_redis_client = next(get_redis_client())
+        self.redis_client = _global_redis_client
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _get_key(self, secret: str) -> str:
+        """Generate Redis key without storing the secret itself"""
+        secret_hash = hashlib.sha256(secret.encode()).hexdigest()
+        return f"{self.prefix}:{secret_hash}"
+
+    def get(self, secret: str) -> Optional[str]:
+        """
+        Get the cached token for a secret
+
+        Args:
+            secret: Secret the token belongs to (e.g. a session cookie)
+
+        Returns:
+            Cached token, or None if missing or Redis is unavailable
+        """
+        try:
+            value = self.redis_client.get(self._get_key(secret))
+        except Exception as e:
+            logger.error(f"Error reading token cache {self.prefix}: {e}")
+            return None
+        if value is None:
+            return None
+        return value.decode() if isinstance(value, bytes) else str(value)
+
+    def set(self, secret: str, token: str) -> bool:
+        """
+        Cache a token for a secret with the configured TTL
+
+        Args:
+            secret: Secret the token belongs to
+            token: Token value to cache
+
+        Returns:
+            True if the token was cached
+        """
+        try:
+            self.redis_client.setex(self._get_key(secret), self.ttl_seconds, token)
+            return True
+        except Exception as e:
+            logger.error(f"Error writing token cache {self.prefix}: {e}")
+            return False
+
+    def delete(self, secret: str) -> bool:
+        """
+        Drop the cached token for a secret, e.g. after it was rejected
+
+        Args:
+            secret: Secret the token belongs to
+
+        Returns:
+            True if the delete was issued
+        """
+        try:
+            self.redis_client.delete(self._get_key(secret))
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting token cache {self.prefix}: {e}")
+            return False
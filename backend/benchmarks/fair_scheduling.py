@@ -0,0 +1,157 @@
+"""
+Simulate per-user fair scheduling of sync tasks on one Celery queue
+
+One user starts a 5,000-record backfill, a second one a smaller backfill,
+while other users trigger small incremental syncs throughout. Backfills are
+split into shards of SYNC_SHARD_SIZE records. The same workload runs through
+
+- fifo: every task, and every shard of a large one, goes to the broker when
+  it is submitted and workers take them in order;
+- fair: the SyncSchedulerService policy (plan_dispatch), with per-user lists,
+  round robin within priority lanes, per-user caps and a limited number of
+  tasks in flight, interactive tasks overtaking queued shards through their
+  message priority.
+
+Reports the p95 wait, from submission to the first record being worked on,
+per user and for the small syncs of all users together.
+
+Usage: python -m benchmarks.fair_scheduling
+"""
+
+import heapq
+import itertools
+import random
+from collections import defaultdict, deque
+from types import SimpleNamespace
+
+from app.config import settings
+from app.services.sync_scheduler_service import (
+    LANE_PRIORITIES,
+    lane_caps,
+    lane_slots,
+    plan_dispatch,
+    task_lane,
+)
+
+SECONDS_PER_RECORD = 0.3
+SMALL_USERS = range(3, 13)
+SMALL_SYNC_RECORDS = (5, 40)
+SMALL_SYNC_INTERVAL = 300.0  # Mean seconds between one user's small syncs
+DURATION = 2 * 3600.0
+
+
+def build_workload(seed: int = 7):
+    """Return tasks as (submit_at, user_id, records), ordered by submit_at"""
+    rng = random.Random(seed)
+    tasks = [(0.0, 1, 5000), (120.0, 2, 1500)]
+    for user_id in SMALL_USERS:
+        at = rng.expovariate(1 / SMALL_SYNC_INTERVAL)
+        while at < DURATION:
+            tasks.append((at, user_id, rng.randint(*SMALL_SYNC_RECORDS)))
+            at += rng.expovariate(1 / SMALL_SYNC_INTERVAL)
+    return sorted(tasks)
+
+
+def units(records: int):
+    """Record counts of the messages a task becomes"""
+    size = settings.SYNC_SHARD_SIZE
+    if not size or records <= size:
+        return [records]
+    return [min(size, records - start) for start in range(0, records, size)]
+
+
+def simulate(workload, workers: int, fair: bool):
+    """Return the wait of every task as {user_id: [seconds, ...]}"""
+    seq = itertools.count()
+    events = []  # (time, seq, kind, payload)
+    broker = []  # (priority, seq, task, records)
+    for index, (at, user_id, records) in enumerate(workload):
+        task = SimpleNamespace(
+            id=index,
+            user_id=user_id,
+            submit_at=at,
+            total_records=records,
+            units=len(units(records)),
+            started_at=None,
+        )
+        heapq.heappush(events, (at, next(seq), "submit", task))
+
+    # Scheduler state, as kept in Redis by SyncSchedulerService
+    queue_slots = workers + settings.SYNC_SCHEDULER_INTERACTIVE_RESERVED_SLOTS
+    rings = defaultdict(list)
+    waiting = defaultdict(deque)
+    running = {}
+
+    def send(task, priority):
+        for records in units(task.total_records):
+            heapq.heappush(broker, (priority, next(seq), task, records))
+
+    def dispatch():
+        pending = {key: len(tasks) for key, tasks in waiting.items()}
+        slots = queue_slots - sum(running.values())
+        picks = plan_dispatch(
+            rings, pending, running, slots, lane_caps(), lane_slots(queue_slots)
+        )
+        for lane, user_id in picks:
+            send(waiting[(lane, user_id)].popleft(), LANE_PRIORITIES[lane])
+
+    idle, waits = workers, defaultdict(list)
+    while events:
+        now, _, kind, task = heapq.heappop(events)
+        if kind == "submit":
+            if fair:
+                key = (task_lane(task), task.user_id)
+                waiting[key].append(task)
+                if len(waiting[key]) == 1:
+                    rings[key[0]].append(task.user_id)
+                dispatch()
+            else:
+                send(task, 0)
+        else:
+            idle += 1
+            task.units -= 1
+            if fair and not task.units:
+                running[(task_lane(task), task.user_id)] -= 1
+                dispatch()
+        while idle and broker:
+            _, _, started, records = heapq.heappop(broker)
+            if started.started_at is None:
+                started.started_at = now
+                waits[started.user_id].append(now - started.submit_at)
+            idle -= 1
+            heapq.heappush(
+                events, (now + records * SECONDS_PER_RECORD, next(seq), "done", started)
+            )
+    return waits
+
+
+def p95(values) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, -(-len(ordered) * 95 // 100) - 1)] if ordered else 0.0
+
+
+def main() -> None:
+    workload = build_workload()
+    print(f"tasks:       {len(workload)} from {len(SMALL_USERS) + 2} users")
+    print(f"shard size:  {settings.SYNC_SHARD_SIZE} records")
+    for workers in (1, 2):
+        fifo = simulate(workload, workers, fair=False)
+        fair = simulate(workload, workers, fair=True)
+        print()
+        print(f"workers={workers}  p95 wait in seconds")
+        print(f"{'user':>6} {'tasks':>6} {'fifo':>10} {'fair':>10}")
+        for user_id in sorted(fifo):
+            print(
+                f"{user_id:>6} {len(fifo[user_id]):>6} "
+                f"{p95(fifo[user_id]):>10.0f} {p95(fair[user_id]):>10.0f}"
+            )
+        small_fifo = [wait for u in SMALL_USERS for wait in fifo[u]]
+        small_fair = [wait for u in SMALL_USERS for wait in fair[u]]
+        print(
+            f"{'small':>6} {len(small_fifo):>6} "
+            f"{p95(small_fifo):>10.0f} {p95(small_fair):>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
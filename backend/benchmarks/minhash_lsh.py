@@ -0,0 +1,181 @@
+"""
+Benchmark the MinHash/LSH near-duplicate detector on synthetic submissions
+
+Each base solution gets near-duplicate variants (renamed variables, changed
+whitespace and comments) that should match, and one-line edits plus unrelated
+solutions that should not. Reports precision/recall of the LSH candidate set
+followed by signature verification at the configured threshold, and the
+signature throughput.
+
+Usage: python -m benchmarks.minhash_lsh
+"""
+
+import random
+import re
+import time
+from collections import defaultdict
+
+from app.config import settings
+from app.utils.minhash import MinHasher
+
+TEMPLATES = [
+    """
+def solve(nums, target):
+    seen = {}
+    for i, num in enumerate(nums):
+        if target - num in seen:
+            return [seen[target - num], i]
+        seen[num] = i
+    return []
+""",
+    """
+def solve(prices):
+    best, low = 0, prices[0]
+    for price in prices:
+        low = min(low, price)
+        best = max(best, price - low)
+    return best
+""",
+    """
+def solve(head):
+    prev = None
+    while head:
+        head.next, prev, head = prev, head, head.next
+    return prev
+""",
+    """
+def solve(grid):
+    rows, cols = len(grid), len(grid[0])
+    count = 0
+    def sink(r, c):
+        if r < 0 or c < 0 or r >= rows or c >= cols or grid[r][c] != "1":
+            return
+        grid[r][c] = "0"
+        for dr, dc in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            sink(r + dr, c + dc)
+    for r in range(rows):
+        for c in range(cols):
+            if grid[r][c] == "1":
+                count += 1
+                sink(r, c)
+    return count
+""",
+    """
+def solve(s):
+    stack = []
+    pairs = {")": "(", "]": "[", "}": "{"}
+    for ch in s:
+        if ch in pairs:
+            if not stack or stack.pop() != pairs[ch]:
+                return False
+        else:
+            stack.append(ch)
+    return not stack
+""",
+]
+
+
+def rename(code: str, rng: random.Random) -> str:
+    names = set(re.findall(r"\b[a-z_][a-z_]*\b", code)) - {
+        "def",
+        "for",
+        "in",
+        "if",
+        "return",
+        "while",
+        "not",
+        "or",
+        "else",
+        "none",
+        "range",
+        "len",
+        "min",
+        "max",
+        "enumerate",
+        "and",
+    }
+    for name in names:
+        code = re.sub(rf"\b{name}\b", f"v{rng.randrange(10**6)}", code)
+    return code
+
+
+def reformat(code: str, rng: random.Random) -> str:
+    lines = []
+    for line in code.splitlines():
+        if rng.random() < 0.3:
+            lines.append("    # note")
+        lines.append(line.replace(", ", ",  ").replace(" = ", "  =  "))
+    return "\n".join(lines)
+
+
+def edit_one_line(code: str, rng: random.Random) -> str:
+    lines = code.strip().splitlines()
+    index = rng.randrange(1, len(lines))
+    lines[index] = lines[index] + " + 1 if len(stack) > 0 else None"
+    return "\n".join(lines)
+
+
+def build_corpus(variants: int, seed: int = 7):
+    """Return (code, group) pairs; codes in the same group are true duplicates"""
+    rng = random.Random(seed)
+    corpus = []
+    for group, template in enumerate(TEMPLATES):
+        corpus.append((template, group))
+        for _ in range(variants):
+            corpus.append((reformat(rename(template, rng), rng), group))
+        # One-line edits change behaviour; they count as distinct solutions
+        corpus.append((edit_one_line(template, rng), f"{group}-edit"))
+    return corpus
+
+
+def main(variants: int = 40) -> None:
+    hasher = MinHasher(
+        num_perm=settings.CODE_MINHASH_NUM_PERM,
+        bands=settings.CODE_MINHASH_BANDS,
+        shingle_size=settings.CODE_MINHASH_SHINGLE_SIZE,
+    )
+    threshold = settings.CODE_SIMILARITY_THRESHOLD
+    corpus = build_corpus(variants)
+
+    started = time.perf_counter()
+    signatures = [hasher.signature(code) for code, _ in corpus]
+    elapsed = time.perf_counter() - started
+
+    buckets = defaultdict(set)
+    for index, signature in enumerate(signatures):
+        for band in enumerate(hasher.band_hashes(signature)):
+            buckets[band].add(index)
+    candidates = set()
+    for members in buckets.values():
+        for a in members:
+            for b in members:
+                if a < b:
+                    candidates.add((a, b))
+
+    predicted = {
+        pair
+        for pair in candidates
+        if hasher.similarity(signatures[pair[0]], signatures[pair[1]]) >= threshold
+    }
+    actual = {
+        (a, b)
+        for a in range(len(corpus))
+        for b in range(a + 1, len(corpus))
+        if corpus[a][1] == corpus[b][1]
+    }
+    true_positives = len(predicted & actual)
+    precision = true_positives / len(predicted) if predicted else 1.0
+    recall = true_positives / len(actual) if actual else 1.0
+
+    print(f"submissions:     {len(corpus)}")
+    print(f"threshold:       {threshold}")
+    print(
+        f"LSH candidates:  {len(candidates)} of {len(corpus) * (len(corpus) - 1) // 2} pairs"
+    )
+    print(f"precision:       {precision:.3f}")
+    print(f"recall:          {recall:.3f}")
+    print(f"signatures/sec:  {len(corpus) / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    main()
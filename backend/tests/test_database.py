@@ -0,0 +1,64 @@
+"""Tests for upgrading the schema of an existing database."""
+
+from unittest.mock import Mock
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base, upgrade_schema
+from app.models import Problem, User
+from app.services.sync_task_service import SyncTaskService
+
+
+class TestUpgradeSchema:
+    """Test cases for upgrade_schema."""
+
+    def test_columns_and_indexes_are_added_once(self):
+        """Tables of an older version get the new columns, then nothing changes."""
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE sync_tasks (id INTEGER PRIMARY KEY, "
+                    "user_id INTEGER NOT NULL, status VARCHAR(20), "
+                    "type VARCHAR(32) NOT NULL)"
+                )
+            )
+            connection.execute(
+                text("CREATE TABLE problems (id INTEGER PRIMARY KEY, title VARCHAR)")
+            )
+        Base.metadata.create_all(bind=engine)
+
+        statements = upgrade_schema(engine)
+
+        inspector = inspect(engine)
+        columns = {c["name"] for c in inspector.get_columns("sync_tasks")}
+        assert {"checkpoint", "full_analysis", "pipeline", "parent_task_id"} <= columns
+        assert "description_markdown" in {
+            c["name"] for c in inspector.get_columns("problems")
+        }
+        indexes = {i["name"] for i in inspector.get_indexes("sync_tasks")}
+        assert {
+            "ix_sync_tasks_user_status_type_created",
+            "ix_sync_tasks_parent_task_id",
+        } <= indexes
+        assert statements
+        assert upgrade_schema(engine) == []
+
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        db.add(
+            User(id=1, username="alice", email="alice@example.com", password_hash="x")
+        )
+        db.add(Problem(id=1, title="Two Sum", description_markdown="Two Sum"))
+        db.commit()
+        task = SyncTaskService(db, event_service=Mock()).create(
+            1, "leetcode_batch_sync", 0, pipeline=True
+        )
+        assert task.pipeline is True
+        db.close()
+        engine.dispose()
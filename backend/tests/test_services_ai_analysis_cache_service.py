@@ -0,0 +1,132 @@
+"""Tests for the content-addressed AI analysis cache."""
+
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import AIAnalysisCache
+from app.schemas.gemini import GeminiConfig
+from app.services.ai_analysis_cache_service import AIAnalysisCacheService
+from app.services.gemini_service import GeminiService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestAIAnalysisCacheService:
+    """Test cases for AIAnalysisCacheService."""
+
+    def test_put_and_get_many_tracks_hits(self, db):
+        """Hits return the stored analysis and refresh the LRU position."""
+        service = AIAnalysisCacheService(db, redis_client=MagicMock())
+        service.put("key-a", "model", {"summary": "a"})
+        db.commit()
+
+        cached = service.get_many(["key-a", "key-b"])
+        db.commit()
+
+        assert cached == {"key-a": {"summary": "a"}}
+        entry = db.query(AIAnalysisCache).filter_by(cache_key="key-a").one()
+        assert entry.hit_count == 1
+
+    def test_duplicate_put_is_ignored(self, db):
+        """A second writer of the same key does not break the transaction."""
+        service = AIAnalysisCacheService(db, redis_client=MagicMock())
+        service.put("key-a", "model", {"summary": "first"})
+        service.put("key-a", "model", {"summary": "second"})
+        db.commit()
+
+        entries = db.query(AIAnalysisCache).all()
+        assert [entry.analysis for entry in entries] == [{"summary": "first"}]
+
+    def test_evict_least_recently_used(self, db):
+        """Eviction keeps the most recently accessed entries."""
+        service = AIAnalysisCacheService(db, redis_client=MagicMock())
+        now = datetime.utcnow()
+        for i, key in enumerate(["old", "mid", "new"]):
+            db.add(
+                AIAnalysisCache(
+                    cache_key=key,
+                    model_name="model",
+                    analysis={},
+                    last_accessed_at=now + timedelta(minutes=i),
+                )
+            )
+        db.commit()
+
+        assert service.evict(2) == 1
+        keys = {entry.cache_key for entry in db.query(AIAnalysisCache).all()}
+        assert keys == {"mid", "new"}
+
+    def test_stats_hit_rate(self, db):
+        """Reuse and in-task duplicates are reported apart from the hit rate."""
+        redis_client = MagicMock()
+        redis_client.hgetall.return_value = {
+            b"hits": b"3",
+            b"misses": b"1",
+            b"reused": b"4",
+            b"deduplicated": b"2",
+        }
+        service = AIAnalysisCacheService(db, redis_client=redis_client)
+        service.put("key-a", "model", {})
+        db.commit()
+
+        stats = service.get_stats()
+
+        assert stats.entries == 1
+        assert stats.hit_rate == 0.75
+        assert (stats.reused, stats.deduplicated) == (4, 2)
+
+    def test_metrics_errors_are_swallowed(self, db):
+        """Redis outages never fail the analysis pipeline."""
+        redis_client = MagicMock()
+        redis_client.pipeline.side_effect = Exception("Redis error")
+        redis_client.hgetall.side_effect = Exception("Redis error")
+        service = AIAnalysisCacheService(db, redis_client=redis_client)
+
+        service.record_lookups(1, 1)
+        assert service.get_stats().hit_rate == 0.0
+
+
+class TestAnalysisCacheKey:
+    """Test cases for GeminiService.analysis_cache_key."""
+
+    def make_service(self, model_name="model-a"):
+        return GeminiService(
+            GeminiConfig(api_key="test-key", model_name=model_name), limiter=MagicMock()
+        )
+
+    def test_whitespace_and_line_endings_are_normalized(self):
+        """Resubmissions differing only in whitespace share a key."""
+        service = self.make_service()
+
+        assert service.analysis_cache_key(
+            "x = 1  \r\ny = 2\n\n", 1, "Python3"
+        ) == service.analysis_cache_key("x = 1\ny = 2", 1, "python3")
+
+    def test_key_covers_problem_language_and_model(self):
+        """Problem, language and model all change the key."""
+        service = self.make_service()
+        key = service.analysis_cache_key("x = 1", 1, "python3")
+
+        assert key != service.analysis_cache_key("x = 1", 2, "python3")
+        assert key != service.analysis_cache_key("x = 1", 1, "java")
+        assert key != self.make_service("model-b").analysis_cache_key(
+            "x = 1", 1, "python3"
+        )
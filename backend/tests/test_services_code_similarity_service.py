@@ -0,0 +1,114 @@
+"""Tests for the near-duplicate code index."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import CodeLSHBand, CodeSignature, Problem, Record, SyncStatus, User
+from app.services.code_similarity_service import CodeSimilarityService
+from app.utils.minhash import MinHasher
+
+CODE = """
+def max_profit(prices):
+    best, low = 0, prices[0]
+    for price in prices:
+        low = min(low, price)
+        best = max(best, price - low)
+    return best
+"""
+
+RENAMED = """
+def max_profit(p):
+    ans, lo = 0, p[0]
+    for x in p:
+        lo = min(lo, x)
+        ans = max(ans, x - lo)
+    return ans
+"""
+
+UNRELATED = """
+def climb(n):
+    a, b = 1, 1
+    while n:
+        a, b, n = b, a + b, n - 1
+    return a
+"""
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(
+        User(id=1, username="user", email="user@example.com", password_hash="x")
+    )
+    session.add_all([Problem(id=1, title="Stock"), Problem(id=2, title="Other")])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_record(db, record_id, code, problem_id=1, user_id=1, analysis=None):
+    record = Record(
+        id=record_id,
+        user_id=user_id,
+        problem_id=problem_id,
+        execution_result="Accepted",
+        submission_id=record_id,
+        code=code,
+        ai_analysis=analysis,
+        ai_sync_status=(
+            SyncStatus.COMPLETED.value if analysis else SyncStatus.PENDING.value
+        ),
+    )
+    db.add(record)
+    db.commit()
+    return record
+
+
+class TestCodeSimilarityService:
+    """Test cases for CodeSimilarityService."""
+
+    def test_index_records_is_idempotent(self, db):
+        """Records are indexed once, with one band row per LSH band."""
+        hasher = MinHasher()
+        service = CodeSimilarityService(db, hasher=hasher)
+        record = add_record(db, 1, CODE)
+
+        assert service.index_records([record]) == 1
+        assert service.index_records([record]) == 0
+        assert db.query(CodeSignature).count() == 1
+        assert db.query(CodeLSHBand).count() == hasher.bands
+
+    def test_reuses_analysis_of_near_duplicate(self, db):
+        """A renamed submission of the same problem reuses its analysis."""
+        service = CodeSimilarityService(db, hasher=MinHasher())
+        analysed = add_record(db, 1, CODE, analysis={"summary": "greedy"})
+        pending = add_record(db, 2, RENAMED)
+        service.index_records([analysed, pending])
+
+        assert service.find_reusable_analysis(pending, threshold=0.95) == (
+            1,
+            1.0,
+            {"summary": "greedy"},
+        )
+
+    def test_ignores_other_problems_and_unrelated_code(self, db):
+        """Only analysed, similar submissions of the same problem qualify."""
+        service = CodeSimilarityService(db, hasher=MinHasher())
+        records = [
+            add_record(db, 1, CODE, problem_id=2, analysis={"summary": "other"}),
+            add_record(db, 2, UNRELATED, analysis={"summary": "dp"}),
+            add_record(db, 3, RENAMED),
+        ]
+        service.index_records(records)
+
+        assert service.find_reusable_analysis(records[2], threshold=0.95) is None
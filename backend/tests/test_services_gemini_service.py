@@ -0,0 +1,235 @@
+"""Tests for GeminiService against a local fake Gemini endpoint."""
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app.schemas.gemini import GeminiConfig
+from app.services.gemini_service import GeminiService
+from app.utils.token_bucket import TokenBucketLimiter
+
+ANALYSIS = {
+    "summary": "Hash map lookup",
+    "solution_types": ["Hash Table"],
+    "time_complexity": "O(n)",
+    "space_complexity": "O(n)",
+    "algorithm_type": "Hash Table",
+    "topic_tags": ["Array", "Hash Table"],
+    "code_quality_score": 8,
+    "style_score": 8,
+    "correctness_confidence": 0.9,
+    "step_analysis": ["Store complements"],
+    "improvement_suggestions": "None",
+    "edge_cases_covered": ["Duplicates"],
+    "related_problems": ["https://leetcode.com/problems/3sum/"],
+    "risk_areas": [],
+    "learning_points": ["Trade space for time"],
+}
+
+
+class FakeGemini:
+    """Minimal generateContent server that can inject quota errors and latency."""
+
+    def __init__(self, quota_errors=0, delay=0.0, respond=None):
+        self.quota_errors = quota_errors
+        self.delay = delay
+        self.respond = respond or (lambda prompt: json.dumps(ANALYSIS))
+        self.prompts = []
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                request = json.loads(
+                    self.rfile.read(int(self.headers["content-length"]))
+                )
+                prompt = request["contents"][0]["parts"][0]["text"]
+                with fake.lock:
+                    fake.prompts.append(prompt)
+                    fake.requests += 1
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    quota_error = fake.quota_errors > 0
+                    if quota_error:
+                        fake.quota_errors -= 1
+                time.sleep(fake.delay)
+                if quota_error:
+                    status, body = 429, {
+                        "error": {
+                            "code": 429,
+                            "message": "Resource exhausted",
+                            "status": "RESOURCE_EXHAUSTED",
+                        }
+                    }
+                else:
+                    status, body = 200, {
+                        "candidates": [
+                            {
+                                "content": {
+                                    "parts": [{"text": fake.respond(prompt)}],
+                                    "role": "model",
+                                }
+                            }
+                        ],
+                        "usageMetadata": {
+                            "promptTokenCount": 50,
+                            "candidatesTokenCount": 50,
+                            "totalTokenCount": 100,
+                        },
+                    }
+                with fake.lock:
+                    fake.in_flight -= 1
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_service(fake, limiter):
+    with patch("app.services.gemini_service.settings.GEMINI_API_BASE_URL", fake.url):
+        return GeminiService(
+            GeminiConfig(api_key="test-key", model_name="fake-model"), limiter=limiter
+        )
+
+
+class TestGeminiServiceFakeEndpoint:
+    """Test cases for GeminiService rate budgeting and retries."""
+
+    def test_analyze_code_records_usage(self):
+        """A successful call validates the schema and settles token usage."""
+        limiter = TokenBucketLimiter(60, 100000)
+        with FakeGemini() as fake:
+            service = make_service(fake, limiter)
+            with patch.object(limiter, "record_usage") as mock_usage:
+                success, result = service.analyze_code("x = 1", "Two Sum", "python")
+
+        assert success is True
+        assert result["model_version"] == "fake-model"
+        assert result["topic_tags"] == ["Array", "Hash Table"]
+        assert mock_usage.call_args.args[1] == 100
+        assert result["usage"]["input_tokens"] == 50
+        assert result["usage"]["output_tokens"] == 50
+        assert result["usage"]["latency_ms"] >= 0
+
+    def test_prompt_uses_compacted_description(self):
+        """The HTML description is sent as markdown."""
+        limiter = TokenBucketLimiter(60, 100000)
+        with FakeGemini() as fake:
+            service = make_service(fake, limiter)
+            service.analyze_code("x = 1", "<p>Find&nbsp;<b>two</b> numbers</p>")
+
+        assert "Find **two** numbers" in fake.prompts[0]
+        assert "<p>" not in fake.prompts[0]
+
+    @patch("app.services.gemini_service.settings.GEMINI_MAX_RETRIES", 2)
+    def test_quota_errors_are_retried_with_backoff(self):
+        """429 responses trigger the adaptive backoff and a retry."""
+        limiter = TokenBucketLimiter(6000, 100000, backoff_base=0.0)
+        with FakeGemini(quota_errors=2) as fake:
+            service = make_service(fake, limiter)
+            with patch.object(
+                limiter, "on_quota_error", wraps=limiter.on_quota_error
+            ) as mock_quota:
+                success, _ = service.analyze_code("x = 1")
+
+        assert success is True
+        assert fake.requests == 3
+        assert mock_quota.call_count == 2
+
+    @patch("app.services.gemini_service.settings.GEMINI_MAX_RETRIES", 1)
+    def test_gives_up_after_max_retries(self):
+        """Persistent quota errors surface as a failed analysis."""
+        limiter = TokenBucketLimiter(6000, 100000, backoff_base=0.0)
+        with FakeGemini(quota_errors=5) as fake:
+            service = make_service(fake, limiter)
+            success, result = service.analyze_code("x = 1")
+
+        assert success is False
+        assert "429" in result["error"]
+        assert fake.requests == 2
+
+    def test_concurrent_analyses_overlap(self):
+        """Concurrent callers share one bucket and overlap their round trips."""
+        limiter = TokenBucketLimiter(600, 1000000)
+        with FakeGemini(delay=0.2) as fake:
+            service = make_service(fake, limiter)
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(
+                    executor.map(lambda i: service.analyze_code(f"x = {i}"), range(8))
+                )
+            elapsed = time.monotonic() - started
+
+        assert all(success for success, _ in results)
+        assert fake.max_in_flight > 1
+        assert elapsed < 8 * 0.2
+
+
+def batch_response(prompt):
+    """Answer batch prompts with one analysis per submission, id 1 invalid."""
+    if "### Submission" not in prompt:
+        return json.dumps(ANALYSIS)
+    count = prompt.count("### Submission")
+    items = [dict(ANALYSIS, id=index) for index in range(count)]
+    items[1]["code_quality_score"] = 42
+    return "```json\n" + json.dumps(items[::-1]) + "\n```"
+
+
+class TestGeminiServiceBatch:
+    """Test cases for batch-mode analysis."""
+
+    def test_batch_validates_items_and_retries_failures(self):
+        """Items are matched by id; invalid ones fall back to single requests."""
+        limiter = TokenBucketLimiter(6000, 1000000)
+        with FakeGemini(respond=batch_response) as fake:
+            service = make_service(fake, limiter)
+            results = service.analyze_code_batch(
+                [(f"x = {i}", "Two Sum", "python") for i in range(3)]
+            )
+
+        assert [success for success, _ in results] == [True, True, True]
+        # The batch request is split across the two items it answered
+        assert results[0][1]["usage"]["input_tokens"] == 50 // 2
+        assert results[2][1]["usage"]["input_tokens"] == 50 // 2
+        assert results[1][1]["usage"]["input_tokens"] == 50
+        assert all(result["model_version"] == "fake-model" for _, result in results)
+        assert fake.requests == 2
+        assert "### Submission 2" in fake.prompts[0]
+        assert "x = 1" in fake.prompts[1]
+        assert "### Submission" not in fake.prompts[1]
+
+    def test_unparseable_batch_falls_back_to_single_requests(self):
+        """A batch response that is not a JSON array retries every item."""
+        limiter = TokenBucketLimiter(6000, 1000000)
+        with FakeGemini(
+            respond=lambda prompt: (
+                "not json" if "### Submission" in prompt else json.dumps(ANALYSIS)
+            )
+        ) as fake:
+            service = make_service(fake, limiter)
+            results = service.analyze_code_batch([("a = 1", "", "python")] * 2)
+
+        assert [success for success, _ in results] == [True, True]
+        assert fake.requests == 3
@@ -0,0 +1,112 @@
+"""Tests for GitMirrorService against a local bare remote."""
+
+import subprocess
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.schemas.github import GitHubConfig
+from app.services.git_mirror_service import GitMirrorService
+
+
+def git(*args, cwd=None):
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def remote(tmp_path):
+    """Bare owner/repo remote plus settings pointing the mirror at it."""
+    remote_path = tmp_path / "remote" / "owner" / "repo.git"
+    git("init", "--quiet", "--bare", "--initial-branch=main", str(remote_path))
+    with patch(
+        "app.services.git_mirror_service.settings.GITHUB_GIT_BASE_URL",
+        f"file://{tmp_path / 'remote'}",
+    ), patch(
+        "app.services.git_mirror_service.settings.GIT_MIRROR_ROOT",
+        str(tmp_path / "mirrors"),
+    ):
+        yield remote_path
+
+
+def make_service():
+    return GitMirrorService(GitHubConfig(repo_url="owner/repo", token="secret"))
+
+
+def remote_log(remote_path):
+    return git("--git-dir", str(remote_path), "log", "--format=%s", "main").split("\n")
+
+
+class TestGitMirrorService:
+    """Test cases for local commits and single-push publishing."""
+
+    def test_first_push_creates_the_branch(self, remote):
+        """An empty remote gets the branch and file in one push."""
+        url = make_service().push_files(
+            [{"file_path": "solutions/a.py", "code": "x = 1\n"}], "Add a"
+        )
+
+        head = git("--git-dir", str(remote), "rev-parse", "main")
+        assert url.endswith(f"/owner/repo/commit/{head}")
+        assert git("--git-dir", str(remote), "show", "main:solutions/a.py") == "x = 1"
+
+    def test_unchanged_files_make_no_commit(self, remote):
+        """Re-pushing identical content is a no-op."""
+        files = [{"file_path": "a.py", "code": "x = 1\n"}]
+        make_service().push_files(files, "Add a")
+
+        service = make_service()
+        assert service.filter_unchanged(files) == []
+        assert service.push_files(files, "Add a again") == ""
+        assert remote_log(remote) == ["Add a"]
+
+    def test_many_commits_publish_in_one_push(self, remote):
+        """Local commits stack up and reach the remote together."""
+        service = make_service()
+        service.commit_files([{"file_path": "a.py", "code": "a"}], "Day 1")
+        service.commit_files(
+            [{"file_path": "b.py", "code": "b"}], "Day 2", datetime(2024, 1, 2)
+        )
+        assert git("--git-dir", str(remote), "branch", "--list") == ""
+        assert service.get_lastest_commit() == "Day 2"
+
+        service.publish()
+
+        assert remote_log(remote) == ["Day 2", "Day 1"]
+        assert git("--git-dir", str(remote), "ls-tree", "--name-only", "main") == (
+            "a.py\nb.py"
+        )
+
+    def test_commits_build_on_remote_changes(self, remote, tmp_path):
+        """Commits pushed elsewhere are fetched before committing on top."""
+        make_service().push_files([{"file_path": "a.py", "code": "a"}], "Add a")
+        clone = tmp_path / "clone"
+        git("clone", "--quiet", str(remote), str(clone))
+        (clone / "README.md").write_text("notes\n")
+        git("add", "README.md", cwd=clone)
+        git("commit", "--quiet", "-m", "Edit on GitHub", cwd=clone)
+        git("push", "--quiet", "origin", "main", cwd=clone)
+
+        make_service().push_files([{"file_path": "b.py", "code": "b"}], "Add b")
+
+        assert remote_log(remote) == ["Add b", "Edit on GitHub", "Add a"]
+
+    def test_repository_management_uses_the_rest_api(self):
+        """Creating and listing repositories is delegated to GitHubService."""
+        with patch("app.services.git_mirror_service.GitHubService") as github:
+            github.return_value.list_repos.return_value = ["owner/repo"]
+            service = make_service()
+
+            assert service.list_repos() == ["owner/repo"]
+            service.create_repository("new-repo", "notes")
+
+        github.assert_called_with(service.config)
+        github.return_value.create_repository.assert_called_once_with(
+            "new-repo", "notes"
+        )
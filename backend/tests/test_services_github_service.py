@@ -0,0 +1,204 @@
+"""Tests for GitHubService against a local git data API stand-in."""
+
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from app.schemas.github import GitHubConfig
+from app.services.github_service import GitHubService, git_blob_sha
+
+
+class FakeGitHub:
+    """Commits, trees and refs of one repository, with ETags on the branch head."""
+
+    def __init__(self, files):
+        self.trees = {
+            "tree-0": {path: git_blob_sha(code) for path, code in files.items()}
+        }
+        self.commits = {"commit-0": ("tree-0", "Initial 20240101")}
+        self.head = "commit-0"
+        self.calls = []
+        self.pushed = []
+        self.blobs = []
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                path = self.path.partition("?")[0]
+                with fake.lock:
+                    fake.calls.append((self.command, path))
+                    status, headers, payload = fake.respond(
+                        self.command, path, self.headers, body
+                    )
+                data = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def respond(self, method, path, headers, body):
+        parts = path.strip("/").split("/")[3:]
+        if parts[0] == "commits":
+            etag = f'"{self.head}"'
+            if headers.get("If-None-Match") == etag:
+                return 304, {}, None
+            tree_sha, message = self.commits[self.head]
+            payload = {
+                "sha": self.head,
+                "commit": {"message": message, "tree": {"sha": tree_sha}},
+            }
+            return 200, {"etag": etag}, payload
+        if method == "GET":
+            entries = [
+                {"path": path, "type": "blob", "sha": sha}
+                for path, sha in self.trees[parts[2]].items()
+            ]
+            return 200, {}, {"sha": parts[2], "tree": entries, "truncated": False}
+        if parts[1] == "blobs":
+            self.blobs.append(body["content"])
+            return 201, {}, {"sha": git_blob_sha(body["content"])}
+        if parts[1] == "trees":
+            self.pushed.extend(entry["path"] for entry in body["tree"])
+            tree = dict(self.trees[body["base_tree"]])
+            tree.update((entry["path"], entry["sha"]) for entry in body["tree"])
+            tree_sha = f"tree-{uuid.uuid4().hex}"
+            self.trees[tree_sha] = tree
+            return 201, {}, {"sha": tree_sha}
+        if parts[1] == "commits":
+            commit_sha = f"commit-{uuid.uuid4().hex}"
+            self.commits[commit_sha] = (body["tree"], body["message"])
+            return (
+                201,
+                {},
+                {"sha": commit_sha, "html_url": f"https://github.com/c/{commit_sha}"},
+            )
+        self.head = body["sha"]
+        return 200, {}, {"object": {"sha": self.head}}
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeRedis:
+    """Just enough of a Redis client for the tree cache."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+def make_service(fake, redis_client):
+    with patch("app.services.github_service.settings.GITHUB_API_BASE_URL", fake.url):
+        service = GitHubService(
+            GitHubConfig(repo_url="owner/repo", token="secret"),
+            redis_client=redis_client,
+        )
+    service.limiter = type("NoLimit", (), {"wait_if_needed": lambda *args: 0.0})()
+    return service
+
+
+class TestGitBlobSha:
+    """Test cases for git_blob_sha."""
+
+    def test_matches_git_hash_object(self):
+        """Same SHA as `echo hello | git hash-object --stdin`."""
+        assert git_blob_sha("hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+
+class TestGitHubServicePushFiles:
+    """Test cases for skipping unchanged files."""
+
+    def test_only_changed_files_are_pushed(self):
+        """Files matching the remote blob SHA are left out of the new tree."""
+        with FakeGitHub({"a.py": "x = 1\n"}) as fake:
+            service = make_service(fake, FakeRedis())
+            url = service.push_files(
+                [
+                    {"file_path": "a.py", "code": "x = 1\n"},
+                    {"file_path": "b.py", "code": "y = 2\n"},
+                ],
+                "Add b",
+            )
+
+        assert url.startswith("https://github.com/c/commit-")
+        assert fake.blobs == ["y = 2\n"]
+        assert fake.pushed == ["b.py"]
+        assert fake.commits[fake.head][1] == "Add b"
+        assert fake.trees[fake.commits[fake.head][0]]["a.py"] == git_blob_sha("x = 1\n")
+
+    def test_nothing_changed_makes_no_commit(self):
+        """A batch already on the branch only costs the head lookup."""
+        with FakeGitHub({"a.py": "x = 1\n"}) as fake:
+            service = make_service(fake, FakeRedis())
+            url = service.push_files(
+                [{"file_path": "a.py", "code": "x = 1\n"}], "No-op"
+            )
+
+        assert url == ""
+        assert fake.head == "commit-0"
+        assert [method for method, _ in fake.calls] == ["GET", "GET"]
+
+    def test_head_is_fetched_once_per_service(self):
+        """Commit message lookup and push share one branch head request."""
+        with FakeGitHub({}) as fake:
+            service = make_service(fake, FakeRedis())
+            assert service.get_lastest_commit() == "Initial 20240101"
+            service.push_files([{"file_path": "a.py", "code": "x"}], "Add a")
+
+        head_requests = [path for _, path in fake.calls if "/commits/" in path]
+        assert head_requests == ["/repos/owner/repo/commits/main"]
+
+    def test_cached_tree_is_revalidated_with_etag(self):
+        """A later task reuses the cached tree while the branch has not moved."""
+        redis_client = FakeRedis()
+        with FakeGitHub({"a.py": "x = 1\n"}) as fake:
+            make_service(fake, redis_client).filter_unchanged([])
+            fake.calls.clear()
+            changed = make_service(fake, redis_client).filter_unchanged(
+                [{"file_path": "a.py", "code": "x = 2\n"}]
+            )
+
+        assert [f["file_path"] for f in changed] == ["a.py"]
+        # One conditional request answered 304, no tree listing
+        assert fake.calls == [("GET", "/repos/owner/repo/commits/main")]
+
+    def test_own_commit_keeps_the_tree_cached(self):
+        """After pushing, the next task does not list the tree again."""
+        redis_client = FakeRedis()
+        with FakeGitHub({}) as fake:
+            make_service(fake, redis_client).push_files(
+                [{"file_path": "a.py", "code": "x"}], "Add a"
+            )
+            fake.calls.clear()
+            changed = make_service(fake, redis_client).filter_unchanged(
+                [{"file_path": "a.py", "code": "x"}]
+            )
+
+        assert changed == []
+        assert fake.calls == [("GET", "/repos/owner/repo/commits/main")]
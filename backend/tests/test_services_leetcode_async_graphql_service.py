@@ -0,0 +1,284 @@
+"""Tests for the async LeetCode GraphQL client."""
+
+import asyncio
+import json
+import threading
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+
+from app.services.leetcode_async_graphql_service import AsyncLeetCodeGraphQLService
+
+
+def make_service(handler, csrf_cache=None, **kwargs):
+    limiter = Mock()
+    limiter.is_allowed.return_value = True
+    if csrf_cache is None:
+        csrf_cache = Mock()
+        csrf_cache.get.return_value = None
+    return AsyncLeetCodeGraphQLService(
+        "session-cookie",
+        limiter=limiter,
+        csrf_cache=csrf_cache,
+        retry_backoff=0,
+        transport=httpx.MockTransport(handler),
+        **kwargs,
+    )
+
+
+def graphql_handler(responses):
+    """Build a handler that serves CSRF on GET and queued responses on POST."""
+    calls = {"get": 0, "post": []}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            calls["get"] += 1
+            return httpx.Response(
+                200, headers={"set-cookie": "csrftoken=token-1; Path=/"}
+            )
+        calls["post"].append(
+            {
+                "body": json.loads(request.content),
+                "csrf": request.headers.get("x-csrftoken"),
+            }
+        )
+        return responses.pop(0)
+
+    return handler, calls
+
+
+class TestAsyncLeetCodeGraphQLService:
+    """Test cases for AsyncLeetCodeGraphQLService."""
+
+    def test_get_submission_details_initializes_csrf_once(self):
+        """CSRF is harvested lazily once and reused across requests."""
+        detail = {
+            "data": {
+                "submissionDetails": {
+                    "id": 1,
+                    "code": "print(1)",
+                    "topicTags": [{"name": "Array"}],
+                    "totalCorrect": 3,
+                    "totalTestcases": 3,
+                }
+            }
+        }
+        handler, calls = graphql_handler(
+            [httpx.Response(200, json=detail), httpx.Response(200, json=detail)]
+        )
+
+        async def run():
+            async with make_service(handler) as service:
+                first = await service.get_submission_details(1)
+                second = await service.get_submission_details(2)
+            return first, second
+
+        first, second = asyncio.run(run())
+
+        assert first["code"] == "print(1)"
+        assert first["topic_tags"] == ["Array"]
+        assert second["total_testcases"] == 3
+        assert calls["get"] == 1
+        assert [c["csrf"] for c in calls["post"]] == ["token-1", "token-1"]
+
+    def test_retries_on_rate_limit_and_server_errors(self):
+        """429 and 5xx responses are retried until a success."""
+        submissions = {
+            "data": {
+                "submissionList": {
+                    "submissions": [
+                        {
+                            "id": "7",
+                            "timestamp": "1700000000",
+                            "statusDisplay": "Accepted",
+                            "lang": "python3",
+                            "titleSlug": "two-sum",
+                        }
+                    ]
+                }
+            }
+        }
+        handler, calls = graphql_handler(
+            [
+                httpx.Response(429, headers={"retry-after": "0"}),
+                httpx.Response(503),
+                httpx.Response(200, json=submissions),
+            ]
+        )
+
+        async def run():
+            async with make_service(handler, max_retries=3) as service:
+                return await service.get_user_submissions(limit=20, offset=0)
+
+        result = asyncio.run(run())
+
+        assert len(calls["post"]) == 3
+        assert result[0]["submission_id"] == 7
+        assert result[0]["problem_title_slug"] == "two-sum"
+
+    def test_gives_up_after_max_retries(self):
+        """The last retryable response is returned once retries are exhausted."""
+        handler, calls = graphql_handler([httpx.Response(500), httpx.Response(500)])
+
+        async def run():
+            async with make_service(handler, max_retries=1) as service:
+                return await service.get_problem_detail("two-sum")
+
+        assert asyncio.run(run()) is None
+        assert len(calls["post"]) == 2
+
+    def test_rotated_csrf_cookie_is_applied(self):
+        """A csrftoken rotated through set-cookie is used for the next call."""
+        status = {"data": {"userStatus": {"isSignedIn": True, "username": "alice"}}}
+        profile = {"data": {"matchedUser": {"username": "alice", "profile": {}}}}
+        handler, calls = graphql_handler(
+            [
+                httpx.Response(
+                    200, json=status, headers={"set-cookie": "csrftoken=token-2"}
+                ),
+                httpx.Response(200, json=profile),
+            ]
+        )
+
+        async def run():
+            async with make_service(handler) as service:
+                return await service.get_user_profile()
+
+        result = asyncio.run(run())
+
+        assert result["username"] == "alice"
+        assert [c["csrf"] for c in calls["post"]] == ["token-1", "token-2"]
+
+    @pytest.mark.parametrize(
+        "payload,expected",
+        [
+            ({"data": {"userStatus": {"isSignedIn": True, "username": "a"}}}, True),
+            ({"data": {"userStatus": {"isSignedIn": False}}}, False),
+        ],
+    )
+    def test_test_connection(self, payload, expected):
+        """test_connection reflects the signed-in state."""
+        responses = [httpx.Response(200, json=payload)]
+        if expected:
+            responses.append(
+                httpx.Response(200, json={"data": {"matchedUser": {"username": "a"}}})
+            )
+        handler, _ = graphql_handler(responses)
+
+        async def run():
+            async with make_service(handler) as service:
+                return await service.test_connection()
+
+        assert asyncio.run(run()) is expected
+
+    def test_redis_calls_run_off_the_event_loop(self):
+        """The sync limiter and CSRF cache are called from worker threads."""
+        threads = []
+
+        def record(*args):
+            threads.append(threading.current_thread())
+            # The limiter denies the first request, then allows
+            return len(threads) > 2
+
+        limiter = Mock()
+        limiter.is_allowed.side_effect = record
+        csrf_cache = Mock()
+        csrf_cache.get.side_effect = lambda key: record() and None
+        handler, _ = graphql_handler(
+            [httpx.Response(200, json={"data": {"userStatus": {}}})]
+        )
+
+        async def run():
+            async with make_service(handler, csrf_cache=csrf_cache) as service:
+                service.limiter = limiter
+                return await service.test_connection()
+
+        with patch(
+            "app.services.leetcode_async_graphql_service.asyncio.sleep",
+            new=AsyncMock(),
+        ):
+            assert asyncio.run(run()) is False
+
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+
+    def test_get_submission_details_batch_uses_aliases(self):
+        """A page of details is fetched in one aliased request."""
+        data = {
+            "data": {
+                "s0": {"id": 11, "code": "a = 1", "topicTags": [{"name": "Math"}]},
+                "s1": None,
+            }
+        }
+        handler, calls = graphql_handler([httpx.Response(200, json=data)])
+
+        async def run():
+            async with make_service(handler) as service:
+                return await service.get_submission_details_batch([11, 12, 11])
+
+        result = asyncio.run(run())
+
+        assert len(calls["post"]) == 1
+        body = calls["post"][0]["body"]
+        assert body["variables"] == {"id0": 11, "id1": 12}
+        assert "s0: submissionDetails(submissionId: $id0)" in body["query"]
+        assert "s1: submissionDetails(submissionId: $id1)" in body["query"]
+        assert result[11]["code"] == "a = 1"
+        assert result[11]["topic_tags"] == ["Math"]
+        assert result[12] == {}
+
+    def test_batch_query_field_profiles(self):
+        """The ingest profile drops heavy debug-only fields."""
+        service = make_service(lambda request: httpx.Response(200))
+        ingest, _ = service._build_submission_details_batch_query([1], "ingest")
+        debug, _ = service._build_submission_details_batch_query([1], "debug")
+
+        for field in ["fullCodeOutput", "testBodies", "testDescriptions"]:
+            assert field not in ingest
+            assert field in debug
+        with pytest.raises(ValueError):
+            service._build_submission_details_batch_query([1], "unknown")
+
+    def test_cached_csrf_token_skips_session_request(self):
+        """A CSRF token cached by another worker avoids the initial GET."""
+        csrf_cache = Mock()
+        csrf_cache.get.return_value = "cached-token"
+        handler, calls = graphql_handler(
+            [httpx.Response(200, json={"data": {"question": {"title": "Two Sum"}}})]
+        )
+
+        async def run():
+            async with make_service(handler, csrf_cache=csrf_cache) as service:
+                return await service.get_problem_detail("two-sum")
+
+        result = asyncio.run(run())
+
+        assert result["title"] == "Two Sum"
+        assert calls["get"] == 0
+        assert calls["post"][0]["csrf"] == "cached-token"
+        csrf_cache.get.assert_called_once_with("session-cookie")
+
+    def test_rejected_cached_token_is_refreshed(self):
+        """A 403 drops the cached token, harvests a new one and retries once."""
+        csrf_cache = Mock()
+        # The first lookup returns the stale token, the refresh misses the cache
+        csrf_cache.get.side_effect = ["stale-token", None]
+        handler, calls = graphql_handler(
+            [
+                httpx.Response(403),
+                httpx.Response(200, json={"data": {"question": {"title": "A"}}}),
+            ]
+        )
+
+        async def run():
+            async with make_service(handler, csrf_cache=csrf_cache) as service:
+                return await service.get_problem_detail("a")
+
+        result = asyncio.run(run())
+
+        assert result["title"] == "A"
+        assert calls["get"] == 1
+        assert [c["csrf"] for c in calls["post"]] == ["stale-token", "token-1"]
+        csrf_cache.delete.assert_called_once_with("session-cookie")
+        csrf_cache.set.assert_called_with("session-cookie", "token-1")
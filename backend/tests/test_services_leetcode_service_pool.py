@@ -0,0 +1,66 @@
+"""Tests for the per-worker LeetCode service pool."""
+
+import threading
+from unittest.mock import Mock, patch
+
+from app.schemas.leetcode import LeetCodeConfig
+from app.services.leetcode_service import LeetCodeServicePool, get_leetcode_service
+
+
+@patch("app.services.leetcode_service.LeetCodeService")
+class TestLeetCodeServicePool:
+    """Test cases for LeetCodeServicePool."""
+
+    def test_reuses_service_for_same_user_and_cookie(self, mock_service_class):
+        """Initialised services are reused instead of re-fetching CSRF."""
+        mock_service_class.side_effect = lambda config: Mock()
+        pool = LeetCodeServicePool(max_size=2)
+        config = LeetCodeConfig(session_cookie="cookie-a")
+
+        first = pool.get(1, config)
+        second = pool.get(1, config)
+
+        assert first is second
+        assert mock_service_class.call_count == 1
+
+    def test_changed_cookie_replaces_service(self, mock_service_class):
+        """A new session cookie builds a new service and closes the old one."""
+        mock_service_class.side_effect = lambda config: Mock()
+        pool = LeetCodeServicePool(max_size=2)
+
+        first = pool.get(1, LeetCodeConfig(session_cookie="cookie-a"))
+        second = pool.get(1, LeetCodeConfig(session_cookie="cookie-b"))
+
+        assert first is not second
+        first.close.assert_called_once()
+
+    def test_evicts_least_recently_used(self, mock_service_class):
+        """The pool is bounded and evicts the least recently used user."""
+        mock_service_class.side_effect = lambda config: Mock()
+        pool = LeetCodeServicePool(max_size=2)
+        config = LeetCodeConfig(session_cookie="cookie")
+
+        user_1 = pool.get(1, config)
+        pool.get(2, config)
+        pool.get(1, config)
+        pool.get(3, config)
+
+        assert pool.get(1, config) is user_1
+        assert mock_service_class.call_count == 3
+
+    def test_each_thread_has_its_own_pool(self, mock_service_class):
+        """Sessions are never shared between threads."""
+        mock_service_class.side_effect = lambda config: Mock()
+        config = LeetCodeConfig(session_cookie="cookie")
+        services = {}
+
+        def worker(name):
+            services[name] = get_leetcode_service(1, config)
+
+        for name in ("a", "b"):
+            thread = threading.Thread(target=worker, args=(name,))
+            thread.start()
+            thread.join()
+
+        assert services["a"] is not services["b"]
+        assert get_leetcode_service(1, config) is get_leetcode_service(1, config)
@@ -0,0 +1,327 @@
+"""Tests for NotionService against a local Notion stand-in."""
+
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+
+from app.schemas.notion import NotionConfig
+from app.services.notion_service import NOTION_MAX_BLOCKS_PER_REQUEST, NotionService
+from app.utils.token_bucket import TokenBucketLimiter
+
+
+class FakeNotion:
+    """Minimal pages/blocks API that records calls and can answer 429."""
+
+    def __init__(self, rate_limited=0, retry_after="0", delay=0.0):
+        self.rate_limited = rate_limited
+        self.retry_after = retry_after
+        self.delay = delay
+        self.pages = {}
+        self.archived = set()
+        self.titles = {}
+        self.calls = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _handle(self):
+                length = int(self.headers.get("content-length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                path, _, query = self.path.partition("?")
+                with fake.lock:
+                    fake.calls.append(
+                        (self.command, path, len(body.get("children", [])))
+                    )
+                    fake.in_flight += 1
+                    fake.max_in_flight = max(fake.max_in_flight, fake.in_flight)
+                    limited = fake.rate_limited > 0
+                    if limited:
+                        fake.rate_limited -= 1
+                time.sleep(fake.delay)
+                headers = {}
+                if limited:
+                    status = 429
+                    headers["retry-after"] = fake.retry_after
+                    payload = {
+                        "object": "error",
+                        "status": 429,
+                        "code": "rate_limited",
+                        "message": "Rate limited",
+                    }
+                else:
+                    status = 200
+                    with fake.lock:
+                        payload = fake.respond(self.command, path, query, body)
+                with fake.lock:
+                    fake.in_flight -= 1
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    @staticmethod
+    def _with_ids(children):
+        return [dict(block, id=str(uuid.uuid4())) for block in children]
+
+    def respond(self, method, path, query, body):
+        parts = path.strip("/").split("/")
+        if method == "POST" and parts == ["v1", "pages"]:
+            page_id = str(uuid.uuid4())
+            self.pages[page_id] = self._with_ids(body["children"])
+            self.titles[page_id] = body["properties"]["title"][0]["text"]["content"]
+            return {
+                "object": "page",
+                "id": page_id,
+                "url": f"https://notion.so/{page_id}",
+            }
+        if parts[1] == "pages":
+            page_id = parts[2]
+            if body.get("archived"):
+                self.archived.add(page_id)
+            if "properties" in body:
+                self.titles[page_id] = body["properties"]["title"][0]["text"]["content"]
+            return {"object": "page", "id": page_id}
+        if method == "DELETE":
+            for blocks in self.pages.values():
+                blocks[:] = [block for block in blocks if block["id"] != parts[2]]
+            return {"object": "block", "id": parts[2], "archived": True}
+        blocks = self.pages[parts[2]]
+        if method == "GET":
+            params = dict(pair.split("=") for pair in query.split("&") if pair)
+            start = int(params.get("start_cursor", 0))
+            size = int(params.get("page_size", 100))
+            end = start + size
+            return {
+                "object": "list",
+                "results": blocks[start:end],
+                "has_more": end < len(blocks),
+                "next_cursor": str(end) if end < len(blocks) else None,
+            }
+        new_blocks = self._with_ids(body["children"])
+        position = len(blocks)
+        if body.get("after"):
+            position = [block["id"] for block in blocks].index(body["after"]) + 1
+        blocks[position:position] = new_blocks
+        return {"object": "list", "results": new_blocks}
+
+    def contents(self, page_id):
+        """Text of every block on a page, in order."""
+        texts = []
+        for block in self.pages[page_id]:
+            value = block[block["type"]]
+            if "rich_text" in value:
+                texts.append(value["rich_text"][0]["text"]["content"])
+            else:
+                texts.append(value["url"])
+        return texts
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def make_service(fake, limiter):
+    with patch("app.services.notion_service.settings.NOTION_API_BASE_URL", fake.url):
+        return NotionService(
+            NotionConfig(token="secret", db_id="parent-page"), limiter=limiter
+        )
+
+
+def make_record(code="x = 1", ai_analysis=None, title="Two Sum"):
+    return Mock(
+        problem=Mock(title=title, description="<p>Find two numbers</p>"),
+        code=code,
+        language="python3",
+        ai_analysis=ai_analysis,
+        submission_url="https://leetcode.com/submissions/detail/1/",
+    )
+
+
+def blocks(count):
+    return [
+        {
+            "object": "block",
+            "type": "paragraph",
+            "paragraph": {"rich_text": [{"type": "text", "text": {"content": str(i)}}]},
+        }
+        for i in range(count)
+    ]
+
+
+class TestNotionServiceFakeEndpoint:
+    """Test cases for NotionService throttling and chunking."""
+
+    def test_children_are_sent_in_ordered_chunks(self):
+        """Pages with more than 100 blocks are created, then appended to in order."""
+        with FakeNotion() as fake:
+            service = make_service(fake, TokenBucketLimiter(6000, 0))
+            success, result = service.create_page("Big page", blocks(250))
+
+        assert success is True
+        assert [count for _, _, count in fake.calls] == [
+            NOTION_MAX_BLOCKS_PER_REQUEST,
+            NOTION_MAX_BLOCKS_PER_REQUEST,
+            50,
+        ]
+        assert fake.calls[1][0] == "PATCH"
+        assert fake.contents(result["page_id"]) == [str(i) for i in range(250)]
+
+    @patch("app.services.notion_service.settings.NOTION_MAX_RETRIES", 2)
+    def test_rate_limited_requests_honour_retry_after(self):
+        """429 responses block the shared limiter for Retry-After seconds."""
+        limiter = TokenBucketLimiter(6000, 0, backoff_base=0.0)
+        with FakeNotion(rate_limited=1, retry_after="0.3") as fake:
+            service = make_service(fake, limiter)
+            started = time.monotonic()
+            success, _ = service.create_page_from_record(make_record())
+            elapsed = time.monotonic() - started
+
+        assert success is True
+        assert len(fake.calls) == 2
+        assert elapsed >= 0.3
+
+    @patch("app.services.notion_service.settings.NOTION_MAX_RETRIES", 1)
+    def test_gives_up_after_max_retries(self):
+        """Persistent rate limiting surfaces as a failed page."""
+        limiter = TokenBucketLimiter(6000, 0, backoff_base=0.0)
+        with FakeNotion(rate_limited=5) as fake:
+            service = make_service(fake, limiter)
+            success, result = service.create_page("Page", blocks(1))
+
+        assert success is False
+        assert "Notion API error" in result["error"]
+        assert len(fake.calls) == 2
+
+    def test_concurrent_pages_respect_request_rate(self):
+        """Concurrent writers overlap but stay within the per-second budget."""
+        limiter = TokenBucketLimiter(600, 0, request_burst=2)
+        with FakeNotion(delay=0.05) as fake:
+            service = make_service(fake, limiter)
+            started = time.monotonic()
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(
+                    executor.map(
+                        lambda i: service.create_page(f"Page {i}", blocks(1)), range(6)
+                    )
+                )
+            elapsed = time.monotonic() - started
+
+        assert all(success for success, _ in results)
+        assert fake.max_in_flight > 1
+        # 2 requests go out at once, the other 4 are paced at 10 req/s
+        assert elapsed >= 0.35
+
+
+class TestNotionServiceUpsert:
+    """Test cases for incremental page updates."""
+
+    def sync(self, service, record, page_id=None, state=None):
+        title, sections = service.build_page_sections(record)
+        return service.sync_page(page_id, state, title, sections)
+
+    def test_unchanged_record_has_nothing_to_sync(self):
+        """A record whose sections match the stored hashes is skipped."""
+        service = NotionService(NotionConfig(token="secret", db_id="parent-page"))
+        record = make_record()
+        title, sections = service.build_page_sections(record)
+        state = service.section_state(title, sections)
+
+        assert service.changed_sections(state, title, sections) == []
+        assert service.changed_sections(None, title, sections) is None
+        changed = make_record(code="x = 2")
+        assert service.changed_sections(
+            state, *service.build_page_sections(changed)
+        ) == ["code"]
+
+    def test_only_changed_sections_are_replaced(self):
+        """New analysis and a new title touch only the title and that section."""
+        with FakeNotion() as fake:
+            service = make_service(fake, TokenBucketLimiter(6000, 0))
+            success, created = self.sync(service, make_record())
+            assert success is True
+            page_id = created["page_id"]
+            first_ids = [block["id"] for block in fake.pages[page_id]]
+            fake.calls.clear()
+
+            updated = make_record(
+                ai_analysis={"summary": "Hash map", "time_complexity": "O(n)"},
+                title="1. Two Sum",
+            )
+            success, result = self.sync(service, updated, page_id, created["state"])
+
+        assert success is True
+        assert result["page_id"] == page_id
+        assert fake.titles[page_id] == "1. Two Sum"
+        # Title update, one listing and one insert; no deletes, no new page
+        assert [method for method, _, _ in fake.calls] == ["PATCH", "GET", "PATCH"]
+        assert [block["id"] for block in fake.pages[page_id]][:4] == first_ids[:4]
+        assert fake.contents(page_id) == [
+            "📝 Problem Description",
+            "Find two numbers",
+            "💻 Code Implementation",
+            "x = 1",
+            "🤖 AI Analysis",
+            "📊 AI Analysis Summary",
+            "Hash map",
+            "⚡ Complexity Analysis",
+            "Time Complexity: O(n)\nSpace Complexity: N/A",
+            "🔗 Submission Link",
+            "https://leetcode.com/submissions/detail/1/",
+        ]
+        assert result["state"] == service.section_state(
+            *service.build_page_sections(updated)
+        )
+
+    def test_changed_code_replaces_its_block_range(self):
+        """Old code blocks are deleted and new ones inserted in place."""
+        with FakeNotion() as fake:
+            service = make_service(fake, TokenBucketLimiter(6000, 0))
+            _, created = self.sync(service, make_record())
+            page_id = created["page_id"]
+
+            success, _ = self.sync(
+                service, make_record(code="y = 2"), page_id, created["state"]
+            )
+
+        assert success is True
+        assert fake.contents(page_id)[2:5] == [
+            "💻 Code Implementation",
+            "y = 2",
+            "🔗 Submission Link",
+        ]
+        assert len(fake.pages) == 1
+
+    def test_pages_without_state_are_recreated(self):
+        """Pages synced before section hashes existed are replaced once."""
+        with FakeNotion() as fake:
+            service = make_service(fake, TokenBucketLimiter(6000, 0))
+            _, legacy = service.create_page("Two Sum", [])
+
+            success, result = self.sync(service, make_record(), legacy["page_id"])
+
+        assert success is True
+        assert legacy["page_id"] in fake.archived
+        assert result["page_id"] != legacy["page_id"]
+        assert result["state"]["sections"]["code"]["count"] == 2
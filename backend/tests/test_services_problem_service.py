@@ -0,0 +1,74 @@
+"""Tests for ProblemService description markdown handling."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import schemas
+from app.database import Base
+from app.models import Problem
+from app.services.problem_service import ProblemService
+from app.utils.description import description_hash
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestProblemDescriptionMarkdown:
+    """Test cases for description_markdown on create, update and backfill."""
+
+    def test_created_and_updated_problems_store_markdown(self, db):
+        """Markdown and hash follow the description through the service."""
+        service = ProblemService(db)
+        problem = service.batch_create_problems(
+            [
+                schemas.ProblemCreate(
+                    source=schemas.ProblemSource.custom,
+                    title="Two Sum",
+                    description="<p>Find <em>two</em></p>",
+                )
+            ]
+        )[0]
+        assert problem.description_markdown == "Find *two*"
+
+        problem = service.update_problem(
+            problem.id, schemas.ProblemUpdate(description="<p>Find three</p>")
+        )
+        assert problem.description_markdown == "Find three"
+        assert problem.description_hash == description_hash("<p>Find three</p>")
+
+    def test_backfill_renders_missing_markdown_in_batches(self, db):
+        """Problems stored before the column existed are filled in bulk."""
+        db.add_all(
+            [
+                Problem(id=i, title=f"P{i}", description=f"<p>Problem {i}</p>")
+                for i in range(1, 6)
+            ]
+            + [Problem(id=6, title="Empty")]
+        )
+        db.commit()
+
+        assert ProblemService(db).backfill_description_markdown(batch_size=2) == 6
+        assert ProblemService(db).backfill_description_markdown(batch_size=2) == 0
+
+        rows = db.query(Problem.id, Problem.description_markdown).order_by(Problem.id)
+        assert [markdown for _, markdown in rows] == [
+            "Problem 1",
+            "Problem 2",
+            "Problem 3",
+            "Problem 4",
+            "Problem 5",
+            "",
+        ]
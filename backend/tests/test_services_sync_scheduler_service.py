@@ -0,0 +1,234 @@
+"""Tests for per-user fair scheduling of sync tasks."""
+
+import time
+from contextlib import nullcontext
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+from celery.canvas import _chain
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import SyncStatus, User
+from app.services.sync_scheduler_service import (
+    LANE_BULK,
+    LANE_INTERACTIVE,
+    SyncSchedulerService,
+    plan_dispatch,
+)
+from app.services.sync_task_service import SyncTaskService
+from app.tasks.sync_scheduling import dispatch_sync_queues
+from app.tasks.task_manager import TaskManager
+
+CAPS = {LANE_INTERACTIVE: 1, LANE_BULK: 1}
+LIMITS = {LANE_INTERACTIVE: 3, LANE_BULK: 2}
+
+
+class FakeRedis:
+    """Lists and hashes, as used by SyncSchedulerService."""
+
+    def __init__(self):
+        self.lists = {}
+        self.hashes = {}
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return nullcontext()
+
+    def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(str(v).encode() for v in values)
+        return len(self.lists[key])
+
+    def lpop(self, key):
+        values = self.lists.get(key)
+        return values.pop(0) if values else None
+
+    def lrange(self, key, start, end):
+        return list(self.lists.get(key, []))
+
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+
+    def delete(self, key):
+        self.lists.pop(key, None)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[str(field).encode()] = value.encode()
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(str(field).encode(), None)
+
+    def hvals(self, key):
+        return list(self.hashes.get(key, {}).values())
+
+    def hkeys(self, key):
+        return list(self.hashes.get(key, {}))
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+
+def make_task(task_id, user_id, total_records=10, type="gemini_sync"):
+    return SimpleNamespace(
+        id=task_id,
+        user_id=user_id,
+        total_records=total_records,
+        type=type,
+        record_ids=None,
+        parent_task_id=None,
+    )
+
+
+class TestPlanDispatch:
+    """Test cases for the dispatch policy."""
+
+    def test_users_take_turns(self):
+        """A user with many tasks does not get ahead of the others."""
+        rings = {LANE_INTERACTIVE: [1, 2, 3]}
+        pending = {(LANE_INTERACTIVE, 1): 5, (LANE_INTERACTIVE, 2): 1}
+        pending[(LANE_INTERACTIVE, 3)] = 1
+        caps = {LANE_INTERACTIVE: 5, LANE_BULK: 1}
+
+        picks = plan_dispatch(
+            rings, pending, {}, 4, caps, {**LIMITS, LANE_INTERACTIVE: 4}
+        )
+
+        assert [user_id for _, user_id in picks] == [1, 2, 3, 1]
+        assert rings[LANE_INTERACTIVE] == [1]
+
+    def test_users_at_their_cap_are_skipped(self):
+        """A user already running a task waits while others go first."""
+        rings = {LANE_BULK: [1, 2]}
+        pending = {(LANE_BULK, 1): 3, (LANE_BULK, 2): 1}
+        running = {(LANE_BULK, 1): 1}
+
+        picks = plan_dispatch(rings, pending, running, 2, CAPS, LIMITS)
+
+        assert picks == [(LANE_BULK, 2)]
+        assert rings[LANE_BULK] == [1]
+
+    def test_interactive_lane_goes_first_and_keeps_its_reserve(self):
+        """Small tasks are dispatched first; bulk tasks stay within their limit."""
+        rings = {LANE_INTERACTIVE: [3], LANE_BULK: [1, 2, 4]}
+        pending = {(LANE_INTERACTIVE, 3): 1}
+        pending.update({(LANE_BULK, user_id): 1 for user_id in (1, 2, 4)})
+
+        picks = plan_dispatch(rings, pending, {}, 5, CAPS, LIMITS)
+
+        assert picks == [(LANE_INTERACTIVE, 3), (LANE_BULK, 1), (LANE_BULK, 2)]
+        assert rings == {LANE_INTERACTIVE: [], LANE_BULK: [4]}
+
+
+class TestSyncSchedulerService:
+    """Test cases for the Redis-backed scheduler."""
+
+    @patch("app.services.sync_scheduler_service.settings.SYNC_SCHEDULER_QUEUE_SLOTS", 2)
+    def test_backfill_does_not_block_small_syncs(self):
+        """Bulk tasks wait their turn; small ones use the reserved slot."""
+        scheduler = SyncSchedulerService(redis_client=FakeRedis())
+        for task in [
+            make_task(1, user_id=1, total_records=5000),
+            make_task(2, user_id=1, total_records=5000),
+            make_task(3, user_id=2, total_records=5000),
+            make_task(4, user_id=3),
+        ]:
+            scheduler.submit("gemini_sync_queue", task)
+
+        assert scheduler.dispatch("gemini_sync_queue") == [4, 1]
+        assert scheduler.dispatch("gemini_sync_queue") == []
+
+        scheduler.release("gemini_sync_queue", 1)
+        assert scheduler.dispatch("gemini_sync_queue") == [3]
+        assert sorted(scheduler.running("gemini_sync_queue")) == [3, 4]
+
+    @patch(
+        "app.services.sync_scheduler_service.settings.SYNC_SCHEDULER_SLOT_LEASE_SECONDS",
+        600,
+    )
+    def test_task_that_died_running_loses_its_slot(self):
+        """The reconcile job takes back slots whose lease ran out."""
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        db.add(
+            User(id=1, username="alice", email="alice@example.com", password_hash="x")
+        )
+        db.commit()
+        sync_tasks = SyncTaskService(db, event_service=Mock())
+        dead = sync_tasks.create(1, "gemini_sync", 10, status=SyncStatus.RUNNING.value)
+        alive = sync_tasks.create(1, "notion_sync", 10, status=SyncStatus.RUNNING.value)
+        redis_client = FakeRedis()
+        scheduler = SyncSchedulerService(redis_client=redis_client)
+        for task, queue in [(dead, "gemini_sync_queue"), (alive, "notion_sync_queue")]:
+            scheduler.submit(queue, task)
+            assert scheduler.dispatch(queue) == [task.id]
+        # The worker running the first task was killed an hour ago
+        redis_client.hashes["sync_scheduler:gemini_sync_queue:running"][
+            str(dead.id).encode()
+        ] = f"interactive:1:{int(time.time()) - 3600}".encode()
+
+        db.close = Mock()
+        with patch("app.tasks.sync_scheduling.get_db", return_value=iter([db])), patch(
+            "app.tasks.sync_scheduling.SyncSchedulerService", return_value=scheduler
+        ), patch.object(TaskManager, "dispatch", return_value=0):
+            dispatch_sync_queues()
+
+        assert scheduler.running("gemini_sync_queue") == {}
+        assert list(scheduler.running("notion_sync_queue")) == [alive.id]
+        engine.dispose()
+
+
+class TestTaskManagerScheduling:
+    """Test cases for starting tasks through the scheduler."""
+
+    def test_scheduled_signature_has_priority_and_releases(self):
+        """The task carries its lane's priority and then frees its slot."""
+        task = make_task(7, user_id=1, total_records=120)
+
+        signature = TaskManager().signature(task, scheduled=True)
+
+        assert isinstance(signature, _chain)
+        sync, release = signature.tasks
+        assert sync.options["priority"] == 9
+        assert release.args == (7, "gemini_sync_queue")
+
+    @patch("app.tasks.task_manager.SyncSchedulerService")
+    def test_tasks_wait_in_the_scheduler(self, scheduler_cls):
+        """start_sync_task submits, then starts what the scheduler returns."""
+        task = make_task(7, user_id=1)
+        scheduler_cls.return_value.dispatch.return_value = [7]
+        db = Mock()
+        task_manager = TaskManager()
+
+        with patch("app.tasks.task_manager.SyncTaskService") as service_cls, patch(
+            "app.tasks.task_manager.object_session", return_value=db
+        ), patch.object(_chain, "apply_async") as apply_async:
+            service_cls.return_value.get.return_value = task
+            assert task_manager.start_sync_task(task) is True
+
+        scheduler_cls.return_value.submit.assert_called_once_with(
+            "gemini_sync_queue", task
+        )
+        apply_async.assert_called_once_with()
+
+    @patch("app.tasks.task_manager.SyncSchedulerService")
+    def test_redis_outage_starts_directly(self, scheduler_cls):
+        """Without Redis the task goes straight to the broker, as before."""
+        scheduler_cls.return_value.submit.side_effect = ConnectionError("down")
+        task = make_task(7, user_id=1)
+
+        with patch("celery.canvas.Signature.apply_async") as apply_async:
+            assert TaskManager().start_sync_task(task)
+
+        apply_async.assert_called_once_with(countdown=None)
@@ -0,0 +1,194 @@
+"""Tests for sharded sync task progress and the shard canvas."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from celery import chord
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import SyncStatus, SyncTaskItem, User
+from app.services.sync_shard_service import (
+    SyncProgress,
+    SyncShardService,
+    shard_counter_key,
+)
+from app.services.sync_task_service import SyncTaskService
+from app.tasks.gemini_sync import gemini_sync_task
+from app.tasks.sharding import shard_signature
+
+
+class FakeRedis:
+    """Hash counters with a pipeline, as used by SyncShardService."""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def pipeline(self):
+        redis, results = self, []
+
+        class Pipeline:
+            def hincrby(self, key, field, amount):
+                values = redis.hashes.setdefault(key, {})
+                values[field] = values.get(field, 0) + amount
+                results.append(values[field])
+
+            def expire(self, key, seconds):
+                results.append(True)
+
+            def execute(self):
+                return list(results)
+
+        return Pipeline()
+
+    def hgetall(self, key):
+        return {
+            k.encode(): str(v).encode() for k, v in self.hashes.get(key, {}).items()
+        }
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(
+        User(id=1, username="alice", email="alice@example.com", password_hash="x")
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def make_shard_progress(db, redis_client, task_id):
+    progress = SyncProgress(SyncTaskService(db), task_id, sharded=True)
+    progress.shard_service = SyncShardService(db, redis_client=redis_client)
+    return progress
+
+
+class TestSyncShardService:
+    """Test cases for counters shared by the shards of one task."""
+
+    def test_shards_add_up_and_finalize(self, db):
+        """Each shard reports deltas; the callback writes the totals."""
+        redis_client = FakeRedis()
+        service = SyncShardService(db, redis_client=redis_client)
+        task = SyncTaskService(db).create(1, "gemini_sync", 5)
+        service.begin(task.id)
+
+        first = make_shard_progress(db, redis_client, task.id)
+        second = make_shard_progress(db, redis_client, task.id)
+        first.update(2, 0)
+        second.update(1, 1)
+        first.update(3, 0, status=SyncStatus.COMPLETED.value)
+        assert SyncTaskService(db).get(task.id).synced_records == 4
+        second.update(1, 1, status=SyncStatus.COMPLETED.value)
+
+        service.finalize(task.id)
+
+        task = SyncTaskService(db).get(task.id)
+        assert (task.status, task.synced_records, task.failed_records) == (
+            SyncStatus.COMPLETED.value,
+            4,
+            1,
+        )
+        assert shard_counter_key(task.id) not in redis_client.hashes
+
+    def test_begin_keeps_the_settled_items(self, db):
+        """Resuming a sharded task starts its counters from the items done."""
+        redis_client = FakeRedis()
+        service = SyncShardService(db, redis_client=redis_client)
+        task = SyncTaskService(db).create(1, "gemini_sync", 2, record_ids=[1, 2])
+        db.query(SyncTaskItem).filter_by(task_id=task.id, record_id=1).update(
+            {"status": SyncStatus.COMPLETED.value}
+        )
+        db.commit()
+
+        service.begin(task.id)
+
+        assert SyncTaskService(db).get(task.id).synced_records == 1
+        assert service.totals(task.id)["synced"] == 1
+
+    def test_failed_shard_fails_the_task(self, db):
+        """One shard failing marks the whole task failed."""
+        redis_client = FakeRedis()
+        service = SyncShardService(db, redis_client=redis_client)
+        task = SyncTaskService(db).create(1, "notion_sync", 4)
+        service.begin(task.id)
+
+        make_shard_progress(db, redis_client, task.id).update(
+            2, 0, status=SyncStatus.COMPLETED.value
+        )
+        make_shard_progress(db, redis_client, task.id).update(
+            0, 2, status=SyncStatus.FAILED.value
+        )
+        service.finalize(task.id)
+
+        assert SyncTaskService(db).get(task.id).status == SyncStatus.FAILED.value
+
+    def test_items_left_pending_pause_the_task(self, db):
+        """Items a shard did not attempt, e.g. over budget, wait for a resume."""
+        redis_client = FakeRedis()
+        service = SyncShardService(db, redis_client=redis_client)
+        task = SyncTaskService(db).create(1, "gemini_sync", 2, record_ids=[1, 2])
+        service.begin(task.id)
+
+        make_shard_progress(db, redis_client, task.id).update(
+            0, 0, status=SyncStatus.COMPLETED.value
+        )
+        service.finalize(task.id)
+
+        assert SyncTaskService(db).get(task.id).status == SyncStatus.PAUSED.value
+
+    def test_paused_task_is_left_alone(self, db):
+        """A pause during the run is not overwritten by the callback."""
+        redis_client = FakeRedis()
+        service = SyncShardService(db, redis_client=redis_client)
+        task = SyncTaskService(db).create(1, "gemini_sync", 4)
+        service.begin(task.id)
+        SyncTaskService(db).update(task.id, status=SyncStatus.PAUSED.value)
+
+        service.finalize(task.id)
+
+        assert SyncTaskService(db).get(task.id).status == SyncStatus.PAUSED.value
+
+
+class TestShardSignature:
+    """Test cases for splitting a task into a chord of shards."""
+
+    @patch("app.tasks.sharding.settings.SYNC_SHARD_SIZE", 2)
+    def test_large_task_becomes_a_chord_of_shards(self):
+        """Record ids are split in order and the callback finalizes."""
+        task = Mock(id=7, type="gemini_sync", record_ids=[1, 2, 3, 4, 5])
+
+        canvas = shard_signature(task, gemini_sync_task, "gemini_sync_queue")
+
+        begin, shards = canvas.tasks
+        assert begin.args == (7,)
+        assert isinstance(shards, chord)
+        assert [sig.args for sig in shards.tasks] == [
+            (7, [1, 2]),
+            (7, [3, 4]),
+            (7, [5]),
+        ]
+        assert {sig.options["queue"] for sig in shards.tasks} == {"gemini_sync_queue"}
+        assert shards.body.name.endswith("finish_sharded_sync_task")
+
+    @patch("app.tasks.sharding.settings.SYNC_SHARD_SIZE", 2)
+    def test_small_and_unsharded_tasks_run_whole(self):
+        """Tasks within one shard, and GitHub syncs, are not split."""
+        small = Mock(id=1, type="gemini_sync", record_ids=[1, 2])
+        github = Mock(id=2, type="github_sync", record_ids=[1, 2, 3])
+
+        assert shard_signature(small, gemini_sync_task, "gemini_sync_queue") is None
+        assert shard_signature(github, gemini_sync_task, "git_sync_queue") is None
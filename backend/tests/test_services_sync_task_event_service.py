@@ -0,0 +1,219 @@
+"""Tests for sync task progress events."""
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import SyncStatus, User
+from app.services.sync_task_event_service import (
+    SyncTaskEventService,
+    sync_task_event_stream,
+    task_events_channel,
+    user_events_channel,
+)
+from app.services.sync_task_service import SyncTaskService
+
+
+class FakeRedis:
+    """Records what is published through a pipeline."""
+
+    def __init__(self):
+        self.published = []
+
+    def pipeline(self, transaction=True):
+        redis = self
+
+        class Pipeline:
+            def publish(self, channel, message):
+                redis.published.append((channel, json.loads(message)))
+
+            def execute(self):
+                return []
+
+        return Pipeline()
+
+
+class BrokenRedis:
+    def pipeline(self, transaction=True):
+        raise ConnectionError("Connection refused")
+
+
+class FakeAsyncRedis:
+    """Async pub/sub replaying messages; None stands for a heartbeat timeout."""
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.subscribed = []
+        self.closed = False
+
+    def pubsub(self):
+        redis = self
+
+        class PubSub:
+            async def subscribe(self, *channels):
+                redis.subscribed.extend(channels)
+
+            async def get_message(self, ignore_subscribe_messages, timeout):
+                data = redis.messages.pop(0)
+                return None if data is None else {"data": json.dumps(data).encode()}
+
+            async def aclose(self):
+                pass
+
+        return PubSub()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRequest:
+    def __init__(self, connected_checks=100):
+        self.connected_checks = connected_checks
+
+    async def is_disconnected(self):
+        self.connected_checks -= 1
+        return self.connected_checks < 0
+
+
+def collect(stream):
+    async def run():
+        return [chunk async for chunk in stream]
+
+    return asyncio.run(run())
+
+
+def progress_events(chunks):
+    return [
+        json.loads(chunk.split("data: ", 1)[1])
+        for chunk in chunks
+        if chunk.startswith("event: progress")
+    ]
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(
+        User(id=1, username="alice", email="alice@example.com", password_hash="x")
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestSyncTaskEventService:
+    """Test cases for publishing task progress."""
+
+    def test_updates_are_published_to_task_and_user(self, db):
+        """Each committed change reaches both the task and the user channel."""
+        redis_client = FakeRedis()
+        service = SyncTaskService(
+            db, event_service=SyncTaskEventService(redis_client=redis_client)
+        )
+        task = service.create(1, "gemini_sync", 3)
+        redis_client.published.clear()
+
+        service.update(task.id, status=SyncStatus.RUNNING.value, synced_records=2)
+
+        assert [channel for channel, _ in redis_client.published] == [
+            task_events_channel(task.id),
+            user_events_channel(1),
+        ]
+        event = redis_client.published[0][1]
+        assert (event["id"], event["status"], event["synced_records"]) == (
+            task.id,
+            "running",
+            2,
+        )
+
+    def test_redis_errors_do_not_fail_the_update(self, db):
+        """Progress is still committed when Redis is unavailable."""
+        service = SyncTaskService(
+            db, event_service=SyncTaskEventService(redis_client=BrokenRedis())
+        )
+        task = service.create(1, "notion_sync", 1)
+
+        updated = service.update(task.id, status=SyncStatus.COMPLETED.value)
+
+        assert updated.status == SyncStatus.COMPLETED.value
+
+
+class TestSyncTaskEventStream:
+    """Test cases for the Server-Sent Events stream."""
+
+    def test_task_stream_ends_when_the_task_finishes(self):
+        """Snapshot first, heartbeats while idle, closed after completion."""
+        redis_client = FakeAsyncRedis(
+            [
+                {"id": 7, "status": "running", "synced_records": 1},
+                None,
+                {"id": 7, "status": "completed", "synced_records": 2},
+                {"id": 7, "status": "running", "synced_records": 3},
+            ]
+        )
+
+        chunks = collect(
+            sync_task_event_stream(
+                FakeRequest(),
+                [task_events_channel(7)],
+                [{"id": 7, "status": "pending", "synced_records": 0}],
+                close_on_terminal=True,
+                redis_client=redis_client,
+            )
+        )
+
+        assert chunks[0].startswith("retry: ")
+        assert ": heartbeat\n\n" in chunks
+        assert [event["status"] for event in progress_events(chunks)] == [
+            "pending",
+            "running",
+            "completed",
+        ]
+        assert redis_client.subscribed == ["sync_task_events:7"]
+        assert redis_client.closed
+
+    def test_finished_task_sends_only_its_snapshot(self):
+        """A task that already completed does not wait for updates."""
+        redis_client = FakeAsyncRedis([])
+
+        chunks = collect(
+            sync_task_event_stream(
+                FakeRequest(),
+                [task_events_channel(7)],
+                [{"id": 7, "status": "failed"}],
+                close_on_terminal=True,
+                redis_client=redis_client,
+            )
+        )
+
+        assert progress_events(chunks) == [{"id": 7, "status": "failed"}]
+
+    def test_user_stream_runs_until_the_client_disconnects(self):
+        """Terminal events of one task do not end the per-user stream."""
+        redis_client = FakeAsyncRedis(
+            [{"id": 1, "status": "completed"}, {"id": 2, "status": "running"}]
+        )
+
+        chunks = collect(
+            sync_task_event_stream(
+                FakeRequest(connected_checks=2),
+                [user_events_channel(1)],
+                [],
+                redis_client=redis_client,
+            )
+        )
+
+        assert [event["id"] for event in progress_events(chunks)] == [1, 2]
+        assert redis_client.closed
@@ -0,0 +1,165 @@
+"""Tests for per-record sync task items."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Record, SyncStatus, SyncTaskItem, User
+from app.services.sync_shard_service import SyncProgress
+from app.services.sync_task_item_service import SyncTaskItemService
+from app.services.sync_task_service import SyncTaskService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(
+        User(id=1, username="alice", email="alice@example.com", password_hash="x")
+    )
+    session.add_all(
+        [
+            Record(id=i, user_id=1, execution_result="Accepted", submission_id=i)
+            for i in range(1, 5)
+        ]
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def run_gemini_sync(db, service, task_id, outcomes):
+    """Claim, set ai_sync_status per outcome and settle the items."""
+    claimed = service.claim(task_id, [1, 2, 3, 4])
+    for record_id in claimed:
+        db.get(Record, record_id).ai_sync_status = outcomes[record_id]
+    db.commit()
+    errors = {
+        record_id: "quota exceeded"
+        for record_id in claimed
+        if outcomes[record_id] == SyncStatus.FAILED.value
+    }
+    service.finish(task_id, claimed, Record.ai_sync_status, errors)
+    db.commit()
+    return claimed
+
+
+class TestSyncTaskItemService:
+    """Test cases for claiming, settling and retrying items."""
+
+    def test_items_are_created_with_tracked_tasks(self, db):
+        """Export tasks get one pending item per record; batch syncs none."""
+        sync_tasks = SyncTaskService(db)
+        task = sync_tasks.create(1, "gemini_sync", 3, record_ids=[1, 2, 2, 3])
+        sync_tasks.create(1, "leetcode_batch_sync", 0)
+
+        service = SyncTaskItemService(db)
+        assert service.counts([task.id]) == {task.id: {"pending": 3}}
+        assert db.query(SyncTaskItem).count() == 3
+
+        sync_tasks.delete(task.id)
+        assert db.query(SyncTaskItem).count() == 0
+
+    def test_claimed_items_are_not_claimed_twice(self, db):
+        """A second worker gets nothing while the items are running."""
+        task = SyncTaskService(db).create(1, "notion_sync", 2, record_ids=[1, 2])
+        service = SyncTaskItemService(db)
+
+        assert service.claim(task.id, [2, 1]) == [2, 1]
+        assert service.claim(task.id, [1, 2]) == []
+        assert service.counts([task.id])[task.id] == {"running": 2}
+
+    def test_retry_only_takes_failed_items(self, db):
+        """Completed items stay done; failed ones keep their error and retry."""
+        task = SyncTaskService(db).create(1, "gemini_sync", 4, record_ids=[1, 2, 3, 4])
+        service = SyncTaskItemService(db)
+        done, failed = SyncStatus.COMPLETED.value, SyncStatus.FAILED.value
+
+        run_gemini_sync(db, service, task.id, {1: done, 2: failed, 3: done, 4: failed})
+
+        assert service.counts([task.id])[task.id] == {"completed": 2, "failed": 2}
+        item = db.query(SyncTaskItem).filter_by(task_id=task.id, record_id=2).one()
+        assert (item.attempts, item.last_error) == (1, "quota exceeded")
+
+        claimed = run_gemini_sync(db, service, task.id, {2: done, 4: failed})
+
+        assert claimed == [2, 4]
+        assert service.counts([task.id])[task.id] == {"completed": 3, "failed": 1}
+
+    def test_retry_keeps_the_totals_of_earlier_runs(self, db):
+        """A retry reports what it did on top of what earlier runs settled."""
+        sync_tasks = SyncTaskService(db, event_service=Mock())
+        task = sync_tasks.create(1, "gemini_sync", 4, record_ids=[1, 2, 3, 4])
+        service = SyncTaskItemService(db)
+        done, failed = SyncStatus.COMPLETED.value, SyncStatus.FAILED.value
+
+        progress = SyncProgress(sync_tasks, task.id, item_service=service)
+        progress.start()
+        run_gemini_sync(db, service, task.id, {1: done, 2: failed, 3: done, 4: failed})
+        progress.update(2, 2, status=failed)
+        task = sync_tasks.get(task.id)
+        assert (task.synced_records, task.failed_records) == (2, 2)
+
+        retry = SyncProgress(sync_tasks, task.id, item_service=service)
+        retry.start()
+        run_gemini_sync(db, service, task.id, {2: done, 4: failed})
+        retry.update(1, 1)
+        task = sync_tasks.get(task.id)
+        assert (task.synced_records, task.failed_records) == (3, 1)
+        retry.update(1, 1, status=failed)
+        task = sync_tasks.get(task.id)
+        assert (task.synced_records, task.failed_records) == (3, 1)
+
+    @patch("app.services.sync_task_item_service.settings.SYNC_ITEM_MAX_ATTEMPTS", 2)
+    @patch(
+        "app.services.sync_task_item_service.settings.SYNC_ITEM_RETRY_BACKOFF_BASE", 10
+    )
+    def test_backoff_grows_until_attempts_run_out(self, db):
+        """The delay doubles per attempt and stops at the attempt limit."""
+        task = SyncTaskService(db).create(1, "gemini_sync", 1, record_ids=[1])
+        service = SyncTaskItemService(db)
+        failed = SyncStatus.FAILED.value
+
+        assert service.retry_delay(task.id) is None
+        run_gemini_sync(db, service, task.id, {1: failed})
+        assert service.retry_delay(task.id) == 10
+        service.claim(task.id, [1])
+        service.release(task.id, "worker lost")
+        db.commit()
+
+        assert service.retry_delay(task.id) is None
+        assert service.claim(task.id, [1]) == []
+
+    def test_requeued_items_are_pending_and_not_charged(self, db):
+        """Items left unattempted go back to pending with their attempt refunded."""
+        task = SyncTaskService(db).create(1, "gemini_sync", 2, record_ids=[1, 2])
+        service = SyncTaskItemService(db)
+        done = SyncStatus.COMPLETED.value
+        claimed = service.claim(task.id, [1, 2])
+        db.get(Record, 1).ai_sync_status = done
+        db.commit()
+
+        service.requeue(task.id, [2])
+        service.finish(task.id, claimed, Record.ai_sync_status)
+        db.commit()
+
+        assert service.counts([task.id])[task.id] == {"completed": 1, "pending": 1}
+        item = db.query(SyncTaskItem).filter_by(task_id=task.id, record_id=2).one()
+        assert (item.attempts, item.last_error) == (0, None)
+        assert service.claim(task.id, [1, 2]) == [2]
+
+    def test_tasks_without_items_run_everything(self, db):
+        """Tasks created before item tracking keep their whole record list."""
+        task = SyncTaskService(db).create(1, "gemini_sync", 0)
+
+        assert SyncTaskItemService(db).claim(task.id, [3, 1]) == [3, 1]
@@ -0,0 +1,116 @@
+"""Tests for SyncTaskService listing totals and statistics."""
+
+from datetime import datetime
+from unittest.mock import Mock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import SyncTask, User
+from app.services.sync_task_service import SyncTaskService
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add_all(
+        [
+            User(id=1, username="alice", email="alice@example.com", password_hash="x"),
+            User(id=2, username="bob", email="bob@example.com", password_hash="x"),
+        ]
+    )
+    tasks = [
+        (1, "github_sync", "completed", datetime(2025, 1, 1)),
+        (1, "github_sync", "failed", datetime(2025, 1, 2)),
+        (1, "notion_sync", "completed", datetime(2025, 2, 1)),
+        (1, "gemini_sync", "running", datetime(2025, 3, 1)),
+        (1, "gemini_sync", "pending", datetime(2025, 3, 2)),
+        (2, "github_sync", "completed", datetime(2025, 1, 1)),
+    ]
+    session.add_all(
+        [
+            SyncTask(user_id=user_id, type=type, status=status, created_at=created_at)
+            for user_id, type, status, created_at in tasks
+        ]
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+class TestSyncTaskServiceAggregates:
+    """Test cases for COUNT and GROUP BY over the list filters."""
+
+    def test_count_matches_the_unpaginated_list(self, db):
+        """count() applies the same filters as list() without the limit."""
+        service = SyncTaskService(db, event_service=Mock())
+        filters = [
+            {"user_id": 1},
+            {"user_id": 1, "type": "github_sync"},
+            {"user_id": 1, "status": "completed"},
+            {"user_id": 1, "created_after": datetime(2025, 1, 15)},
+            {"user_id": 1, "created_before": datetime(2025, 2, 1)},
+            {},
+        ]
+
+        for kwargs in filters:
+            assert service.count(**kwargs) == len(
+                service.list(limit=10000, **kwargs)
+            ), kwargs
+        assert service.list(user_id=1, limit=2)[0].type == "gemini_sync"
+
+    def test_stats_count_statuses_and_types(self, db):
+        """Statuses and types are counted within the user's filtered tasks."""
+        service = SyncTaskService(db, event_service=Mock())
+
+        stats = service.stats(user_id=1)
+
+        assert (stats["total"], stats["completed"], stats["failed"]) == (5, 2, 1)
+        assert (stats["running"], stats["pending"], stats["paused"]) == (1, 1, 0)
+        assert stats["by_type"] == {
+            "github_sync": 2,
+            "notion_sync": 1,
+            "gemini_sync": 2,
+        }
+        assert service.stats(user_id=1, type="github_sync")["by_type"] == {
+            "github_sync": 2
+        }
+        assert (
+            service.stats(user_id=1, created_before=datetime(2025, 1, 31))["total"] == 2
+        )
+
+    def test_stats_for_one_task_respect_its_owner(self, db):
+        """A task id of another user counts as nothing."""
+        service = SyncTaskService(db, event_service=Mock())
+        other = db.query(SyncTask).filter(SyncTask.user_id == 2).one()
+
+        assert service.stats(user_id=1, task_id=other.id)["total"] == 0
+        assert service.stats(user_id=2, task_id=other.id)["completed"] == 1
+
+
+class TestSyncTaskServicePause:
+    """Test cases for telling when a paused run has stopped."""
+
+    def test_resume_waits_for_the_worker(self, db):
+        """A run paused mid-page has stopped once acknowledged or gone silent."""
+        service = SyncTaskService(db, event_service=Mock())
+        task = service.create(1, "leetcode_batch_sync", 0, status="running")
+
+        service.update(task.id, status="paused", paused_at=None)
+        assert not service.has_stopped(task)
+
+        service.update(task.id, updated_at=datetime(2025, 1, 1))
+        assert service.has_stopped(task)
+
+        service.update(task.id, paused_at=datetime.utcnow())
+        assert service.has_stopped(task)
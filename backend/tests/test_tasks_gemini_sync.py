@@ -0,0 +1,253 @@
+"""Tests for the Gemini sync task."""
+
+from unittest.mock import MagicMock, Mock, patch
+
+from app.models import SyncStatus
+from app.tasks import gemini_sync
+from app.tasks.gemini_sync import gemini_sync_task
+
+
+def make_record(record_id, code):
+    return Mock(
+        id=record_id,
+        code=code,
+        problem_id=1,
+        language="python3",
+        problem=Mock(description="Two Sum"),
+        ai_analysis=None,
+        topic_tags=None,
+    )
+
+
+@patch(
+    "app.tasks.gemini_sync.SyncTaskItemService",
+    Mock(
+        return_value=Mock(
+            claim=lambda task_id, record_ids: list(record_ids),
+            settled=lambda task_id: (0, 0),
+            totals=lambda task_id: None,
+        )
+    ),
+)
+@patch("app.tasks.gemini_sync.get_db")
+@patch("app.tasks.gemini_sync.CodeSimilarityService")
+@patch("app.tasks.gemini_sync.AIAnalysisCacheService")
+@patch("app.tasks.gemini_sync.GeminiService")
+@patch("app.tasks.gemini_sync.UserConfigService")
+@patch("app.tasks.gemini_sync.SyncTaskService")
+class TestGeminiSyncTask:
+    """Test cases for gemini_sync_task."""
+
+    def test_cache_hits_and_duplicates_skip_the_llm(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_gemini_service,
+        mock_cache_service,
+        mock_similarity_service,
+        mock_get_db,
+    ):
+        """Cached analyses apply instantly and identical code is analysed once."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        records = [
+            make_record(1, "cached"),
+            make_record(2, "fresh"),
+            make_record(3, "fresh"),
+        ]
+        db.query.return_value.options.return_value.filter.return_value.all.return_value = (
+            records
+        )
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1, 2, 3])
+        sync_tasks.can_start.return_value = True
+        gemini = mock_gemini_service.return_value
+        gemini.analysis_cache_key.side_effect = lambda code, problem_id, lang: code
+        gemini.estimate_analysis_tokens.return_value = 100
+        gemini.analyze_code_batch.side_effect = lambda items: [
+            (True, {"topic_tags": ["Array"], "usage": {"input_tokens": 10}})
+            for _ in items
+        ]
+        cache = mock_cache_service.return_value
+        cache.get_many.return_value = {"cached": {"topic_tags": ["Hash Table"]}}
+        mock_similarity_service.return_value.find_reusable_analysis.return_value = None
+
+        gemini_sync_task(1)
+
+        gemini.analyze_code_batch.assert_called_once()
+        assert len(gemini.analyze_code_batch.call_args.args[0]) == 1
+        assert records[0].topic_tags == ["Hash Table"]
+        assert records[1].topic_tags == records[2].topic_tags == ["Array"]
+        assert records[1].ai_analysis == {"topic_tags": ["Array"]}
+        assert [r.ai_input_tokens for r in records] == [0, 10, 0]
+        assert all(r.ai_sync_status == SyncStatus.COMPLETED.value for r in records)
+        cache.put.assert_called_once()
+        cache.record_lookups.assert_called_once_with(1, 1, reused=0, deduplicated=1)
+        final = sync_tasks.update.call_args.kwargs
+        assert final["synced_records"] == 3
+        assert final["failed_records"] == 0
+
+    def test_near_duplicate_analysis_is_reused(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_gemini_service,
+        mock_cache_service,
+        mock_similarity_service,
+        mock_get_db,
+    ):
+        """A near-duplicate submission's analysis replaces the LLM call."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        records = [make_record(1, "renamed")]
+        db.query.return_value.options.return_value.filter.return_value.all.return_value = (
+            records
+        )
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1])
+        sync_tasks.can_start.return_value = True
+        gemini = mock_gemini_service.return_value
+        gemini.analysis_cache_key.side_effect = lambda code, problem_id, lang: code
+        gemini.estimate_analysis_tokens.return_value = 100
+        cache = mock_cache_service.return_value
+        cache.get_many.return_value = {}
+        similarity = mock_similarity_service.return_value
+        similarity.find_reusable_analysis.return_value = (
+            7,
+            0.97,
+            {"topic_tags": ["Two Pointers"]},
+        )
+
+        gemini_sync_task(1)
+
+        similarity.index_records.assert_called_once_with(records, commit=False)
+        gemini.analyze_code_batch.assert_not_called()
+        assert records[0].topic_tags == ["Two Pointers"]
+        cache.put.assert_not_called()
+        cache.record_lookups.assert_called_once_with(0, 0, reused=1, deduplicated=0)
+
+    @patch("app.tasks.gemini_sync.settings.GEMINI_BATCH_SIZE", 2)
+    def test_submissions_are_analysed_in_batches(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_gemini_service,
+        mock_cache_service,
+        mock_similarity_service,
+        mock_get_db,
+    ):
+        """Distinct submissions are packed into requests of GEMINI_BATCH_SIZE."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        records = [make_record(i, f"code-{i}") for i in range(1, 4)]
+        db.query.return_value.options.return_value.filter.return_value.all.return_value = (
+            records
+        )
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1, 2, 3])
+        sync_tasks.can_start.return_value = True
+        gemini = mock_gemini_service.return_value
+        gemini.analysis_cache_key.side_effect = lambda code, problem_id, lang: code
+        gemini.estimate_analysis_tokens.return_value = 100
+        gemini.analyze_code_batch.side_effect = lambda items: [
+            (code != "code-3", {"topic_tags": [code], "error": "invalid"})
+            for code, _, _ in items
+        ]
+        mock_cache_service.return_value.get_many.return_value = {}
+        mock_similarity_service.return_value.find_reusable_analysis.return_value = None
+
+        gemini_sync_task(1)
+
+        batch_sizes = sorted(
+            len(call.args[0]) for call in gemini.analyze_code_batch.call_args_list
+        )
+        assert batch_sizes == [1, 2]
+        assert records[0].topic_tags == ["code-1"]
+        assert records[2].ai_sync_status == SyncStatus.FAILED.value
+        final = sync_tasks.update.call_args.kwargs
+        assert final["synced_records"] == 2
+        assert final["failed_records"] == 1
+
+    @patch("app.tasks.gemini_sync.settings.GEMINI_TASK_TOKEN_BUDGET", 150)
+    def test_token_budget_leaves_records_pending_and_pauses(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_gemini_service,
+        mock_cache_service,
+        mock_similarity_service,
+        mock_get_db,
+    ):
+        """Submissions beyond the budget are not sent nor charged an attempt."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        records = [make_record(1, "first"), make_record(2, "second")]
+        for record in records:
+            record.ai_sync_status = SyncStatus.PENDING.value
+        db.query.return_value.options.return_value.filter.return_value.all.return_value = (
+            records
+        )
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1, 2])
+        sync_tasks.can_start.return_value = True
+        gemini = mock_gemini_service.return_value
+        gemini.analysis_cache_key.side_effect = lambda code, problem_id, lang: code
+        gemini.estimate_analysis_tokens.return_value = 100
+        gemini.analyze_code_batch.side_effect = lambda items: [
+            (True, {"topic_tags": ["Array"]}) for _ in items
+        ]
+        cache = mock_cache_service.return_value
+        cache.get_many.return_value = {}
+        mock_similarity_service.return_value.find_reusable_analysis.return_value = None
+
+        gemini_sync_task(1)
+
+        assert gemini.analyze_code_batch.call_args.args[0][0][0] == "first"
+        assert records[1].ai_sync_status == SyncStatus.PENDING.value
+        cache.record_lookups.assert_called_once_with(0, 1, reused=0, deduplicated=0)
+        items = gemini_sync.SyncTaskItemService.return_value
+        items.requeue.assert_called_with(1, [2])
+        final = sync_tasks.update.call_args.kwargs
+        assert (final["synced_records"], final["failed_records"]) == (1, 0)
+        assert final["status"] == SyncStatus.PAUSED.value
+
+    def test_confident_local_analysis_skips_the_llm(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_gemini_service,
+        mock_cache_service,
+        mock_similarity_service,
+        mock_get_db,
+    ):
+        """Local estimates are applied unless the task asks for a full analysis."""
+        for full_analysis, llm_calls in ((False, 0), (True, 1)):
+            db = MagicMock()
+            mock_get_db.return_value = iter([db])
+            record = make_record(1, "def f(nums):\n    return sum(nums)\n")
+            db.query.return_value.options.return_value.filter.return_value.all.return_value = [
+                record
+            ]
+            sync_tasks = mock_sync_task_service.return_value
+            sync_tasks.get.return_value = Mock(
+                user_id=1, record_ids=[1], full_analysis=full_analysis
+            )
+            sync_tasks.can_start.return_value = True
+            gemini = mock_gemini_service.return_value
+            gemini.reset_mock()
+            gemini.analysis_cache_key.side_effect = lambda code, problem_id, lang: code
+            gemini.estimate_analysis_tokens.return_value = 100
+            gemini.analyze_code_batch.side_effect = lambda items: [
+                (True, {"model_version": "gemini"}) for _ in items
+            ]
+            mock_cache_service.return_value.get_many.return_value = {}
+            mock_similarity_service.return_value.find_reusable_analysis.return_value = (
+                None
+            )
+
+            gemini_sync_task(1)
+
+            assert gemini.analyze_code_batch.call_count == llm_calls
+            assert record.ai_sync_status == SyncStatus.COMPLETED.value
+            expected = "gemini" if full_analysis else "local-static-v1"
+            assert record.ai_analysis["model_version"] == expected
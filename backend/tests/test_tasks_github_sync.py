@@ -0,0 +1,194 @@
+"""Tests for the GitHub sync task."""
+
+import subprocess
+from datetime import datetime
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+from celery.exceptions import Retry
+
+from app.models import SyncStatus
+from app.schemas.github import GitHubConfig
+from app.tasks.github_sync import (
+    GitHubSyncTask,
+    PushLockTimeout,
+    _push_lock,
+    github_sync_task,
+)
+
+
+def make_record(record_id, code="x = 1", day=1):
+    return Mock(
+        id=record_id,
+        problem=Mock(id=record_id, title=f"Problem {record_id}", description=""),
+        language="python3",
+        code=code,
+        submit_time=datetime(2024, 1, day, 12, 0, record_id),
+    )
+
+
+@patch("app.tasks.github_sync.SyncTaskService")
+@patch("app.tasks.github_sync.GitHubService")
+class TestGitHubSyncTaskChunks:
+    """Test cases for chunked commits."""
+
+    def make_task(self):
+        return GitHubSyncTask(
+            MagicMock(), GitHubConfig(repo_url="owner/repo", token="secret")
+        )
+
+    @patch("app.tasks.github_sync.settings.GITHUB_MAX_FILES_PER_COMMIT", 2)
+    def test_failed_chunk_only_fails_its_records(
+        self, mock_github_service, mock_sync_task_service
+    ):
+        """Each chunk is its own commit; one failure leaves the others synced."""
+        service = mock_github_service.return_value
+        service.filter_unchanged.side_effect = lambda files: files[1:]
+        service.get_lastest_commit.return_value = "Initial 20240101"
+        service.push_files.side_effect = [
+            "https://github.com/c/1",
+            Exception("Failed to push files to GitHub: 502"),
+        ]
+        records = [make_record(i) for i in range(1, 6)]
+
+        synced, failed = self.make_task().run(Mock(id=7), records)
+
+        assert (synced, failed) == (3, 2)
+        assert [len(call.args[0]) for call in service.push_files.call_args_list] == [
+            2,
+            2,
+        ]
+        statuses = [record.github_sync_status for record in records]
+        assert (
+            statuses == [SyncStatus.COMPLETED.value] * 3 + [SyncStatus.FAILED.value] * 2
+        )
+        assert records[1].git_file_path == "https://github.com/c/1"
+        # Unchanged files, then one progress update per chunk
+        updates = mock_sync_task_service.return_value.update.call_args_list
+        assert [call.kwargs["synced_records"] for call in updates] == [1, 3, 3]
+
+    @patch("app.tasks.github_sync.settings.GITHUB_MAX_BYTES_PER_COMMIT", 1500)
+    def test_chunks_respect_the_byte_limit(
+        self, mock_github_service, mock_sync_task_service
+    ):
+        """Files are grouped until the next one would exceed the byte limit."""
+        items = [
+            (Mock(), {"file_path": f"{size}.py", "code": "x" * size})
+            for size in (1000, 400, 200, 2000, 10)
+        ]
+
+        chunks = self.make_task()._split_into_chunks(items)
+
+        assert [[f["file_path"] for _, f in chunk] for chunk in chunks] == [
+            ["1000.py", "400.py"],
+            ["200.py"],
+            ["2000.py"],
+            ["10.py"],
+        ]
+
+
+@patch("app.tasks.github_sync.SyncTaskService")
+class TestGitHubSyncTaskMirror:
+    """Test cases for mirror mode."""
+
+    def test_one_commit_per_day_in_a_single_push(
+        self, mock_sync_task_service, tmp_path
+    ):
+        """Records are committed per submission day and published together."""
+        remote = tmp_path / "owner" / "repo.git"
+        subprocess.run(["git", "init", "--quiet", "--bare", str(remote)], check=True)
+        config = GitHubConfig(
+            repo_url="owner/repo",
+            token="secret",
+            sync_mode="mirror",
+            commit_per_day=True,
+            commit_message_template="Solutions of {date}",
+        )
+        records = [make_record(1, day=2), make_record(2, day=1), make_record(3, day=2)]
+        with patch(
+            "app.services.git_mirror_service.settings.GITHUB_GIT_BASE_URL",
+            f"file://{tmp_path}",
+        ), patch(
+            "app.services.git_mirror_service.settings.GIT_MIRROR_ROOT",
+            str(tmp_path / "mirrors"),
+        ):
+            synced, failed = GitHubSyncTask(MagicMock(), config).run(
+                Mock(id=7), records
+            )
+
+        assert (synced, failed) == (3, 0)
+        log = subprocess.run(
+            ["git", "--git-dir", str(remote), "log", "--format=%s", "main"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split("\n")[:-1]
+        assert log == ["Solutions of 20240102", "Solutions of 20240101"]
+        assert records[0].git_file_path == records[2].git_file_path
+        assert records[0].git_file_path != records[1].git_file_path
+        assert {record.github_sync_status for record in records} == {
+            SyncStatus.COMPLETED.value
+        }
+
+
+@patch("app.tasks.github_sync.get_redis_client")
+class TestPushLock:
+    """Test cases for the per-user push lock."""
+
+    def test_lock_timeout_raises(self, mock_get_redis_client):
+        """A lock held by another worker for the whole wait is not skipped."""
+        lock = mock_get_redis_client.return_value.__next__.return_value.lock
+        lock.return_value.acquire.return_value = False
+
+        with pytest.raises(PushLockTimeout):
+            with _push_lock(1):
+                pytest.fail("pushed without the lock")
+
+    def test_unreachable_redis_pushes_unlocked(self, mock_get_redis_client):
+        """Only a Redis outage lets the push run without the lock."""
+        lock = mock_get_redis_client.return_value.__next__.return_value.lock
+        lock.return_value.acquire.side_effect = ConnectionError("refused")
+        pushed = []
+
+        with _push_lock(1):
+            pushed.append(True)
+
+        assert pushed == [True]
+        lock.return_value.release.assert_not_called()
+
+
+@patch("app.tasks.github_sync.GitHubSyncTask")
+@patch("app.tasks.github_sync._push_lock")
+@patch("app.tasks.github_sync.SyncTaskItemService")
+@patch("app.tasks.github_sync.UserConfigService")
+@patch("app.tasks.github_sync.SyncTaskService")
+@patch("app.tasks.github_sync.get_db")
+class TestGitHubSyncTaskLockTimeout:
+    """Test cases for runs that could not take the push lock."""
+
+    def test_lock_timeout_requeues_the_run(
+        self,
+        mock_get_db,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_item_service,
+        mock_push_lock,
+        mock_sync,
+    ):
+        """Claimed items go back to pending and the task is retried later."""
+        mock_get_db.return_value = iter([MagicMock()])
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(id=7, user_id=1, record_ids=[1, 2])
+        sync_tasks.can_start.return_value = True
+        items = mock_item_service.return_value
+        items.claim.return_value = [1, 2]
+        items.settled.return_value = (0, 0)
+        mock_push_lock.return_value.__enter__.side_effect = PushLockTimeout("busy")
+
+        with pytest.raises(Retry):
+            github_sync_task(7)
+
+        mock_sync.return_value.run.assert_not_called()
+        items.requeue.assert_called_once_with(7, [1, 2])
+        items.release.assert_not_called()
+        sync_tasks.update.assert_called_once_with(7, status=SyncStatus.RETRY.value)
@@ -0,0 +1,377 @@
+"""Tests for checkpointed LeetCode batch sync."""
+
+from datetime import datetime
+from unittest.mock import MagicMock, Mock, patch
+
+from app.models import SyncStatus
+from app.services.leetcode_graphql_service import LeetCodeGraphQLService
+from app.tasks.leetcode_batch_sync import leetcode_batch_sync_task
+
+SUBMIT_TIME = datetime(2024, 1, 1)
+
+
+def make_submission(submission_id):
+    return {
+        "submission_id": submission_id,
+        "problem_title_slug": "two-sum",
+        "status": "Accepted",
+        "language": "python3",
+        "submit_time": SUBMIT_TIME,
+        "runtime": "1 ms",
+        "memory": "1 MB",
+        "submission_url": f"https://leetcode.com/submissions/detail/{submission_id}/",
+    }
+
+
+class TestGetAllUserSubmissionsOffset:
+    """Test cases for resuming the submission walk at an offset."""
+
+    def test_start_offset(self):
+        """Pages are requested from the checkpoint offset, not from zero."""
+        service = LeetCodeGraphQLService.__new__(LeetCodeGraphQLService)
+        pages = {20: [make_submission(i) for i in range(20)], 40: []}
+        with patch.object(
+            service,
+            "get_user_submissions",
+            side_effect=lambda limit, offset: pages[offset],
+        ) as mock_get:
+            batches = list(service.get_all_user_submissions(start_offset=20))
+
+        assert len(batches) == 1
+        assert [c.args for c in mock_get.call_args_list] == [(20, 20), (20, 40)]
+
+    def test_max_submissions_counts_from_start(self):
+        """max_submissions covers the whole walk, including resumed offsets."""
+        service = LeetCodeGraphQLService.__new__(LeetCodeGraphQLService)
+        page = [make_submission(i) for i in range(20)]
+        with patch.object(service, "get_user_submissions", return_value=page):
+            batches = list(
+                service.get_all_user_submissions(max_submissions=25, start_offset=20)
+            )
+
+        assert [len(b) for b in batches] == [5]
+
+
+@patch("app.tasks.leetcode_batch_sync.get_global_rate_limiter", Mock())
+@patch(
+    "app.tasks.leetcode_batch_sync.get_redis_client",
+    Mock(side_effect=lambda: iter([Mock()])),
+)
+@patch("app.tasks.leetcode_batch_sync.CodeSimilarityService", Mock())
+@patch("app.tasks.leetcode_batch_sync.get_db")
+@patch("app.tasks.leetcode_batch_sync.SyncWatermarkService")
+@patch("app.tasks.leetcode_batch_sync.ProblemService")
+@patch("app.tasks.leetcode_batch_sync.RecordService")
+@patch("app.tasks.leetcode_batch_sync.UserConfigService")
+@patch("app.tasks.leetcode_batch_sync.SyncTaskService")
+@patch("app.tasks.leetcode_batch_sync.get_leetcode_service")
+class TestLeetCodeBatchSyncCheckpoint:
+    """Test cases for checkpoint, resume and pause in the batch sync task."""
+
+    def setup_task(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_record_service,
+        mock_get_db,
+        checkpoint=None,
+        pages=None,
+        watermark=None,
+        watermark_service=None,
+        pipeline=False,
+    ):
+        mock_get_db.side_effect = lambda: iter([MagicMock()])
+        sync_task = Mock(
+            user_id=1,
+            total_records=0,
+            checkpoint=checkpoint,
+            synced_records=3,
+            failed_records=1,
+            pipeline=pipeline,
+        )
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = sync_task
+        sync_tasks.can_start.return_value = True
+        sync_tasks.is_paused.return_value = False
+        mock_record_service.return_value.get_record_by_submission_id.return_value = None
+        mock_record_service.return_value.existing_submission_ids.return_value = set()
+        if watermark_service is not None:
+            watermark_service.return_value.get.return_value = watermark
+        service = mock_get_service.return_value
+        service.fetch_user_submissions.return_value = iter(pages or [])
+        service.fetch_user_submissions_detail_batch.side_effect = lambda ids: {
+            i: {"code": "x"} for i in ids
+        }
+        return sync_tasks, service
+
+    def test_checkpoint_saved_after_each_page(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """Each committed page records offset, page and last submission id."""
+        pages = [
+            [make_submission(100), make_submission(99)],
+            [make_submission(98)],
+        ]
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            pages=pages,
+            watermark_service=mock_watermark_service,
+        )
+
+        leetcode_batch_sync_task(1)
+
+        service.fetch_user_submissions.assert_called_once_with(
+            max_submissions=None, start_offset=0
+        )
+        checkpoints = [
+            c.kwargs["checkpoint"]
+            for c in sync_tasks.update.call_args_list
+            if "checkpoint" in c.kwargs
+        ]
+        assert checkpoints == [
+            {
+                "offset": 2,
+                "last_submission_id": 99,
+                "page": 1,
+                "newest_submission_id": 100,
+                "newest_submit_time": SUBMIT_TIME.isoformat(),
+            },
+            {
+                "offset": 3,
+                "last_submission_id": 98,
+                "page": 2,
+                "newest_submission_id": 100,
+                "newest_submit_time": SUBMIT_TIME.isoformat(),
+            },
+        ]
+        assert sync_tasks.update.call_args.kwargs["status"] == (
+            SyncStatus.COMPLETED.value
+        )
+
+    def test_resume_continues_from_checkpoint(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """Resumed tasks start at the saved offset and skip already handled ids."""
+        checkpoint = {
+            "offset": 40,
+            "last_submission_id": 99,
+            "page": 2,
+            "newest_submission_id": 120,
+        }
+        # A new submission shifted the offsets while the task was paused
+        pages = [[make_submission(99), make_submission(98)]]
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            checkpoint=checkpoint,
+            pages=pages,
+            watermark_service=mock_watermark_service,
+        )
+
+        leetcode_batch_sync_task(1)
+
+        service.fetch_user_submissions.assert_called_once_with(
+            max_submissions=None, start_offset=40
+        )
+        service.fetch_user_submissions_detail_batch.assert_called_once_with([98])
+        final = sync_tasks.update.call_args.kwargs
+        assert final["synced_records"] == 4
+        assert final["failed_records"] == 1
+
+    def test_pause_stops_between_pages(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """A pause stops the run after the current page and is acknowledged."""
+        pages = [[make_submission(100)], [make_submission(99)]]
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            pages=pages,
+            watermark_service=mock_watermark_service,
+        )
+        sync_tasks.is_paused.side_effect = [False, True]
+
+        leetcode_batch_sync_task(1)
+
+        service.fetch_user_submissions_detail_batch.assert_called_once_with([100])
+        statuses = [c.kwargs.get("status") for c in sync_tasks.update.call_args_list]
+        assert SyncStatus.COMPLETED.value not in statuses
+        checkpoint, acknowledgement = sync_tasks.update.call_args_list[-2:]
+        assert checkpoint.kwargs["checkpoint"]["offset"] == 1
+        assert isinstance(acknowledgement.kwargs["paused_at"], datetime)
+
+    def test_watermark_stops_without_record_lookups(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """Incremental runs stop at the watermark and advance it to the newest id."""
+        pages = [
+            [make_submission(105), make_submission(104), make_submission(100)],
+            [make_submission(99)],
+        ]
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            pages=pages,
+            watermark=Mock(last_submission_id=100),
+            watermark_service=mock_watermark_service,
+        )
+
+        leetcode_batch_sync_task(1)
+
+        service.fetch_user_submissions_detail_batch.assert_called_once_with([105, 104])
+        mock_record_service.return_value.get_record_by_submission_id.assert_not_called()
+        mock_watermark_service.return_value.advance.assert_called_once_with(
+            1, 105, SUBMIT_TIME
+        )
+
+    def test_rerun_after_a_failure_skips_committed_pages(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """Pages above the watermark committed before a failure are not re-created."""
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            watermark=Mock(last_submission_id=100),
+            watermark_service=mock_watermark_service,
+        )
+        records = mock_record_service.return_value
+        created = []
+        records.create_record.side_effect = lambda user_id, data: created.append(
+            data.submission_id
+        ) or Mock(id=data.submission_id, oj_sync_status=data.oj_sync_status)
+        records.existing_submission_ids.side_effect = lambda user_id, ids: set(
+            ids
+        ) & set(created)
+
+        def failing_walk(**kwargs):
+            yield [make_submission(105), make_submission(104)]
+            raise ConnectionError("LeetCode went away")
+
+        service.fetch_user_submissions.side_effect = failing_walk
+        leetcode_batch_sync_task(1)
+        assert sync_tasks.update.call_args.kwargs["status"] == SyncStatus.FAILED.value
+        mock_watermark_service.return_value.advance.assert_not_called()
+
+        # The scheduler starts a fresh task, which walks from the newest again
+        service.fetch_user_submissions.side_effect = None
+        service.fetch_user_submissions.return_value = iter(
+            [
+                [make_submission(106), make_submission(105)],
+                [make_submission(104), make_submission(103), make_submission(100)],
+            ]
+        )
+        leetcode_batch_sync_task(2)
+
+        assert created == [105, 104, 106, 103]
+        mock_watermark_service.return_value.advance.assert_called_once_with(
+            1, 106, SUBMIT_TIME
+        )
+
+    def test_paused_run_does_not_advance_watermark(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """The watermark only moves once the walk has completed."""
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            pages=[[make_submission(100)], [make_submission(99)]],
+            watermark_service=mock_watermark_service,
+        )
+        sync_tasks.is_paused.side_effect = [False, True]
+
+        leetcode_batch_sync_task(1)
+
+        mock_watermark_service.return_value.advance.assert_not_called()
+
+    def test_pipeline_dispatches_each_committed_page(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_record_service,
+        mock_problem_service,
+        mock_watermark_service,
+        mock_get_db,
+    ):
+        """Pipelined runs hand every page downstream as soon as it is created."""
+        pages = [[make_submission(100), make_submission(99)], [make_submission(98)]]
+        sync_tasks, service = self.setup_task(
+            mock_get_service,
+            mock_sync_task_service,
+            mock_record_service,
+            mock_get_db,
+            pages=pages,
+            watermark_service=mock_watermark_service,
+            pipeline=True,
+        )
+        service.fetch_user_submissions_detail_batch.side_effect = lambda ids: {
+            i: {"code": "x"} for i in ids if i != 99
+        }
+        mock_record_service.return_value.create_record.side_effect = (
+            lambda user_id, data: Mock(
+                id=data.submission_id + 1000,
+                oj_sync_status=data.oj_sync_status,
+            )
+        )
+
+        with patch("app.tasks.pipeline.start_pipeline_batch") as mock_start:
+            leetcode_batch_sync_task(1)
+
+        batches = [c.args[3:] for c in mock_start.call_args_list]
+        assert batches == [([1100, 1099], [1099]), ([1098], [])]
+        assert mock_start.call_args.args[1] is sync_tasks.get.return_value
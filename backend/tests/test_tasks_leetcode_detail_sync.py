@@ -0,0 +1,78 @@
+"""Tests for chunked LeetCode detail sync."""
+
+from unittest.mock import MagicMock, Mock, patch
+
+from app.models import Record, SyncStatus
+from app.tasks.leetcode_detail_sync import leetcode_detail_sync_task
+
+DETAIL = {
+    "code": "print(1)",
+    "runtime_percentile": 90.0,
+    "memory_percentile": 80.0,
+    "total_correct": 3,
+    "total_testcases": 3,
+    "topic_tags": ["Array"],
+}
+
+
+@patch(
+    "app.tasks.leetcode_detail_sync.SyncTaskItemService",
+    Mock(
+        return_value=Mock(
+            claim=lambda task_id, record_ids: list(record_ids),
+            settled=lambda task_id: (0, 0),
+            totals=lambda task_id: None,
+        )
+    ),
+)
+@patch("app.tasks.leetcode_detail_sync.settings.LEETCODE_DETAIL_SYNC_CHUNK_SIZE", 2)
+@patch("app.tasks.leetcode_detail_sync.CodeSimilarityService", Mock())
+@patch("app.tasks.leetcode_detail_sync.get_db")
+@patch("app.tasks.leetcode_detail_sync.UserConfigService")
+@patch("app.tasks.leetcode_detail_sync.SyncTaskService")
+@patch("app.tasks.leetcode_detail_sync.get_leetcode_service")
+class TestLeetCodeDetailSync:
+    """Test cases for leetcode_detail_sync_task."""
+
+    def test_chunks_queries_and_bulk_updates(
+        self,
+        mock_get_service,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_get_db,
+    ):
+        """Records load per chunk, details fetch concurrently, updates go in bulk."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1, 2, 3])
+        sync_tasks.can_start.return_value = True
+        db.query.return_value.filter.return_value.all.side_effect = [
+            [Mock(id=1, submission_id=101), Mock(id=2, submission_id=102)],
+            [Mock(id=3, submission_id=103)],
+        ]
+        service = mock_get_service.return_value
+        service.fetch_user_submissions_details.side_effect = [
+            {101: DETAIL, 102: {}},
+            {103: DETAIL},
+        ]
+
+        leetcode_detail_sync_task(1)
+
+        assert db.query.call_count == 2
+        assert [
+            c.args[0] for c in service.fetch_user_submissions_details.call_args_list
+        ] == [
+            [101, 102],
+            [103],
+        ]
+        first_chunk = db.bulk_update_mappings.call_args_list[0].args
+        assert first_chunk[0] is Record
+        assert first_chunk[1][0]["oj_sync_status"] == SyncStatus.COMPLETED.value
+        assert first_chunk[1][0]["code"] == "print(1)"
+        assert first_chunk[1][1] == {"id": 2, "oj_sync_status": SyncStatus.FAILED.value}
+        assert db.commit.call_count == 2
+        final = sync_tasks.update.call_args.kwargs
+        assert final["status"] == SyncStatus.COMPLETED.value
+        assert final["synced_records"] == 2
+        assert final["failed_records"] == 1
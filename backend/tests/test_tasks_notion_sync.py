@@ -0,0 +1,112 @@
+"""Tests for the Notion sync task."""
+
+from unittest.mock import MagicMock, Mock, patch
+
+from app.models import SyncStatus
+from app.tasks.notion_sync import notion_sync_task
+
+
+@patch(
+    "app.tasks.notion_sync.SyncTaskItemService",
+    Mock(
+        return_value=Mock(
+            claim=lambda task_id, record_ids: list(record_ids),
+            settled=lambda task_id: (0, 0),
+            totals=lambda task_id: None,
+        )
+    ),
+)
+@patch("app.tasks.notion_sync.get_db")
+@patch("app.tasks.notion_sync.NotionService")
+@patch("app.tasks.notion_sync.UserConfigService")
+@patch("app.tasks.notion_sync.SyncTaskService")
+class TestNotionSyncTask:
+    """Test cases for notion_sync_task."""
+
+    @patch("app.tasks.notion_sync.settings.NOTION_COMMIT_BATCH_SIZE", 2)
+    def test_pages_are_created_concurrently_and_committed_in_batches(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_notion_service,
+        mock_get_db,
+    ):
+        """Pages are built up front, sent by workers and statuses batched."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        records = [Mock(id=i, notion_page_id=None) for i in range(1, 6)]
+        db.query.return_value.options.return_value.filter.return_value.all.return_value = (
+            records
+        )
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1, 2, 3, 4, 5])
+        sync_tasks.can_start.return_value = True
+        notion = mock_notion_service.return_value
+
+        def build_page_sections(record):
+            if record.id == 5:
+                raise ValueError("record has no problem")
+            return f"Title {record.id}", []
+
+        notion.build_page_sections.side_effect = build_page_sections
+        notion.sync_page.side_effect = lambda page_id, state, title, sections: (
+            (False, {"error": "boom"})
+            if title == "Title 4"
+            else (
+                True,
+                {
+                    "page_id": title,
+                    "page_url": f"https://notion.so/{title}",
+                    "state": {"title": title},
+                },
+            )
+        )
+
+        notion_sync_task(1)
+
+        assert notion.sync_page.call_count == 4
+        assert records[0].notion_page_id == "Title 1"
+        assert records[0].notion_sync_state == {"title": "Title 1"}
+        assert records[0].notion_sync_status == SyncStatus.COMPLETED.value
+        assert records[3].notion_sync_status == SyncStatus.FAILED.value
+        assert records[4].notion_sync_status == SyncStatus.FAILED.value
+        # One commit for building, two progress updates, one final commit
+        assert db.commit.call_count == 2
+        assert sync_tasks.update.call_count == 3
+        final = sync_tasks.update.call_args.kwargs
+        assert final["status"] == SyncStatus.COMPLETED.value
+        assert final["synced_records"] == 3
+        assert final["failed_records"] == 2
+
+    def test_unchanged_pages_are_skipped(
+        self,
+        mock_sync_task_service,
+        mock_user_config_service,
+        mock_notion_service,
+        mock_get_db,
+    ):
+        """Records whose sections match the stored state make no API calls."""
+        db = MagicMock()
+        mock_get_db.return_value = iter([db])
+        unchanged = Mock(id=1, notion_page_id="page-1", notion_sync_state={"a": 1})
+        changed = Mock(id=2, notion_page_id="page-2", notion_sync_state={"a": 2})
+        db.query.return_value.options.return_value.filter.return_value.all.return_value = [
+            unchanged,
+            changed,
+        ]
+        sync_tasks = mock_sync_task_service.return_value
+        sync_tasks.get.return_value = Mock(user_id=1, record_ids=[1, 2])
+        sync_tasks.can_start.return_value = True
+        notion = mock_notion_service.return_value
+        notion.build_page_sections.return_value = ("Two Sum", [])
+        notion.changed_sections.side_effect = lambda state, title, sections: (
+            [] if state == {"a": 1} else ["code"]
+        )
+        notion.sync_page.return_value = (True, {"page_id": "page-2", "state": {}})
+
+        notion_sync_task(1)
+
+        notion.sync_page.assert_called_once_with("page-2", {"a": 2}, "Two Sum", [])
+        assert unchanged.notion_sync_status == SyncStatus.COMPLETED.value
+        assert changed.notion_sync_status == SyncStatus.COMPLETED.value
+        assert sync_tasks.update.call_args.kwargs["synced_records"] == 2
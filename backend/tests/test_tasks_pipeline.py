@@ -0,0 +1,156 @@
+"""Tests for the streaming batch sync pipeline."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+from celery import chord
+from celery.canvas import Signature, _chain
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import SyncStatus, SyncTask, User
+from app.services.sync_task_service import SyncTaskService
+from app.tasks.pipeline import start_pipeline_batch
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add(
+        User(id=1, username="alice", email="alice@example.com", password_hash="x")
+    )
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def make_parent(db, full_analysis=False):
+    return SyncTaskService(db).create(
+        1, "leetcode_batch_sync", 0, pipeline=True, full_analysis=full_analysis
+    )
+
+
+def make_config(github=True, gemini=True, notion=True):
+    return SimpleNamespace(
+        github_config=object() if github else None,
+        gemini_config=object() if gemini else None,
+        notion_config=object() if notion else None,
+    )
+
+
+class TestStartPipelineBatch:
+    """Test cases for dispatching one ingested page downstream."""
+
+    def test_page_flows_through_every_configured_stage(self, db):
+        """Details come first, then GitHub alongside Gemini followed by Notion."""
+        parent = make_parent(db, full_analysis=True)
+        with patch.object(_chain, "apply_async", autospec=True) as apply_async:
+            stages = start_pipeline_batch(db, parent, make_config(), [1, 2, 3], [2])
+
+        by_type = {task.type: task for task in stages}
+        assert by_type["leetcode_detail_sync"].record_ids == [2]
+        assert by_type["notion_sync"].record_ids == [1, 2, 3]
+        assert by_type["gemini_sync"].full_analysis is True
+        assert {task.parent_task_id for task in stages} == {parent.id}
+
+        canvas = apply_async.call_args.args[0]
+        detail, downstream = canvas.tasks
+        assert detail.args == (by_type["leetcode_detail_sync"].id,)
+        assert detail.options["queue"] == "leetcode_sync_queue"
+        # A group followed by a task is folded into a chord by Celery
+        assert isinstance(downstream, chord)
+        reviews = downstream.body
+        github, analysis = downstream.tasks
+        assert github.args == (by_type["github_sync"].id,)
+        assert [sig.args for sig in analysis.tasks] == [
+            (by_type["gemini_sync"].id,),
+            (by_type["notion_sync"].id,),
+        ]
+        assert reviews.name.endswith("generate_review_candidates_task")
+        assert reviews.args == (parent.id, [1, 2, 3])
+
+    @patch("app.tasks.pipeline.settings.REVIEW_CANDIDATES_AFTER_SYNC", False)
+    def test_unconfigured_stages_are_left_out(self, db):
+        """With only Gemini set up and all details fetched, one task is sent."""
+        parent = make_parent(db)
+        config = make_config(github=False, notion=False)
+        with patch.object(Signature, "apply_async", autospec=True) as apply_async:
+            stages = start_pipeline_batch(db, parent, config, [1, 2], [])
+
+        assert [task.type for task in stages] == ["gemini_sync"]
+        signature = apply_async.call_args.args[0]
+        assert signature.args == (stages[0].id,)
+        assert signature.options["queue"] == "gemini_sync_queue"
+
+    def test_page_without_stages_still_gets_reviews(self, db):
+        """No export configured and nothing to fetch: only review generation."""
+        parent = make_parent(db)
+        config = make_config(github=False, gemini=False, notion=False)
+        with patch.object(Signature, "apply_async", autospec=True) as apply_async:
+            assert start_pipeline_batch(db, parent, config, [1], []) == []
+
+        signature = apply_async.call_args.args[0]
+        assert signature.args == (parent.id, [1])
+        assert db.query(SyncTask).count() == 1
+
+    @patch("app.tasks.pipeline.settings.REVIEW_CANDIDATES_AFTER_SYNC", False)
+    def test_nothing_to_do_dispatches_nothing(self, db):
+        """With review generation off as well, no messages are sent."""
+        parent = make_parent(db)
+        config = make_config(github=False, gemini=False, notion=False)
+        with patch.object(Signature, "apply_async") as apply_async:
+            assert start_pipeline_batch(db, parent, config, [1], []) == []
+
+        apply_async.assert_not_called()
+        assert db.query(SyncTask).count() == 1
+
+
+class TestPipelineProgress:
+    """Test cases for per-stage progress of a pipelined batch sync."""
+
+    def test_stage_tasks_are_aggregated_in_pipeline_order(self, db):
+        """Counts and record totals are summed per stage."""
+        service = SyncTaskService(db)
+        parent = make_parent(db)
+        for task_type, status, synced, failed in [
+            ("notion_sync", SyncStatus.PENDING.value, 0, 0),
+            ("gemini_sync", SyncStatus.COMPLETED.value, 20, 0),
+            ("gemini_sync", SyncStatus.FAILED.value, 15, 5),
+            ("gemini_sync", SyncStatus.RUNNING.value, 3, 0),
+        ]:
+            service.create(
+                1,
+                task_type,
+                20,
+                status=status,
+                synced_records=synced,
+                failed_records=failed,
+                parent_task_id=parent.id,
+            )
+        service.create(1, "gemini_sync", 20)
+
+        progress = service.pipeline_progress(parent.id)
+
+        assert [stage["type"] for stage in progress] == ["gemini_sync", "notion_sync"]
+        assert progress[0] == {
+            "type": "gemini_sync",
+            "tasks": 3,
+            "pending": 0,
+            "running": 1,
+            "completed": 1,
+            "failed": 1,
+            "total_records": 60,
+            "synced_records": 38,
+            "failed_records": 5,
+        }
+        assert progress[1]["pending"] == 1
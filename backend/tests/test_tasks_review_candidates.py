@@ -0,0 +1,147 @@
+"""Tests for post-sync review generation."""
+
+from unittest.mock import Mock, patch
+
+import pytest
+from celery.canvas import _chain
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import Base
+from app.models import Problem, Record, Review, SyncStatus, User
+from app.services.review_service import ReviewService
+from app.services.sync_task_service import SyncTaskService
+from app.tasks.review_candidates import generate_review_candidates_task
+from app.tasks.task_manager import TaskManager
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add_all(
+        [
+            User(id=1, username="alice", email="alice@example.com", password_hash="x"),
+            Problem(id=10, title="Two Sum"),
+            Problem(id=11, title="Add Two Numbers"),
+            Problem(id=12, title="Median of Two Sorted Arrays"),
+        ]
+    )
+    results = [
+        (1, 10, "Accepted"),
+        (2, 11, "Wrong Answer"),
+        (3, 11, "Time Limit Exceeded"),
+        (4, 12, "Runtime Error"),
+        (5, None, "Wrong Answer"),
+    ]
+    session.add_all(
+        [
+            Record(
+                id=record_id,
+                user_id=1,
+                problem_id=problem_id,
+                execution_result=result,
+                submission_id=record_id,
+            )
+            for record_id, problem_id, result in results
+        ]
+    )
+    session.add(Review(user_id=1, problem_id=12, wrong_reason="known"))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def run_task(db, *args):
+    db.close = Mock()
+    with patch("app.tasks.review_candidates.get_db", return_value=iter([db])):
+        return generate_review_candidates_task(*args)
+
+
+class TestReviewCandidates:
+    """Test cases for the set-based candidate query."""
+
+    @patch("app.services.review_service.settings.REVIEW_CANDIDATE_CHUNK_SIZE", 2)
+    def test_candidates_join_problem_and_review(self, db):
+        """Accepted records are skipped; existing reviews are reported."""
+        candidates = ReviewService(db).review_candidates(1, [1, 2, 3, 4, 5, 99])
+
+        assert [(c["record_id"], c["title"], c["review_id"]) for c in candidates] == [
+            (2, "Add Two Numbers", None),
+            (3, "Add Two Numbers", None),
+            (4, "Median of Two Sorted Arrays", 1),
+            (5, "Unknown", None),
+        ]
+
+    def test_reviews_are_created_once_per_problem(self, db):
+        """Two failures of one problem make one review; existing ones stay."""
+        service = ReviewService(db)
+
+        assert service.create_reviews_for_records(1, [1, 2, 3, 4, 5]) == 1
+        assert service.create_reviews_for_records(1, [1, 2, 3, 4, 5]) == 0
+        assert sorted(r.problem_id for r in db.query(Review).all()) == [11, 12]
+
+    def test_analyzed_records_get_their_analysis_as_reason(self, db):
+        """The analysis dict is stored as text, unanalyzed ones get a default."""
+        db.get(Record, 2).ai_analysis = {"summary": "off by one"}
+        db.commit()
+
+        assert ReviewService(db).create_reviews_for_records(1, [2, 4, 5]) == 1
+
+        review = db.query(Review).filter(Review.problem_id == 11).one()
+        assert review.wrong_reason == str({"summary": "off by one"})
+
+
+class TestGenerateReviewCandidatesTask:
+    """Test cases for the post-sync step."""
+
+    def test_completed_task_gets_reviews(self, db):
+        task = SyncTaskService(db, event_service=Mock()).create(
+            1, "github_sync", 2, record_ids=[1, 2], status=SyncStatus.COMPLETED.value
+        )
+
+        assert run_task(db, task.id) == 1
+
+    def test_unfinished_task_is_skipped(self, db):
+        task = SyncTaskService(db, event_service=Mock()).create(
+            1, "github_sync", 2, record_ids=[1, 2], status=SyncStatus.FAILED.value
+        )
+
+        assert run_task(db, task.id) == 0
+        assert db.query(Review).count() == 1
+
+    def test_pipeline_page_uses_the_given_records(self, db):
+        """The running batch task reviews the records of one page."""
+        parent = SyncTaskService(db, event_service=Mock()).create(
+            1, "leetcode_batch_sync", 0, status=SyncStatus.RUNNING.value
+        )
+
+        assert run_task(db, parent.id, [3]) == 1
+
+
+class TestTaskManagerSignature:
+    """Test cases for chaining review generation after a sync."""
+
+    def test_tasks_with_records_are_followed_by_reviews(self):
+        task = Mock(id=3, type="github_sync", record_ids=[1], parent_task_id=None)
+
+        signature = TaskManager().signature(task)
+
+        assert isinstance(signature, _chain)
+        sync, reviews = signature.tasks
+        assert sync.args == reviews.args == (3,)
+        assert reviews.options["queue"] == "git_sync_queue"
+
+    def test_batch_syncs_and_pipeline_stages_are_not(self):
+        batch = Mock(id=1, type="leetcode_batch_sync", record_ids=None)
+        stage = Mock(id=2, type="github_sync", record_ids=[1], parent_task_id=1)
+
+        assert not isinstance(TaskManager().signature(batch), _chain)
+        assert not isinstance(TaskManager().signature(stage), _chain)
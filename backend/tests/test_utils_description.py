@@ -0,0 +1,47 @@
+"""Tests for problem description markdown rendering."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.utils.description import (
+    apply_description,
+    description_hash,
+    problem_markdown,
+    render_description_markdown,
+)
+
+
+def make_problem(description):
+    return SimpleNamespace(
+        description=description, description_markdown=None, description_hash=None
+    )
+
+
+class TestDescriptionMarkdown:
+    """Test cases for stored markdown descriptions."""
+
+    def test_render_collapses_blank_lines(self):
+        """HTML converts to markdown without runs of blank lines."""
+        markdown = render_description_markdown("<p>Two</p><br><br><br><p>Sum</p>")
+        assert "\n\n\n" not in markdown
+        assert markdown.startswith("Two")
+        assert render_description_markdown(None) == ""
+
+    def test_markdown_is_rendered_once(self):
+        """A stored, up to date markdown is reused without converting again."""
+        problem = make_problem("<p>Find <strong>two</strong> numbers</p>")
+        assert problem_markdown(problem) == "Find **two** numbers"
+        assert problem.description_hash == description_hash(problem.description)
+
+        with patch("app.utils.description.md") as md:
+            assert problem_markdown(problem) == "Find **two** numbers"
+        md.assert_not_called()
+
+    def test_changed_description_is_rendered_again(self):
+        """Editing the description makes the stored markdown stale."""
+        problem = make_problem("<p>Old</p>")
+        apply_description(problem)
+        problem.description = "<p>New</p>"
+
+        assert apply_description(problem) is True
+        assert problem.description_markdown == "New"
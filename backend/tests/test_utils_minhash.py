@@ -0,0 +1,86 @@
+"""Tests for MinHash signatures and LSH banding."""
+
+import pytest
+
+from app.utils.minhash import MinHasher, tokenize_code
+
+TWO_SUM = """
+class Solution:
+    def twoSum(self, nums, target):
+        # remember every value we have seen
+        seen = {}
+        for i, num in enumerate(nums):
+            if target - num in seen:
+                return [seen[target - num], i]
+            seen[num] = i
+        return []
+"""
+
+TWO_SUM_RENAMED = """
+class Solution:
+    def twoSum(self, arr, goal):
+        lookup = {}
+        for idx,  value in enumerate(arr):
+            if goal - value in lookup:
+                return [lookup[goal - value], idx]
+            lookup[value] = idx
+        return []
+"""
+
+REVERSE_LIST = """
+class Solution:
+    def reverseList(self, head):
+        prev = None
+        while head:
+            head.next, prev, head = prev, head, head.next
+        return prev
+"""
+
+
+class TestTokenizeCode:
+    """Test cases for tokenize_code."""
+
+    def test_renames_comments_and_whitespace_are_ignored(self):
+        """Renamed, reformatted and commented code tokenizes identically."""
+        assert tokenize_code(TWO_SUM) == tokenize_code(TWO_SUM_RENAMED)
+
+    def test_literals_and_keywords(self):
+        """Literals collapse to placeholders while keywords are kept."""
+        assert tokenize_code('return x + 1 if "a" else 2.5') == [
+            "return",
+            "ID",
+            "+",
+            "NUM",
+            "if",
+            "STR",
+            "else",
+            "NUM",
+        ]
+
+
+class TestMinHasher:
+    """Test cases for MinHasher."""
+
+    def test_signature_is_deterministic(self):
+        """Two hashers with the same seed agree, so stored signatures stay valid."""
+        assert MinHasher().signature(TWO_SUM) == MinHasher().signature(TWO_SUM)
+
+    def test_near_duplicates_are_similar(self):
+        """Renamed code is a near duplicate; unrelated code is not."""
+        hasher = MinHasher()
+        signature = hasher.signature(TWO_SUM)
+        assert hasher.similarity(signature, hasher.signature(TWO_SUM_RENAMED)) == 1.0
+        assert hasher.similarity(signature, hasher.signature(REVERSE_LIST)) < 0.5
+
+    def test_band_hashes_collide_for_near_duplicates(self):
+        """Near duplicates share LSH buckets."""
+        hasher = MinHasher()
+        first = hasher.band_hashes(hasher.signature(TWO_SUM))
+        second = hasher.band_hashes(hasher.signature(TWO_SUM_RENAMED))
+        assert len(first) == hasher.bands
+        assert set(first) & set(second)
+
+    def test_bands_must_divide_permutations(self):
+        """The signature must split evenly into bands."""
+        with pytest.raises(ValueError):
+            MinHasher(num_perm=100, bands=16)
@@ -0,0 +1,47 @@
+"""Tests for prompt compaction helpers."""
+
+from app.utils.prompt_compaction import (
+    TRUNCATION_MARKER,
+    compact_code,
+    description_to_markdown,
+    estimate_tokens,
+    truncate_middle,
+)
+
+
+class TestPromptCompaction:
+    """Test cases for prompt compaction."""
+
+    def test_description_to_markdown(self):
+        """HTML becomes compact markdown without images or blank runs."""
+        html = (
+            "<p>Given&nbsp;<code>nums</code>, return <strong>indices</strong>.</p>"
+            "<p>&nbsp;</p><p>&nbsp;</p><img src='example.png'/>"
+            "<p>1 &lt;= n &lt;= 10<sup>4</sup></p>"
+        )
+
+        markdown = description_to_markdown(html)
+
+        assert markdown == ("Given `nums`, return **indices**.\n\n1 <= n <= 10^4")
+
+    def test_compact_code(self):
+        """Trailing spaces and blank-line runs are dropped."""
+        code = "\r\n\r\ndef f():   \r\n\r\n\r\n\r\n    return 1  \r\n\r\n"
+
+        assert compact_code(code) == "def f():\n\n    return 1"
+
+    def test_truncate_middle_keeps_head_and_tail(self):
+        """Long text is cut to the cap, keeping both ends."""
+        text = "a" * 100 + "b" * 100
+
+        truncated = truncate_middle(text, 60)
+
+        assert len(truncated) == 60
+        assert TRUNCATION_MARKER in truncated
+        assert truncated.startswith("a") and truncated.endswith("b")
+        assert truncate_middle(text, 0) == text
+
+    def test_estimate_tokens(self):
+        """Roughly four characters per token, rounded up."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcde") == 2
@@ -0,0 +1,153 @@
+"""Tests for the local static analyzer."""
+
+from app.schemas.gemini import GeminiAIAnalysisSchema
+from app.utils.static_analyzer import LOCAL_ANALYZER_VERSION, StaticAnalyzer
+
+TWO_SUM = """
+class Solution:
+    def twoSum(self, nums, target):
+        seen = {}
+        for i, num in enumerate(nums):
+            if target - num in seen:
+                return [seen[target - num], i]
+            seen[num] = i
+"""
+
+PAIRS = """
+def count_pairs(nums):
+    count = 0
+    for i in range(len(nums)):
+        for j in range(i):
+            for dx in (1, -1):
+                count += nums[i] * dx > nums[j]
+    return count
+"""
+
+BINARY_SEARCH = """
+def search(nums, target):
+    lo, hi = 0, len(nums) - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        if nums[mid] == target:
+            return mid
+        if nums[mid] < target:
+            lo = mid + 1
+        else:
+            hi = mid - 1
+    return -1
+"""
+
+MERGE = """
+def merge(intervals):
+    if not intervals:
+        return []
+    intervals.sort()
+    merged = [intervals[0]]
+    for start, end in intervals[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+"""
+
+SLIDING_WINDOW = """
+def longest_unique(s):
+    seen = set()
+    best = left = 0
+    for right, ch in enumerate(s):
+        while ch in seen:
+            seen.remove(s[left])
+            left += 1
+        seen.add(ch)
+        best = max(best, right - left + 1)
+    return best
+"""
+
+NEIGHBOURS = """
+def close_pairs(nums):
+    n = len(nums)
+    count = 0
+    for i in range(n):
+        for j in range(i + 1, min(i + 3, n)):
+            count += nums[i] == nums[j]
+    return count
+"""
+
+FIB = """
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+"""
+
+
+class TestStaticAnalyzer:
+    """Test cases for StaticAnalyzer."""
+
+    def analyze(self, code, language="python3"):
+        return StaticAnalyzer().analyze(code, language)
+
+    def test_hash_table_solution(self):
+        """A single pass with a dict is O(n) time and space."""
+        confidence, analysis = self.analyze(TWO_SUM)
+
+        assert confidence >= 0.8
+        assert analysis["time_complexity"] == "O(n)"
+        assert analysis["space_complexity"] == "O(n)"
+        assert analysis["algorithm_type"] == "Hash Table"
+        assert analysis["model_version"] == LOCAL_ANALYZER_VERSION
+        GeminiAIAnalysisSchema(**analysis)
+
+    def test_constant_loops_do_not_count(self):
+        """Nested input loops count, loops over literals do not."""
+        _, analysis = self.analyze(PAIRS)
+
+        assert analysis["time_complexity"] == "O(n^2)"
+        assert analysis["space_complexity"] == "O(1)"
+
+    def test_binary_search_and_sorting(self):
+        """Halving loops are logarithmic and sorting dominates a single pass."""
+        _, search = self.analyze(BINARY_SEARCH)
+        _, merge = self.analyze(MERGE)
+
+        assert search["time_complexity"] == "O(log n)"
+        assert search["algorithm_type"] == "Binary Search"
+        assert merge["time_complexity"] == "O(n log n)"
+        assert merge["edge_cases_covered"] == ["Empty input"]
+
+    def test_low_confidence_escalates(self):
+        """Plain recursion, syntax errors and other languages are uncertain."""
+        recursion_confidence, analysis = self.analyze(FIB)
+        java_confidence, java = self.analyze(
+            "class S { int f(int[] a) { int c = 0; for (int x : a) "
+            "{ for (int y : a) { c += x * y; } } return c; } }",
+            "java",
+        )
+
+        assert recursion_confidence < 0.8
+        assert analysis["risk_areas"]
+        assert self.analyze("def broken(:", "python3") == (0.0, {})
+        assert java_confidence < 0.8
+        assert java["time_complexity"] == "O(n^2)"
+
+    def test_topic_tags_are_left_to_the_problem(self):
+        """Local guesses never backfill topic tags."""
+        _, analysis = self.analyze(TWO_SUM)
+
+        assert analysis["topic_tags"] == []
+
+    def test_amortized_and_bounded_inner_loops_escalate(self):
+        """Inner loops that may not multiply the cost are left to the LLM."""
+        window_confidence, _ = self.analyze(SLIDING_WINDOW)
+        neighbours_confidence, _ = self.analyze(NEIGHBOURS)
+
+        assert window_confidence < 0.8
+        assert neighbours_confidence < 0.8
+
+    def test_nested_loops_escalate(self):
+        """Only flat code is trusted; nested input loops go to the LLM."""
+        confidence, analysis = self.analyze(PAIRS)
+
+        assert confidence < 0.8
+        assert analysis["time_complexity"] == "O(n^2)"
@@ -0,0 +1,90 @@
+"""Tests for the RPM/TPM token bucket limiter."""
+
+from app.utils.token_bucket import TokenBucketLimiter, get_token_bucket
+
+
+class FakeClock:
+    """Manually advanced clock whose sleep moves time forward."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_limiter(rpm=60, tpm=6000, **kwargs):
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rpm, tpm, clock=clock, sleep=clock.sleep, **kwargs)
+    return limiter, clock
+
+
+class TestTokenBucketLimiter:
+    """Test cases for TokenBucketLimiter."""
+
+    def test_requests_per_minute(self):
+        """Bursts up to the RPM budget, then waits for one request's refill."""
+        limiter, clock = make_limiter(rpm=2)
+
+        assert limiter.acquire(1) == 0
+        assert limiter.acquire(1) == 0
+        assert limiter.acquire(1) == 30.0
+        assert clock.now == 30.0
+
+    def test_request_burst_caps_back_to_back_requests(self):
+        """A small burst paces requests at the per-second rate."""
+        limiter, clock = make_limiter(rpm=180, request_burst=3)
+
+        waits = [limiter.acquire(0) for _ in range(5)]
+
+        assert waits[:3] == [0, 0, 0]
+        assert waits[3] == waits[4] == 60 / 180
+
+    def test_tokens_per_minute(self):
+        """Large prompts wait for the token budget even when RPM is free."""
+        limiter, clock = make_limiter(rpm=100, tpm=600)
+
+        limiter.acquire(600)
+        waited = limiter.acquire(300)
+
+        assert waited == 30.0
+
+    def test_oversized_request_is_clamped(self):
+        """A request above the whole TPM budget still runs on a full bucket."""
+        limiter, _ = make_limiter(tpm=100)
+
+        assert limiter.acquire(1000) == 0
+
+    def test_record_usage_settles_estimate(self):
+        """Under-estimated requests debit the difference from the budget."""
+        limiter, _ = make_limiter(rpm=100, tpm=600)
+
+        limiter.acquire(100)
+        limiter.record_usage(100, 700)
+
+        assert limiter.acquire(60) == 16.0
+
+    def test_quota_errors_back_off_adaptively(self):
+        """Consecutive quota errors double the delay until a success resets it."""
+        limiter, clock = make_limiter(backoff_base=1.0, backoff_max=3.0)
+
+        assert limiter.on_quota_error() == 1.0
+        assert limiter.on_quota_error() == 2.0
+        assert limiter.on_quota_error() == 3.0
+        assert limiter.on_quota_error(retry_after=10.0) == 10.0
+        assert limiter.acquire(1) == 10.0
+
+        limiter.on_success()
+        assert limiter.on_quota_error() == 1.0
+
+    def test_get_token_bucket_shared_per_key(self):
+        """Buckets are shared per API key within the process."""
+        first = get_token_bucket("key-a", 10, 1000)
+
+        assert get_token_bucket("key-a", 10, 1000) is first
+        assert get_token_bucket("key-b", 10, 1000) is not first
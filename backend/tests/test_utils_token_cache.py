@@ -0,0 +1,61 @@
+"""Tests for Redis token cache utility."""
+
+import hashlib
+from unittest.mock import Mock, patch
+
+from app.utils.token_cache import RedisTokenCache
+
+
+class TestRedisTokenCache:
+    """Test cases for RedisTokenCache."""
+
+    @patch("app.utils.token_cache._global_redis_client", None)
+    @patch("app.utils.token_cache.get_redis_client")
+    def test_key_hashes_secret(self, mock_get_redis_client):
+        """Keys never contain the raw secret."""
+        mock_get_redis_client.return_value = iter([Mock()])
+
+        cache = RedisTokenCache("leetcode_csrf", 60)
+
+        expected = hashlib.sha256(b"cookie").hexdigest()
+        assert cache._get_key("cookie") == f"leetcode_csrf:{expected}"
+
+    @patch("app.utils.token_cache._global_redis_client", None)
+    @patch("app.utils.token_cache.get_redis_client")
+    def test_set_and_get(self, mock_get_redis_client):
+        """Tokens are written with the TTL and decoded on read."""
+        mock_redis = Mock()
+        mock_redis.get.return_value = b"token"
+        mock_get_redis_client.return_value = iter([mock_redis])
+
+        cache = RedisTokenCache("leetcode_csrf", 60)
+
+        assert cache.set("cookie", "token") is True
+        mock_redis.setex.assert_called_once_with(cache._get_key("cookie"), 60, "token")
+        assert cache.get("cookie") == "token"
+
+    @patch("app.utils.token_cache._global_redis_client", None)
+    @patch("app.utils.token_cache.get_redis_client")
+    def test_get_missing(self, mock_get_redis_client):
+        """A cache miss returns None."""
+        mock_redis = Mock()
+        mock_redis.get.return_value = None
+        mock_get_redis_client.return_value = iter([mock_redis])
+
+        assert RedisTokenCache("p", 60).get("cookie") is None
+
+    @patch("app.utils.token_cache._global_redis_client", None)
+    @patch("app.utils.token_cache.get_redis_client")
+    def test_redis_errors_are_swallowed(self, mock_get_redis_client):
+        """Redis failures degrade to cache misses instead of raising."""
+        mock_redis = Mock()
+        mock_redis.get.side_effect = Exception("Redis error")
+        mock_redis.setex.side_effect = Exception("Redis error")
+        mock_redis.delete.side_effect = Exception("Redis error")
+        mock_get_redis_client.return_value = iter([mock_redis])
+
+        cache = RedisTokenCache("p", 60)
+
+        assert cache.get("cookie") is None
+        assert cache.set("cookie", "token") is False
+        assert cache.delete("cookie") is False
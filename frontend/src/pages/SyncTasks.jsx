@@ -209,6 +209,17 @@ const SyncTasks = () => {
     }
   }, [loadTasks]);
 
+  // Apply progress pushed by the server instead of reloading the list
+  useEffect(() => {
+    return syncTaskService.subscribeToEvents((event) => {
+      setTasks((prev) =>
+        prev.map((task) =>
+          task.id === event.id ? { ...task, ...event } : task,
+        ),
+      );
+    });
+  }, []);
+
   useEffect(() => {
     if (modalVisible) {
       setSelectedTaskType(null);
@@ -110,6 +110,8 @@ export const API_ENDPOINTS = {
     RETRY: (taskId) => `/api/sync_task/${taskId}/retry`,
     PAUSE: (taskId) => `/api/sync_task/${taskId}/pause`,
     RESUME: (taskId) => `/api/sync_task/${taskId}/resume`,
+    EVENTS: '/api/sync_task/events',
+    TASK_EVENTS: (taskId) => `/api/sync_task/${taskId}/events`,
   },
 
   // LeetCode Integration
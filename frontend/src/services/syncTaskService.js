@@ -156,6 +156,23 @@ class SyncTaskService {
     return statusMap[status] || status;
   }
 
+  /**
+   * Subscribe to task progress pushed by the server (Server-Sent Events)
+   * @param {function} onProgress - Called with each task progress update
+   * @param {number} [taskId] - Only follow this task; all of the user's tasks otherwise
+   * @returns {function} Unsubscribe function
+   */
+  subscribeToEvents(onProgress, taskId = null) {
+    const path = taskId
+      ? API_ENDPOINTS.SYNC_TASK.TASK_EVENTS(taskId)
+      : API_ENDPOINTS.SYNC_TASK.EVENTS;
+    const source = new EventSource(`${api.defaults.baseURL}${path}`);
+    source.addEventListener('progress', (event) => {
+      onProgress(JSON.parse(event.data));
+    });
+    return () => source.close();
+  }
+
   /**
    * Get task status color
    * @param {string} status - Task status